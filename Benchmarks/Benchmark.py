@@ -0,0 +1,357 @@
+# Benchmark suite of the parsing and post-processing hot paths of the workflow, on synthetic data
+# Stages:
+#   parseForceData = ImportExportUtilities.parseForceData on a file3.nlh tracker file of N samples
+#   readRcforc = ForceOutput.readRcforc on an rcforc file of N output times of two contact interfaces
+#   readBinout = ForceOutput.readBinout on a binout file of N output times of two contact interfaces
+#   importConfig = ImportExportUtilities.importConfig on a Config.csv file of N rows
+#   compressionLookup = CompressionCurve index build and loading duration lookup on a compression test of N samples
+#   postProcessingCold = PostProcessing.run on N Sliding Test runs with an empty summary cache
+#   postProcessingWarm = PostProcessing.run on N Sliding Test runs with a filled summary cache
+#   keyword = KeywordBenchmark friction table steps on N curves
+#   mechanicalSetup = SetupBenchmark Sliding Test model setup on a recording fake ExtAPI with N Named Selections
+#   deckGeneration = DeckGenerator base deck scan and Sliding Test deck writing on a base deck of N nodes
+#   heightMapRoughness = Topography.measureHeightMap on an N x N .npy height map
+#   pronyReduction = Prony.reduceSeries on a Prony series of N terms over the default Sliding Test time window
+#   resultsDatabaseQuery = ResultsDatabase COF interpolation over one geometry and speed of a database of N campaign records
+#   numericWorker = ImportExportUtilities.parseForceData on a file3.nlh tracker file of N samples, run by a numeric worker of this interpreter
+# Each stage is timed, then run again under tracemalloc for its peak traced memory when tracemalloc is available
+# The mechanical setup stage also reports its ExtAPI round trips, which are deterministic, so any increase is a regression
+# Results are compared against a stored baseline; stages slower than the baseline by more than the tolerance are reported as regressions
+# Usage: python Benchmarks/Benchmark.py [--profile quick|full] [--stages name,...] [--repeat N] [--tolerance F] [--no-memory]
+#                                       [--baseline path] [--save-baseline] [--output path]
+# The exit code is 1 when a regression is found
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import tempfile
+import argparse
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+# Add Scripts directory to local import path
+benchmarkFolderPath = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(benchmarkFolderPath, "..", "Scripts"))
+
+import ImportExportUtilities
+import PostProcessing
+import CompressionCurve
+import SyntheticData
+import KeywordBenchmark
+import SetupBenchmark
+import DeckGenerator
+import ForceOutput
+import Topography
+import Prony
+import NumericWorker
+
+BASELINE_PATH = os.path.join(benchmarkFolderPath, "Baseline.json")
+
+# Sizes of each stage, by profile
+PROFILES = {
+    "quick": {
+        "parseForceData": [1000, 10000, 100000],
+        "readRcforc": [1000, 10000, 100000],
+        "readBinout": [1000, 10000, 100000],
+        "importConfig": [10, 1000, 100000],
+        "compressionLookup": [1000, 10000, 100000],
+        "postProcessingCold": [1, 10, 100],
+        "postProcessingWarm": [1, 10, 100],
+        "keyword": [100, 1000, 10000],
+        "mechanicalSetup": [7, 100, 1000],
+        "deckGeneration": [1000, 10000, 100000],
+        "heightMapRoughness": [100, 300, 1000],
+        "pronyReduction": [5, 15, 30],
+        "resultsDatabaseQuery": [10, 100, 1000],
+        "numericWorker": [1000, 10000, 100000]},
+    "full": {
+        "parseForceData": [1000, 10000, 100000, 1000000, 10000000],
+        "readRcforc": [1000, 10000, 100000, 1000000],
+        "readBinout": [1000, 10000, 100000, 1000000],
+        "importConfig": [10, 1000, 100000, 1000000],
+        "compressionLookup": [1000, 10000, 100000, 1000000, 10000000],
+        "postProcessingCold": [1, 10, 100, 1000],
+        "postProcessingWarm": [1, 10, 100, 1000],
+        "keyword": [100, 1000, 10000, 100000],
+        "mechanicalSetup": [7, 100, 1000, 10000],
+        "deckGeneration": [1000, 10000, 100000, 1000000],
+        "heightMapRoughness": [100, 300, 1000, 3000],
+        "pronyReduction": [5, 15, 30, 60],
+        "resultsDatabaseQuery": [10, 100, 1000, 10000],
+        "numericWorker": [1000, 10000, 100000, 1000000, 10000000]}}
+
+# Number of samples of each Sliding Test run in the post-processing stages
+SAMPLES_PER_RUN = 10000
+
+# Number of target normal forces looked up in the compression lookup stage
+NUM_TARGETS = 1000
+
+clock = getattr(time, "perf_counter", time.time)
+
+# Each stage is a pair of functions: setup(directory, size) creates the synthetic input and returns the argument of run(argument)
+# run may return a dictionary of additional metrics of the stage
+
+def setupParseForceData(directory, size):
+    path = os.path.join(directory, "file3.nlh")
+    SyntheticData.writeTrackerFile(path, size)
+    return path
+
+def runParseForceData(path):
+    ImportExportUtilities.parseForceData(path)
+
+def setupReadRcforc(directory, size):
+    path = os.path.join(directory, "rcforc")
+    SyntheticData.writeRcforcFile(path, size, 2)
+    return path
+
+def runReadRcforc(path):
+    ForceOutput.readRcforc(path)
+
+def setupReadBinout(directory, size):
+    path = os.path.join(directory, "binout")
+    SyntheticData.writeBinoutFile(path, size, 2)
+    return path
+
+def runReadBinout(path):
+    ForceOutput.readBinout([path])
+
+def setupImportConfig(directory, size):
+    path = os.path.join(directory, "Config.csv")
+    SyntheticData.writeConfigFile(path, size)
+    return path
+
+def runImportConfig(path):
+    ImportExportUtilities.importConfig(path)
+
+def setupCompressionLookup(directory, size):
+    sampleTime, normal, shear = SyntheticData.forceHistory(size, peakNormal=500.0)
+    targets = [500.0 * (0.05 + 0.9 * i / NUM_TARGETS) for i in range(NUM_TARGETS)]
+    return (sampleTime, normal, targets)
+
+def runCompressionLookup(argument):
+    sampleTime, normal, targets = argument
+    CompressionCurve.loadingDurations(CompressionCurve.buildIndex(sampleTime, normal), targets)
+
+def setupPostProcessing(directory, size):
+    SyntheticData.writeForceSet(directory, size, SAMPLES_PER_RUN)
+    return directory
+
+def setupPostProcessingCold(directory, size):
+    return setupPostProcessing(directory, size)
+
+def runPostProcessingCold(directory):
+    cachePath = os.path.join(directory, "Results", PostProcessing.SUMMARY_CACHE_NAME)
+    if os.path.exists(cachePath):
+        os.remove(cachePath)
+    PostProcessing.run(directory)
+
+def setupPostProcessingWarm(directory, size):
+    setupPostProcessing(directory, size)
+    PostProcessing.run(directory)
+    return directory
+
+def runPostProcessingWarm(directory):
+    PostProcessing.run(directory)
+
+def setupKeyword(directory, size):
+    return size
+
+def runKeyword(size):
+    KeywordBenchmark.measure(size)
+
+def setupMechanicalSetup(directory, size):
+    return size
+
+def runMechanicalSetup(size):
+    roundTrips, elapsed, steps = SetupBenchmark.measure(size)
+    return {"roundTrips": roundTrips}
+
+def setupDeckGeneration(directory, size):
+    SyntheticData.writeBaseDeck(directory, size)
+    return directory
+
+def runDeckGeneration(directory):
+    DeckGenerator.saveBase(directory)
+    loads = {"targetPressure": 1e6, "displacementDuration": 2e-4, "displacementDistance": 1e-4, "analysisDuration": 4e-4, "movementSpeed": 0.5}
+    DeckGenerator.writeSlidingDeck(directory, os.path.join(directory, "Sliding.k"), loads)
+
+def setupHeightMapRoughness(directory, size):
+    path = os.path.join(directory, "HeightMap.npy")
+    SyntheticData.writeHeightMap(path, size)
+    return path
+
+def runHeightMapRoughness(path):
+    Topography.measureHeightMap(path, 1e-6)
+
+def setupPronyReduction(directory, size):
+    return SyntheticData.pronySeries(size)
+
+def runPronyReduction(series):
+    Prony.reduceSeries(series[0], series[1], (1e-6, 0.0119), Prony.DEFAULT_TOLERANCE)
+
+def setupResultsDatabaseQuery(directory, size):
+    return SyntheticData.writeResultsDatabase(os.path.join(directory, "Database"), size)
+
+def runResultsDatabaseQuery(database):
+    database.interpolateCof(5e5, geometry="{:040x}".format(1), speed=1.0)
+
+# The worker is started by a first job here, so the stage times the jobs and not the interpreter start
+def setupNumericWorker(directory, size):
+    path = setupParseForceData(directory, size)
+    worker = NumericWorker.openWorker({"NumericWorkerCommand": '"{}"'.format(sys.executable)})
+    NumericWorker.run(worker, ImportExportUtilities.parseForceData, path, 0.0, 0.0)
+    return worker, path
+
+def runNumericWorker(argument):
+    worker, path = argument
+    NumericWorker.run(worker, ImportExportUtilities.parseForceData, path)
+
+STAGES = [
+    ("parseForceData", setupParseForceData, runParseForceData, "samples"),
+    ("readRcforc", setupReadRcforc, runReadRcforc, "samples"),
+    ("readBinout", setupReadBinout, runReadBinout, "samples"),
+    ("importConfig", setupImportConfig, runImportConfig, "rows"),
+    ("compressionLookup", setupCompressionLookup, runCompressionLookup, "samples"),
+    ("postProcessingCold", setupPostProcessingCold, runPostProcessingCold, "runs"),
+    ("postProcessingWarm", setupPostProcessingWarm, runPostProcessingWarm, "runs"),
+    ("keyword", setupKeyword, runKeyword, "curves"),
+    ("mechanicalSetup", setupMechanicalSetup, runMechanicalSetup, "selections"),
+    ("deckGeneration", setupDeckGeneration, runDeckGeneration, "nodes"),
+    ("heightMapRoughness", setupHeightMapRoughness, runHeightMapRoughness, "points per side"),
+    ("pronyReduction", setupPronyReduction, runPronyReduction, "terms"),
+    ("resultsDatabaseQuery", setupResultsDatabaseQuery, runResultsDatabaseQuery, "records"),
+    ("numericWorker", setupNumericWorker, runNumericWorker, "samples")]
+
+# Returns the best wall-clock time in seconds of a number of calls of a function, and the result of the last call
+def bestTime(function, argument, repeat):
+    times = []
+    for i in range(repeat):
+        start = clock()
+        result = function(argument)
+        times.append(clock() - start)
+    return min(times), result
+
+# Returns the peak memory in MB traced by tracemalloc during a call of a function, or None if tracemalloc is not available
+def peakMemory(function, argument):
+    if tracemalloc is None:
+        return None
+    tracemalloc.start()
+    try:
+        function(argument)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return peak / 1e6
+
+# Run the benchmark stages
+# Returns a dictionary of results by "stage/size" key, each holding the stage, size, time in s and peak memory in MB
+# profile = profile name in PROFILES
+# stageNames = names of the stages to run
+# repeat = number of timed calls of each stage, the best time is kept
+# memory = True to measure the peak memory of each stage
+def runStages(profile, stageNames, repeat=3, memory=True):
+    results = {}
+    for name, setup, run, unit in STAGES:
+        if name not in stageNames:
+            continue
+        for size in PROFILES[profile][name]:
+            directory = tempfile.mkdtemp(prefix="Benchmark")
+            try:
+                argument = setup(directory, size)
+                elapsed, metrics = bestTime(run, argument, repeat)
+                peak = peakMemory(run, argument) if memory else None
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+
+            result = {"stage": name, "size": size, "time": elapsed, "memory": peak}
+            result.update(metrics or {})
+            results["{}/{}".format(name, size)] = result
+            print("{:<20} {:>10} {:<10} | {:9.4f} s | {}{}".format(name, size, unit, elapsed,
+                "{:9.2f} MB".format(peak) if peak is not None else "        - MB",
+                "".join(" | {} {}".format(key, value) for key, value in sorted((metrics or {}).items()))))
+            sys.stdout.flush()
+    return results
+
+# Returns the list of regressions of the results against a baseline, as strings
+# Only stages taking more than minimumTime seconds in the baseline are compared, faster ones are dominated by noise
+# results = results returned by runStages
+# baseline = baseline results
+# tolerance = allowed relative slowdown, e.g. 0.25 for 25 %
+def findRegressions(results, baseline, tolerance, minimumTime=0.01):
+    regressions = []
+    for key in sorted(results):
+        if key not in baseline:
+            continue
+        reference = baseline[key]
+        if reference["time"] > minimumTime and results[key]["time"] > reference["time"] * (1.0 + tolerance):
+            regressions.append("{}: {:.4f} s vs baseline {:.4f} s".format(key, results[key]["time"], reference["time"]))
+        if reference.get("memory") and results[key]["memory"] and results[key]["memory"] > reference["memory"] * (1.0 + tolerance):
+            regressions.append("{}: {:.2f} MB vs baseline {:.2f} MB".format(key, results[key]["memory"], reference["memory"]))
+        if "roundTrips" in reference and results[key].get("roundTrips", 0) > reference["roundTrips"]:
+            regressions.append("{}: {} ExtAPI round trips vs baseline {}".format(key, results[key]["roundTrips"], reference["roundTrips"]))
+    return regressions
+
+# Returns a description of the machine the benchmarks ran on, stored with the baseline
+def environment():
+    return {"python": platform.python_version(), "implementation": platform.python_implementation(),
+        "platform": platform.platform(), "machine": platform.machine()}
+
+def main(arguments):
+    parser = argparse.ArgumentParser(description="Benchmark the workflow's parsing and post-processing on synthetic data")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="quick")
+    parser.add_argument("--stages", default=",".join(stage[0] for stage in STAGES), help="comma separated stage names")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--no-memory", dest="memory", action="store_false")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--output", help="path to write the results to as JSON")
+    options = parser.parse_args(arguments)
+
+    stageNames = options.stages.split(",")
+    unknown = [name for name in stageNames if name not in [stage[0] for stage in STAGES]]
+    if unknown:
+        parser.error("unknown stages: {}".format(", ".join(unknown)))
+
+    results = runStages(options.profile, stageNames, options.repeat, options.memory)
+    report = {"profile": options.profile, "environment": environment(), "results": results}
+
+    if options.output:
+        with open(options.output, 'w') as fileObj:
+            json.dump(report, fileObj, indent=1, sort_keys=True)
+
+    if options.save_baseline:
+        baseline = {"environment": environment(), "results": {}}
+        if os.path.exists(options.baseline):
+            with open(options.baseline, 'r') as fileObj:
+                baseline = json.load(fileObj)
+        baseline["environment"] = environment()
+        baseline["results"].update(results)
+        with open(options.baseline, 'w') as fileObj:
+            json.dump(baseline, fileObj, indent=1, sort_keys=True)
+        print("Baseline saved to {}".format(options.baseline))
+        return 0
+
+    if not os.path.exists(options.baseline):
+        print("No baseline at {}, run with --save-baseline to create one".format(options.baseline))
+        return 0
+
+    with open(options.baseline, 'r') as fileObj:
+        baseline = json.load(fileObj)
+    regressions = findRegressions(results, baseline["results"], options.tolerance)
+    if not baseline["environment"] == environment():
+        print("Baseline was recorded on a different environment: {}".format(baseline["environment"]))
+    for regression in regressions:
+        print("REGRESSION {}".format(regression))
+    if not regressions:
+        print("No regressions against {}".format(options.baseline))
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,140 @@
+# Recording stand-in for the Mechanical ExtAPI, so the ls_dyna setup functions run without Ansys
+# Every member read, property write and method call on a fake object is counted as one round trip across the .NET boundary
+# Members that the workflow does not configure are created on first access as fake objects, which can also be called, so any chain of calls succeeds
+# installModules registers stand-ins for the Ansys modules imported by ls_dyna; it must be called before ls_dyna is imported
+
+import sys
+import types
+
+# Named Selections of the workflow geometry
+WORKFLOW_NAMED_SELECTIONS = ["Floor", "Shoe", "Floor_Contact", "Shoe_Contact", "Shoe_Top", "Floor_Side", "Shoe_Side"]
+
+# Counts the round trips made on fake objects
+class Recorder(object):
+    def __init__(self):
+        self.counts = {}
+
+    # Count a round trip
+    # kind = "get", "set" or "call"
+    # path = path of the accessed member, e.g. "DataModel.Project.Model"
+    def record(self, kind, path):
+        key = (kind, path)
+        self.counts[key] = self.counts.get(key, 0) + 1
+
+    # Returns the total number of round trips, optionally of one kind only
+    def total(self, kind=None):
+        return sum(count for key, count in self.counts.items() if kind is None or key[0] == kind)
+
+    # Returns the round trip counts by kind
+    def totals(self):
+        return dict((kind, self.total(kind)) for kind in ["get", "set", "call"])
+
+    def reset(self):
+        self.counts = {}
+
+# A method of a fake object, recorded when called
+# recorder = Recorder reference
+# path = path of the method
+# function = optional function called with the method's arguments, a new fake object is returned otherwise
+class FakeMethod(object):
+    def __init__(self, recorder, path, function=None):
+        self.recorder = recorder
+        self.path = path
+        self.function = function
+
+    def __call__(self, *args, **kwargs):
+        self.recorder.record("call", self.path)
+        if self.function is not None:
+            return self.function(*args, **kwargs)
+        return FakeObject(self.recorder, self.path + "()")
+
+# A fake .NET object
+# recorder = Recorder reference
+# path = path of the object, used as the prefix of its recorded members
+# attributes = initial members of the object
+class FakeObject(object):
+    def __init__(self, recorder, path, **attributes):
+        object.__setattr__(self, "_recorder", recorder)
+        object.__setattr__(self, "_path", path)
+        object.__setattr__(self, "_attributes", attributes)
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        path = "{}.{}".format(self._path, name)
+        self._recorder.record("get", path)
+        if name not in self._attributes:
+            self._attributes[name] = FakeObject(self._recorder, path)
+        return self._attributes[name]
+
+    def __call__(self, *args, **kwargs):
+        self._recorder.record("call", self._path)
+        return FakeObject(self._recorder, self._path + "()")
+
+    def __setattr__(self, name, value):
+        self._recorder.record("set", "{}.{}".format(self._path, name))
+        self._attributes[name] = value
+
+    def __getitem__(self, key):
+        path = "{}[{}]".format(self._path, key)
+        self._recorder.record("get", path)
+        items = self._attributes.setdefault("__items__", {})
+        if key not in items:
+            items[key] = FakeObject(self._recorder, path)
+        return items[key]
+
+    def __setitem__(self, key, value):
+        self._recorder.record("set", "{}[{}]".format(self._path, key))
+        self._attributes.setdefault("__items__", {})[key] = value
+
+# Returns a fake ExtAPI holding a model with the workflow's Named Selections
+# recorder = Recorder reference
+# numNamedSelections = total number of Named Selections in the model, padded with unrelated ones placed before the workflow's
+# workingDirectory = WorkingDir of the analysis
+# systemCaption = SystemCaption of the analysis
+def createExtAPI(recorder, numNamedSelections=len(WORKFLOW_NAMED_SELECTIONS), workingDirectory="", systemCaption="Sliding Test"):
+    names = ["Selection_{}".format(i) for i in range(max(0, numNamedSelections - len(WORKFLOW_NAMED_SELECTIONS)))] + WORKFLOW_NAMED_SELECTIONS
+    namedSelections = []
+    for i, name in enumerate(names):
+        path = "NamedSelection[{}]".format(name)
+        location = FakeObject(recorder, path + ".Location", Ids=[i + 1])
+        namedSelections.append(FakeObject(recorder, path, Name=name, Location=location))
+
+    geometry = FakeObject(recorder, "Model.Geometry")
+    geometry._attributes["GetBody"] = FakeMethod(recorder, "Model.Geometry.GetBody", lambda entity: FakeObject(recorder, "Body"))
+    model = FakeObject(recorder, "Model", NamedSelections=FakeObject(recorder, "Model.NamedSelections", Children=namedSelections), Geometry=geometry)
+
+    treeObjects = {}
+    def getObjectsByName(name):
+        if name not in treeObjects:
+            treeObjects[name] = FakeObject(recorder, "Object[{}]".format(name))
+        return [treeObjects[name]]
+
+    geoData = FakeObject(recorder, "DataModel.GeoData")
+    geoData._attributes["GeoEntityById"] = FakeMethod(recorder, "DataModel.GeoData.GeoEntityById", lambda entityId: FakeObject(recorder, "GeoEntity"))
+    analysis = FakeObject(recorder, "Analysis", WorkingDir=workingDirectory, SystemCaption=systemCaption)
+    dataModel = FakeObject(recorder, "DataModel", Project=FakeObject(recorder, "Project", Model=model), AnalysisList=[analysis], GeoData=geoData)
+    dataModel._attributes["GetObjectsByName"] = FakeMethod(recorder, "DataModel.GetObjectsByName", getObjectsByName)
+
+    return FakeObject(recorder, "ExtAPI", DataModel=dataModel, SelectionManager=FakeObject(recorder, "SelectionManager"))
+
+# Register stand-ins for the Ansys modules imported by ls_dyna
+# recorder = Recorder reference the enumerations and Quantity constructor record to
+def installModules(recorder):
+    members = {
+        "Ansys.Mechanical.DataModel.Enums.StiffnessBehavior": FakeObject(recorder, "StiffnessBehavior"),
+        "Ansys.Core.Units.Quantity": FakeMethod(recorder, "Quantity"),
+        "Ansys.ACT.Mechanical.Fields.VariableDefinitionType": FakeObject(recorder, "VariableDefinitionType"),
+        "Ansys.Mechanical.DataModel.Enums.NormalOrientationType": FakeObject(recorder, "NormalOrientationType"),
+        "Ansys.ACT.Interfaces.Common.SelectionTypeEnum": FakeObject(recorder, "SelectionTypeEnum")}
+
+    for fullName, member in members.items():
+        parts = fullName.split(".")
+        for i in range(1, len(parts)):
+            moduleName = ".".join(parts[:i])
+            if moduleName not in sys.modules:
+                sys.modules[moduleName] = types.ModuleType(moduleName)
+                if i > 1:
+                    setattr(sys.modules[".".join(parts[:i - 1])], parts[i - 1], sys.modules[moduleName])
+        setattr(sys.modules[".".join(parts[:-1])], parts[-1], member)
+        sys.modules[fullName] = member
@@ -0,0 +1,57 @@
+# Benchmark of building, writing, parsing and merging large pressure-dependent friction tables
+# Compares the Keyword module against the string concatenation previously used by PostProcessing.run
+# CPython optimizes in-place string concatenation; under IronPython, where strings are immutable .NET strings, it is quadratic
+# Usage: python Benchmarks/KeywordBenchmark.py [number of curves ...]
+
+import os
+import sys
+import time
+import random
+
+# Add Scripts directory to local import path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Scripts"))
+
+import Keyword
+
+# Returns the friction snippet built with repeated string concatenation, as PostProcessing.run used to
+def legacySnippet(points, tableNum=1, curveStartNum=100):
+    keywordSnippet = "*DEFINE_TABLE\n{}\n$ Pressure value vs Curve ID\n".format(tableNum)
+    for i, point in enumerate(points):
+        keywordSnippet += "{},{}\n".format(point[0], curveStartNum + i)
+    for i, point in enumerate(points):
+        keywordSnippet += "*DEFINE_CURVE\n{}\n$ Relative velocity vs COF\n0,{}\n100,{}\n".format(curveStartNum + i, point[1], point[1])
+    return keywordSnippet
+
+# Returns the wall-clock time of a function call in seconds and the call's result
+def timed(function, *args):
+    start = time.time()
+    result = function(*args)
+    return time.time() - start, result
+
+# Returns the times in seconds of each step on a friction table of the given number of curves
+def measure(numCurves):
+    random.seed(numCurves)
+    points = sorted((random.uniform(1e4, 1e7), random.uniform(0.01, 0.5)) for i in range(numCurves))
+
+    timings = {}
+    timings["legacy"], legacyText = timed(legacySnippet, points)
+    timings["build"], keywords = timed(Keyword.frictionTable, points)
+    timings["comma"], text = timed(Keyword.formatKeywords, keywords)
+    timings["fixed"], fixedText = timed(Keyword.formatKeywords, keywords, True)
+    timings["parse"], parsed = timed(Keyword.parseKeywords, text.splitlines())
+    timings["read"], table = timed(Keyword.readFrictionTable, parsed)
+    timings["merge"], merged = timed(Keyword.mergeFrictionTables, table, table)
+
+    assert len(table) == numCurves and merged == table
+
+    return timings
+
+def run(numCurves):
+    timings = measure(numCurves)
+    print("{:>9} curves | legacy += {legacy:8.3f} s | build {build:7.3f} s | comma {comma:7.3f} s | fixed {fixed:7.3f} s | parse {parse:7.3f} s | read {read:7.3f} s | merge {merge:7.3f} s".format(
+        numCurves, **timings))
+
+if __name__ == "__main__":
+    sizes = [int(argument) for argument in sys.argv[1:]] or [100, 1000, 10000, 100000]
+    for size in sizes:
+        run(size)
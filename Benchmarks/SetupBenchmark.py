@@ -0,0 +1,98 @@
+# Benchmark of the Mechanical model setup done by the Sliding Test script, on a recording fake ExtAPI
+# Counts the ExtAPI round trips of each ls_dyna setup step and compares the Named Selection and body lookups
+# against the per-name scans and selection round trips previously used by ls_dyna
+# Usage: python Benchmarks/SetupBenchmark.py [number of Named Selections ...]
+
+import os
+import sys
+import time
+
+# Add Scripts directory to local import path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Scripts"))
+
+import FakeExtAPI
+
+recorder = FakeExtAPI.Recorder()
+FakeExtAPI.installModules(recorder)
+
+import ls_dyna
+
+# Returns the Named Selections found with one scan of the model tree per name, as ls_dyna used to
+def legacyGetNamedSelections(ExtAPI, names):
+    model = ExtAPI.DataModel.Project.Model
+
+    namedSelections = {}
+    for name in names:
+        namedSelections[name] = [selection for selection in model.NamedSelections.Children if selection.Name == name][0]
+
+    return namedSelections
+
+# Returns the bodies found with a selection round trip per body, as ls_dyna used to
+def legacyGetBodies(ExtAPI, namedSelections):
+    dataModel = ExtAPI.DataModel
+    model = ExtAPI.DataModel.Project.Model
+    selectionManager = ExtAPI.SelectionManager
+
+    bodies = {}
+    for namedSelection in namedSelections:
+        selectionManager.NewSelection(namedSelection)
+        bodies[namedSelection.Name] = model.Geometry.GetBody(dataModel.GeoData.GeoEntityById(selectionManager.CurrentSelection.Ids[0]))
+        selectionManager.ClearSelection()
+
+    return bodies
+
+# Run the ls_dyna setup steps of the Sliding Test script
+# Returns the round trips of each step, as a list of (step, round trips) pairs
+# ExtAPI = fake ExtAPI reference
+def runSlidingTestSetup(ExtAPI):
+    steps = []
+    def step(name, function, *args):
+        recorder.reset()
+        result = function(*args)
+        steps.append((name, recorder.total()))
+        return result
+
+    step("getReferences", ls_dyna.getReferences, ExtAPI)
+    namedSelections = step("getNamedSelections", ls_dyna.getNamedSelections, ExtAPI, FakeExtAPI.WORKFLOW_NAMED_SELECTIONS)
+    bodies = step("getBodies", ls_dyna.getBodies, ExtAPI, [namedSelections["Floor"], namedSelections["Shoe"]])
+    step("setupGeometry", ls_dyna.setupGeometry, bodies["Shoe"], bodies["Floor"])
+    step("mesh", ls_dyna.mesh, ExtAPI, 5e-4, namedSelections["Floor_Contact"], namedSelections["Shoe_Contact"], namedSelections["Floor"], namedSelections["Shoe"])
+    step("setAnalysisEndTime", ls_dyna.setAnalysisEndTime, ExtAPI, 0.01)
+    displacement = step("createDisplacement", ls_dyna.createDisplacement, ExtAPI, namedSelections["Shoe_Top"], [[0, 0], [0.005, -1e-5], [0.01, -1e-5]])
+    step("createBirthAndDeath", ls_dyna.createBirthAndDeath, ExtAPI, 0, 0, 0.005)
+    step("createVelocity", ls_dyna.createVelocity, ExtAPI, namedSelections["Shoe_Top"], [[0, 0], [0.005, 0.5], [0.01, 0.5]])
+    step("createBirthAndDeath", ls_dyna.createBirthAndDeath, ExtAPI, 1, 0.005, 0)
+    step("createRigidBodyConstraint", ls_dyna.createRigidBodyConstraint, ExtAPI, namedSelections["Floor"])
+    step("createDefaultContact", ls_dyna.createDefaultContact, ExtAPI)
+    step("suppressDefaultBodyInteraction", ls_dyna.suppressDefaultBodyInteraction, ExtAPI)
+    step("createResults", ls_dyna.createResults, ExtAPI, displacement)
+    return steps
+
+# Returns the round trips of the previous Named Selection and body lookups
+# ExtAPI = fake ExtAPI reference
+def runLegacyLookups(ExtAPI):
+    recorder.reset()
+    namedSelections = legacyGetNamedSelections(ExtAPI, FakeExtAPI.WORKFLOW_NAMED_SELECTIONS)
+    legacyGetBodies(ExtAPI, [namedSelections["Floor"], namedSelections["Shoe"]])
+    return recorder.total()
+
+# Returns the total round trips of the Sliding Test setup, the time it took in seconds and the round trips of each step
+# numNamedSelections = number of Named Selections in the fake model
+def measure(numNamedSelections):
+    ExtAPI = FakeExtAPI.createExtAPI(recorder, numNamedSelections)
+    start = time.time()
+    steps = runSlidingTestSetup(ExtAPI)
+    return sum(count for name, count in steps), time.time() - start, steps
+
+def run(numNamedSelections):
+    roundTrips, elapsed, steps = measure(numNamedSelections)
+    lookupSteps = sum(count for name, count in steps if name in ("getNamedSelections", "getBodies"))
+    print("{:>6} named selections | setup {:6} round trips in {:.4f} s | lookups {:5} | previous lookups {:6}".format(
+        numNamedSelections, roundTrips, elapsed, lookupSteps, runLegacyLookups(FakeExtAPI.createExtAPI(recorder, numNamedSelections))))
+    for name, count in steps:
+        print("    {:<32} {:6}".format(name, count))
+
+if __name__ == "__main__":
+    sizes = [int(argument) for argument in sys.argv[1:]] or [7, 100, 1000]
+    for size in sizes:
+        run(size)
@@ -0,0 +1,113 @@
+# Stand-in for the LS-DYNA executable, so the direct deck path and the job queue run end to end without a solver
+# Reads the end time and the displacement step of a generated Sliding Test deck and writes a synthetic file3.nlh force tracker file
+# and a glstat file reporting the simulated time and time step into the working directory, a block of samples at a time,
+# stopping early when a d3kil file appears as LS-DYNA does
+# With *DATABASE_BINARY_D3DUMP in the deck, a d3dumpNN restart dump is written every CYCL samples, and r=<dump> resumes from a dump,
+# writing the outputs again from the dump time; crash=F exits with an error once F of the end time is reached, to mimic a preempted node
+# Samples are written at the smallest output interval of the deck, see DeckGenerator.OUTPUT_KEYWORDS, unless samples=N is given
+# Usage: python Benchmarks/StubSolver.py i=<deck> [r=<dump>] [ncpu=N] [samples=N] [delay=seconds per block] [crash=fraction]
+# e.g. SolverCommand = python Benchmarks/StubSolver.py i={input} ncpu={ncpu}
+
+import os
+import sys
+import json
+import math
+import time
+
+# Add Scripts directory to local import path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Scripts"))
+
+import Keyword
+import DeckGenerator
+
+# Number of samples written between two d3kil checks
+BLOCK_SIZE = 100
+
+# Returns the end time of a deck, the death time of its prescribed y displacement, its restart dump interval in cycles, 0 without dumps,
+# and its smallest output interval, None without outputs
+# deckPath = path to the keyword deck
+def readDeck(deckPath):
+    times = {"endTime": None, "displacementDuration": None, "dumpCycles": 0, "outputInterval": None}
+
+    def handler(name, lines):
+        data = DeckGenerator.dataLines(lines[1:])
+        if name == "CONTROL_TERMINATION" and data:
+            times["endTime"] = float(Keyword.parseFields(data[0])[0])
+        elif name == "DATABASE_BINARY_D3DUMP" and data:
+            times["dumpCycles"] = int(Keyword.parseFields(data[0])[0])
+        elif name in DeckGenerator.OUTPUT_KEYWORDS and data:
+            interval = Keyword.parseFields(data[0])[0]
+            if isinstance(interval, (int, float)) and interval > 0:
+                times["outputInterval"] = min(interval, times["outputInterval"] or interval)
+        elif name.startswith(DeckGenerator.MOTION_KEYWORD):
+            for idLine, line in DeckGenerator.motionCards(name, lines[1:]):
+                values = Keyword.parseFields(line)
+                if len(values) > 6 and int(values[1]) == 2 and int(values[2]) == 2 and float(values[6]) < DeckGenerator.NEVER:
+                    times["displacementDuration"] = float(values[6])
+
+    with open(deckPath, 'r') as fileObj:
+        DeckGenerator.streamBlocks(fileObj, handler)
+
+    if times["endTime"] is None:
+        raise Exception("The deck {} has no *CONTROL_TERMINATION.".format(deckPath))
+    if times["displacementDuration"] is None:
+        times["displacementDuration"] = times["endTime"]
+    return times["endTime"], times["displacementDuration"], times["dumpCycles"], times["outputInterval"]
+
+# Returns the (time, normal force, shear force) row of a sample
+# The normal force ramps up over the displacement step, then the shear force settles around a steady COF while sliding
+def sample(sampleTime, displacementDuration, peakNormal=100.0, cof=0.25):
+    normal = peakNormal * min(1.0, sampleTime / displacementDuration)
+    sliding = max(0.0, sampleTime - displacementDuration) / displacementDuration
+    shear = normal * cof * (1.0 - math.exp(-5.0 * sliding))
+    return sampleTime, -normal, shear
+
+# Write a restart dump holding the deck and the last sample written
+# Dumps are numbered in the order they are written, as LS-DYNA does
+def writeDump(deckPath, sampleCount):
+    numbers = [int(name[len("d3dump"):]) for name in os.listdir(".") if name.startswith("d3dump") and name[len("d3dump"):].isdigit()]
+    with open("d3dump{:02d}".format(max(numbers + [0]) + 1), 'w') as fileObj:
+        json.dump({"input": deckPath, "samples": sampleCount}, fileObj)
+
+def run(arguments):
+    options = dict(argument.split("=", 1) for argument in arguments if "=" in argument)
+    first = 0
+    if "r" in options:
+        with open(options["r"], 'r') as fileObj:
+            dump = json.load(fileObj)
+        options.setdefault("i", dump["input"])
+        first = dump["samples"]
+    if "i" not in options:
+        print("Usage: python StubSolver.py i=<deck> [r=<dump>] [ncpu=N] [samples=N] [delay=seconds per block] [crash=fraction]")
+        return 2
+
+    endTime, displacementDuration, dumpCycles, outputInterval = readDeck(options["i"])
+    numSamples = int(options.get("samples", round(endTime / outputInterval) if outputInterval else 1000))
+    delay = float(options.get("delay", "0"))
+    crash = float(options["crash"]) if "crash" in options and "r" not in options else None
+
+    timeStep = endTime / numSamples
+    with open("file3.nlh", 'w') as fileObj, open("glstat", 'w') as glstatObj:
+        fileObj.write('<?xml version="1.0"?>\n<ROOT>\n<HEAD>Stub solver force tracker</HEAD>\n<COLDATA>\n')
+        for start in range(first, numSamples, BLOCK_SIZE):
+            if os.path.exists("d3kil"):
+                break
+            end = min(numSamples, start + BLOCK_SIZE)
+            for i in range(start, end):
+                fileObj.write(" {:.6e} {:.6e} {:.6e}\n".format(*sample(endTime * (i + 1) / numSamples, displacementDuration)))
+                if dumpCycles > 0 and (i + 1) % dumpCycles == 0 and i + 1 < numSamples:
+                    writeDump(options["i"], i + 1)
+            fileObj.flush()
+            glstatObj.write(" dt of cycle {:>8d} is controlled by shell 1\n\n time...................... {:.5e}\n time step................. {:.5e}\n\n".format(
+                end, endTime * end / numSamples, timeStep))
+            glstatObj.flush()
+            if crash is not None and end >= crash * numSamples:
+                # The process dies without closing the tracker file, as a preempted solve would
+                return 1
+            if delay > 0:
+                time.sleep(delay)
+        fileObj.write('</COLDATA>\n</ROOT>\n')
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(run(sys.argv[1:]))
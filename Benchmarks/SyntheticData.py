@@ -0,0 +1,242 @@
+# Synthetic workflow data for the benchmarks, so they run without Ansys or LS-Dyna
+# Generates file3.nlh force tracker files, rcforc and binout interface force files, result store force data sets with their workflow state,
+# Config.csv files, Compression Test base decks, profilometer height maps, Prony series and results databases
+# Force histories follow the shape of the real tests: the normal force ramps up while the shear force settles around a steady COF
+
+import os
+import sys
+import math
+import array
+import random
+import struct
+
+# Add Scripts directory to local import path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Scripts"))
+
+import ImportExportUtilities
+import ResultStore
+import WorkflowState
+import BatchCampaign
+import Keyword
+import DeckGenerator
+import ResultsDatabase
+
+TEMPLATE_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Config", "Config.csv")
+
+# Returns synthetic force history columns (time, normal force, shear force)
+# numSamples = number of samples
+# timeStep = time between samples in s
+# peakNormal = magnitude of the normal force at the last sample in N
+# cof = steady state coefficient of friction
+# seed = random seed, so the same arguments always give the same data
+def forceHistory(numSamples, timeStep=1e-5, peakNormal=100.0, cof=0.2, seed=0):
+    generator = random.Random(seed)
+    time = array.array('d')
+    normal = array.array('d')
+    shear = array.array('d')
+    for i in range(numSamples):
+        ramp = float(i + 1) / numSamples
+        force = peakNormal * ramp * (1.0 + 0.01 * generator.uniform(-1.0, 1.0))
+        time.append(i * timeStep)
+        normal.append(-force)
+        shear.append(force * cof * (1.0 - math.exp(-10.0 * ramp)) + 0.01 * force * generator.uniform(-1.0, 1.0))
+    return [time, normal, shear]
+
+# Write a synthetic file3.nlh force tracker file in the layout written by LS-Dyna
+# path = path to the tracker file
+# numSamples = number of COLDATA rows
+# seed = random seed
+def writeTrackerFile(path, numSamples, seed=0):
+    time, normal, shear = forceHistory(numSamples, seed=seed)
+    with open(path, 'w') as fileObj:
+        fileObj.write('<?xml version="1.0"?>\n<ROOT>\n<HEAD>Synthetic force tracker</HEAD>\n<COLDATA>\n')
+        lines = []
+        for row in zip(time, normal, shear):
+            lines.append(" {:.6e} {:.6e} {:.6e}\n".format(*row))
+            if len(lines) == 10000:
+                fileObj.write("".join(lines))
+                lines = []
+        fileObj.write("".join(lines))
+        fileObj.write('</COLDATA>\n</ROOT>\n')
+
+# Returns the rows of a synthetic rcforc output of several contact interfaces, as (time, interface ID, side, x, y, z force) tuples
+# The force history of interface 1 is the one written to the tracker file, as the contact force on each side
+# numSamples = number of output times
+# numInterfaces = number of contact interfaces
+def interfaceForceRows(numSamples, numInterfaces=1, seed=0):
+    time, normal, shear = forceHistory(numSamples, seed=seed)
+    rows = []
+    for i in range(numSamples):
+        for interfaceId in range(1, numInterfaces + 1):
+            scale = 1.0 / interfaceId
+            rows.append((time[i], interfaceId, "slave", -shear[i] * scale, -normal[i] * scale, 0.0))
+            rows.append((time[i], interfaceId, "master", shear[i] * scale, normal[i] * scale, 0.0))
+    return rows
+
+# Write a synthetic ASCII rcforc file in the layout written by LS-DYNA
+# path = path to the rcforc file
+# numSamples = number of output times
+# numInterfaces = number of contact interfaces
+def writeRcforcFile(path, numSamples, numInterfaces=1, seed=0):
+    with open(path, 'w') as fileObj:
+        fileObj.write(" r e s u l t a n t   i n t e r f a c e   f o r c e s\n\n")
+        for interfaceId in range(1, numInterfaces + 1):
+            fileObj.write("  {:>9}  contact interface {}\n".format(interfaceId, interfaceId))
+        fileObj.write("\n")
+        lines = []
+        for sampleTime, interfaceId, side, x, y, z in interfaceForceRows(numSamples, numInterfaces, seed):
+            lines.append("  {:>6}{:>10} time {:12.5E}  x {:12.5E}  y {:12.5E}  z {:12.5E} mass {:12.5E}\n".format(side, interfaceId, sampleTime, x, y, z, 0.0))
+            if len(lines) == 10000:
+                fileObj.write("".join(lines))
+                lines = []
+        fileObj.write("".join(lines))
+
+# Write a synthetic binout file holding rcforc data, in the LSDA record layout written by LS-DYNA
+# Each output time is a /rcforc/dNNNNNN directory with a time and x, y and z force arrays ordered like the metadata ids and side arrays
+# path = path to the binout file
+# numSamples = number of output times
+# numInterfaces = number of contact interfaces
+def writeBinoutFile(path, numSamples, numInterfaces=1, seed=0):
+    rows = interfaceForceRows(numSamples, numInterfaces, seed)
+    entries = 2 * numInterfaces
+
+    def cd(fileObj, directory):
+        path = directory.encode("ascii")
+        fileObj.write(struct.pack("<QB", 9 + len(path), 2) + path)
+
+    def data(fileObj, name, typeId, code, values):
+        payload = struct.pack("<{}{}".format(len(values), code), *values)
+        fileObj.write(struct.pack("<QBBB", 11 + len(name) + len(payload), 3, typeId, len(name)) + name.encode("ascii") + payload)
+
+    with open(path, 'wb') as fileObj:
+        fileObj.write(struct.pack("8B", 8, 8, 8, 1, 1, 1, 0, 0))
+        cd(fileObj, "/rcforc/metadata")
+        data(fileObj, "ids", 3, "i", [row[1] for row in rows[:entries]])
+        data(fileObj, "side", 3, "i", [0 if row[2] == "slave" else 1 for row in rows[:entries]])
+        for i in range(numSamples):
+            step = rows[i * entries:(i + 1) * entries]
+            cd(fileObj, "../d{:06d}".format(i + 1))
+            data(fileObj, "time", 9, "f", [step[0][0]])
+            for component, column in [("x", 3), ("y", 4), ("z", 5)]:
+                data(fileObj, component + "_force", 9, "f", [row[column] for row in step])
+
+# Create a synthetic working directory holding a Compression Test and a set of Sliding Test runs in its result store
+# The workflow state holds the measurements read by PostProcessing
+# workingDirectory = path to the synthetic working directory
+# numRuns = number of Sliding Test runs
+# samplesPerRun = number of samples of each run
+# exportCsv = True to also write the Force_*.csv exports
+def writeForceSet(workingDirectory, numRuns, samplesPerRun, exportCsv=False):
+    resultsFolderPath = os.path.join(workingDirectory, "Results")
+    if not os.path.exists(resultsFolderPath):
+        os.makedirs(resultsFolderPath)
+
+    ResultStore.writeForceData(resultsFolderPath, "CompressionTest", forceHistory(samplesPerRun, peakNormal=500.0), exportCsv)
+    for i in range(numRuns):
+        columns = forceHistory(samplesPerRun, peakNormal=10.0 + 490.0 * i / max(1, numRuns - 1), cof=0.3 - 0.1 * i / max(1, numRuns - 1), seed=i + 1)
+        ResultStore.writeForceData(resultsFolderPath, i, columns, exportCsv)
+
+    state = WorkflowState.openState(workingDirectory)
+    state.reset()
+    state.set(TopFaceArea=1e-8, SlidingDistance=1e-4, DistanceToContact=1e-5)
+
+# Write a synthetic Config.csv file based on the template configuration
+# The Prony series columns are extended to the given number of rows
+# path = path to the configuration file
+# numRows = number of data rows
+def writeConfigFile(path, numRows, seed=0):
+    generator = random.Random(seed)
+    config = ImportExportUtilities.importConfig(TEMPLATE_CONFIG_PATH)
+    columns = BatchCampaign.readConfigColumns(TEMPLATE_CONFIG_PATH)
+    config["RelativeModuli"] = ["{:.6g}".format(generator.uniform(0.0, 0.1)) for i in range(numRows)]
+    config["RelaxationTime"] = ["{:.6g}".format(10.0 ** generator.uniform(-10.0, 4.0)) for i in range(numRows)]
+    BatchCampaign.writeConfig(path, config, columns)
+
+# Write a synthetic Compression Test base deck into the Decks directory of a campaign, laid out like the decks written by Mechanical
+# The Shoe top node set is pushed down by a y displacement curve while its x and z displacements are held, and the Floor is fixed
+# numNodes = number of nodes of the mesh, on a line of 8-noded solid elements
+# Write a square height map of a rough surface as a .npy file of heights in m
+# The surface is a sum of random waves with a small amount of noise
+# path = path to the .npy file
+# size = number of points of each side of the map
+def writeHeightMap(path, size, seed=0):
+    generator = random.Random(seed)
+    waves = [(generator.uniform(0.01, 0.3), generator.uniform(0.01, 0.3), generator.uniform(0, 2 * math.pi), generator.uniform(1e-6, 5e-6)) for i in range(8)]
+    rows = []
+    for j in range(size):
+        row = array.array('d', [0.0] * size)
+        for kx, ky, phase, amplitude in waves:
+            offset = ky * j + phase
+            for i in range(size):
+                row[i] += amplitude * math.sin(kx * i + offset)
+        rows.append(array.array('d', [value + generator.gauss(0.0, 1e-7) for value in row]))
+    ResultStore.writeNpy(path, rows)
+
+# Returns the (relative moduli, relaxation times in s) of a synthetic Prony series
+# The relaxation times are spaced half a decade apart from 1e-8 s and the moduli sum to 0.9, like a measured rubber series
+# numTerms = number of terms
+# seed = random seed, so the same arguments always give the same series
+def pronySeries(numTerms, seed=0):
+    generator = random.Random(seed)
+    weights = [generator.uniform(0.5, 1.5) for i in range(numTerms)]
+    moduli = [0.9 * weight / sum(weights) for weight in weights]
+    times = [1e-8 * 10 ** (0.5 * i) for i in range(numTerms)]
+    return moduli, times
+
+# Write a results database of synthetic campaign records
+# The records cycle through four geometries and two movement speeds, and their runs cover the same pressure range
+# directory = path to the database directory
+# numRecords = number of campaign records
+# runsPerRecord = number of Sliding Test runs of each record
+def writeResultsDatabase(directory, numRecords, runsPerRecord=10, seed=0):
+    generator = random.Random(seed)
+    config = ImportExportUtilities.importConfig(TEMPLATE_CONFIG_PATH)
+    records = []
+    for i in range(numRecords):
+        runs = []
+        for j in range(runsPerRecord):
+            pressure = 1e5 + 9.9e5 * j / max(1, runsPerRecord - 1)
+            runs.append({"run": j, "pressure": pressure * generator.uniform(0.98, 1.02), "cof": 0.3 - 0.1 * j / max(1, runsPerRecord - 1) + generator.gauss(0.0, 0.005)})
+        records.append({"version": ResultsDatabase.DATABASE_VERSION, "id": "{:016x}".format(i), "name": "Campaign{}".format(i), "directory": "",
+            "ingested": 0.0, "config": config, "geometry": "{:040x}".format(i % 4), "geometryFile": "Geometry{}.agdb".format(i % 4),
+            "material": ResultsDatabase.materialHash(config), "materialName": config.get("MaterialName", ""), "speed": 0.5 * (1 + i % 2),
+            "measurements": {}, "runs": runs, "snippet": None})
+    database = ResultsDatabase.ResultsDatabase(directory)
+    database.addRecords(records)
+    return database
+
+def writeBaseDeck(workingDirectory, numNodes):
+    decksFolderPath = os.path.join(workingDirectory, DeckGenerator.DECKS_FOLDER)
+    if not os.path.exists(decksFolderPath):
+        os.makedirs(decksFolderPath)
+
+    endTime = 0.002
+    keywords = [Keyword.Keyword("KEYWORD"), Keyword.Keyword("CONTROL_TERMINATION", [Keyword.Card([endTime, 0, 0.0, 0.0, 0.0], "endtim,endcyc,dtmin,endeng,endmas")])]
+    keywords.append(Keyword.Keyword("DATABASE_NCFORC", [Keyword.Card([endTime / 100, 0, 0, 1])]))
+    keywords.extend(Keyword.frictionContact([(1e5, 0.3), (1e6, 0.25), (1e7, 0.2)]))
+
+    motion = Keyword.Keyword("BOUNDARY_PRESCRIBED_MOTION_SET")
+    motion.addCard([1, 2, 2, 1, 1.0, 0, DeckGenerator.NEVER, 0], "id,dof,vad,lcid,sf,vid,death,birth")
+    motion.addCard([1, 1, 2, 2, 1.0, 0, DeckGenerator.NEVER, 0])
+    motion.addCard([1, 3, 2, 2, 1.0, 0, DeckGenerator.NEVER, 0])
+    motion.addCard([2, 1, 2, 2, 1.0, 0, DeckGenerator.NEVER, 0])
+    motion.addCard([2, 2, 2, 2, 1.0, 0, DeckGenerator.NEVER, 0])
+    motion.addCard([2, 3, 2, 2, 1.0, 0, DeckGenerator.NEVER, 0])
+    keywords.append(motion)
+    keywords.append(Keyword.Keyword("DEFINE_CURVE", [Keyword.Card([1, 0, 1.0, 1.0, 0.0, 0.0]), Keyword.Card([0, 0]), Keyword.Card([endTime, -1e-5])]))
+    keywords.append(Keyword.Keyword("DEFINE_CURVE", [Keyword.Card([2, 0, 1.0, 1.0, 0.0, 0.0]), Keyword.Card([0, 0]), Keyword.Card([endTime, 0])]))
+
+    numLayers = max(1, numNodes // 4 - 1)
+    nodes = Keyword.Keyword("NODE")
+    for i in range(4 * (numLayers + 1)):
+        nodes.addCard([i + 1, 1e-4 * (i % 2), 1e-4 * (i // 4), 1e-4 * ((i // 2) % 2)])
+    elements = Keyword.Keyword("ELEMENT_SOLID")
+    for i in range(numLayers):
+        elements.addCard([i + 1, 1 if i < numLayers // 2 else 2] + [4 * i + j + 1 for j in [0, 1, 3, 2, 4, 5, 7, 6]])
+    keywords.extend([nodes, elements])
+    keywords.append(Keyword.Keyword("SET_NODE_LIST", [Keyword.Card([1]), Keyword.Card(list(range(4 * numLayers + 1, 4 * numLayers + 5)))]))
+    keywords.append(Keyword.Keyword("SET_NODE_LIST", [Keyword.Card([2]), Keyword.Card([1, 2, 3, 4])]))
+
+    with open(DeckGenerator.getBasePath(workingDirectory), 'w') as fileObj:
+        Keyword.writeKeywords(fileObj, keywords)
+        fileObj.write("*END\n")
@@ -0,0 +1,150 @@
+# Batch campaigns run several geometries and/or Config variants in one Workbench project
+# Campaigns are listed in Config/Campaigns.csv, one row per campaign:
+#   Name = campaign name, also the name of its directory in Campaigns/
+#   Geometry = optional name of a geometry file in the Geometry directory, the default geometry is used when empty
+#   any other column = Config.csv setting overridden for the campaign, the base Config.csv value is used when empty;
+#   a column that is not in Config.csv raises a ValueError, so a misspelt setting is not silently ignored
+# Each campaign gets a Campaigns/<Name> directory laid out like the Template (Config, Geometry, Keyword Snippet, Logs, Results)
+# The journal shares Engineering Data and Geometry systems and Compression Test results between campaigns whose inputs match
+
+import os
+import csv
+import shutil
+
+import ImportExportUtilities
+import WorkflowState
+import Topography
+
+CAMPAIGNS_NAME = "Campaigns.csv"
+
+# Material columns of the Config file; campaigns that agree on all of them share an Engineering Data system
+MATERIAL_COLUMNS = ["MaterialName", "Density", "DensityUnit", "YoungsModulus", "YoungsModulusUnit", "PoissonsRatio",
+    "RelativeModuli", "RelaxationTime", "RelaxationTimeUnit"]
+
+# Returns the list of campaigns in Config/Campaigns.csv, or None if the file does not exist
+# Each campaign is a dictionary with the campaign "name", "geometry" file name and Config "overrides"
+# workingDirectory = path to the workflow working directory
+def loadCampaigns(workingDirectory):
+    campaignsPath = os.path.join(workingDirectory, "Config", CAMPAIGNS_NAME)
+    if not os.path.exists(campaignsPath):
+        return None
+
+    columns = readConfigColumns(os.path.join(workingDirectory, "Config", "Config.csv"))
+    campaigns = []
+    with open(campaignsPath, 'r') as csvFile:
+        csvReader = csv.DictReader(csvFile)
+        unknownColumns = [column for column in csvReader.fieldnames if column not in columns + ["Name", "Geometry"]]
+        if unknownColumns:
+            raise ValueError("{} has columns that are not Config.csv settings: {}".format(campaignsPath, ", ".join(unknownColumns)))
+        for row in csvReader:
+            name = row.pop("Name").strip()
+            geometry = row.pop("Geometry", "").strip()
+            overrides = dict((key, value.strip()) for key, value in row.items() if value is not None and not value.strip() == "")
+            campaigns.append({"name": name, "geometry": geometry, "overrides": overrides})
+    return campaigns
+
+# Write a configuration dictionary in the layout read by importConfig
+# List values are written down their column, one element per row
+# path = path to the configuration file
+# config = configuration dictionary
+# columns = list of column names in the order they are written
+def writeConfig(path, config, columns):
+    values = [config[column] if isinstance(config[column], list) else [config[column]] for column in columns]
+    numRows = max(len(value) for value in values)
+    rows = [[value[i] if i < len(value) else "" for value in values] for i in range(numRows)]
+    with open(path, 'wb' if str is bytes else 'w') as csvFile:
+        csvWriter = csv.writer(csvFile, lineterminator="\n")
+        csvWriter.writerow(columns)
+        csvWriter.writerows(rows)
+
+# Returns the column names of a configuration file in file order
+# path = path to the configuration file
+def readConfigColumns(path):
+    with open(path, 'r') as csvFile:
+        return next(csv.reader(csvFile))
+
+# Create or update the directory of a campaign
+# The base Config.csv with the campaign's overrides, the geometry file and the keyword snippet are copied into it
+# Returns the path to the campaign directory
+# workingDirectory = path to the workflow working directory
+# campaign = campaign dictionary returned by loadCampaigns
+def createCampaignDirectory(workingDirectory, campaign):
+    campaignDirectory = os.path.join(workingDirectory, "Campaigns", campaign["name"])
+    for folder in ["Config", "Geometry", "Logs", "Results"]:
+        path = os.path.join(campaignDirectory, folder)
+        if not os.path.exists(path):
+            os.makedirs(path)
+
+    # Campaign configuration
+    baseConfigPath = os.path.join(workingDirectory, "Config", "Config.csv")
+    config = ImportExportUtilities.importConfig(baseConfigPath)
+    columns = readConfigColumns(baseConfigPath)
+    for key, value in campaign["overrides"].items():
+        config[key] = value
+    writeConfig(os.path.join(campaignDirectory, "Config", "Config.csv"), config, columns)
+
+    # Campaign geometry, the only .agdb file in the campaign's Geometry directory
+    if campaign["geometry"]:
+        geometryPath = os.path.join(workingDirectory, "Geometry", campaign["geometry"])
+    else:
+        geometryPath = ImportExportUtilities.getGeometryPath(workingDirectory)
+    geometryFolderPath = os.path.join(campaignDirectory, "Geometry")
+    for file in os.listdir(geometryFolderPath):
+        if file.endswith(".agdb") and not file == os.path.basename(geometryPath):
+            os.remove(os.path.join(geometryFolderPath, file))
+    shutil.copyfile(geometryPath, os.path.join(geometryFolderPath, os.path.basename(geometryPath)))
+
+    # SpaceClaim document of the geometry, whose named selections give the measured faces
+    for file in os.listdir(geometryFolderPath):
+        if file.lower().endswith(".scdoc"):
+            os.remove(os.path.join(geometryFolderPath, file))
+    documentPath = Topography.findDocumentPath(geometryPath)
+    if documentPath is not None:
+        shutil.copyfile(documentPath, os.path.join(geometryFolderPath, os.path.basename(documentPath)))
+
+    # Campaign geometry export, measured by the Compression Test, and height map
+    exportPath = Topography.findExportPath(workingDirectory, geometryPath)
+    if exportPath is not None:
+        exportFolderPath = os.path.join(campaignDirectory, Topography.EXPORT_FOLDER)
+        if not os.path.exists(exportFolderPath):
+            os.makedirs(exportFolderPath)
+        for file in os.listdir(exportFolderPath):
+            if file.lower().endswith(".sat"):
+                os.remove(os.path.join(exportFolderPath, file))
+        shutil.copyfile(exportPath, os.path.join(exportFolderPath, os.path.basename(exportPath)))
+    heightMapPath = config.get("HeightMap", "")
+    if heightMapPath and not os.path.isabs(heightMapPath):
+        campaignHeightMapPath = os.path.join(campaignDirectory, heightMapPath)
+        if not os.path.exists(os.path.dirname(campaignHeightMapPath)):
+            os.makedirs(os.path.dirname(campaignHeightMapPath))
+        shutil.copyfile(os.path.join(workingDirectory, heightMapPath), campaignHeightMapPath)
+
+    # Campaign keyword snippet
+    keywordSnippetPath = os.path.join(workingDirectory, "Keyword Snippet", "Keyword Snippet.txt")
+    if os.path.exists(keywordSnippetPath):
+        snippetFolderPath = os.path.join(campaignDirectory, "Keyword Snippet")
+        if not os.path.exists(snippetFolderPath):
+            os.mkdir(snippetFolderPath)
+        shutil.copyfile(keywordSnippetPath, os.path.join(snippetFolderPath, "Keyword Snippet.txt"))
+
+    return campaignDirectory
+
+# Returns the key of the material inputs of a configuration, used to share Engineering Data systems
+# config = configuration dictionary returned by importConfig
+def materialKey(config):
+    return repr([config.get(column, "") for column in MATERIAL_COLUMNS])
+
+# Mark a campaign as the one the Mechanical scripts run on
+# workingDirectory = path to the workflow working directory
+# name = campaign name, or None to run on the working directory itself
+def setCurrentCampaign(workingDirectory, name):
+    WorkflowState.openState(workingDirectory).set(CurrentCampaign=name)
+
+# Returns the directory of the campaign the Mechanical scripts run on
+# This is the working directory itself unless a batch campaign is running
+# workingDirectory = path to the workflow working directory
+def getCampaignDirectory(workingDirectory):
+    name = WorkflowState.openState(workingDirectory).get("CurrentCampaign")
+    if not name:
+        return workingDirectory
+    return os.path.join(workingDirectory, "Campaigns", name)
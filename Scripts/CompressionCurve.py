@@ -0,0 +1,96 @@
+# Precomputed lookup index of the compression test's normal force vs time curve
+# The index holds the monotone upper envelope of the absolute normal force, so it can be searched with binary search
+# Loading durations for any number of target normal forces are then answered in one call by linear interpolation
+# The index is saved next to the compression test results as CompressionCurve.npy
+
+import os
+import bisect
+import array
+
+import ResultStore
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+INDEX_NAME = "CompressionCurve.npy"
+
+# Returns the lookup index [forces, times] of a compression test force history
+# Only samples where the absolute normal force exceeds every earlier sample are kept, so forces are strictly increasing
+# time = column of sample times in seconds
+# normal = column of normal forces in N
+def buildIndex(time, normal):
+    if numpy is not None:
+        force = numpy.abs(numpy.asarray(normal, dtype=float))
+        keep = numpy.ones(len(force), dtype=bool)
+        keep[1:] = force[1:] > numpy.fmax.accumulate(force)[:-1]
+        keep &= force > float("-inf")
+        return [array.array('d', force[keep].tolist()), array.array('d', numpy.asarray(time, dtype=float)[keep].tolist())]
+
+    forces = array.array('d')
+    times = array.array('d')
+    peak = float("-inf")
+    for sampleTime, sampleNormal in zip(time, normal):
+        force = abs(float(sampleNormal))
+        if force > peak:
+            forces.append(force)
+            times.append(float(sampleTime))
+            peak = force
+    return [forces, times]
+
+# Build the lookup index from the compression test results and save it in the Results directory
+# Returns the lookup index
+# resultsFolderPath = path to the Results directory
+def saveIndex(resultsFolderPath):
+    time, normal, shear = ResultStore.readForceData(resultsFolderPath, "CompressionTest")
+    index = buildIndex(time, normal)
+    ResultStore.writeNpy(os.path.join(resultsFolderPath, INDEX_NAME), index)
+    return index
+
+# Returns the saved lookup index, building it from the compression test results if it does not exist yet
+# resultsFolderPath = path to the Results directory
+def loadIndex(resultsFolderPath):
+    indexPath = os.path.join(resultsFolderPath, INDEX_NAME)
+    if not os.path.exists(indexPath):
+        return saveIndex(resultsFolderPath)
+    return ResultStore.readNpy(indexPath)
+
+# Returns the times at which the compression test first reaches each target normal force
+# Targets outside of the range of the compression curve are returned as None
+# index = lookup index returned by buildIndex or loadIndex
+# targetForces = list of target normal forces in N
+def lookupTimes(index, targetForces):
+    forces, times = index
+    if len(forces) == 0:
+        return [None for target in targetForces]
+
+    if numpy is not None:
+        values = numpy.interp(numpy.asarray(targetForces, dtype=float), forces, times, left=numpy.nan, right=numpy.nan)
+        return [None if numpy.isnan(value) else float(value) for value in values]
+
+    results = []
+    for target in targetForces:
+        k = bisect.bisect_left(forces, target)
+        if k == len(forces) or (k == 0 and forces[0] > target):
+            results.append(None)
+        elif forces[k] == target:
+            results.append(times[k])
+        else:
+            fraction = (target - forces[k - 1]) / (forces[k] - forces[k - 1])
+            results.append(times[k - 1] + fraction * (times[k] - times[k - 1]))
+    return results
+
+# Returns the loading durations needed to reach each target normal force
+# Raises an exception listing every target that the compression test does not reach
+# index = lookup index returned by buildIndex or loadIndex
+# targetForces = list of target normal forces in N
+def loadingDurations(index, targetForces):
+    durations = lookupTimes(index, targetForces)
+    outOfRange = [target for target, duration in zip(targetForces, durations) if duration is None]
+    if outOfRange:
+        forces = index[0]
+        forceRange = "{:.4e} N to {:.4e} N".format(forces[0], forces[-1]) if len(forces) else "empty"
+        raise Exception("Target normal forces {} are outside of the compression test range ({}).\nIncrease CompressionTestDisplacementFactor or reduce MaxPressure.".format(
+            ", ".join("{:.4e} N".format(target) for target in outOfRange), forceRange))
+    return durations
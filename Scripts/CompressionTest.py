@@ -1,64 +1,64 @@
 import os
 import sys
-import csv
-import xml.etree.ElementTree as ET
 
-# There does not seem to be any way to get the working directory programatically in SpaceClaim
-# It needs to be hardcoded
-workingDirectory = r"/ihome/kbeschorner/hti2/Flooring_Topography_Modeling/Template"
+# Get working directory path by going up 4 levels from the MECH directory
+workingDirectory = ExtAPI.DataModel.AnalysisList[0].WorkingDir
+for i in range(5):
+    workingDirectory = os.path.dirname(workingDirectory)
 
-# Check if the hardcoded working directory path is valid
-# Throw an exception if it is not valid
-if not os.path.isdir(workingDirectory):
-    raise Exception("Working Directory path is invalid.\nUpdate the script's workingDirectory path declaration.")
-
-# Check if Log.xml file can be located
-# Throw an exception if it cannot
-logFilePath = os.path.join(workingDirectory, "Logs", "Log.xml")
-if not os.path.exists(logFilePath):
-    raise Exception("Log.xml cannot be found.")
-
-# Parse the workflow log file
-logTree = ET.parse(logFilePath)
-log = logTree.getroot()
-    
 # Add Scripts directory to local import path
 scriptFolderPath = os.path.join(workingDirectory, "Scripts")
 sys.path.append(scriptFolderPath)
 
 import ls_dyna
 import ImportExportUtilities
+import ResultStore
+import CompressionCurve
+import WorkflowState
+import BatchCampaign
+import Trace
+import DeckGenerator
+import ForceOutput
+import Keyword
+import Progress
+import Topography
+import SteadyState
+import NumericWorker
+
+# Locate the campaign this Compression Test belongs to; batch campaigns keep their files in Campaigns/<Name>
+campaignDirectory = BatchCampaign.getCampaignDirectory(workingDirectory)
+
+# Check if the workflow state file can be located
+# Throw an exception if it cannot
+stateFilePath = os.path.join(campaignDirectory, "Logs", "State.jsonl")
+if not os.path.exists(stateFilePath):
+    raise Exception("State.jsonl cannot be found.")
 
 # Parse the workflow configuration file
-config = ImportExportUtilities.importConfig(os.path.join(workingDirectory, "Config", "Config.csv"))
+config = ImportExportUtilities.importConfig(os.path.join(campaignDirectory, "Config", "Config.csv"))
 
-# Parse the workflow log file
-logFilePath = os.path.join(workingDirectory, "Logs", "Log.xml")
-logTree = ET.parse(logFilePath)
-log = logTree.getroot()
+# Open the workflow state store
+state = WorkflowState.openState(campaignDirectory)
 
-# Retrieve references 
-project, selectionManager, dataModel, model, mesh, analysis, analysisSettings, solution, solutionInformation = ls_dyna.getReferences(ExtAPI)
+# Time each phase of the script in the campaign's trace
+tracer = Trace.openTracer(campaignDirectory, "Mechanical")
+
+tracer.phase("References", "mechanical")
+
+# Retrieve references of the analysis of the system the journal runs this script on
+project, selectionManager, dataModel, model, mesh, analysis, analysisSettings, solution, solutionInformation = ls_dyna.getReferences(ExtAPI, state.get("CurrentSystem"))
 namedSelections = ls_dyna.getNamedSelections(ExtAPI, ["Floor", "Shoe", "Floor_Contact", "Shoe_Contact", "Shoe_Top", "Floor_Side", "Shoe_Side"])
 bodies = ls_dyna.getBodies(ExtAPI, [namedSelections["Floor"], namedSelections["Shoe"]])
 
-# Measurements
-topFaceArea = 2.94e-6
-slidingDistance = 5.3463e-3
-distanceToContact = 3.1013e-4
-
-# Save in Config xml
-topFaceAreaNode = ET.SubElement(log, "TopFaceArea")
-topFaceAreaNode.text = str(topFaceArea)
-slidingDistanceNode = ET.SubElement(log, "SlidingDistance")
-slidingDistanceNode.text = "{:.4e}".format(float(slidingDistance))
-distanceToContactNode = ET.SubElement(log, "DistanceToContact")
-distanceToContactNode.text = "{:.4e}".format(float(distanceToContact))
-
-# Save changes to Config.xml file
-with open(logFilePath, 'wb') as fileObj:
-    logTree.write(fileObj, encoding='utf-8')
-    
+tracer.phase("Measurements", "mechanical")
+
+# Measure the geometry from its .sat export, if MeasureGeometry is set, and save the measurements in the workflow state
+measurements = Topography.measureCampaign(config, campaignDirectory)
+topFaceArea = measurements["TopFaceArea"]
+state.set(**measurements)
+
+tracer.phase("Geometry setup", "mechanical")
+
 # Set the User IDs of the Shoe body and Floor body Named Selections (needed for the Keyword Snippet)
 namedSelections["Shoe"].LSDynaUserId = 1
 namedSelections["Floor"].LSDynaUserId = 2
@@ -66,12 +66,22 @@ namedSelections["Floor"].LSDynaUserId = 2
 # Set Stiffness Behavior and Material Assignments for Shoe and Floor Bodies
 ls_dyna.setupGeometry(bodies["Shoe"], bodies["Floor"])
 
+tracer.phase("Mesh", "mechanical")
+
 # Add Mesh Controls and generate Mesh
-meshSize = float(config["SizeScale"]) * float(config["MeshSizeFactor"])
-ls_dyna.mesh(ExtAPI, meshSize, namedSelections["Floor_Contact"], namedSelections["Shoe_Contact"], namedSelections["Floor"], namedSelections["Shoe"])
+# With MeshReuse, the systems of a campaign share one Model, so only the first script meshes and later ones reuse its mesh
+# The mesh is regenerated whenever its key, the hash of the geometry file and the mesh size, changes
+meshSize = ImportExportUtilities.getMeshSize(config)
+meshKey = ImportExportUtilities.getMeshKey(config, campaignDirectory)
+meshReuse = ImportExportUtilities.getConfigFlag(config, "MeshReuse")
+if not (meshReuse and state.get("MeshKey") == meshKey and ls_dyna.isMeshed(ExtAPI)):
+    ls_dyna.mesh(ExtAPI, meshSize, namedSelections["Floor_Contact"], namedSelections["Shoe_Contact"], namedSelections["Floor"], namedSelections["Shoe"])
+    state.set(MeshKey=meshKey)
+
+tracer.phase("Boundary conditions", "mechanical")
 
 # Calculate displacement distance and analysis time
-displacementDistance = float(config["SizeScale"]) * float(config["CompressionTestDisplacementFactor"]) + float("{:.4e}".format(float(log.find("./DistanceToContact").text)))
+displacementDistance = float(config["SizeScale"]) * float(config["CompressionTestDisplacementFactor"]) + float(state.get("DistanceToContact"))
 analysisTime = displacementDistance / float(config["MovementSpeed"])
 
 # Set analysis End Time
@@ -83,11 +93,13 @@ displacement = ls_dyna.createDisplacement(ExtAPI, namedSelections["Shoe_Top"], [
 # Create Rigid Body Constraint and apply to Floor body
 rigidBodyConstraint = ls_dyna.createRigidBodyConstraint(ExtAPI, namedSelections["Floor"])
 
+tracer.phase("Contact and results", "mechanical")
+
 # Checking if Keyword Snippet is available in working directory
 # If Snippet file exists, then load the file, create a Keyword Snippet, and suppress the default frictionless contact
 # If not, create the necessary snippet to define a frictionless, surface-to-surface contact condition
 # This is needed because this type of contact is not currently hooked up inside the Ansys Mechanical/LS-Dyna ACT package
-keywordSnippetPath = os.path.join(workingDirectory, "Keyword Snippet", "Keyword Snippet.txt")
+keywordSnippetPath = os.path.join(campaignDirectory, "Keyword Snippet", "Keyword Snippet.txt")
 if os.path.exists(keywordSnippetPath):
     with open(keywordSnippetPath, 'r') as fileObj:
         snippetText = fileObj.read()
@@ -96,33 +108,65 @@ if os.path.exists(keywordSnippetPath):
 else:
     keywordSnippet = ls_dyna.createDefaultContact(ExtAPI)
 
+# Ask the solver for its own interface force output when the force data is read from rcforc or binout instead of the tracker file
+forceSource = ForceOutput.getForceSource(config)
+outputKeywords = ForceOutput.outputKeywords(config)
+if outputKeywords:
+    ls_dyna.createKeywordSnippet(ExtAPI, Keyword.formatKeywords(outputKeywords, fixedWidth=True))
+
 ls_dyna.suppressDefaultBodyInteraction(ExtAPI)
 
 # Create results
 equivalentStress, normalForce, shearForce = ls_dyna.createResults(ExtAPI, displacement)
 
+# Write the input deck once as the base of the Sliding Test decks generated without Mechanical, if enabled in the Config file
+if ImportExportUtilities.getConfigFlag(config, "DirectDecks"):
+    tracer.phase("Base deck writing", "mechanical")
+    basePath = DeckGenerator.getBasePath(campaignDirectory)
+    if not os.path.exists(os.path.dirname(basePath)):
+        os.mkdir(os.path.dirname(basePath))
+    analysis.WriteInputFile(basePath)
+    DeckGenerator.saveBase(campaignDirectory)
+
+tracer.phase("Solve", "mechanical")
+
+# Report the progress of the solve
+monitor = Progress.createMonitor(config, campaignDirectory, "CompressionTest", analysis.WorkingDir, analysisTime)
+if monitor is not None:
+    backgroundMonitor = SteadyState.BackgroundMonitor(monitor)
+
 # Solve the analysis
 analysis.Solve()
 
-# Access raw data file for External Force Trackers (needed due to limitations in the Mechanical Scripting API)
-# First, find the _files directory
-folders = os.listdir(workingDirectory)
-filesFolder = [folder for folder in folders if folder.endswith("_files")][0]
+if monitor is not None:
+    backgroundMonitor.finish()
+    monitor.finish()
+
+# Access raw data file for External Force Trackers (needed due to limitations in the Mechanical Scripting API),
+# or the solver's own interface force output when picked in the Config file
+
+tracer.phase("Tracker parsing", "mechanical")
 
 # Parse the raw data file
-results = ImportExportUtilities.parseForceData(os.path.join(workingDirectory, filesFolder, "dp0", "SYS", "MECH", "file3.nlh"))
+# Only keep data that occurs following the initial contact between the two bodies
+contactTime = float(state.get("DistanceToContact")) / float(config["MovementSpeed"])
+# The force output is parsed by the numeric worker when one is configured
+worker = NumericWorker.openWorker(config)
+time, normal, shear = NumericWorker.run(worker, ForceOutput.readForces, analysis.WorkingDir, forceSource, contactTime)
 
-# Create Results folder if it does not exist already
-resultsFolderPath = os.path.join(workingDirectory, "Results")
-if not os.path.exists(resultsFolderPath):
-    os.mkdir(resultsFolderPath)
+tracer.phase("Result writing", "mechanical")
 
 # Writing Normal and Shear Force data to Results directory
-with open(os.path.join(workingDirectory, "Results", "Force_CompressionTest.csv"), 'wb') as fileObj:
-    csvWriter = csv.writer(fileObj)
-    csvWriter.writerow(["Time [s]", "Normal Force [N]", "Shear Force [N]"])
-    for row in results:
-        # Only export data that occurs following the initial contact between the two bodies
-        if float(row[0]) < float(log.find("./DistanceToContact").text) / float(config["MovementSpeed"]):
-            continue
-        csvWriter.writerow(row)
+resultsFolderPath = os.path.join(campaignDirectory, "Results")
+ResultStore.writeForceData(resultsFolderPath, "CompressionTest", [time, normal, shear], ImportExportUtilities.getConfigFlag(config, "ExportForceCsv"))
+
+tracer.phase("Compression curve", "mechanical")
+
+# Build the force lookup index used by the Sliding Tests to determine their loading durations
+compressionCurve = NumericWorker.run(worker, CompressionCurve.saveIndex, resultsFolderPath)
+
+# Check up front that the compression test reaches the normal force of every target pressure
+targetPressures = ImportExportUtilities.getTargetPressures(config)
+CompressionCurve.loadingDurations(compressionCurve, [pressure * topFaceArea for pressure in targetPressures])
+
+tracer.endPhase()
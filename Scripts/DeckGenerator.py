@@ -0,0 +1,290 @@
+# Direct keyword deck generation for the Sliding Tests, without a Mechanical session per simulation
+# The Compression Test writes its input deck once as Decks/Base.k of the campaign; it holds the mesh, materials, parts, contact and outputs
+# Each Sliding Test deck is a streamed copy of the base deck in which the prescribed motion of the loaded node set is replaced by
+# the sliding test's displacement and velocity steps, with their load curves, and *CONTROL_TERMINATION is set to the sliding test's end time
+# The output intervals of the base deck were set for the Compression Test's end time; they are scaled to the Sliding Test's end time,
+# so each deck writes as many outputs as Mechanical writes for its output controls given as a number of points
+# The force output and restart dump requests of the Config file, see ForceOutput and Restart, replace those of the base deck
+# Only the prescribed motion, curve, table, database, termination and end keywords are parsed; every other line is copied as is,
+# so large meshes stream through
+
+import os
+import json
+
+import Keyword
+import ResultStore
+import ForceOutput
+import CompressionCurve
+import PressureSampling
+import SlidingTestResults
+import SteadyState
+import Restart
+
+DECKS_FOLDER = "Decks"
+BASE_NAME = "Base.k"
+BASE_INFO_NAME = "Base.json"
+MOTION_KEYWORD = "BOUNDARY_PRESCRIBED_MOTION"
+
+# Default death time of a prescribed motion in LS-DYNA
+NEVER = 1e28
+
+# Output keywords whose first field is an output interval in time
+OUTPUT_KEYWORDS = ["DATABASE_" + name for name in ["ABSTAT", "BNDOUT", "DEFORC", "ELOUT", "GCEOUT", "GLSTAT", "JNTFORC", "MATSUM", "NCFORC",
+    "NODFOR", "NODOUT", "RBDOUT", "RCFORC", "RWFORC", "SBTOUT", "SECFORC", "SLEOUT", "SPCFORC", "SPHOUT", "SWFORC",
+    "BINARY_D3PLOT", "BINARY_D3THDT", "BINARY_D3PART", "BINARY_INTFOR", "BINARY_XTFILE"]]
+
+# Returns the path to the base deck of a campaign
+# workingDirectory = path to the campaign directory
+def getBasePath(workingDirectory):
+    return os.path.join(workingDirectory, DECKS_FOLDER, BASE_NAME)
+
+# Returns True if the campaign has a scanned base deck
+# workingDirectory = path to the campaign directory
+def hasBase(workingDirectory):
+    return os.path.exists(os.path.join(workingDirectory, DECKS_FOLDER, BASE_INFO_NAME)) and os.path.exists(getBasePath(workingDirectory))
+
+# Returns the name of the keyword on a keyword line, without options such as a trailing title
+def keywordName(line):
+    return line[1:].strip().split()[0].upper() if line[1:].strip() else ""
+
+# Returns True for keywords that are parsed when scanning or copying a deck
+def isParsed(name):
+    return (name.startswith(MOTION_KEYWORD) or name.startswith("DEFINE_CURVE") or name.startswith("DEFINE_TABLE") or name.startswith("DATABASE_")
+        or name in ("CONTROL_TERMINATION", "END"))
+
+# Returns the data lines of a keyword block, without comments and blank lines
+def dataLines(lines):
+    return [line for line in lines if line.strip() and not line.startswith("$")]
+
+# Returns the (ID line, data line) pairs of the cards of a prescribed motion keyword
+# Keywords with the ID option have an ID line before each data line
+def motionCards(name, lines):
+    data = dataLines(lines)
+    if "ID" in name[len(MOTION_KEYWORD):].split("_"):
+        return [(data[i], data[i + 1]) for i in range(0, len(data) - 1, 2)]
+    return [(None, line) for line in data]
+
+# Call handler(name, lines) for every parsed keyword block of a deck and write(line) for every other line
+# fileObj = deck file object
+# handler = function called with the keyword name and the list of lines of a parsed block, keyword line included
+# write = function called with each line of the blocks that are not parsed, or None to skip them
+def streamBlocks(fileObj, handler, write=None):
+    name = None
+    block = None
+    for line in fileObj:
+        if line.startswith("*"):
+            if block is not None:
+                handler(name, block)
+            name = keywordName(line)
+            block = [line] if isParsed(name) else None
+            if block is None and write is not None:
+                write(line)
+        elif block is not None:
+            block.append(line)
+        elif write is not None:
+            write(line)
+    if block is not None:
+        handler(name, block)
+
+# Scan the base deck of a campaign and save what is needed to derive the Sliding Test decks from it in Decks/Base.json
+# The loaded target is the node set (or node, or part) whose y displacement follows a non-zero curve; its prescribed motions are replaced
+# The end time of the base deck is kept to scale its output intervals
+# Returns the scan results
+# workingDirectory = path to the campaign directory
+def saveBase(workingDirectory):
+    motions = []
+    curves = {}
+    ids = [0]
+    termination = {"endTime": None}
+
+    def handler(name, lines):
+        data = dataLines(lines[1:])
+        if name == "CONTROL_TERMINATION" and data:
+            termination["endTime"] = float(Keyword.parseFields(data[0])[0])
+        elif name.startswith(MOTION_KEYWORD):
+            for idLine, line in motionCards(name, lines[1:]):
+                motions.append({"keyword": name, "values": Keyword.parseFields(line)})
+        elif name.startswith("DEFINE_CURVE") or name.startswith("DEFINE_TABLE"):
+            if name.endswith("_TITLE"):
+                data = data[1:]
+            if data:
+                curveId = int(Keyword.parseFields(data[0])[0])
+                ids.append(curveId)
+                if name in ("DEFINE_CURVE", "DEFINE_CURVE_TITLE"):
+                    curves[curveId] = [Keyword.parseFields(line)[:2] for line in data[1:]]
+
+    with open(getBasePath(workingDirectory), 'r') as fileObj:
+        streamBlocks(fileObj, handler)
+
+    loaded = []
+    for motion in motions:
+        values = motion["values"]
+        if len(values) > 3 and abs(int(values[1])) == 2 and int(values[2]) == 2 and any(float(point[1]) != 0 for point in curves.get(int(values[3]), [])):
+            target = [motion["keyword"], values[0]]
+            if target not in loaded:
+                loaded.append(target)
+    if not loaded:
+        raise Exception("The base deck has no prescribed y displacement to replace with the Sliding Test loads.")
+
+    removedCurves = set(int(motion["values"][3]) for motion in motions if [motion["keyword"], motion["values"][0]] in loaded)
+    keptCurves = set(int(motion["values"][3]) for motion in motions if [motion["keyword"], motion["values"][0]] not in loaded)
+    info = {"loaded": loaded, "removedCurves": sorted(removedCurves - keptCurves), "nextId": max(ids) + 1, "endTime": termination["endTime"]}
+
+    ResultStore.replaceFile(os.path.join(workingDirectory, DECKS_FOLDER, BASE_INFO_NAME), json.dumps(info, indent=1, sort_keys=True))
+    return info
+
+# Returns the scan results saved by saveBase
+# workingDirectory = path to the campaign directory
+def loadBase(workingDirectory):
+    with open(os.path.join(workingDirectory, DECKS_FOLDER, BASE_INFO_NAME), 'r') as fileObj:
+        return json.load(fileObj)
+
+# Returns the loads of a Sliding Test: target pressure in Pa, displacement duration in s, displacement distance in m,
+# analysis duration in s and movement speed in m/s
+# config = configuration dictionary returned by importConfig
+# state = WorkflowState.StateStore reference of the campaign
+# workingDirectory = path to the campaign directory
+# simIndex = simulation index of the Sliding Test
+def slidingLoads(config, state, workingDirectory, simIndex):
+    targetPressure = PressureSampling.getTargetPressure(config, workingDirectory, simIndex)
+    movementSpeed = float(config["MovementSpeed"])
+
+    # Determine the duration of the displacement loading step by interpolating the compression test data
+    compressionCurve = CompressionCurve.loadIndex(os.path.join(workingDirectory, "Results"))
+    displacementDuration = CompressionCurve.loadingDurations(compressionCurve, [targetPressure * float(state.get("TopFaceArea"))])[0]
+
+    # The sliding step moves the shoe over the sliding distance at the movement speed
+    slidingDuration = float(state.get("SlidingDistance")) / movementSpeed
+
+    return {
+        "targetPressure": targetPressure,
+        "displacementDuration": displacementDuration,
+        "displacementDistance": displacementDuration * movementSpeed,
+        "analysisDuration": displacementDuration + slidingDuration,
+        "movementSpeed": movementSpeed}
+
+# Returns the keywords of the Sliding Test loads, matching the conditions SlidingTest.py creates in Mechanical:
+# a y displacement ramp with zero x and z displacement until the end of the displacement step, then an x velocity with zero y and z velocity
+# info = scan results of the base deck
+# loads = Sliding Test loads returned by slidingLoads
+def loadKeywords(info, loads):
+    displacementDuration = loads["displacementDuration"]
+    analysisDuration = loads["analysisDuration"]
+    displacementCurve, velocityCurve, zeroCurve = info["nextId"], info["nextId"] + 1, info["nextId"] + 2
+
+    keywords = []
+    for name, target in info["loaded"]:
+        options = [option for option in name[len(MOTION_KEYWORD):].split("_") if option and not option == "ID"]
+        motion = Keyword.Keyword("_".join([MOTION_KEYWORD] + options))
+        motion.addCard([target, 2, 2, displacementCurve, 1.0, 0, displacementDuration, 0], "id,dof,vad,lcid,sf,vid,death,birth")
+        motion.addCard([target, 1, 2, zeroCurve, 1.0, 0, displacementDuration, 0])
+        motion.addCard([target, 3, 2, zeroCurve, 1.0, 0, displacementDuration, 0])
+        motion.addCard([target, 1, 0, velocityCurve, 1.0, 0, NEVER, displacementDuration])
+        motion.addCard([target, 2, 0, zeroCurve, 1.0, 0, NEVER, displacementDuration])
+        motion.addCard([target, 3, 0, zeroCurve, 1.0, 0, NEVER, displacementDuration])
+        keywords.append(motion)
+
+    for curveId, points, comment in [
+            (displacementCurve, [(0, 0), (displacementDuration, -loads["displacementDistance"]), (analysisDuration, -loads["displacementDistance"])], "Time vs y displacement"),
+            (velocityCurve, [(0, 0), (displacementDuration, loads["movementSpeed"]), (analysisDuration, loads["movementSpeed"])], "Time vs x velocity"),
+            (zeroCurve, [(0, 0), (analysisDuration, 0)], "Time vs zero motion")]:
+        curve = Keyword.Keyword("DEFINE_CURVE")
+        curve.addCard([curveId, 0, 1.0, 1.0, 0.0, 0.0], "lcid,sidr,sfa,sfo,offa,offo")
+        for i, point in enumerate(points):
+            curve.addCard(list(point), comment if i == 0 else None)
+        keywords.append(curve)
+
+    return keywords
+
+# Write the deck of a Sliding Test from the base deck of its campaign
+# workingDirectory = path to the campaign directory
+# deckPath = path to the Sliding Test deck
+# loads = Sliding Test loads returned by slidingLoads
+# extraKeywords = keywords added to the deck, e.g. the restart dump request; base deck keywords of the same name are left out
+def writeSlidingDeck(workingDirectory, deckPath, loads, extraKeywords=()):
+    info = loadBase(workingDirectory)
+    loaded = [tuple(target) for target in info["loaded"]]
+    removedCurves = set(info["removedCurves"])
+    replaced = set(keyword.name for keyword in extraKeywords)
+    state = {"termination": False}
+
+    # Output intervals keep their number of outputs over the Sliding Test's end time; a base deck scanned without its end time is copied as is
+    baseEndTime = info.get("endTime")
+    intervalScale = loads["analysisDuration"] / baseEndTime if baseEndTime else 1.0
+
+    temporaryPath = ResultStore.temporaryFilePath(deckPath)
+    with open(temporaryPath, 'w') as deck:
+        def handler(name, lines):
+            if name.startswith(MOTION_KEYWORD):
+                cards = [(idLine, line) for idLine, line in motionCards(name, lines[1:]) if (name, Keyword.parseFields(line)[0]) not in loaded]
+                if cards:
+                    deck.write(lines[0])
+                    for idLine, line in cards:
+                        if idLine is not None:
+                            deck.write(idLine)
+                        deck.write(line)
+            elif name in ("DEFINE_CURVE", "DEFINE_CURVE_TITLE"):
+                data = dataLines(lines[1:])
+                if name.endswith("_TITLE"):
+                    data = data[1:]
+                if not data or int(Keyword.parseFields(data[0])[0]) not in removedCurves:
+                    deck.writelines(lines)
+            elif name == "CONTROL_TERMINATION":
+                data = dataLines(lines[1:])
+                values = Keyword.parseFields(data[0]) if data else [0]
+                values[0] = loads["analysisDuration"]
+                deck.write(lines[0])
+                deck.write(",".join(Keyword.formatValue(value) for value in values) + "\n")
+                state["termination"] = True
+            elif name in replaced:
+                pass
+            elif name in OUTPUT_KEYWORDS and not intervalScale == 1.0:
+                # A zero or negative interval means the outputs follow a load curve, which is kept
+                data = dataLines(lines[1:])
+                values = Keyword.parseFields(data[0]) if data else []
+                if values and isinstance(values[0], (int, float)) and values[0] > 0:
+                    values[0] = values[0] * intervalScale
+                    deck.write(lines[0])
+                    deck.write(",".join(Keyword.formatValue(value) for value in values) + "\n")
+                    deck.writelines(lines[lines.index(data[0]) + 1:])
+                else:
+                    deck.writelines(lines)
+            elif not name == "END":
+                deck.writelines(lines)
+
+        with open(getBasePath(workingDirectory), 'r') as base:
+            streamBlocks(base, handler, deck.write)
+
+        keywords = loadKeywords(info, loads) + list(extraKeywords)
+        if not state["termination"]:
+            keywords.append(Keyword.Keyword("CONTROL_TERMINATION", [Keyword.Card([loads["analysisDuration"]], "endtim")]))
+        Keyword.writeKeywords(deck, keywords)
+        deck.write("*END\n")
+
+    ResultStore.renameOver(temporaryPath, deckPath)
+
+# Returns the run directory of a Sliding Test solved from a generated deck
+# workingDirectory = path to the campaign directory
+# simIndex = simulation index of the Sliding Test
+def getRunDirectory(workingDirectory, simIndex):
+    return os.path.join(workingDirectory, "Runs", str(simIndex))
+
+# Write the deck and job file of a Sliding Test into its run directory and record it as pending in the workflow state
+# Returns the run directory and the path to the deck
+# config = configuration dictionary returned by importConfig
+# state = WorkflowState.StateStore reference of the campaign
+# workingDirectory = path to the campaign directory
+# simIndex = simulation index of the Sliding Test
+def prepareRun(config, state, workingDirectory, simIndex):
+    runDirectory = getRunDirectory(workingDirectory, simIndex)
+    if not os.path.exists(runDirectory):
+        os.makedirs(runDirectory)
+    SteadyState.clear(runDirectory)
+
+    loads = slidingLoads(config, state, workingDirectory, simIndex)
+    deckPath = os.path.join(runDirectory, "input.k")
+    writeSlidingDeck(workingDirectory, deckPath, loads, ForceOutput.outputKeywords(config) + Restart.outputKeywords(config))
+    SlidingTestResults.writeJob(runDirectory, simIndex, loads["targetPressure"], loads["displacementDuration"], deckPath, loads["analysisDuration"])
+    state.updateSimulation(simIndex, pressure=loads["targetPressure"], directory=runDirectory, status="pending", input=deckPath)
+
+    return runDirectory, deckPath
@@ -0,0 +1,276 @@
+# Readers of the solver's own contact interface force output, as an alternative to Mechanical's file3.nlh force tracker file
+# rcforc is the ASCII interface resultant force file and binout the binary (LSDA) database LS-DYNA writes it to when *DATABASE_RCFORC asks for it
+# Both are read through a memory map: the rcforc lines of the selected interface are matched in place and the binout records are walked
+# from their headers, so only the time and selected force component values of the selected interface are ever read
+# Forces are returned in the tracker's convention, the force of the loading on the Shoe: the negative of the contact force on the Shoe (slave) side,
+# or the contact force on the Floor (master) side, whichever side is selected
+# The ForceSource column of the Config file picks the source ("Tracker", "rcforc" or "binout") and ForceInterface the contact interface ID
+# Usage: python Scripts/ForceOutput.py <run directory> [Tracker|rcforc|binout] [interface ID] [slave|master]
+
+import os
+import re
+import sys
+import array
+import struct
+import posixpath
+
+try:
+    import mmap
+except ImportError:
+    mmap = None
+
+import ImportExportUtilities
+import Keyword
+
+TRACKER_NAME = "file3.nlh"
+RCFORC_NAME = "rcforc"
+BINOUT_PREFIX = "binout"
+
+SOURCES = ["Tracker", "rcforc", "binout"]
+
+# Names LS-DYNA versions use for each side of a contact interface in rcforc
+SIDE_NAMES = {"slave": [b"slave", b"secondary"], "master": [b"master", b"main"]}
+
+# Codes of each side in the side array of the binout rcforc metadata
+BINOUT_SIDE_CODES = {"slave": 0, "master": 1}
+
+# LSDA record commands and data types
+LSDA_CD = 2
+LSDA_DATA = 3
+LSDA_TYPES = {1: "b", 2: "h", 3: "i", 4: "q", 5: "B", 6: "H", 7: "I", 8: "Q", 9: "f", 10: "d"}
+LSDA_TYPE_SIZES = {1: 1, 2: 2, 3: 4, 4: 8, 5: 1, 6: 2, 7: 4, 8: 8, 9: 4, 10: 8}
+PACK_CODES = {1: "B", 2: "H", 4: "I", 8: "Q"}
+
+# Returns the force source of the Config file as a (source, interface ID, side) tuple
+# config = configuration dictionary returned by importConfig
+def getForceSource(config):
+    source = config.get("ForceSource", "") or "Tracker"
+    matches = [name for name in SOURCES if name.lower() == source.strip().lower()]
+    if not matches:
+        raise Exception("Unknown ForceSource {}, expected one of {}.".format(source, ", ".join(SOURCES)))
+    return matches[0], int(config.get("ForceInterface", "") or 1), (config.get("ForceInterfaceSide", "") or "slave").strip().lower()
+
+# Returns the keywords that make LS-DYNA write the interface forces of a force source, none for the tracker
+# The rcforc output interval is the ForceOutputInterval of the Config file in s
+# config = configuration dictionary returned by importConfig
+def outputKeywords(config):
+    source = getForceSource(config)[0]
+    if source == "Tracker":
+        return []
+    binary = 1 if source == "rcforc" else 2
+    return [Keyword.Keyword("DATABASE_RCFORC", [Keyword.Card([float(config["ForceOutputInterval"]), binary, 0, 1], "dt,binary,lcur,ioopt")])]
+
+# Returns the (time, normal force, shear force) columns of a solver working directory, from the source picked in the Config file
+# directory = solver working directory, e.g. the MECH directory of a system or a run directory of a generated deck
+# forceSource = (source, interface ID, side) tuple returned by getForceSource, the tracker file when None
+# startTime = optional, rows with a time below this value are dropped
+# endTime = optional, rows with a time at or above this value are dropped
+def readForces(directory, forceSource=None, startTime=None, endTime=None):
+    source, interfaceId, side = forceSource if forceSource is not None else ("Tracker", 1, "slave")
+    if source == "rcforc":
+        return readRcforc(os.path.join(directory, RCFORC_NAME), interfaceId, side, startTime=startTime, endTime=endTime)
+    if source == "binout":
+        return readBinout(findBinoutFiles(directory), interfaceId, side, startTime=startTime, endTime=endTime)
+    return ImportExportUtilities.parseForceData(os.path.join(directory, TRACKER_NAME), startTime=startTime, endTime=endTime)
+
+# Returns a read-only view of the contents of a file, memory-mapped where possible
+# fileObj = file object opened in binary mode
+def mapFile(fileObj):
+    size = os.fstat(fileObj.fileno()).st_size
+    if mmap is None or size == 0:
+        return fileObj.read()
+    return mmap.mmap(fileObj.fileno(), 0, access=mmap.ACCESS_READ)
+
+# Returns the sign applied to the contact forces of a side, so they follow the tracker convention
+def sideSign(side):
+    if side not in SIDE_NAMES:
+        raise Exception("Unknown interface side {}, expected slave or master.".format(side))
+    return -1.0 if side == "slave" else 1.0
+
+# Returns the (time, normal force, shear force) columns of one side of a contact interface in an rcforc file
+# path = path to the rcforc file
+# interfaceId = contact interface ID
+# side = "slave" or "master"
+# components = force components of the normal and shear columns
+# startTime = optional, rows with a time below this value are dropped
+# endTime = optional, rows with a time at or above this value are dropped
+def readRcforc(path, interfaceId=1, side="slave", components=("y", "x"), startTime=None, endTime=None):
+    sign = sideSign(side)
+    pattern = re.compile(b"^[ \\t]*(?:" + b"|".join(SIDE_NAMES[side]) + b")[ \\t]+" + str(interfaceId).encode("ascii") +
+        b"[ \\t]+time[ \\t]*(\\S+)[ \\t]+x[ \\t]*(\\S+)[ \\t]+y[ \\t]*(\\S+)[ \\t]+z[ \\t]*(\\S+)", re.M)
+    groups = [2 + "xyz".index(component) for component in components]
+
+    columns = [array.array('d') for i in range(1 + len(components))]
+    with open(path, 'rb') as fileObj:
+        data = mapFile(fileObj)
+        try:
+            for match in pattern.finditer(data):
+                sampleTime = float(match.group(1))
+                if (startTime is not None and sampleTime < startTime) or (endTime is not None and sampleTime >= endTime):
+                    continue
+                columns[0].append(sampleTime)
+                for column, group in zip(columns[1:], groups):
+                    column.append(sign * float(match.group(group)))
+        finally:
+            if mmap is not None and isinstance(data, mmap.mmap):
+                data.close()
+    return columns
+
+# Returns the paths of the binout files of a solver working directory, binout or binout0000, binout0001, ... for MPP runs
+# directory = solver working directory
+def findBinoutFiles(directory):
+    paths = [os.path.join(directory, name) for name in sorted(os.listdir(directory)) if re.match(BINOUT_PREFIX + r"\d*$", name)]
+    if not paths:
+        raise Exception("No binout file found in {}.".format(directory))
+    return paths
+
+# Data records of an LSDA (binout) file, read through a memory map
+# Records are walked from their headers only; record data is read on request, one variable or one value at a time
+# path = path to the binout file
+class BinoutFile(object):
+    def __init__(self, path):
+        self.path = path
+        self.fileObj = open(path, 'rb')
+        self.data = mapFile(self.fileObj)
+        self.index = None
+
+        header = struct.unpack("8B", self.data[0:8])
+        self.headerLength, lengthSize, offsetSize, commandSize, typeSize = header[0:5]
+        self.byteOrder = "<" if header[5] else ">"
+        self.recordHeader = struct.Struct(self.byteOrder + PACK_CODES[lengthSize] + PACK_CODES[commandSize])
+        self.dataHeader = struct.Struct(self.byteOrder + PACK_CODES[lengthSize] + PACK_CODES[commandSize] + PACK_CODES[typeSize] + "B")
+
+    def close(self):
+        if mmap is not None and isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.fileObj.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+        return False
+
+    # Yields the (directory, name, type ID, data position, data length) of each data record in file order
+    def records(self):
+        directory = "/"
+        offset = self.headerLength
+        size = len(self.data)
+        while offset + self.recordHeader.size <= size:
+            length, command = self.recordHeader.unpack_from(self.data, offset)
+            if length < self.recordHeader.size:
+                break
+            if command == LSDA_CD:
+                path = self.data[offset + self.recordHeader.size:offset + length].decode("ascii", "replace").rstrip("\0")
+                directory = posixpath.normpath(posixpath.join(directory, path))
+            elif command == LSDA_DATA:
+                length, command, typeId, nameLength = self.dataHeader.unpack_from(self.data, offset)
+                position = offset + self.dataHeader.size
+                name = self.data[position:position + nameLength].decode("ascii", "replace")
+                yield directory, name, typeId, position + nameLength, offset + length - position - nameLength
+            offset += length
+
+    # Returns the values of a record as a list
+    def values(self, typeId, position, length):
+        if typeId not in LSDA_TYPES:
+            return []
+        count = length // LSDA_TYPE_SIZES[typeId]
+        return list(struct.unpack_from("{}{}{}".format(self.byteOrder, count, LSDA_TYPES[typeId]), self.data, position))
+
+    # Returns one value of a record, reading only that value
+    # i = position of the value in the record
+    def value(self, typeId, position, i):
+        return struct.unpack_from(self.byteOrder + LSDA_TYPES[typeId], self.data, position + i * LSDA_TYPE_SIZES[typeId])[0]
+
+    # Returns the values of a variable as a list, or None if the variable does not exist
+    # The records of the file are indexed by directory and name on the first call
+    def read(self, directory, name):
+        if self.index is None:
+            self.index = dict(((recordDirectory, recordName), (typeId, position, length)) for recordDirectory, recordName, typeId, position, length in self.records())
+        if (directory, name) not in self.index:
+            return None
+        return self.values(*self.index[(directory, name)])
+
+# Returns the (time, normal force, shear force) columns of one side of a contact interface in the rcforc data of binout files
+# Each file is walked twice: up to its rcforc metadata, then through its output times, keeping only the selected values
+# paths = paths to the binout files of a run
+# interfaceId = contact interface ID
+# side = "slave" or "master"
+# components = force components of the normal and shear columns
+# startTime = optional, rows with a time below this value are dropped
+# endTime = optional, rows with a time at or above this value are dropped
+def readBinout(paths, interfaceId=1, side="slave", components=("y", "x"), startTime=None, endTime=None):
+    sign = sideSign(side)
+    names = ["time"] + [component + "_force" for component in components]
+    columns = [array.array('d') for name in names]
+
+    def addRow(values):
+        if len(values) < len(names):
+            return
+        sampleTime = values["time"]
+        if (startTime is not None and sampleTime < startTime) or (endTime is not None and sampleTime >= endTime):
+            return
+        columns[0].append(sampleTime)
+        for column, name in zip(columns[1:], names[1:]):
+            column.append(sign * values[name])
+
+    for path in paths:
+        with BinoutFile(path) as binout:
+            metadata = {}
+            for directory, name, typeId, position, length in binout.records():
+                if directory == "/rcforc/metadata" and name in ("ids", "side"):
+                    metadata[name] = binout.values(typeId, position, length)
+                    if len(metadata) == 2:
+                        break
+            if "ids" not in metadata:
+                continue
+            entry = interfacePosition(metadata["ids"], metadata.get("side"), interfaceId, side)
+
+            current = None
+            values = {}
+            for directory, name, typeId, position, length in binout.records():
+                if not directory == current:
+                    addRow(values)
+                    current = directory
+                    values = {}
+                if name in names and directory.startswith("/rcforc/d"):
+                    values[name] = binout.value(typeId, position, 0 if name == "time" else entry)
+            addRow(values)
+
+    # The files of an MPP run may hold their output times out of order, and several of them the same output time;
+    # the rows are sorted by time and the first row of each time is kept
+    times = columns[0]
+    if any(times[i] <= times[i - 1] for i in range(1, len(times))):
+        order = sorted(range(len(times)), key=lambda i: times[i])
+        order = [i for k, i in enumerate(order) if k == 0 or times[i] > times[order[k - 1]]]
+        columns = [array.array('d', [column[i] for i in order]) for column in columns]
+    return columns
+
+# Returns the position of one side of a contact interface in the force arrays of binout rcforc data
+# Without a side array, the slave side is the first entry of the interface and the master side the second
+# ids = interface ID of each entry
+# sides = side code of each entry, or None
+def interfacePosition(ids, sides, interfaceId, side):
+    positions = [i for i, entryId in enumerate(ids) if entryId == interfaceId]
+    if sides is not None:
+        positions = [i for i in positions if sides[i] == BINOUT_SIDE_CODES[side]]
+    elif side == "master":
+        positions = positions[1:]
+    if not positions:
+        raise Exception("The binout rcforc data has no {} side of contact interface {}.".format(side, interfaceId))
+    return positions[0]
+
+if __name__ == "__main__":
+    if not 2 <= len(sys.argv) <= 5:
+        print("Usage: python ForceOutput.py <run directory> [Tracker|rcforc|binout] [interface ID] [slave|master]")
+        sys.exit(2)
+    source = getForceSource({"ForceSource": sys.argv[2] if len(sys.argv) > 2 else "",
+        "ForceInterface": sys.argv[3] if len(sys.argv) > 3 else "", "ForceInterfaceSide": sys.argv[4] if len(sys.argv) > 4 else ""})
+    time, normal, shear = readForces(sys.argv[1], source)
+    print("{} samples from {}".format(len(time), source[0]))
+    if len(time):
+        averageNormal = sum(normal) / len(normal)
+        averageShear = sum(shear) / len(shear)
+        print("Time {:.6e} s to {:.6e} s | average normal force {:.6e} N | average shear force {:.6e} N | COF {:.4f}".format(
+            time[0], time[-1], averageNormal, averageShear, averageShear / -averageNormal if averageNormal else 0.0))
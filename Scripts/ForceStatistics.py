@@ -0,0 +1,222 @@
+# Single-pass streaming statistics of a Sliding Test force history
+# The history is read in chunks and reduced into a fixed number of time bins, each holding shifted sums and sums of squares
+# of the normal and shear force, so memory does not grow with the length of the run
+# The steady window is found from the bins' COF: it starts at the first bin after which every bin stays within a relative tolerance
+# of the mean COF of the second half of the run, so the stick/slip transient at the start of sliding is left out
+# A run whose solve was stopped by SteadyState only holds the steady window it found, so all of it is taken as steady
+# Means, standard deviations and 95% confidence intervals are computed over the steady window; the confidence intervals use the bins
+# as batch means, since consecutive samples are strongly correlated
+# The bin COF values give the COF time series of the run, and the bin COF standard deviation its spread over the steady window
+
+import math
+import bisect
+import operator
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Number of samples reduced at a time
+CHUNK_SIZE = 1 << 16
+
+# Default number of time bins of a run, and relative COF tolerance of the steady window
+DEFAULT_BINS = 100
+DEFAULT_TOLERANCE = 0.05
+
+# Two-sided 95% Student t quantiles by degrees of freedom, the normal quantile is used above the table
+T_QUANTILES = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228, 2.201, 2.179, 2.160, 2.145, 2.131,
+    2.120, 2.110, 2.101, 2.093, 2.086, 2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+
+# Returns the two-sided 95% Student t quantile of a number of degrees of freedom
+def tQuantile(degreesOfFreedom):
+    if degreesOfFreedom < 1:
+        return float("nan")
+    if degreesOfFreedom <= len(T_QUANTILES):
+        return T_QUANTILES[degreesOfFreedom - 1]
+    return 1.96
+
+# Online count, mean and variance of a stream of values
+# Values are summed relative to a shift, the first value seen, so the variance keeps its precision when the mean is far from zero
+# Accumulators with the same shift can be merged by adding their sums
+class Accumulator(object):
+    def __init__(self, shift=None):
+        self.shift = shift
+        self.count = 0
+        self.total = 0.0
+        self.totalSquares = 0.0
+
+    def add(self, value):
+        if self.shift is None:
+            self.shift = value
+        deviation = value - self.shift
+        self.count += 1
+        self.total += deviation
+        self.totalSquares += deviation * deviation
+
+    # Add a segment of values at once, from its plain sums
+    # count = number of values
+    # total = sum of the values
+    # totalSquares = sum of the squared values
+    def addSums(self, count, total, totalSquares):
+        if count == 0:
+            return
+        if self.shift is None:
+            self.shift = total / count
+        self.count += count
+        self.total += total - count * self.shift
+        self.totalSquares += totalSquares - 2.0 * self.shift * total + count * self.shift * self.shift
+
+    # Add the sums of another accumulator
+    def merge(self, other):
+        if other.count == 0:
+            return
+        if self.shift is None:
+            self.shift = other.shift
+        offset = other.shift - self.shift
+        self.count += other.count
+        self.total += other.total + other.count * offset
+        self.totalSquares += other.totalSquares + 2.0 * offset * other.total + other.count * offset * offset
+
+    def mean(self):
+        return self.shift + self.total / self.count if self.count else float("nan")
+
+    # Returns the sample variance
+    def variance(self):
+        if self.count < 2:
+            return 0.0
+        return max(0.0, (self.totalSquares - self.total * self.total / self.count) / (self.count - 1))
+
+    def std(self):
+        return math.sqrt(self.variance())
+
+# Returns an accumulator of a sequence of values
+def accumulate(values):
+    accumulator = Accumulator()
+    for value in values:
+        accumulator.add(value)
+    return accumulator
+
+# Returns the half width of the 95% confidence interval of the mean of a list of batch means
+def confidenceHalfWidth(values):
+    accumulator = accumulate(values)
+    if accumulator.count < 2:
+        return float("nan")
+    return tQuantile(accumulator.count - 1) * accumulator.std() / math.sqrt(accumulator.count)
+
+# Normal and shear force accumulators of each time bin of a run
+# startTime, endTime = time range of the run in s
+# numBins = number of bins
+class BinnedForces(object):
+    def __init__(self, startTime, endTime, numBins, normalShift=0.0, shearShift=0.0):
+        self.startTime = startTime
+        self.endTime = endTime
+        self.numBins = numBins
+        self.width = (endTime - startTime) / numBins if endTime > startTime else 1.0
+        self.normal = [Accumulator(normalShift) for i in range(numBins)]
+        self.shear = [Accumulator(shearShift) for i in range(numBins)]
+
+    # Returns the bin of a time
+    def binOf(self, sampleTime):
+        return min(self.numBins - 1, max(0, int((sampleTime - self.startTime) / self.width)))
+
+    # Reduce a chunk of samples into the bins
+    # Samples are in increasing time order, so each bin's samples are one contiguous segment of the chunk
+    # time, normal, shear = equal length sequences of samples
+    def addChunk(self, time, normal, shear):
+        if numpy is not None:
+            self.addChunkNumpy(time, normal, shear)
+            return
+        start = 0
+        while start < len(time):
+            i = self.binOf(time[start])
+            end = len(time) if i == self.numBins - 1 else max(start + 1, bisect.bisect_left(time, self.startTime + (i + 1) * self.width, start))
+            for accumulator, values in [(self.normal[i], normal[start:end]), (self.shear[i], shear[start:end])]:
+                accumulator.addSums(len(values), math.fsum(values), math.fsum(map(operator.mul, values, values)))
+            start = end
+
+    def addChunkNumpy(self, time, normal, shear):
+        bins = numpy.clip(((numpy.asarray(time, dtype=float) - self.startTime) / self.width).astype(int), 0, self.numBins - 1)
+        counts = numpy.bincount(bins, minlength=self.numBins)
+        for accumulators, values in [(self.normal, normal), (self.shear, shear)]:
+            deviations = numpy.asarray(values, dtype=float) - accumulators[0].shift
+            totals = numpy.bincount(bins, weights=deviations, minlength=self.numBins)
+            totalSquares = numpy.bincount(bins, weights=deviations * deviations, minlength=self.numBins)
+            for i in numpy.nonzero(counts)[0]:
+                accumulator = accumulators[i]
+                accumulator.count += int(counts[i])
+                accumulator.total += float(totals[i])
+                accumulator.totalSquares += float(totalSquares[i])
+
+    # Returns the (bin center time, COF) pairs of the bins holding samples
+    def cofSeries(self):
+        series = []
+        for i in range(self.numBins):
+            if self.normal[i].count and not self.normal[i].mean() == 0:
+                series.append((self.startTime + (i + 0.5) * self.width, self.shear[i].mean() / -self.normal[i].mean()))
+        return series
+
+# Returns the first bin of the steady window of a run
+# The window starts at the first bin after which every bin COF is within the tolerance of the mean COF of the second half of the bins,
+# and always holds the second half of the bins
+# series = list of (bin index, COF) pairs of the bins holding samples
+# tolerance = largest relative difference between a bin COF and the steady COF
+def findSteadyStart(series, tolerance):
+    if not series:
+        return 0
+    tail = [cof for i, cof in series[len(series) // 2:]]
+    steadyCof = sum(tail) / len(tail)
+    start = series[len(series) // 2][0]
+    for i, cof in reversed(series[:len(series) // 2]):
+        if abs(cof - steadyCof) > tolerance * abs(steadyCof):
+            break
+        start = i
+    return start
+
+# Reduce the force history of a run in one pass
+# Returns a dictionary of the run's sample count, its steady window, the mean, standard deviation and 95% confidence half width
+# of the normal force, shear force and COF over the steady window, and the COF time series of the bins
+# columns = (time, normal force, shear force) columns supporting len, indexing and slicing, e.g. returned by ResultStore.openForceData,
+#           which reads each chunk from disk, so a run is reduced in constant memory with or without NumPy
+# numBins = number of time bins
+# tolerance = largest relative difference between a bin COF and the steady COF
+# steadyStart = first bin of the steady window, e.g. 0 for a history already trimmed to its steady window; found from the bin COF when None
+def summarize(columns, numBins=DEFAULT_BINS, tolerance=DEFAULT_TOLERANCE, steadyStart=None):
+    time, normal, shear = columns[0], columns[1], columns[2]
+    numSamples = len(time)
+    if numSamples == 0:
+        return {"samples": 0, "steadySamples": 0}
+
+    forces = BinnedForces(float(time[0]), float(time[numSamples - 1]), numBins, float(normal[0]), float(shear[0]))
+    for start in range(0, numSamples, CHUNK_SIZE):
+        forces.addChunk(time[start:start + CHUNK_SIZE], normal[start:start + CHUNK_SIZE], shear[start:start + CHUNK_SIZE])
+
+    # Bin COF values by bin index, then by bin center time for the series
+    bins = [i for i in range(numBins) if forces.normal[i].count and not forces.normal[i].mean() == 0]
+    binCofs = [(i, forces.shear[i].mean() / -forces.normal[i].mean()) for i in bins]
+    if steadyStart is None:
+        steadyStart = findSteadyStart(binCofs, tolerance)
+    steadyBins = [i for i in bins if i >= steadyStart]
+
+    normalSteady = Accumulator(forces.normal[0].shift)
+    shearSteady = Accumulator(forces.shear[0].shift)
+    for i in steadyBins:
+        normalSteady.merge(forces.normal[i])
+        shearSteady.merge(forces.shear[i])
+
+    normalMean = normalSteady.mean()
+    shearMean = shearSteady.mean()
+    return {
+        "samples": numSamples,
+        "steadyStart": forces.startTime + steadyStart * forces.width,
+        "steadySamples": normalSteady.count,
+        "normalMean": normalMean,
+        "normalStd": normalSteady.std(),
+        "normalCi": confidenceHalfWidth([forces.normal[i].mean() for i in steadyBins]),
+        "shearMean": shearMean,
+        "shearStd": shearSteady.std(),
+        "shearCi": confidenceHalfWidth([forces.shear[i].mean() for i in steadyBins]),
+        "cof": shearMean / -normalMean if normalMean else float("nan"),
+        "cofStd": accumulate([cof for i, cof in binCofs if i >= steadyStart]).std(),
+        "cofCi": confidenceHalfWidth([cof for i, cof in binCofs if i >= steadyStart]),
+        "cofSeries": [[binTime, cof] for binTime, cof in forces.cofSeries()]}
@@ -0,0 +1,198 @@
+# Fitted, compact COF vs pressure friction tables
+# The raw table written by PostProcessing has one row and one curve per Sliding Test; the full-shoe simulations that use the snippet
+# look the table up in every contact evaluation, so a fitted table with fewer rows is cheaper to evaluate
+# Two fits are available:
+#   Monotone = isotonic regression of the COF in the direction of its overall trend, interpolated by a monotone cubic (PCHIP) spline
+#   Power = least squares power law COF = a * pressure ^ b, fitted in log space
+# The fit is then resampled with the fewest points whose linear interpolation, as LS-DYNA does between table rows, stays within a
+# COF tolerance of the fit over the pressure range of the data
+# The fit parameters, errors and resampled points are reported in Results/FrictionFit.json
+
+import os
+import json
+import math
+
+import ResultStore
+
+REPORT_NAME = "FrictionFit.json"
+METHODS = ["None", "Monotone", "Power"]
+
+# Number of pressures the fit is checked at when resampling
+GRID_POINTS = 1000
+
+# Returns the fit method and COF tolerance of the Config file
+# config = configuration dictionary returned by importConfig
+def getFitSettings(config):
+    method = config.get("FrictionFit", "") or "None"
+    matches = [name for name in METHODS if name.lower() == method.strip().lower()]
+    if not matches:
+        raise Exception("Unknown FrictionFit {}, expected one of {}.".format(method, ", ".join(METHODS)))
+    return matches[0], float(config.get("FrictionFitTolerance", "") or 0.002)
+
+# Returns (pressure, cof) pairs in ascending pressure order with the COF of equal pressures averaged
+# points = iterable of (pressure, cof) pairs
+def uniquePoints(points):
+    merged = []
+    for pressure, cof in sorted(points):
+        if merged and merged[-1][0] == pressure:
+            merged[-1][1].append(cof)
+        else:
+            merged.append((pressure, [cof]))
+    return [(pressure, sum(cofs) / len(cofs)) for pressure, cofs in merged]
+
+# Returns the isotonic regression of a list of values, non-decreasing when increasing is True and non-increasing otherwise
+# Adjacent values that violate the order are pooled into their mean
+def isotonic(values, increasing=True):
+    sign = 1.0 if increasing else -1.0
+    blocks = []
+    for value in values:
+        blocks.append([sign * value, 1])
+        while len(blocks) > 1 and blocks[-2][0] > blocks[-1][0]:
+            value, count = blocks.pop()
+            blocks[-1] = [(blocks[-1][0] * blocks[-1][1] + value * count) / (blocks[-1][1] + count), blocks[-1][1] + count]
+    fitted = []
+    for value, count in blocks:
+        fitted.extend([sign * value] * count)
+    return fitted
+
+# Returns the slopes of the monotone cubic Hermite interpolation of points, by the Fritsch-Carlson method
+# x = increasing abscissas
+# y = ordinates
+def pchipSlopes(x, y):
+    n = len(x)
+    if n < 2:
+        return [0.0] * n
+    h = [x[i + 1] - x[i] for i in range(n - 1)]
+    delta = [(y[i + 1] - y[i]) / h[i] for i in range(n - 1)]
+    if n == 2:
+        return [delta[0], delta[0]]
+
+    slopes = [0.0] * n
+    for i in range(1, n - 1):
+        if delta[i - 1] * delta[i] > 0:
+            w1 = 2 * h[i] + h[i - 1]
+            w2 = h[i] + 2 * h[i - 1]
+            slopes[i] = (w1 + w2) / (w1 / delta[i - 1] + w2 / delta[i])
+
+    # One-sided end slopes, limited so the end intervals stay monotone
+    for end, inner, d0, d1, h0, h1 in [(0, 1, delta[0], delta[1], h[0], h[1]), (n - 1, n - 2, delta[-1], delta[-2], h[-1], h[-2])]:
+        slope = ((2 * h0 + h1) * d0 - h0 * d1) / (h0 + h1)
+        if slope * d0 <= 0:
+            slope = 0.0
+        elif d0 * d1 <= 0 and abs(slope) > abs(3 * d0):
+            slope = 3 * d0
+        slopes[end] = slope
+    return slopes
+
+# Returns the value of a cubic Hermite spline at a point, constant outside of the data range
+def hermite(x, y, slopes, value):
+    if value <= x[0]:
+        return y[0]
+    if value >= x[-1]:
+        return y[-1]
+    lo, hi = 0, len(x) - 1
+    while hi - lo > 1:
+        middle = (lo + hi) // 2
+        if x[middle] <= value:
+            lo = middle
+        else:
+            hi = middle
+    h = x[hi] - x[lo]
+    t = (value - x[lo]) / h
+    return ((2 * t ** 3 - 3 * t ** 2 + 1) * y[lo] + (t ** 3 - 2 * t ** 2 + t) * h * slopes[lo] +
+        (-2 * t ** 3 + 3 * t ** 2) * y[hi] + (t ** 3 - t ** 2) * h * slopes[hi])
+
+# Returns the monotone fit of (pressure, cof) points as a (function, parameters) pair
+# The COF trend direction is the sign of the correlation between pressure and COF
+def fitMonotone(points):
+    pressures = [point[0] for point in points]
+    cofs = [point[1] for point in points]
+    meanPressure = sum(pressures) / len(pressures)
+    meanCof = sum(cofs) / len(cofs)
+    increasing = sum((p - meanPressure) * (c - meanCof) for p, c in points) >= 0
+
+    fitted = isotonic(cofs, increasing)
+    slopes = pchipSlopes(pressures, fitted)
+    parameters = {"increasing": increasing, "knots": [[p, c] for p, c in zip(pressures, fitted)]}
+    return (lambda pressure: hermite(pressures, fitted, slopes, pressure)), parameters
+
+# Returns the power law fit COF = a * pressure ^ b of (pressure, cof) points as a (function, parameters) pair
+def fitPower(points):
+    if any(pressure <= 0 or cof <= 0 for pressure, cof in points):
+        raise Exception("The Power friction fit needs positive pressures and COF values.")
+    logs = [(math.log(pressure), math.log(cof)) for pressure, cof in points]
+    meanX = sum(x for x, y in logs) / len(logs)
+    meanY = sum(y for x, y in logs) / len(logs)
+    sxx = sum((x - meanX) ** 2 for x, y in logs)
+    b = sum((x - meanX) * (y - meanY) for x, y in logs) / sxx if sxx > 0 else 0.0
+    a = math.exp(meanY - b * meanX)
+    return (lambda pressure: a * pressure ** b), {"a": a, "b": b}
+
+# Returns the value at a point of the linear interpolation of (x, y) pairs in ascending x order
+def interpolate(points, value):
+    if value <= points[0][0]:
+        return points[0][1]
+    for (x0, y0), (x1, y1) in zip(points, points[1:]):
+        if value <= x1:
+            return y0 + (y1 - y0) * (value - x0) / (x1 - x0)
+    return points[-1][1]
+
+# Returns the fewest grid points whose linear interpolation stays within a tolerance of a function over the grid
+# Each segment is extended greedily for as long as the chord stays within the tolerance at every grid point it spans
+# function = function of one variable
+# grid = ascending list of abscissas
+# tolerance = largest absolute difference between the chords and the function
+def resample(function, grid, tolerance):
+    values = [function(x) for x in grid]
+    indices = [0]
+    start = 0
+    while start < len(grid) - 1:
+        end = start + 1
+        while end + 1 < len(grid) and chordError(grid, values, start, end + 1) <= tolerance:
+            end += 1
+        indices.append(end)
+        start = end
+    return [(grid[i], values[i]) for i in indices]
+
+# Returns the largest difference between the chord from grid point start to grid point end and the values in between
+def chordError(grid, values, start, end):
+    slope = (values[end] - values[start]) / (grid[end] - grid[start])
+    return max(abs(values[start] + slope * (grid[i] - grid[start]) - values[i]) for i in range(start, end + 1))
+
+# Fit (pressure, cof) points and resample the fit into a compact friction table
+# Returns a report dictionary holding the method, fit parameters, fit and table errors and the resampled (pressure, cof) table
+# points = iterable of (pressure, cof) pairs
+# method = "Monotone" or "Power"
+# tolerance = largest COF difference between the resampled table and the fit
+def fitTable(points, method, tolerance):
+    points = uniquePoints(points)
+    if len(points) < 2:
+        return {"method": method, "parameters": {}, "table": points, "rawPoints": len(points)}
+
+    function, parameters = fitMonotone(points) if method == "Monotone" else fitPower(points)
+    residuals = [cof - function(pressure) for pressure, cof in points]
+
+    minPressure, maxPressure = points[0][0], points[-1][0]
+    grid = [minPressure + (maxPressure - minPressure) * i / (GRID_POINTS - 1) for i in range(GRID_POINTS)]
+    table = resample(function, grid, tolerance)
+
+    return {
+        "method": method,
+        "parameters": parameters,
+        "tolerance": tolerance,
+        "rawPoints": len(points),
+        "tablePoints": len(table),
+        "fitRmsError": math.sqrt(sum(residual * residual for residual in residuals) / len(residuals)),
+        "fitMaxError": max(abs(residual) for residual in residuals),
+        "tableMaxErrorToFit": max(abs(interpolate(table, x) - function(x)) for x in grid),
+        "tableMaxErrorToData": max(abs(interpolate(table, pressure) - cof) for pressure, cof in points),
+        "table": [[pressure, cof] for pressure, cof in table]}
+
+# Write a fit report to the Results directory
+# Returns the path to the report
+# resultsFolderPath = path to the Results directory
+# report = report dictionary returned by fitTable
+def writeReport(resultsFolderPath, report):
+    path = os.path.join(resultsFolderPath, REPORT_NAME)
+    ResultStore.replaceFile(path, json.dumps(report, indent=1, sort_keys=True))
+    return path
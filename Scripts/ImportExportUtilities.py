@@ -1,6 +1,22 @@
+import os
 import csv
+import array
+import hashlib
 import xml.etree.ElementTree as ET
 
+try:
+    import mmap
+except ImportError:
+    mmap = None
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Whitespace bytes that separate the values of COLDATA
+SPACE_BYTES = [b" ", b"\t", b"\r", b"\n"]
+
 # Import Configuration file and return a dictionary of values extracted from the file
 # path = path to the configuration file
 def importConfig(path):
@@ -13,24 +29,223 @@ def importConfig(path):
     config = {}
     for i in range(len(rows[0])):
         data = [row[i] for row in rows[1:] if not row[i] == '']
-        config[rows[0][i]] = data if len(data) > 1 else data[0]
+        config[rows[0][i]] = data if len(data) > 1 else (data[0] if data else '')
 
     return config
 
+# Returns the list of target contact pressures of the Sliding Tests, evenly spaced from MinPressure to MaxPressure
+# config = configuration dictionary returned by importConfig
+def getTargetPressures(config):
+    numSims = int(config["NumberOfSimulations"])
+    minPressure = float(config["MinPressure"])
+    maxPressure = float(config["MaxPressure"])
+    if numSims == 1:
+        return [minPressure]
+    return [(maxPressure - minPressure) / (numSims - 1) * i + minPressure for i in range(numSims)]
+
+# Returns the path of the geometry file imported by the workflow, the first .agdb file in the Geometry directory
+# workingDirectory = path to the workflow working directory
+def getGeometryPath(workingDirectory):
+    path = os.path.join(workingDirectory, "Geometry")
+    files = [file for file in os.listdir(path) if file.endswith(".agdb")]
+    files.sort()
+    return os.path.join(path, files[0])
+
+# Returns the Mechanical working directory of an analysis system
+# The project _files directory is located by listing the working directory
+# workingDirectory = path to the workflow working directory
+# systemName = name of the system directory, e.g. "SYS" for the compression test or "SYS-1" for the first sliding test
+def getSystemDirectory(workingDirectory, systemName):
+    filesFolder = [folder for folder in os.listdir(workingDirectory) if folder.endswith("_files")][0]
+    return os.path.join(workingDirectory, filesFolder, "dp0", systemName, "MECH")
+
+# Returns the SHA-1 hex digest of a file, read in chunks
+# path = path to the file
+# chunkSize = number of bytes read from the file at a time
+def hashFile(path, chunkSize=1 << 20):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as fileObj:
+        while True:
+            chunk = fileObj.read(chunkSize)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# Returns the element size of the mesh in m
+# config = configuration dictionary returned by importConfig
+def getMeshSize(config):
+    return float(config["SizeScale"]) * float(config["MeshSizeFactor"])
+
+# Returns the key of the mesh of a campaign, from the hash of the geometry file and the mesh size, the only inputs of the mesh controls set by ls_dyna.mesh
+# config = configuration dictionary returned by importConfig
+# workingDirectory = path to the campaign directory
+def getMeshKey(config, workingDirectory):
+    return "{} {!r}".format(hashFile(getGeometryPath(workingDirectory)), getMeshSize(config))
+
+# Returns a boolean setting from the configuration dictionary
+# Optional settings that are missing from Config.csv fall back to the default value
+# config = configuration dictionary returned by importConfig
+# key = name of the setting
+# default = value returned when the setting is not defined
+def getConfigFlag(config, key, default=False):
+    if key not in config:
+        return default
+    return config[key].strip().lower() in ["1", "true", "yes", "on"]
+
+# Parser target that tokenizes the COLDATA text of a force tracker file as it is fed in
+# Values are converted to floats and stored directly into typed column arrays
+# Rows outside of the [startTime, endTime) window are dropped while parsing
+# When onRow is given, each row is passed to it as a list instead of being stored
+class ForceDataTarget(object):
+    def __init__(self, numColumns, startTime, endTime, onRow=None):
+        self.numColumns = numColumns
+        self.startTime = startTime
+        self.endTime = endTime
+        self.onRow = onRow
+        self.columns = [array.array('d') for i in range(numColumns)]
+        self.inColData = False
+        self.skipLine = False
+        self.partial = ''
+        self.row = []
+        self.done = False
+
+    def start(self, tag, attrib):
+        if tag == "COLDATA" and not self.done:
+            self.inColData = True
+            # The first line of COLDATA is not part of the data
+            self.skipLine = True
+
+    def end(self, tag):
+        if tag == "COLDATA" and self.inColData:
+            self.flushToken()
+            self.inColData = False
+            self.done = True
+
+    def data(self, text):
+        if not self.inColData:
+            return
+
+        if self.skipLine:
+            newline = text.find('\n')
+            if newline < 0:
+                return
+            self.skipLine = False
+            text = text[newline + 1:]
+
+        # Tokens may be split across chunks, so hold on to the trailing fragment
+        text = self.partial + text
+        tokens = text.split()
+        if tokens and not text[-1].isspace():
+            self.partial = tokens.pop()
+        else:
+            self.partial = ''
+
+        for token in tokens:
+            self.addValue(float(token))
+
+    def close(self):
+        return self.columns
+
+    def flushToken(self):
+        if self.partial:
+            self.addValue(float(self.partial))
+            self.partial = ''
+
+    def addValue(self, value):
+        self.row.append(value)
+        if len(self.row) < self.numColumns:
+            return
+
+        time = self.row[0]
+        if (self.startTime is None or time >= self.startTime) and (self.endTime is None or time < self.endTime):
+            if self.onRow is not None:
+                self.onRow(self.row)
+            else:
+                for column, element in zip(self.columns, self.row):
+                    column.append(element)
+        self.row = []
+
 # Parse the raw data file of the External Force Tracker results
-def parseForceData(path):
-    forceTrackerTree = ET.parse(path)
-    forceTracker = forceTrackerTree.getroot()
-    forceTracker.find("COLDATA").text
-    rawResults = [element.split(' ') for element in forceTracker.find("COLDATA").text.splitlines()[1:]]
-    results = []
-    row = []
-    for rawRow in rawResults:
-        for element in rawRow:
-            if (not element == ''):
-                if len(row) < 3:
-                    row.append("{:.4e}".format(float(element)))
-                else:
-                    results.append(row)
-                    row = ["{:.4e}".format(float(element))]
-    return results
+# Returns a list of typed column arrays (time, normal force, shear force)
+# A file cut short by an interrupted solve keeps the complete rows written before the interruption
+# path = path to the file3.nlh force tracker file
+# startTime = optional, rows with a time below this value are dropped
+# endTime = optional, rows with a time at or above this value are dropped
+# numColumns = number of values per row of COLDATA
+# chunkSize = number of bytes read from the file at a time
+def parseForceData(path, startTime=None, endTime=None, numColumns=3, chunkSize=1 << 20):
+    if numpy is not None and mmap is not None:
+        return parseColData(path, startTime, endTime, numColumns, chunkSize)
+
+    target = ForceDataTarget(numColumns, startTime, endTime)
+    parser = ET.XMLParser(target=target)
+    with open(path, 'rb') as fileObj:
+        while True:
+            chunk = fileObj.read(chunkSize)
+            if not chunk:
+                break
+            parser.feed(chunk)
+    try:
+        return parser.close()
+    except ET.ParseError:
+        return target.close()
+
+# Append the values of a NumPy array to a typed column array
+def appendValues(column, values):
+    data = numpy.ascontiguousarray(values, dtype=float).tobytes()
+    if hasattr(column, "frombytes"):
+        column.frombytes(data)
+    else:
+        column.fromstring(data)
+
+# Parse the COLDATA of a force tracker file with NumPy, where it is available
+# The file is memory-mapped and its values are converted a chunk at a time, instead of one token at a time by the XML parser target
+# Returns the same column arrays as parseForceData, including for a file cut short by an interrupted solve
+# path, startTime, endTime, numColumns, chunkSize = see parseForceData
+def parseColData(path, startTime, endTime, numColumns, chunkSize):
+    columns = [array.array('d') for i in range(numColumns)]
+    with open(path, 'rb') as fileObj:
+        if os.fstat(fileObj.fileno()).st_size == 0:
+            return columns
+        data = mmap.mmap(fileObj.fileno(), 0, access=mmap.ACCESS_READ)
+
+    # The first line of COLDATA is not part of the data, and the data ends at the closing tag or where the file was cut short
+    tag = data.find(b"<COLDATA")
+    tagEnd = data.find(b">", tag) if tag >= 0 else -1
+    start = data.find(b"\n", tagEnd) + 1 if tagEnd >= 0 else 0
+    end = data.find(b"<", start) if start > 0 else -1
+    complete = end >= 0
+    if not complete:
+        end = len(data) if start > 0 else 0
+
+    values = numpy.empty(0)
+    position = start
+    while position < end:
+        stop = min(position + chunkSize, end)
+        chunk = data[position:stop]
+        if stop < end or not complete:
+            # A value split by the end of the chunk is parsed with the next one, and dropped at the end of a cut short file
+            split = max(chunk.rfind(space) for space in SPACE_BYTES)
+            if split < 0 and stop < end:
+                chunkSize *= 2
+                continue
+            chunk = chunk[:split + 1]
+            if not chunk:
+                break
+        position += len(chunk)
+
+        values = numpy.concatenate([values, numpy.array(chunk.split(), dtype=float)])
+        numRows = len(values) // numColumns
+        rows = values[:numRows * numColumns].reshape(numRows, numColumns)
+        values = values[numRows * numColumns:]
+        keep = numpy.ones(numRows, dtype=bool)
+        if startTime is not None:
+            keep &= rows[:, 0] >= startTime
+        if endTime is not None:
+            keep &= rows[:, 0] < endTime
+        rows = rows[keep]
+        for i, column in enumerate(columns):
+            appendValues(column, rows[:, i])
+    data.close()
+    return columns
@@ -0,0 +1,191 @@
+# Structured LS-DYNA keyword cards
+# Keywords are modelled as data (a name and a list of cards), streamed out as comma-separated or fixed-width text,
+# and parsed back from existing decks and snippets such as the one in the Keyword Snippet directory
+# Builders are provided for the pressure-dependent friction contact written by PostProcessing
+
+import heapq
+
+FIELD_WIDTH = 10
+
+# A single card of a keyword
+# values = list of field values
+# comment = optional comment line written above the card, without the leading "$"
+class Card(object):
+    def __init__(self, values, comment=None):
+        self.values = values
+        self.comment = comment
+
+# A keyword and its cards
+# name = keyword name without the leading "*", e.g. "DEFINE_CURVE"
+# cards = list of Card references
+class Keyword(object):
+    def __init__(self, name, cards=None):
+        self.name = name
+        self.cards = cards if cards is not None else []
+
+    # Add a card and return it
+    # values = list of field values
+    # comment = optional comment line written above the card
+    def addCard(self, values, comment=None):
+        card = Card(values, comment)
+        self.cards.append(card)
+        return card
+
+# Returns the text of a field value
+def formatValue(value):
+    return "{}".format(value)
+
+# Returns the text of a field value that fits in a fixed-width field
+# Floats that are too long are written in exponent notation with as many digits as fit
+def formatFixedValue(value):
+    text = formatValue(value)
+    if len(text) <= FIELD_WIDTH or not isinstance(value, float):
+        return text
+    for digits in range(FIELD_WIDTH - 6, -1, -1):
+        text = "{:.{}e}".format(value, digits)
+        if len(text) <= FIELD_WIDTH:
+            return text
+    return text
+
+# Returns the text lines of a keyword
+# keyword = Keyword reference
+# fixedWidth = write fields right aligned in 10 character columns instead of separating them with commas
+def formatLines(keyword, fixedWidth=False):
+    lines = ["*" + keyword.name]
+    for card in keyword.cards:
+        if card.comment is not None:
+            if fixedWidth and "," in card.comment:
+                lines.append("$" + "".join(name.strip().rjust(FIELD_WIDTH) for name in card.comment.split(","))[1:])
+            else:
+                lines.append("$ " + card.comment)
+        if fixedWidth:
+            lines.append("".join(formatFixedValue(value).rjust(FIELD_WIDTH) for value in card.values))
+        else:
+            lines.append(",".join(formatValue(value) for value in card.values))
+    return lines
+
+# Write keywords to a file object one line at a time
+# fileObj = writable file object
+# keywords = iterable of Keyword references
+# fixedWidth = write fixed-width fields instead of comma-separated fields
+def writeKeywords(fileObj, keywords, fixedWidth=False):
+    for keyword in keywords:
+        for line in formatLines(keyword, fixedWidth):
+            fileObj.write(line + "\n")
+
+# Returns the text of a list of keywords
+# keywords = iterable of Keyword references
+# fixedWidth = write fixed-width fields instead of comma-separated fields
+def formatKeywords(keywords, fixedWidth=False):
+    lines = []
+    for keyword in keywords:
+        lines.extend(formatLines(keyword, fixedWidth))
+    return "\n".join(lines) + "\n"
+
+# Returns a field value as an int or float when possible, as stripped text otherwise
+def parseValue(text):
+    text = text.strip()
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+# Returns the field values of a data line
+# Lines holding a comma are comma-separated, other lines are read as 10 character fixed-width fields
+def parseFields(line):
+    if "," in line:
+        return [parseValue(field) for field in line.split(",")]
+    line = line.rstrip()
+    return [parseValue(line[i:i + FIELD_WIDTH]) for i in range(0, len(line), FIELD_WIDTH)]
+
+# Returns the list of keywords in a keyword deck or snippet
+# Comment lines are attached to the card that follows them
+# lines = iterable of text lines, e.g. an open file object or text.splitlines()
+def parseKeywords(lines):
+    keywords = []
+    keyword = None
+    comment = None
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if not line.strip():
+            continue
+        if line.startswith("*"):
+            keyword = Keyword(line[1:].strip())
+            keywords.append(keyword)
+            comment = None
+        elif line.startswith("$"):
+            comment = line[1:].strip()
+        elif keyword is not None:
+            keyword.addCard(parseFields(line), comment)
+            comment = None
+    return keywords
+
+# Returns a *CONTACT_AUTOMATIC_SURFACE_TO_SURFACE keyword between the Shoe (part set 1) and Floor (part set 2)
+# fs = static friction coefficient, or 2 to look up friction in the table given by fd
+# fd = dynamic friction coefficient, or the table ID when fs is 2
+def contactAutomaticSurfaceToSurface(fs=0, fd=0):
+    keyword = Keyword("CONTACT_AUTOMATIC_SURFACE_TO_SURFACE")
+    keyword.addCard([1, 2, 3, 3, 0, 0, 1, 1], "ssid,msid,sstyp,mstyp,sboxid,mboxid,spr,mpr")
+    keyword.addCard([fs, fd, 0, 0, 10, 0, 0, 0], "fs,fd,dc,vc,vdc,penchk,bt,dt")
+    keyword.addCard([0, 0, 0, 0, 0, 0, 0, 0], "sfs,sfm,sst,mst,sfst,sfmt,fsf,vsf")
+    keyword.addCard([2, 0.1, 0, 0, 3, 5, 0, 0], "soft,softscl,lcidab,maxpar,sbopt,depth,bsort,frcfrq")
+    keyword.addCard([0, 0, 0, 0, 0, 0, 0, 0], "penmax,tkhopt,shlthk,snlog,isym,i2d3d,sldthk,sldstf")
+    return keyword
+
+# Returns the keywords of a pressure-dependent friction table
+# A *DEFINE_TABLE maps each pressure to a *DEFINE_CURVE of COF vs relative velocity, constant from velocity 0 to 100
+# points = iterable of (pressure, cof) pairs in ascending pressure order
+# tableNum = table ID
+# curveStartNum = ID of the first curve
+def frictionTable(points, tableNum=1, curveStartNum=100):
+    table = Keyword("DEFINE_TABLE")
+    table.addCard([tableNum])
+    curves = []
+    for i, (pressure, cof) in enumerate(points):
+        table.addCard([pressure, curveStartNum + i], "Pressure value vs Curve ID" if i == 0 else None)
+        curve = Keyword("DEFINE_CURVE")
+        curve.addCard([curveStartNum + i])
+        curve.addCard([0, cof], "Relative velocity vs COF")
+        curve.addCard([100, cof])
+        curves.append(curve)
+    return [table] + curves
+
+# Returns the keywords of the pressure-dependent friction contact snippet
+# points = iterable of (pressure, cof) pairs in ascending pressure order
+# tableNum = table ID
+# curveStartNum = ID of the first curve
+def frictionContact(points, tableNum=1, curveStartNum=100):
+    return [contactAutomaticSurfaceToSurface(2, tableNum)] + frictionTable(points, tableNum, curveStartNum)
+
+# Returns the (pressure, cof) pairs of a friction table in a list of keywords
+# keywords = list of Keyword references, e.g. returned by parseKeywords
+# tableNum = table ID
+def readFrictionTable(keywords, tableNum=1):
+    curves = {}
+    rows = []
+    for keyword in keywords:
+        if keyword.name == "DEFINE_CURVE" and keyword.cards:
+            curves[keyword.cards[0].values[0]] = keyword.cards[1].values[1] if len(keyword.cards) > 1 else None
+        elif keyword.name == "DEFINE_TABLE" and keyword.cards and keyword.cards[0].values[0] == tableNum:
+            rows = [card.values for card in keyword.cards[1:]]
+    return [(float(pressure), float(curves[curveId])) for pressure, curveId in rows]
+
+# Returns the merged (pressure, cof) pairs of several friction tables, in ascending pressure order
+# Each input must already be in ascending pressure order, as friction tables are, so the merge takes linear time
+# A pressure found in several tables is kept once; a table cannot hold two COFs at one pressure, so differing COFs raise a ValueError
+# tables = lists of (pressure, cof) pairs
+# tolerance = relative difference up to which two COFs of one pressure are taken as equal, e.g. after a round trip through a deck
+def mergeFrictionTables(*tables, **options):
+    tolerance = options.get("tolerance", 1e-9)
+    merged = []
+    for pressure, cof in heapq.merge(*tables):
+        if merged and merged[-1][0] == pressure:
+            if abs(cof - merged[-1][1]) > tolerance * max(abs(cof), abs(merged[-1][1])):
+                raise ValueError("Conflicting COFs {} and {} at pressure {}.".format(merged[-1][1], cof, pressure))
+            continue
+        merged.append((pressure, cof))
+    return merged
@@ -0,0 +1,285 @@
+# Out-of-process numeric worker for the scripts hosted in IronPython
+# The Workbench journal and the Mechanical scripts run in the embedded IronPython interpreter, which cannot import NumPy,
+# so their heavy numeric jobs can be handed to a persistent CPython process started with NumericWorkerCommand, e.g. "python"
+# The worker runs this script with --serve and answers jobs over its stdin and stdout pipes; each message is one JSON header line
+# followed by the raw bytes of the typed arrays it carries, so force columns cross the pipe as binary data instead of text
+# A job is a call of one of the functions in JOBS, which take file paths and small arguments and use NumPy where the worker has it
+# When no worker is configured, it cannot be started or it does not answer within NumericWorkerTimeout seconds, the function is
+# called in this process instead and the worker is not used again
+# Usage: python Scripts/NumericWorker.py --serve
+
+import os
+import sys
+import json
+import array
+import shlex
+import atexit
+import threading
+import subprocess
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Functions that can be run by the worker, as "module.function" names
+JOBS = ["ImportExportUtilities.parseForceData", "ForceOutput.readForces", "PostProcessing.summarizeRun", "CompressionCurve.saveIndex", "FrictionFit.fitTable"]
+
+# Key of the placeholder that stands for a typed array in the JSON header of a message
+ARRAY_KEY = "__array__"
+
+# Seconds the worker may take to answer a job when NumericWorkerTimeout is not set
+JOB_TIMEOUT = 600.0
+
+WORKER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "NumericWorker.py")
+
+# Raised when a job fails in the worker, the worker itself is still available
+class JobError(Exception):
+    pass
+
+# Returns the bytes of a typed array
+def arrayBytes(values):
+    return values.tobytes() if hasattr(values, "tobytes") else values.tostring()
+
+# Returns a typed array read from bytes
+# typecode = array.array type code of the values
+# data = bytes of the values
+def bytesArray(typecode, data):
+    values = array.array(typecode)
+    if hasattr(values, "frombytes"):
+        values.frombytes(data)
+    else:
+        values.fromstring(data)
+    return values
+
+# Returns a JSON serializable copy of a value, with each typed array replaced by a placeholder and its bytes appended to blobs
+# One dimensional NumPy float arrays are sent as typed arrays, other NumPy values as lists and Python scalars
+# value = value to encode
+# blobs = list of (type code, bytes) tuples, appended to
+def encodeValue(value, blobs):
+    if numpy is not None and isinstance(value, numpy.ndarray) and value.ndim == 1 and value.dtype.kind == 'f':
+        value = bytesArray('d', numpy.ascontiguousarray(value, dtype=float).tobytes())
+    elif numpy is not None and isinstance(value, (numpy.ndarray, numpy.generic)):
+        value = value.tolist()
+
+    if isinstance(value, array.array):
+        blobs.append((value.typecode, arrayBytes(value)))
+        return {ARRAY_KEY: len(blobs) - 1}
+    if isinstance(value, (list, tuple)):
+        return [encodeValue(element, blobs) for element in value]
+    if isinstance(value, dict):
+        return dict((key, encodeValue(element, blobs)) for key, element in value.items())
+    return value
+
+# Returns a value decoded by encodeValue, with its placeholders replaced by typed arrays
+# value = decoded JSON value
+# arrays = list of the typed arrays of the message
+def decodeValue(value, arrays):
+    if isinstance(value, list):
+        return [decodeValue(element, arrays) for element in value]
+    if isinstance(value, dict):
+        if ARRAY_KEY in value:
+            return arrays[value[ARRAY_KEY]]
+        return dict((key, decodeValue(element, arrays)) for key, element in value.items())
+    return value
+
+# Write a message to a binary stream
+# stream = binary stream, e.g. the stdin pipe of the worker
+# message = dictionary sent as the JSON header line of the message
+def writeMessage(stream, message):
+    blobs = []
+    header = encodeValue(message, blobs)
+    header["arrays"] = [[typecode, len(data)] for typecode, data in blobs]
+    stream.write((json.dumps(header) + "\n").encode("ascii"))
+    for typecode, data in blobs:
+        stream.write(data)
+    stream.flush()
+
+# Returns the next message of a binary stream, or None at the end of the stream
+# stream = binary stream, e.g. the stdout pipe of the worker
+def readMessage(stream):
+    line = stream.readline()
+    if not line:
+        return None
+    header = json.loads(line.decode("ascii"))
+    arrays = []
+    for typecode, size in header.pop("arrays"):
+        data = stream.read(size)
+        if not len(data) == size:
+            raise IOError("The numeric worker message ended after {} of {} bytes.".format(len(data), size))
+        arrays.append(bytesArray(str(typecode), data))
+    return decodeValue(header, arrays)
+
+# Returns the "module.function" job name of a function
+def jobName(function):
+    return "{}.{}".format(function.__module__, function.__name__)
+
+# A persistent CPython worker process, started on its first job
+# Jobs of several threads, e.g. the result collection of the scheduler's jobs, are sent one at a time
+# command = command line of the CPython interpreter, e.g. "python"
+# timeout = seconds the worker may take to answer a job before it is stopped
+class NumericWorker(object):
+    def __init__(self, command, timeout=JOB_TIMEOUT):
+        self.command = command
+        self.timeout = timeout
+        self.process = None
+        self.lock = threading.Lock()
+        self.available = True
+        self.info = None
+        self.error = None
+
+    # Start the worker process and check that it answers
+    def start(self):
+        # Windows command lines keep their backslashes and quotes, shlex's POSIX rules would take them as escapes
+        arguments = shlex.split(self.command, posix=(os.name != "nt"))
+        self.process = subprocess.Popen(arguments + [WORKER_PATH, "--serve"], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        writeMessage(self.process.stdin, {"job": "info", "arguments": []})
+        response = self.receive()
+        if response is None or "error" in response:
+            raise IOError("The numeric worker did not start: {}".format(self.command))
+        self.info = response["result"]
+
+    # Returns the next message of the worker, or None if it exited
+    # The message is read by another thread, so a worker that hangs is stopped and marked unavailable after timeout seconds
+    def receive(self):
+        outcome = []
+        def read():
+            try:
+                outcome.append((readMessage(self.process.stdout), None))
+            except Exception as error:
+                outcome.append((None, error))
+        reader = threading.Thread(target=read)
+        reader.daemon = True
+        reader.start()
+        reader.join(self.timeout)
+        if not outcome:
+            self.available = False
+            self.error = "The numeric worker did not answer within {:g} s.".format(self.timeout)
+            self.kill()
+            raise IOError(self.error)
+        response, error = outcome[0]
+        if error is not None:
+            raise error
+        return response
+
+    # Stop the worker process at once, e.g. when it hangs in a job
+    def kill(self):
+        try:
+            self.process.kill()
+            self.process.wait()
+        except (IOError, OSError):
+            pass
+        self.process = None
+
+    # Returns the result of a job run by the worker
+    # Raises JobError when the job fails in the worker, and another exception when the worker cannot be reached
+    # name = job name, one of JOBS
+    # arguments = list of the positional arguments of the job's function
+    def call(self, name, arguments):
+        with self.lock:
+            # Another thread may have stopped the worker while this one waited for the lock
+            if not self.available:
+                raise IOError(self.error or "The numeric worker is not available.")
+            if self.process is None:
+                self.start()
+            writeMessage(self.process.stdin, {"job": name, "arguments": list(arguments)})
+            response = self.receive()
+        if response is None:
+            raise IOError("The numeric worker exited.")
+        if "error" in response:
+            raise JobError(response["error"])
+        return response["result"]
+
+    # Stop the worker process; it exits once its stdin pipe is closed
+    def close(self):
+        with self.lock:
+            if self.process is None:
+                return
+            try:
+                self.process.stdin.close()
+                self.process.wait()
+            except (IOError, OSError):
+                pass
+            self.process = None
+
+_workers = {}
+
+# Returns the numeric worker configured in the Config file, or None if jobs are run in this process
+# The worker is enabled by setting NumericWorkerCommand; one worker process is shared by every caller with the same command
+# NumericWorkerTimeout sets the seconds a job may take, JOB_TIMEOUT if empty
+# config = configuration dictionary returned by importConfig
+def openWorker(config):
+    config = config or {}
+    command = config.get("NumericWorkerCommand", "")
+    if command == "":
+        return None
+    if command not in _workers:
+        _workers[command] = NumericWorker(command, float(config.get("NumericWorkerTimeout", "") or JOB_TIMEOUT))
+    return _workers[command]
+
+# Stop every worker process, when the interpreter exits
+def closeWorkers():
+    for worker in _workers.values():
+        worker.close()
+
+atexit.register(closeWorkers)
+
+# Returns the result of a function, run by the worker when one is available and in this process otherwise
+# A job that fails in the worker is run again here, so it raises its usual exception; a worker that cannot be reached or does not
+# answer in time is not used again, and the reason is written to stderr
+# worker = NumericWorker reference returned by openWorker, or None
+# function = one of the functions of JOBS
+# arguments = positional arguments of the function: paths, numbers, strings, lists, dictionaries and typed arrays
+def run(worker, function, *arguments):
+    if worker is not None and worker.available:
+        try:
+            return worker.call(jobName(function), arguments)
+        except JobError:
+            pass
+        except (IOError, OSError, ValueError) as error:
+            worker.error = str(error)
+            worker.available = False
+            worker.close()
+            sys.stderr.write("The numeric worker is not used, {} runs in this process: {}\n".format(jobName(function), worker.error))
+    return function(*arguments)
+
+# Answer the jobs of a client until its stream ends
+# inputStream, outputStream = binary streams the messages are read from and written to
+def serve(inputStream, outputStream):
+    while True:
+        message = readMessage(inputStream)
+        if message is None:
+            break
+        try:
+            if message["job"] == "info":
+                result = {"numpy": numpy is not None, "version": sys.version}
+            elif message["job"] in JOBS:
+                moduleName, functionName = message["job"].split(".")
+                result = getattr(__import__(moduleName), functionName)(*message["arguments"])
+            else:
+                raise ValueError("Unknown job {}.".format(message["job"]))
+            response = {"result": result}
+        except Exception as error:
+            response = {"error": "{}: {}".format(type(error).__name__, error)}
+        try:
+            writeMessage(outputStream, response)
+        except (TypeError, ValueError) as error:
+            # The header is serialized before anything is written, so a result that cannot be sent is reported as an error
+            writeMessage(outputStream, {"error": "{}: {}".format(type(error).__name__, error)})
+
+if __name__ == "__main__":
+    if not sys.argv[1:] == ["--serve"]:
+        print("Usage: python NumericWorker.py --serve")
+        sys.exit(2)
+
+    # Python 2 opens the standard streams in text mode on Windows, which would translate the line endings in the array bytes
+    if sys.platform == "win32" and not hasattr(sys.stdout, "buffer"):
+        import msvcrt
+        msvcrt.setmode(sys.stdin.fileno(), os.O_BINARY)
+        msvcrt.setmode(sys.stdout.fileno(), os.O_BINARY)
+
+    # Keep the stdout pipe for the messages, anything the jobs print goes to stderr
+    inputStream = getattr(sys.stdin, "buffer", sys.stdin)
+    outputStream = getattr(sys.stdout, "buffer", sys.stdout)
+    sys.stdout = sys.stderr
+    serve(inputStream, outputStream)
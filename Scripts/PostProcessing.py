@@ -1,76 +1,179 @@
 # This script handles the post processing steps of the workflow
-# All external force tracker data from the LS-Dyna Sliding Test simulations is loaded in
-# Average normal force, average shear force, average contact pressure, and average COF is calculated
-# Results are exported to a CSV file
+# All external force tracker data from the LS-Dyna Sliding Test simulations is loaded in from the binary result store
+# Each run is reduced in one streaming pass by ForceStatistics, and the per-run aggregates are cached, so only new or changed runs are read and reduced again
+# With NumericWorkerCommand set in the Config file, the runs are reduced and the table is fitted in the CPython numeric worker, which can use NumPy
+# Average normal force, average shear force, average contact pressure, and average COF over each run's steady window are calculated,
+# with the COF confidence interval and force standard deviations
+# Results are exported to a CSV file, and the COF time series of every run to CofSeries.csv
 # Results are then used to construct an LS-Dyna Keyword Snippet that captures the COF vs Pressure relationship of the data in a pressure-dependent friction condition
+# With FrictionFit set in the Config file, the table of the snippet is a compact resampling of a fit of the results instead of one row per run
 # The Keyword Snippet is then saved in a text file
 
 import os
-import xml.etree.ElementTree as ET
 import csv
+import json
 import ImportExportUtilities
+import ResultStore
+import WorkflowState
+import Keyword
+import ForceStatistics
+import FrictionFit
+import NumericWorker
 
-def run(workingDirectory):
-    # Parse the workflow log file
-    logFilePath = os.path.join(workingDirectory, "Logs", "Log.xml")
-    logTree = ET.parse(logFilePath)
-    log = logTree.getroot()
-
-    topFaceArea = float(log.find("./TopFaceArea").text)
-
-    # List of force tracker data files
-    files = os.listdir(os.path.join(workingDirectory, "Results"))
-    files.sort()
-    if "Force_CompressionTest.csv" in files: files.remove("Force_CompressionTest.csv")
-    if "Results.csv" in files: files.remove("Results.csv")
-    if "Keyword Snippet.txt" in files: files.remove("Keyword Snippet.txt")
-
-    # Import data from files
-    data = []
-    for file in files:
-        with open(os.path.join(workingDirectory, "Results", file)) as csvFile:
-            csvReader = csv.reader(csvFile, delimiter=',', quotechar='|')
-            csvRows = [row for i, row in enumerate(csvReader) if i > 0]
-            data.append(csvRows)
-
-    # Extract average COF and pressure values from each set of normal and shear force data
-    header = ["Average Normal Force [N]", "Average Shear Force [N]", "Average Pressure [Pa]", "Average COF [-]"]
+SUMMARY_CACHE_NAME = "SummaryCache.json"
+COF_SERIES_NAME = "CofSeries.csv"
+
+# Returns the per-run summary cache of the Results directory, or an empty cache if none exists
+# resultsFolderPath = path to the Results directory
+def loadSummaryCache(resultsFolderPath):
+    cachePath = os.path.join(resultsFolderPath, SUMMARY_CACHE_NAME)
+    if not os.path.exists(cachePath):
+        return {}
+    with open(cachePath, 'r') as fileObj:
+        return json.load(fileObj)
+
+# Returns the configuration of a working directory, or an empty configuration if it has no Config file
+# workingDirectory = path to the workflow working directory
+def loadConfig(workingDirectory):
+    configPath = os.path.join(workingDirectory, "Config", "Config.csv")
+    return ImportExportUtilities.importConfig(configPath) if os.path.exists(configPath) else {}
+
+# Returns the settings of the streaming statistics, as a [number of bins, steady COF tolerance] list
+# config = configuration dictionary returned by importConfig, or None for the defaults
+def getStatisticsSettings(config):
+    config = config or {}
+    return [int(config.get("StatisticsBins", "") or ForceStatistics.DEFAULT_BINS), float(config.get("SteadyCofTolerance", "") or ForceStatistics.DEFAULT_TOLERANCE)]
+
+# Reduce the force history of a run to its per-run aggregates
+# Returns the dictionary of steady window statistics returned by ForceStatistics.summarize
+# resultsFolderPath = path to the Results directory
+# runName = name of the run in the result store
+# settings = statistics settings returned by getStatisticsSettings
+# steady = True if the stored history only holds the steady window found while solving, which is then not searched again
+def summarizeRun(resultsFolderPath, runName, settings, steady=False):
+    return ForceStatistics.summarize(ResultStore.openForceData(resultsFolderPath, runName), settings[0], settings[1], 0 if steady else None)
+
+# Returns the aggregates of a run, reusing the cached entry when the run's data file, its steady flag and the statistics settings are unchanged
+# The file size and modification time are checked first, the content hash only when those differ
+# cache = summary cache dictionary, updated in place
+# resultsFolderPath = path to the Results directory
+# runName = name of the run in the result store
+# settings = statistics settings returned by getStatisticsSettings
+# worker = optional NumericWorker reference the run is reduced by
+def getRunSummary(cache, resultsFolderPath, runName, settings, worker=None):
+    path = ResultStore.forceDataPath(resultsFolderPath, runName)
+    stat = os.stat(path)
+    steady = ResultStore.isSteadyRun(resultsFolderPath, runName)
+    entry = cache.get(runName)
+    if entry is not None and not (entry.get("settings") == settings and entry.get("steady", False) == steady):
+        entry = None
+
+    if entry is not None and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+        return entry["summary"]
+
+    contentHash = ImportExportUtilities.hashFile(path)
+    if entry is None or not entry["size"] == stat.st_size or not entry["hash"] == contentHash:
+        entry = {"hash": contentHash, "settings": settings, "steady": steady,
+            "summary": NumericWorker.run(worker, summarizeRun, resultsFolderPath, runName, settings, steady)}
+    entry["size"] = stat.st_size
+    entry["mtime"] = stat.st_mtime
+    cache[runName] = entry
+
+    return entry["summary"]
+
+# Returns the list of per-run summaries of the sliding test runs, with their run names
+# Only runs that are new or have changed since the last call are reduced again
+# workingDirectory = path to the workflow working directory
+# config = configuration dictionary returned by importConfig; read from the working directory when not given
+def summarizeRuns(workingDirectory, config=None):
+    if config is None:
+        config = loadConfig(workingDirectory)
+    settings = getStatisticsSettings(config)
+
+    # List of sliding test runs stored in the Results directory
+    resultsFolderPath = os.path.join(workingDirectory, "Results")
+    runs = ResultStore.listSlidingRuns(resultsFolderPath)
+
+    # Runs are reduced by the numeric worker when one is configured
+    cache = loadSummaryCache(resultsFolderPath)
+    worker = NumericWorker.openWorker(config)
+    summaries = [getRunSummary(cache, resultsFolderPath, runName, settings, worker) for runName in runs]
+    cache = dict((runName, cache[runName]) for runName in runs)
+    ResultStore.replaceFile(os.path.join(resultsFolderPath, SUMMARY_CACHE_NAME), json.dumps(cache, indent=1, sort_keys=True))
+
+    return list(zip(runs, summaries))
+
+# Returns the result of a sliding test run, in the column order of Results.csv, or None if the run has no steady window
+# summary = run summary returned by summarizeRuns
+# topFaceArea = area of the top face of the shoe in m^2
+def runResult(summary, topFaceArea):
+    if not summary["steadySamples"]:
+        return None
+    averageNormal = -summary["normalMean"]
+    averageShear = summary["shearMean"]
+    return [averageNormal, averageShear, averageNormal / topFaceArea, averageShear / averageNormal,
+        summary["cofCi"], summary["normalStd"], summary["shearStd"], summary["steadyStart"], summary["steadySamples"]]
+
+# Returns the results of every sliding test run, sorted by pressure
+# Each result is the average normal force, shear force, pressure and COF over the run's steady window, followed by the half width
+# of the 95% COF confidence interval, the normal and shear force standard deviations, the steady window start time and its sample count
+# Only runs that are new or have changed since the last call are reduced again
+# workingDirectory = path to the workflow working directory
+# config = configuration dictionary returned by importConfig; read from the working directory when not given
+# summaries = run summaries returned by summarizeRuns; computed when not given
+def computeResults(workingDirectory, config=None, summaries=None):
+    # Read the top face area from the workflow state
+    topFaceArea = float(WorkflowState.openState(workingDirectory).get("TopFaceArea"))
+
+    # Extract average COF and pressure values from the steady window statistics of each run
     results = []
-    for dataSet in data:
-        normal = [-float(row[1]) for row in dataSet]
-        shear = [float(row[2]) for row in dataSet]
-        averageNormal = sum(normal) / len(normal)
-        averageShear = sum(shear) / len(shear)
-        averagePressure = averageNormal / topFaceArea
-        averageCof = averageShear / averageNormal
-        results.append([averageNormal, averageShear, averagePressure, averageCof])
-
-    with open(os.path.join(workingDirectory, "Results", "Results.csv"), 'wb') as csvFile:
+    if summaries is None:
+        summaries = summarizeRuns(workingDirectory, config)
+    for runName, summary in summaries:
+        result = runResult(summary, topFaceArea)
+        if result is not None:
+            results.append(result)
+
+    # The pressure table of the keyword snippet must be in ascending order
+    results.sort(key=lambda result: result[2])
+
+    return results
+
+def run(workingDirectory, config=None):
+    if config is None:
+        config = loadConfig(workingDirectory)
+    summaries = summarizeRuns(workingDirectory, config)
+    results = computeResults(workingDirectory, config, summaries)
+    header = ["Average Normal Force [N]", "Average Shear Force [N]", "Average Pressure [Pa]", "Average COF [-]", "COF 95% CI Half Width [-]",
+        "Normal Force Std [N]", "Shear Force Std [N]", "Steady Window Start [s]", "Steady Samples"]
+
+    with open(os.path.join(workingDirectory, "Results", "Results.csv"), 'wb' if str is bytes else 'w') as csvFile:
             csvWriter = csv.writer(csvFile)
             csvWriter.writerow(header)
             csvWriter.writerows(results)
 
+    # Export the COF time series of every run
+    with open(os.path.join(workingDirectory, "Results", COF_SERIES_NAME), 'wb' if str is bytes else 'w') as csvFile:
+        csvWriter = csv.writer(csvFile)
+        csvWriter.writerow(["Run", "Time [s]", "COF [-]"])
+        for runName, summary in summaries:
+            csvWriter.writerows([runName] + point for point in summary.get("cofSeries", []))
+
     # Create LS-DYNA keyword code to define a pressure dependant friction based on the COF and Pressure results
     # boundary condition based on the curve fitting results
-    tableNum = 1;
-    curveStartNum = 100;
-    keywordSnippet = "*CONTACT_AUTOMATIC_SURFACE_TO_SURFACE\n"
-    keywordSnippet += "$ ssid,msid,sstyp,mstyp,sboxid,mboxid,spr,mpr\n"
-    keywordSnippet += "1,2,3,3,0,0,1,1\n"
-    keywordSnippet += "$ fs,fd,dc,vc,vdc,penchk,bt,dt\n"
-    keywordSnippet += "2,1,0,0,10,0,0,0\n"
-    keywordSnippet += "$ sfs,sfm,sst,mst,sfst,sfmt,fsf,vsf\n"
-    keywordSnippet += "0,0,0,0,0,0,0,0\n"
-    keywordSnippet += "$ soft,softscl,lcidab,maxpar,sbopt,depth,bsort,frcfrq\n"
-    keywordSnippet += "2,0.1,0,0,3,5,0,0\n"
-    keywordSnippet += "$ penmax,tkhopt,shlthk,snlog,isym,i2d3d,sldthk,sldstf\n"
-    keywordSnippet += "0,0,0,0,0,0,0,0\n"
-    keywordSnippet += "*DEFINE_TABLE\n{}\n$ Pressure value vs Curve ID\n".format(tableNum)
-    for i, result in enumerate(results):
-        keywordSnippet += "{},{}\n".format(result[2], curveStartNum + i)
-    for i, result in enumerate(results):
-        keywordSnippet += "*DEFINE_CURVE\n{}\n$ Relative velocity vs COF\n0,{}\n100,{}\n".format(curveStartNum + i, result[3], result[3])
+    tableNum = 1
+    curveStartNum = 100
+    points = [(result[2], result[3]) for result in results]
+
+    # Replace the raw table by a compact fitted one, if enabled in the Config file, and report the fit next to Results.csv
+    method, tolerance = FrictionFit.getFitSettings(config)
+    if not method == "None" and points:
+        report = NumericWorker.run(NumericWorker.openWorker(config), FrictionFit.fitTable, points, method, tolerance)
+        FrictionFit.writeReport(os.path.join(workingDirectory, "Results"), report)
+        points = [(pressure, cof) for pressure, cof in report["table"]]
+
+    keywords = Keyword.frictionContact(points, tableNum, curveStartNum)
 
     # Save the keyword snippet
     with open(os.path.join(workingDirectory, "Results", "Keyword Snippet.txt"), 'w') as fileObj:
-        fileObj.write(keywordSnippet)
+        Keyword.writeKeywords(fileObj, keywords)
@@ -0,0 +1,104 @@
+# Chooses the target contact pressures of the Sliding Tests
+# In Uniform mode the pressures are evenly spaced from MinPressure to MaxPressure, as before
+# In Adaptive mode a coarse uniform set is solved first, then new pressures are added where linear interpolation of the
+# COF vs pressure curve (which is how LS-DYNA evaluates the *DEFINE_TABLE) is least accurate, until a tolerance is met
+# The pressure of every simulation index is recorded in Logs/PressureSchedule.json
+
+import os
+import json
+
+import ImportExportUtilities
+import ResultStore
+
+SCHEDULE_NAME = "PressureSchedule.json"
+
+# Returns the path of the pressure schedule file
+# workingDirectory = path to the workflow working directory
+def getSchedulePath(workingDirectory):
+    return os.path.join(workingDirectory, "Logs", SCHEDULE_NAME)
+
+# Returns the list of target pressures by simulation index, or None if no schedule has been saved
+# workingDirectory = path to the workflow working directory
+def loadSchedule(workingDirectory):
+    schedulePath = getSchedulePath(workingDirectory)
+    if not os.path.exists(schedulePath):
+        return None
+    with open(schedulePath, 'r') as fileObj:
+        return json.load(fileObj)
+
+# Save the list of target pressures by simulation index
+# workingDirectory = path to the workflow working directory
+# pressures = list of target pressures in Pa
+def saveSchedule(workingDirectory, pressures):
+    ResultStore.replaceFile(getSchedulePath(workingDirectory), json.dumps(pressures, indent=1))
+
+# Start the schedule from the uniform pressure grid of the Config file
+# A saved schedule that starts with the same pressures is kept, so the pressures added to it by adaptive sampling are solved again
+# instead of being lost; a schedule of other settings is replaced
+# Returns the schedule
+# workingDirectory = path to the workflow working directory
+# pressures = list of uniform target pressures in Pa
+def seedSchedule(workingDirectory, pressures):
+    schedule = loadSchedule(workingDirectory)
+    if schedule is None or not schedule[:len(pressures)] == list(pressures):
+        schedule = list(pressures)
+        saveSchedule(workingDirectory, schedule)
+    return schedule
+
+# Add pressures to the end of the schedule
+# Returns the simulation indices assigned to the new pressures
+# workingDirectory = path to the workflow working directory
+# pressures = list of target pressures in Pa
+def appendPressures(workingDirectory, pressures):
+    schedule = loadSchedule(workingDirectory) or []
+    indices = list(range(len(schedule), len(schedule) + len(pressures)))
+    saveSchedule(workingDirectory, schedule + list(pressures))
+    return indices
+
+# Returns the target pressure of a sliding test
+# The saved schedule is used when there is one, otherwise the uniform pressure grid of the Config file
+# config = configuration dictionary returned by importConfig
+# workingDirectory = path to the workflow working directory
+# simIndex = simulation index of the sliding test
+def getTargetPressure(config, workingDirectory, simIndex):
+    schedule = loadSchedule(workingDirectory)
+    if schedule is not None:
+        return schedule[simIndex]
+    return ImportExportUtilities.getTargetPressures(config)[simIndex]
+
+# Returns the interpolation error estimate of each point of a COF vs pressure curve
+# The estimate of an interior point is the distance between its COF and the straight line through its two neighbours
+# The two end points take the estimate of their only interior neighbour
+# points = list of (pressure, cof) pairs sorted by pressure
+def interpolationErrors(points):
+    if len(points) < 3:
+        return [float("inf") for point in points]
+
+    errors = [0.0]
+    for (p0, c0), (p1, c1), (p2, c2) in zip(points[:-2], points[1:-1], points[2:]):
+        interpolated = c0 + (c2 - c0) * (p1 - p0) / (p2 - p0) if p2 > p0 else c0
+        errors.append(abs(c1 - interpolated))
+    errors.append(0.0)
+    errors[0] = errors[1]
+    errors[-1] = errors[-2]
+    return errors
+
+# Returns the next pressures to solve, at the midpoints of the intervals with the largest interpolation error
+# An empty list means the curve already meets the tolerance everywhere
+# points = list of (pressure, cof) pairs of the solved sliding tests
+# tolerance = largest acceptable COF interpolation error
+# count = maximum number of pressures to return
+# minSpacing = intervals narrower than twice this value are not split any further
+def nextPressures(points, tolerance, count, minSpacing=0.0):
+    points = sorted(points)
+    errors = interpolationErrors(points)
+
+    candidates = []
+    for i in range(len(points) - 1):
+        width = points[i + 1][0] - points[i][0]
+        error = max(errors[i], errors[i + 1])
+        if error > tolerance and width > 2 * minSpacing:
+            candidates.append((error, width, (points[i][0] + points[i + 1][0]) / 2.0))
+
+    candidates.sort(reverse=True)
+    return [pressure for error, width, pressure in candidates[:count]]
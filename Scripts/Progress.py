@@ -0,0 +1,239 @@
+# Live progress of the LS-DYNA solves
+# A monitor tails the solver's text outputs in a solve's working directory while it runs: glstat ("time..." and "time step..." entries)
+# and the message files and solver log (cycle lines such as "  1000 t 1.0000E-04 dt 1.00E-07 ...")
+# The run's simulated time, end time, time step, throughput and estimated time remaining are written to Logs/Progress/<name>.json
+# of the campaign every ProgressInterval seconds; the file is overwritten, so the live progress takes constant space
+# The workflow state record of the simulation gets the final progress once, when the solve ends, so State.jsonl does not grow while solving
+# Usage: python Scripts/Progress.py <campaign directory> [...] [--watch seconds]
+
+import os
+import re
+import sys
+import json
+import time
+import collections
+
+import ResultStore
+import WorkflowState
+
+PROGRESS_FOLDER = "Progress"
+
+# Text outputs of the solver that report the simulated time, in the solve's working directory
+SOURCE_NAMES = ["glstat", "messag", "mes0000", "solver.log"]
+
+GLSTAT_TIME = re.compile(r"^\s*time\.{3,}\s*(\S+)")
+GLSTAT_TIME_STEP = re.compile(r"^\s*time step\.{3,}\s*(\S+)")
+CYCLE_LINE = re.compile(r"^\s*(\d+)\s+t\s+(\S+)\s+dt\s+(\S+)")
+
+# Wall-clock seconds of history the throughput is measured over
+RATE_WINDOW = 60.0
+
+# Reads the complete lines appended to a growing text file since the last poll
+# path = path to the text file
+class LineTail(object):
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self.partial = b""
+
+    # Returns the list of new complete lines
+    def poll(self):
+        if not os.path.exists(self.path):
+            return []
+        if os.path.getsize(self.path) < self.offset:
+            # The file was rewritten, start over
+            self.offset = 0
+            self.partial = b""
+        with open(self.path, 'rb') as fileObj:
+            fileObj.seek(self.offset)
+            chunk = fileObj.read()
+        self.offset += len(chunk)
+        lines = (self.partial + chunk).split(b"\n")
+        self.partial = lines.pop()
+        return [line.decode("ascii", "replace") for line in lines]
+
+# Returns the float value of a solver output field, or None if it cannot be read
+def parseNumber(text):
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+# Tracks the progress of one solve from its text outputs and publishes it
+# directory = working directory of the solve
+# endTime = end time of the analysis in s, or None if unknown
+# statusPath = path to the status file of the run
+# state = optional WorkflowState.StateStore reference the final progress is published to
+# index = simulation index of the run in the workflow state
+# publishInterval = seconds between two writes of the status file
+class ProgressMonitor(object):
+    def __init__(self, directory, endTime, statusPath, state=None, index=None, publishInterval=30.0):
+        self.directory = directory
+        self.endTime = endTime
+        self.statusPath = statusPath
+        self.state = state
+        self.index = index
+        self.publishInterval = publishInterval
+        self.tails = [LineTail(os.path.join(directory, name)) for name in SOURCE_NAMES]
+        self.startTime = time.time()
+        self.simulatedTime = None
+        self.timeStep = None
+        self.cycle = None
+        self.history = collections.deque()
+        self.lastPublished = None
+        self.lastWritten = None
+        self.finished = False
+        self.published = False
+
+    # Read the lines of a solver output
+    def parse(self, lines):
+        for line in lines:
+            match = CYCLE_LINE.match(line)
+            if match:
+                self.update(parseNumber(match.group(2)), parseNumber(match.group(3)), int(match.group(1)))
+                continue
+            match = GLSTAT_TIME_STEP.match(line)
+            if match:
+                self.timeStep = parseNumber(match.group(1)) or self.timeStep
+                continue
+            match = GLSTAT_TIME.match(line)
+            if match:
+                self.update(parseNumber(match.group(1)), None, None)
+
+    def update(self, simulatedTime, timeStep, cycle):
+        if simulatedTime is not None and (self.simulatedTime is None or simulatedTime > self.simulatedTime):
+            self.simulatedTime = simulatedTime
+        if timeStep is not None:
+            self.timeStep = timeStep
+        if cycle is not None:
+            self.cycle = cycle
+
+    # Returns the progress of the run as a dictionary
+    def status(self):
+        now = time.time()
+        status = {"index": self.index, "directory": self.directory, "simulatedTime": self.simulatedTime, "endTime": self.endTime,
+            "timeStep": self.timeStep, "cycle": self.cycle, "elapsed": now - self.startTime, "updated": now, "finished": self.finished,
+            "fraction": None, "throughput": None, "eta": None}
+        if self.simulatedTime is not None and self.endTime:
+            status["fraction"] = min(1.0, self.simulatedTime / self.endTime)
+        if len(self.history) > 1:
+            (wall0, sim0), (wall1, sim1) = self.history[0], self.history[-1]
+            if wall1 > wall0 and sim1 > sim0:
+                status["throughput"] = (sim1 - sim0) / (wall1 - wall0)
+                if self.endTime:
+                    status["eta"] = max(0.0, self.endTime - sim1) / status["throughput"]
+        return status
+
+    # Read new solver output, write the status file when due and publish the final progress to the workflow state
+    # Always returns False, as progress never stops a solve
+    def poll(self):
+        for tail in self.tails:
+            self.parse(tail.poll())
+
+        now = time.time()
+        if self.simulatedTime is not None and (not self.history or self.simulatedTime > self.history[-1][1]):
+            self.history.append((now, self.simulatedTime))
+        while len(self.history) > 2 and self.history[1][0] < now - RATE_WINDOW:
+            self.history.popleft()
+
+        status = self.status()
+        due = self.finished or self.lastPublished is None or now - self.lastPublished >= self.publishInterval
+        if due and not (self.simulatedTime, self.finished) == self.lastWritten:
+            ResultStore.replaceFile(self.statusPath, json.dumps(status, indent=1, sort_keys=True))
+            self.lastWritten = (self.simulatedTime, self.finished)
+            self.lastPublished = now
+        if self.finished and not self.published and self.state is not None and self.index is not None:
+            self.state.updateSimulation(self.index, progress=status["fraction"], simulatedTime=status["simulatedTime"], timeStep=status["timeStep"], eta=status["eta"])
+            self.published = True
+        return False
+
+    def stop(self):
+        pass
+
+    # Read the last solver output once the solve has ended and publish the final progress
+    def finish(self):
+        self.finished = True
+        self.poll()
+
+# Returns the path to the status file of a run
+# workingDirectory = path to the campaign directory
+# name = run name, e.g. the simulation index or "CompressionTest"
+def getStatusPath(workingDirectory, name):
+    folderPath = os.path.join(workingDirectory, "Logs", PROGRESS_FOLDER)
+    if not os.path.exists(folderPath):
+        os.makedirs(folderPath)
+    return os.path.join(folderPath, "{}.json".format(name))
+
+# Returns a progress monitor configured from the Config file, or None if progress telemetry is disabled
+# Telemetry is disabled by setting ProgressInterval to 0
+# config = configuration dictionary returned by importConfig
+# workingDirectory = path to the campaign directory
+# name = run name, e.g. the simulation index or "CompressionTest"
+# directory = working directory of the solve
+# endTime = end time of the analysis in s, or None if unknown
+# state = optional WorkflowState.StateStore reference the final progress of simulation runs is published to
+def createMonitor(config, workingDirectory, name, directory, endTime, state=None):
+    interval = float(config.get("ProgressInterval", "") or 30)
+    if interval <= 0:
+        return None
+    index = name if isinstance(name, int) else None
+    return ProgressMonitor(directory, endTime, getStatusPath(workingDirectory, name), state, index, interval)
+
+# Returns the status dictionaries of the runs of a campaign, by run name
+# workingDirectory = path to the campaign directory
+def loadStatuses(workingDirectory):
+    folderPath = os.path.join(workingDirectory, "Logs", PROGRESS_FOLDER)
+    statuses = {}
+    if not os.path.exists(folderPath):
+        return statuses
+    for fileName in os.listdir(folderPath):
+        if not fileName.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(folderPath, fileName), 'r') as fileObj:
+                statuses[fileName[:-len(".json")]] = json.load(fileObj)
+        except ValueError:
+            continue
+    return statuses
+
+# Returns the text of a value, or "-" when it is unknown
+def formatValue(value, pattern):
+    return "-" if value is None else pattern.format(value)
+
+# Returns the progress table of a campaign as text
+# The status of each simulation comes from the workflow state, its progress from the status files
+# workingDirectory = path to the campaign directory
+def formatProgress(workingDirectory):
+    statuses = loadStatuses(workingDirectory)
+    records = WorkflowState.openState(workingDirectory).simulations()
+    names = sorted(set(statuses) | set(str(index) for index in records), key=lambda name: (not name.isdigit(), int(name) if name.isdigit() else name))
+
+    lines = [workingDirectory, "{:<16} {:<10} {:>8} {:>12} {:>12} {:>10} {:>14} {:>10} {:>10}".format(
+        "Run", "Status", "Done", "Time [s]", "End [s]", "dt [s]", "Sim s / s", "Elapsed", "ETA [s]")]
+    for name in names:
+        status = statuses.get(name, {})
+        record = records.get(int(name), {}) if name.isdigit() else {}
+        runStatus = record.get("status", "finished" if status.get("finished") else "running")
+        lines.append("{:<16} {:<10} {:>8} {:>12} {:>12} {:>10} {:>14} {:>10} {:>10}".format(name, runStatus,
+            formatValue(status.get("fraction"), "{:.1%}"), formatValue(status.get("simulatedTime"), "{:.4e}"), formatValue(status.get("endTime"), "{:.4e}"),
+            formatValue(status.get("timeStep"), "{:.2e}"), formatValue(status.get("throughput"), "{:.4e}"), formatValue(status.get("elapsed"), "{:.0f}"),
+            formatValue(None if runStatus in ("completed", "failed") else status.get("eta"), "{:.0f}")))
+    return "\n".join(lines) + "\n"
+
+if __name__ == "__main__":
+    arguments = sys.argv[1:]
+    watch = None
+    if "--watch" in arguments:
+        position = arguments.index("--watch")
+        watch = float(arguments[position + 1]) if position + 1 < len(arguments) else 5.0
+        arguments = arguments[:position] + arguments[position + 2:]
+    if not arguments:
+        print("Usage: python Progress.py <campaign directory> [...] [--watch seconds]")
+        sys.exit(2)
+
+    while True:
+        sys.stdout.write("\n".join(formatProgress(directory) for directory in arguments))
+        if watch is None:
+            break
+        sys.stdout.flush()
+        time.sleep(watch)
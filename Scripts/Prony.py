@@ -0,0 +1,312 @@
+# Prony series of the viscoelastic shear relaxation of the material, and their reduction to the terms that matter for a campaign
+# With relative moduli a(i) and relaxation times tau(i), the shear relaxation modulus is G(t) = G0 (a_inf + sum a(i) exp(-t / tau(i))),
+# with a_inf = 1 - sum a(i), and the storage and loss moduli are
+#   G'(w) = G0 (a_inf + sum a(i) w^2 tau(i)^2 / (1 + w^2 tau(i)^2)), G''(w) = G0 sum a(i) w tau(i) / (1 + w^2 tau(i)^2)
+# The solver updates every term of every element at every step, yet terms much slower than the longest test have not relaxed yet,
+# and terms much faster than the shortest time the results resolve have fully relaxed
+# The reduction drops terms one at a time, refitting the moduli of the others by non-negative least squares, for as long as G(t), G'(w)
+# and G''(w) stay within PronyTolerance of the full series over the campaign's time window and the matching frequencies
+# The fit may lower the instantaneous modulus G0, when fast terms are folded into it; the series only describes the shear relaxation,
+# so Young's modulus and Poisson's ratio are both changed to scale G0 while keeping the bulk modulus K of the material
+# The time window is PronyWindow (two values in s) or, by default, from ForceOutputInterval to the longest test duration, the Compression
+# Test displacement and the sliding distance at MovementSpeed
+# Usage: python Scripts/Prony.py <campaign directory> [--tolerance F] [--window tMin,tMax]
+
+import os
+import sys
+import json
+import math
+import operator
+
+import ImportExportUtilities
+import ResultStore
+import Topography
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+REPORT_NAME = "Prony.json"
+
+# Relaxation time units of the Config file, in s
+TIME_UNITS = {"s": 1.0, "ms": 1e-3, "us": 1e-6, "ns": 1e-9, "min": 60.0, "hr": 3600.0}
+
+# Number of times and frequencies of each decade of the window the series are compared at
+POINTS_PER_DECADE = 20
+
+DEFAULT_TOLERANCE = 0.01
+
+# Returns the values of a Config column as a list
+def configList(config, key):
+    values = config.get(key, "")
+    return [value for value in (values if isinstance(values, list) else [values]) if not value == ""]
+
+# Returns the (relative moduli, relaxation times in s) of the Prony series of the Config file
+# config = configuration dictionary returned by importConfig
+def getTerms(config):
+    unit = config.get("RelaxationTimeUnit", "") or "s"
+    if unit not in TIME_UNITS:
+        raise Exception("Unknown RelaxationTimeUnit {}, expected one of {}.".format(unit, ", ".join(sorted(TIME_UNITS))))
+    moduli = [float(value) for value in configList(config, "RelativeModuli")]
+    times = [float(value) * TIME_UNITS[unit] for value in configList(config, "RelaxationTime")]
+    if not len(moduli) == len(times):
+        raise Exception("RelativeModuli and RelaxationTime must have the same number of values.")
+    return moduli, times
+
+# Returns the (shear modulus, bulk modulus) of an isotropic material
+# youngsModulus = Young's modulus
+# poissonsRatio = Poisson's ratio
+def shearAndBulkModuli(youngsModulus, poissonsRatio):
+    return youngsModulus / (2.0 * (1.0 + poissonsRatio)), youngsModulus / (3.0 * (1.0 - 2.0 * poissonsRatio))
+
+# Returns the (Young's modulus, Poisson's ratio) of an isotropic material
+# shearModulus = shear modulus
+# bulkModulus = bulk modulus
+def youngsModulusAndPoissonsRatio(shearModulus, bulkModulus):
+    return 9.0 * bulkModulus * shearModulus / (3.0 * bulkModulus + shearModulus), (3.0 * bulkModulus - 2.0 * shearModulus) / (2.0 * (3.0 * bulkModulus + shearModulus))
+
+# Returns the shear relaxation modulus G(t) / G0 at a list of times
+# moduli = relative moduli of the terms
+# times = relaxation times of the terms in s
+# sampleTimes = times in s
+def relaxationModulus(moduli, times, sampleTimes):
+    infinite = 1.0 - sum(moduli)
+    if numpy is not None:
+        decay = numpy.exp(-numpy.outer(sampleTimes, 1.0 / numpy.asarray(times, dtype=float)))
+        return list(infinite + decay.dot(numpy.asarray(moduli, dtype=float)))
+    return [infinite + math.fsum(a * math.exp(-t / tau) for a, tau in zip(moduli, times)) for t in sampleTimes]
+
+# Returns the storage and loss moduli G'(w) / G0 and G''(w) / G0 at a list of angular frequencies
+# moduli = relative moduli of the terms
+# times = relaxation times of the terms in s
+# frequencies = angular frequencies in rad/s
+def dynamicModuli(moduli, times, frequencies):
+    infinite = 1.0 - sum(moduli)
+    if numpy is not None:
+        product = numpy.outer(frequencies, numpy.asarray(times, dtype=float))
+        denominator = 1.0 + product * product
+        weights = numpy.asarray(moduli, dtype=float)
+        return list(infinite + (product * product / denominator).dot(weights)), list((product / denominator).dot(weights))
+    storage, loss = [], []
+    for w in frequencies:
+        products = [w * tau for tau in times]
+        storage.append(infinite + math.fsum(a * p * p / (1.0 + p * p) for a, p in zip(moduli, products)))
+        loss.append(math.fsum(a * p / (1.0 + p * p) for a, p in zip(moduli, products)))
+    return storage, loss
+
+# Returns log-spaced times over a window and the matching angular frequencies 1 / t
+def windowGrid(window):
+    decades = max(1.0, math.log10(window[1] / window[0]))
+    count = int(math.ceil(decades * POINTS_PER_DECADE)) + 1
+    sampleTimes = [window[0] * (window[1] / window[0]) ** (i / float(count - 1)) for i in range(count)]
+    return sampleTimes, [1.0 / t for t in sampleTimes]
+
+# Returns the rows of the fit of a set of relaxation times against the full series, as (columns, target)
+# Each row is a relaxation, storage or loss modulus value, weighted so its difference is relative to the full series' modulus
+# The unknowns are the long-term modulus and the modulus of each term, relative to G0
+def fitRows(times, sampleTimes, frequencies, target):
+    relaxation, storage, loss = target
+    columns = [[1.0 / g for g in relaxation] + [1.0 / math.hypot(s, l) for s, l in zip(storage, loss)] + [0.0] * len(frequencies)]
+    for tau in times:
+        column = [math.exp(-t / tau) / g for t, g in zip(sampleTimes, relaxation)]
+        products = [w * tau for w in frequencies]
+        column += [p * p / (1.0 + p * p) / math.hypot(s, l) for p, s, l in zip(products, storage, loss)]
+        column += [p / (1.0 + p * p) / math.hypot(s, l) for p, s, l in zip(products, storage, loss)]
+        columns.append(column)
+    values = [1.0] * len(relaxation) + [s / math.hypot(s, l) for s, l in zip(storage, loss)] + [l / math.hypot(s, l) for s, l in zip(storage, loss)]
+    return columns, values
+
+# Returns the Gram matrix of a set of columns and their projections on a target, the normal equations of their least squares fit
+def normalEquations(columns, target):
+    gram = [[0.0] * len(columns) for column in columns]
+    for i, a in enumerate(columns):
+        for j in range(i, len(columns)):
+            gram[i][j] = gram[j][i] = math.fsum(map(operator.mul, a, columns[j]))
+    return gram, [math.fsum(map(operator.mul, column, target)) for column in columns]
+
+# Returns the least squares solution of the normal equations restricted to a subset of the unknowns, by Cholesky factorization
+# Unknowns whose column depends linearly on the previous ones get a zero value
+# indices = indices of the unknowns
+def solveSubset(gram, projections, indices):
+    size = len(indices)
+    factor = [[0.0] * size for i in range(size)]
+    for i in range(size):
+        for j in range(i + 1):
+            value = gram[indices[i]][indices[j]] - math.fsum(factor[i][k] * factor[j][k] for k in range(j))
+            if i == j:
+                factor[i][i] = math.sqrt(value) if value > 1e-13 * gram[indices[i]][indices[i]] else 0.0
+            elif factor[j][j] > 0:
+                factor[i][j] = value / factor[j][j]
+    forward = [0.0] * size
+    for i in range(size):
+        if factor[i][i] > 0:
+            forward[i] = (projections[indices[i]] - math.fsum(factor[i][k] * forward[k] for k in range(i))) / factor[i][i]
+    solution = [0.0] * size
+    for i in reversed(range(size)):
+        if factor[i][i] > 0:
+            solution[i] = (forward[i] - math.fsum(factor[k][i] * solution[k] for k in range(i + 1, size))) / factor[i][i]
+    return solution
+
+# Returns the non-negative least squares solution of normal equations, by the Lawson-Hanson active set method
+# The solution is returned by unknown index, as a dictionary of the positive unknowns
+# gram, projections = normal equations returned by normalEquations
+# unknowns = indices of the unknowns
+# passive = optional guess of the positive unknowns, e.g. those of a fit with one more unknown
+def nonNegativeLeastSquares(gram, projections, unknowns, passive=None, maxIterations=200):
+    solution = {}
+    passive = list(passive or [])
+    # Start from the least squares solution of the guess, dropping the unknowns that come out negative
+    while passive:
+        trial = solveSubset(gram, projections, passive)
+        if all(value > 0 for value in trial):
+            solution = dict(zip(passive, trial))
+            break
+        passive = [j for j, value in zip(passive, trial) if value > 0]
+
+    # Unknowns whose column depends linearly on those of the positive unknowns
+    dependent = set()
+    for iteration in range(maxIterations):
+        gradient = dict((j, projections[j] - math.fsum(gram[j][k] * value for k, value in solution.items())) for j in unknowns if j not in solution)
+        candidates = [j for j in gradient if gradient[j] > 1e-12 * abs(projections[j]) and j not in dependent]
+        if not candidates:
+            break
+        passive.append(max(candidates, key=lambda j: gradient[j]))
+        while passive:
+            trial = solveSubset(gram, projections, passive)
+            if passive[-1] not in solution and trial[-1] <= 0:
+                dependent.add(passive.pop())
+                break
+            if all(value > 0 for value in trial):
+                solution = dict(zip(passive, trial))
+                break
+            # Step towards the trial solution until a variable reaches zero, and drop it
+            step = min(solution.get(j, 0.0) / (solution.get(j, 0.0) - value) for j, value in zip(passive, trial) if value <= 0)
+            solution = dict((j, solution.get(j, 0.0) + step * (value - solution.get(j, 0.0))) for j, value in zip(passive, trial))
+            passive = [j for j in passive if solution[j] > 1e-15]
+            solution = dict((j, solution[j]) for j in passive)
+    return solution
+
+# Fit the moduli of a subset of the terms to the full series
+# The rows are weighted relative to the full series, so the largest residual is the largest relative difference of G(t), G'(w) and G''(w)
+# Returns (relative moduli, instantaneous modulus scale, error, positive unknowns), where the scale is the fitted G0 relative to the full
+# series' G0
+# columns, values = rows returned by fitRows
+# gram, projections = normal equations of the rows
+# terms = indices of the terms of the subset
+# passive = optional guess of the positive unknowns
+def fitTerms(columns, values, gram, projections, terms, passive=None):
+    unknowns = [0] + [term + 1 for term in terms]
+    solution = nonNegativeLeastSquares(gram, projections, unknowns, passive)
+    residual = [-value for value in values]
+    for j, value in solution.items():
+        residual = [r + value * a for r, a in zip(residual, columns[j])]
+    scale = sum(solution.values())
+    moduli = [solution.get(j, 0.0) / scale for j in unknowns[1:]]
+    return moduli, scale, max(abs(r) for r in residual), list(solution)
+
+# Reduce a Prony series to the fewest terms that stay within a tolerance of it over a time window
+# Terms are dropped one at a time, each time dropping the term whose removal gives the smallest error after refitting
+# Returns a report dictionary holding the window, the full and reduced terms, the instantaneous modulus scale and the error
+# moduli = relative moduli of the terms
+# times = relaxation times of the terms in s
+# window = (shortest, longest) time in s
+# tolerance = largest relative difference of the moduli over the window
+def reduceSeries(moduli, times, window, tolerance=DEFAULT_TOLERANCE):
+    sampleTimes, frequencies = windowGrid(window)
+    relaxation = relaxationModulus(moduli, times, sampleTimes)
+    storage, loss = dynamicModuli(moduli, times, frequencies)
+    # The rows and their normal equations are built once for all terms, each trial fit uses the subset of its terms
+    columns, values = fitRows(times, sampleTimes, frequencies, (relaxation, storage, loss))
+    gram, projections = normalEquations(columns, values)
+
+    kept = list(range(len(times)))
+    keptModuli, scale, error = list(moduli), 1.0, 0.0
+    passive = list(range(len(times) + 1))
+    while len(kept) > 1:
+        best = None
+        for i in range(len(kept)):
+            trial = kept[:i] + kept[i + 1:]
+            trialModuli, trialScale, trialError, trialPassive = fitTerms(columns, values, gram, projections, trial,
+                [j for j in passive if not j == kept[i] + 1])
+            if best is None or trialError < best[3]:
+                best = (trial, trialModuli, trialScale, trialError, trialPassive)
+        if best[3] > tolerance:
+            break
+        kept, keptModuli, scale, error, passive = best
+    keptTimes = [times[i] for i in kept]
+
+    return {
+        "window": list(window),
+        "tolerance": tolerance,
+        "fullTerms": len(times),
+        "reducedTerms": len(keptTimes),
+        "fullModuli": list(moduli),
+        "fullTimes": list(times),
+        "relativeModuli": keptModuli,
+        "relaxationTimes": keptTimes,
+        "modulusScale": scale,
+        "maxError": error}
+
+# Returns the time window of a campaign in s
+# PronyWindow holds the shortest and longest time; by default the window runs from ForceOutputInterval to the longest test duration
+# config = configuration dictionary returned by importConfig
+# workingDirectory = path to the campaign directory
+def getWindow(config, workingDirectory):
+    window = [float(value) for value in configList(config, "PronyWindow")]
+    if len(window) == 2:
+        return min(window), max(window)
+
+    measurements = Topography.campaignGeometry(config, workingDirectory)["measurements"]
+    distance = float(config["SizeScale"]) * float(config["CompressionTestDisplacementFactor"]) + measurements["DistanceToContact"] + measurements["SlidingDistance"]
+    return float(config.get("ForceOutputInterval", "") or 1e-6), distance / float(config["MovementSpeed"])
+
+# Returns the configuration with its Prony series reduced for a campaign, if PronyReduction is set in the Config file
+# The reduced RelativeModuli and RelaxationTime replace the full ones, and YoungsModulus and PoissonsRatio are set for the scaled
+# instantaneous shear modulus and the unchanged bulk modulus, so the Engineering Data system, the campaign's material key and its
+# solve cache key all follow the reduced series
+# The reduction is reported in Results/Prony.json, with the relative bulk modulus error of the written values
+# config = configuration dictionary returned by importConfig
+# workingDirectory = path to the campaign directory
+def reduceConfig(config, workingDirectory):
+    if not ImportExportUtilities.getConfigFlag(config, "PronyReduction"):
+        return config
+
+    moduli, times = getTerms(config)
+    report = reduceSeries(moduli, times, getWindow(config, workingDirectory), float(config.get("PronyTolerance", "") or DEFAULT_TOLERANCE))
+
+    unit = TIME_UNITS[config.get("RelaxationTimeUnit", "") or "s"]
+    reduced = dict(config)
+    reduced["RelativeModuli"] = [repr(value) for value in report["relativeModuli"]]
+    reduced["RelaxationTime"] = [repr(value / unit) for value in report["relaxationTimes"]]
+    shearModulus, bulkModulus = shearAndBulkModuli(float(config["YoungsModulus"]), float(config["PoissonsRatio"]))
+    youngsModulus, poissonsRatio = youngsModulusAndPoissonsRatio(shearModulus * report["modulusScale"], bulkModulus)
+    reduced["YoungsModulus"] = repr(youngsModulus)
+    reduced["PoissonsRatio"] = repr(poissonsRatio)
+    report["youngsModulus"] = float(reduced["YoungsModulus"])
+    report["poissonsRatio"] = float(reduced["PoissonsRatio"])
+    report["bulkModulusError"] = abs(shearAndBulkModuli(report["youngsModulus"], report["poissonsRatio"])[1] - bulkModulus) / bulkModulus
+
+    resultsFolderPath = os.path.join(workingDirectory, "Results")
+    if not os.path.exists(resultsFolderPath):
+        os.makedirs(resultsFolderPath)
+    ResultStore.replaceFile(os.path.join(resultsFolderPath, REPORT_NAME), json.dumps(report, indent=1, sort_keys=True))
+    return reduced
+
+if __name__ == "__main__":
+    arguments = sys.argv[1:]
+    options = {}
+    for name in ["--tolerance", "--window"]:
+        if name in arguments:
+            position = arguments.index(name)
+            options[name] = arguments[position + 1]
+            arguments = arguments[:position] + arguments[position + 2:]
+    if not len(arguments) == 1:
+        print("Usage: python Prony.py <campaign directory> [--tolerance F] [--window tMin,tMax]")
+        sys.exit(2)
+
+    campaignConfig = ImportExportUtilities.importConfig(os.path.join(arguments[0], "Config", "Config.csv"))
+    window = [float(value) for value in options["--window"].split(",")] if "--window" in options else getWindow(campaignConfig, arguments[0])
+    fullModuli, fullTimes = getTerms(campaignConfig)
+    tolerance = float(options.get("--tolerance", campaignConfig.get("PronyTolerance", "") or DEFAULT_TOLERANCE))
+    print(json.dumps(reduceSeries(fullModuli, fullTimes, window, tolerance), indent=1, sort_keys=True))
@@ -0,0 +1,275 @@
+# Restart-aware resume of interrupted Sliding Test solves
+# The Sliding Test decks ask LS-DYNA for a d3dump restart dump every RestartDumpCycles cycles
+# Each run directory holds a Restart.json record of its deck, whether it completed and the restarts it went through
+# A run is interrupted when its record is not completed, its deck is unchanged and a restart dump is left in its directory
+# An interrupted run is resumed from its latest dump with RestartCommand, by default the SolverCommand with i={input} replaced by r={dump},
+# either by the scheduler as soon as its solver exits with an error, or when the journal or this script is run again
+# The latest dump is the highest numbered one whose size has settled and is not much smaller than the dump before it, so a dump the
+# solver was still writing when it died is passed over for the one before it
+# A run whose deck changed since it was interrupted is not resumed; the journal refuses to run again until it is started over
+# Before resuming, the outputs written so far are moved into Segments/<n>, as the resumed solve writes its outputs again from the dump time
+# The force history of a resumed run is stitched from its segments: each segment is cut at the first time of the next one
+# Usage: python Scripts/Restart.py <campaign directory> [--resume]
+
+import os
+import re
+import sys
+import json
+import time
+import bisect
+import shutil
+import functools
+
+import ImportExportUtilities
+import ResultStore
+import ForceOutput
+import Keyword
+import Scheduler
+import WorkflowState
+import NumericWorker
+
+RESTART_NAME = "Restart.json"
+SEGMENTS_FOLDER = "Segments"
+
+# Restart dumps of LS-DYNA: numbered d3dump files and the running restart file
+DUMP_NAME = re.compile(r"^(d3dump\d+|runrsf)$")
+
+# Seconds the size of a dump must stay unchanged before it is taken as completely written
+DUMP_SETTLE_TIME = 1.0
+
+# A dump smaller than this fraction of the dump written before it was cut short
+DUMP_SIZE_FRACTION = 0.9
+
+# Outputs of a solve that are moved into its segment before it is resumed, binout and message files are matched by prefix
+OUTPUT_NAMES = [ForceOutput.TRACKER_NAME, ForceOutput.RCFORC_NAME, "glstat", "d3hsp", "messag", "solver.log"]
+OUTPUT_PREFIXES = [ForceOutput.BINOUT_PREFIX, "mes0"]
+
+# Returns the restart settings of the Config file, as a (dump cycles, restart command template, restart attempts) tuple
+# Dumps are disabled by setting RestartDumpCycles to 0, and resuming by leaving RestartCommand empty when SolverCommand has no i={input}
+# config = configuration dictionary returned by importConfig
+def getSettings(config):
+    dumpCycles = int(float(config.get("RestartDumpCycles", "") or 0))
+    command = config.get("RestartCommand", "")
+    if command == "" and "i={input}" in config.get("SolverCommand", ""):
+        command = config["SolverCommand"].replace("i={input}", "r={dump}")
+    return dumpCycles, command, int(config.get("RestartAttempts", "") or 3)
+
+# Returns the keywords that make LS-DYNA write restart dumps, none when dumps are disabled
+# config = configuration dictionary returned by importConfig
+def outputKeywords(config):
+    dumpCycles = getSettings(config)[0]
+    if dumpCycles <= 0:
+        return []
+    return [Keyword.Keyword("DATABASE_BINARY_D3DUMP", [Keyword.Card([dumpCycles], "cycl")])]
+
+# Returns the restart record of a run directory, or None if it has none
+# directory = working directory of the solve
+def loadRecord(directory):
+    path = os.path.join(directory, RESTART_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as fileObj:
+        return json.load(fileObj)
+
+# Write the restart record of a run directory
+# directory = working directory of the solve
+# record = restart record dictionary
+def saveRecord(directory, record):
+    ResultStore.replaceFile(os.path.join(directory, RESTART_NAME), json.dumps(record, indent=1, sort_keys=True))
+
+# Returns True once the size of a file has stopped changing, waiting for it to settle when it was modified less than DUMP_SETTLE_TIME ago
+# path = path to the file
+def isSettled(path):
+    size, modified = os.path.getsize(path), os.path.getmtime(path)
+    age = time.time() - modified
+    if age >= DUMP_SETTLE_TIME:
+        return True
+    time.sleep(DUMP_SETTLE_TIME - age)
+    return os.path.getsize(path) == size and os.path.getmtime(path) == modified
+
+# Returns the path to the latest complete restart dump of a run directory, or None if it has none
+# Numbered dumps are taken from the highest number down; the running restart file comes first when it was written after them
+# directory = working directory of the solve
+def findDump(directory):
+    if not os.path.isdir(directory):
+        return None
+    names = [name for name in os.listdir(directory) if DUMP_NAME.match(name)]
+    dumps = sorted((name for name in names if name.startswith("d3dump")), key=lambda name: int(name[len("d3dump"):]), reverse=True)
+    dumps = [os.path.join(directory, name) for name in dumps]
+    runrsf = os.path.join(directory, "runrsf")
+    if "runrsf" in names and (not dumps or os.path.getmtime(runrsf) > os.path.getmtime(dumps[0])):
+        dumps.insert(0, runrsf)
+    for i, path in enumerate(dumps):
+        if not isSettled(path):
+            continue
+        if i + 1 < len(dumps) and os.path.getsize(path) < DUMP_SIZE_FRACTION * os.path.getsize(dumps[i + 1]):
+            continue
+        return path
+    return None
+
+# Returns the list of the solver outputs in a run directory
+def listOutputs(directory):
+    return [name for name in os.listdir(directory) if name in OUTPUT_NAMES or any(name.startswith(prefix) for prefix in OUTPUT_PREFIXES)]
+
+# Start a new run in a directory: remove the dumps and segments of earlier runs and record the deck
+# directory = working directory of the solve
+# inputPath = path to the solver input deck
+def startRun(directory, inputPath):
+    for name in os.listdir(directory):
+        if DUMP_NAME.match(name):
+            os.remove(os.path.join(directory, name))
+    if os.path.exists(os.path.join(directory, SEGMENTS_FOLDER)):
+        shutil.rmtree(os.path.join(directory, SEGMENTS_FOLDER))
+    saveRecord(directory, {"input": inputPath, "deck": ImportExportUtilities.hashFile(inputPath), "completed": False, "restarts": []})
+
+# Returns True if the run in a directory was interrupted and can be resumed from a restart dump
+# directory = working directory of the solve
+# inputPath = path to the solver input deck, which must be unchanged since the run started
+def canResume(directory, inputPath):
+    record = loadRecord(directory)
+    if record is None or record["completed"] or not os.path.exists(inputPath) or findDump(directory) is None:
+        return False
+    return record["deck"] == ImportExportUtilities.hashFile(inputPath)
+
+# Move the outputs of a run written so far into a new segment and record the restart
+# Returns the path to the dump the run is resumed from
+# directory = working directory of the solve
+def beginSegment(directory):
+    record = loadRecord(directory)
+    dumpPath = findDump(directory)
+    segmentPath = os.path.join(directory, SEGMENTS_FOLDER, str(len(record["restarts"])))
+    if os.path.exists(segmentPath):
+        shutil.rmtree(segmentPath)
+    os.makedirs(segmentPath)
+    for name in listOutputs(directory):
+        shutil.move(os.path.join(directory, name), os.path.join(segmentPath, name))
+    record["restarts"].append({"dump": os.path.basename(dumpPath), "time": time.time()})
+    saveRecord(directory, record)
+    return dumpPath
+
+# Returns the solver command that resumes the run of a job from its latest restart dump, or None if it cannot be resumed
+# Used as the restart function of the scheduler's jobs, so a solve that exits with an error is resumed right away
+# config = configuration dictionary returned by importConfig
+# job = Scheduler.Job reference of the solve
+def resumeCommand(config, job):
+    dumpCycles, template, attempts = getSettings(config)
+    record = loadRecord(job.directory)
+    if template == "" or record is None or len(record["restarts"]) >= attempts or not canResume(job.directory, record["input"]):
+        return None
+    return Scheduler.buildSolverCommand(template, record["input"], job.cores, beginSegment(job.directory))
+
+# Returns the solver job of a Sliding Test
+# The job resumes the run in its directory from its latest dump when it was interrupted, and starts a new run otherwise
+# index = simulation index of the Sliding Test
+# config = configuration dictionary returned by importConfig
+# inputPath = path to the solver input deck
+# directory = working directory of the solve
+# cores, monitor, state, context = see Scheduler.Job
+def createJob(index, config, inputPath, directory, cores, monitor=None, state=None, context=None):
+    job = Scheduler.Job(index, None, directory, cores, monitor, state, functools.partial(resumeCommand, config), context)
+    if canResume(directory, inputPath):
+        job.command = resumeCommand(config, job)
+        job.restarts = 0 if job.command is None else 1
+    if job.command is None:
+        startRun(directory, inputPath)
+        job.command = Scheduler.buildSolverCommand(config["SolverCommand"], inputPath, cores)
+    return job
+
+# Mark the run in a directory as completed, so its dumps are not resumed
+# directory = working directory of the solve
+def markCompleted(directory):
+    record = loadRecord(directory)
+    if record is not None and not record["completed"]:
+        record["completed"] = True
+        saveRecord(directory, record)
+
+# Returns the (time, normal force, shear force) columns of a run directory, stitched from the segments of a resumed run
+# Each segment is cut at the first time of the next one, which restarts from an earlier dump and writes that time span again
+# directory = working directory of the solve
+# forceSource = (source, interface ID, side) tuple returned by ForceOutput.getForceSource, the tracker file when None
+# startTime = optional, rows with a time below this value are dropped
+# endTime = optional, rows with a time above this value are dropped, e.g. the end of a steady window, whose last row is kept
+# worker = optional NumericWorker reference the force output is parsed by
+def readForces(directory, forceSource=None, startTime=None, endTime=None, worker=None):
+    record = loadRecord(directory)
+    if record is None or not record["restarts"]:
+        return trimColumns(NumericWorker.run(worker, ForceOutput.readForces, directory, forceSource, startTime), endTime)
+
+    segments = [os.path.join(directory, SEGMENTS_FOLDER, str(i)) for i in range(len(record["restarts"]))] + [directory]
+    stitched = None
+    segmentEnd = None
+    for segmentPath in reversed(segments):
+        columns = trimColumns(NumericWorker.run(worker, ForceOutput.readForces, segmentPath, forceSource, startTime, segmentEnd), endTime)
+        if len(columns[0]):
+            stitched = columns if stitched is None else [column + later for column, later in zip(columns, stitched)]
+            segmentEnd = columns[0][0]
+    return stitched if stitched is not None else trimColumns(NumericWorker.run(worker, ForceOutput.readForces, directory, forceSource, startTime), endTime)
+
+# Returns force columns without the rows after an end time
+# columns = (time, normal force, shear force) columns in ascending time order
+# endTime = rows with a time above this value are dropped, or None to keep every row
+def trimColumns(columns, endTime):
+    if endTime is None:
+        return columns
+    count = bisect.bisect_right(columns[0], endTime)
+    return [column[:count] for column in columns]
+
+# Returns the simulation indices of a campaign whose runs were interrupted and can be resumed, with their workflow state records
+# workingDirectory = path to the campaign directory
+def findInterrupted(workingDirectory):
+    interrupted = []
+    for index, record in sorted(WorkflowState.openState(workingDirectory).simulations().items()):
+        if not record.get("status") == "completed" and record.get("directory") and record.get("input") and canResume(record["directory"], record["input"]):
+            interrupted.append((index, record))
+    return interrupted
+
+# Returns the simulation indices of a campaign whose runs were interrupted with a restart dump but whose deck changed or was removed since,
+# with their workflow state records; they cannot be resumed
+# workingDirectory = path to the campaign directory
+def findChanged(workingDirectory):
+    changed = []
+    for index, record in sorted(WorkflowState.openState(workingDirectory).simulations().items()):
+        if record.get("status") == "completed" or not record.get("directory"):
+            continue
+        restartRecord = loadRecord(record["directory"])
+        if restartRecord is None or restartRecord["completed"] or findDump(record["directory"]) is None:
+            continue
+        inputPath = restartRecord["input"]
+        if not os.path.exists(inputPath) or not restartRecord["deck"] == ImportExportUtilities.hashFile(inputPath):
+            changed.append((index, record))
+    return changed
+
+if __name__ == "__main__":
+    arguments = sys.argv[1:]
+    resume = "--resume" in arguments
+    arguments = [argument for argument in arguments if not argument == "--resume"]
+    if not len(arguments) == 1:
+        print("Usage: python Restart.py <campaign directory> [--resume]")
+        sys.exit(2)
+
+    import SlidingTestResults
+
+    campaignDirectory = arguments[0]
+    campaignConfig = ImportExportUtilities.importConfig(os.path.join(campaignDirectory, "Config", "Config.csv"))
+    interrupted = findInterrupted(campaignDirectory)
+    for index, record in interrupted:
+        restartRecord = loadRecord(record["directory"])
+        print("{} {} restarts={} dump={}".format(index, record["directory"], len(restartRecord["restarts"]), os.path.basename(findDump(record["directory"]))))
+    for index, record in findChanged(campaignDirectory):
+        print("{} {} deck changed, not resumed".format(index, record["directory"]))
+    if not resume or not interrupted:
+        sys.exit(0)
+
+    # Resume the interrupted runs outside of Workbench and collect their stitched force histories
+    state = WorkflowState.openState(campaignDirectory)
+    cores = int(campaignConfig.get("CoresPerJob", "1"))
+    jobs = [createJob(index, campaignConfig, record["input"], record["directory"], cores) for index, record in interrupted]
+
+    def collectResults(job):
+        displacementDuration = SlidingTestResults.readJob(job.directory)["displacementDuration"]
+        forceDataPath = SlidingTestResults.collect(campaignDirectory, job.index, displacementDuration, ImportExportUtilities.getConfigFlag(campaignConfig, "ExportForceCsv"),
+            job.directory, ForceOutput.getForceSource(campaignConfig), NumericWorker.openWorker(campaignConfig))
+        state.updateSimulation(job.index, status="completed", forceData=forceDataPath)
+
+    done = Scheduler.runJobs(jobs, max(1, int(campaignConfig.get("SolverWorkers", "1"))), state, collectResults)
+    sys.exit(0 if all(job.returnCode == 0 for job in done) else 1)
@@ -0,0 +1,328 @@
+# Binary columnar store for the normal and shear force histories of each simulation
+# Each run is saved as a single .npy file holding a (columns x samples) float64 array, so every column is contiguous on disk
+# A small manifest.json in the Results directory lists the stored runs
+# The .npy files are written and read without NumPy so the module works inside IronPython
+# When NumPy is available, readers get memory-mapped, zero-copy column views instead
+
+import os
+import sys
+import csv
+import json
+import ast
+import array
+import time
+import errno
+import struct
+import socket
+import threading
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+MANIFEST_NAME = "manifest.json"
+COLUMN_NAMES = ["Time [s]", "Normal Force [N]", "Shear Force [N]"]
+
+_NPY_MAGIC = b"\x93NUMPY"
+
+# Returns the path of the binary force data file of a run
+# resultsFolder = path to the Results directory
+# name = run name, e.g. the simulation index or "CompressionTest"
+def forceDataPath(resultsFolder, name):
+    return os.path.join(resultsFolder, "Force_{}.npy".format(name))
+
+# Returns the manifest dictionary of the Results directory, or an empty manifest if none exists
+# resultsFolder = path to the Results directory
+def loadManifest(resultsFolder):
+    manifestPath = os.path.join(resultsFolder, MANIFEST_NAME)
+    if not os.path.exists(manifestPath):
+        return {"runs": {}}
+    with open(manifestPath, 'r') as fileObj:
+        return json.load(fileObj)
+
+# Write the manifest dictionary to the Results directory
+# The file is written to a temporary path first so a crash never leaves a truncated manifest
+# resultsFolder = path to the Results directory
+# manifest = manifest dictionary
+def saveManifest(resultsFolder, manifest):
+    manifestPath = os.path.join(resultsFolder, MANIFEST_NAME)
+    replaceFile(manifestPath, json.dumps(manifest, indent=1, sort_keys=True))
+
+# Returns the path a new version of a file is written to before it is renamed over the file
+# The name holds the process and thread IDs, so concurrent writers of the same file never write to each other's temporary file
+# path = destination file path
+def temporaryFilePath(path):
+    return "{}.{}.{}.tmp".format(path, os.getpid(), threading.current_thread().ident)
+
+# Write text to a file by writing a temporary file and renaming it over the destination
+# path = destination file path
+# text = file contents
+def replaceFile(path, text):
+    temporaryPath = temporaryFilePath(path)
+    with open(temporaryPath, 'w') as fileObj:
+        fileObj.write(text)
+    renameOver(temporaryPath, path)
+
+# Rename a file over a destination in one atomic step, so readers see either the old or the new file
+# IronPython has no os.replace, and its os.rename refuses an existing destination on Windows, so the destination is removed first there
+# temporaryPath = path to the new file
+# path = destination file path
+def renameOver(temporaryPath, path):
+    if hasattr(os, "replace"):
+        os.replace(temporaryPath, path)
+        return
+    try:
+        os.rename(temporaryPath, path)
+    except OSError:
+        os.remove(path)
+        os.rename(temporaryPath, path)
+
+# Returns True if a process of this host is running, False if it is not, or None if that cannot be told
+# os.kill cannot be used on Windows, where it terminates the process, so the process is opened through the Windows API there
+# pid = process ID
+def processRunning(pid):
+    if os.name == "nt":
+        try:
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+        except (ImportError, AttributeError):
+            return None
+        # PROCESS_QUERY_LIMITED_INFORMATION access, and the STILL_ACTIVE exit code
+        handle = kernel32.OpenProcess(0x1000, False, pid)
+        if not handle:
+            return False
+        exitCode = ctypes.c_ulong()
+        kernel32.GetExitCodeProcess(handle, ctypes.byref(exitCode))
+        kernel32.CloseHandle(handle)
+        return exitCode.value == 259
+    try:
+        os.kill(pid, 0)
+    except OSError as error:
+        return error.errno == errno.EPERM
+    return True
+
+# Lock held while a shared file is updated, implemented as an exclusively created lock file holding the host name and PID of its owner
+# A lock whose owner has exited is broken right away; a lock whose owner runs on another host, or cannot be read,
+# is broken once it is older than the timeout, as a lock left behind by a crashed process
+# path = path to the lock file
+# timeout = seconds after which a lock of an unknown owner is broken
+class FileLock(object):
+    def __init__(self, path, timeout=60.0):
+        self.path = path
+        self.timeout = timeout
+        self.owner = "{} {}".format(socket.gethostname(), os.getpid())
+
+    def __enter__(self):
+        while True:
+            try:
+                fileDescriptor = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except OSError:
+                self.breakStale()
+                time.sleep(0.01)
+                continue
+            os.write(fileDescriptor, self.owner.encode("ascii"))
+            os.close(fileDescriptor)
+            return self
+
+    # Remove the lock file if its owner is gone
+    def breakStale(self):
+        try:
+            with open(self.path, 'r') as fileObj:
+                owner = fileObj.read()
+            age = time.time() - os.path.getmtime(self.path)
+        except (IOError, OSError):
+            return
+        host, pid = (owner.rsplit(" ", 1) + [""])[:2]
+        running = processRunning(int(pid)) if host == socket.gethostname() and pid.isdigit() else None
+        if running is False or (running is None and age > self.timeout):
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+    def __exit__(self, excType, excValue, traceback):
+        os.remove(self.path)
+        return False
+
+# Save the force history of a run and register it in the manifest
+# Returns the path of the written .npy file
+# resultsFolder = path to the Results directory
+# name = run name, e.g. the simulation index or "CompressionTest"
+# columns = sequence of equal length columns (time, normal force, shear force)
+# exportCsv = also write a Force_{name}.csv text copy of the data
+# steady = True if the columns only hold the steady window of the run, as found while it was solved
+def writeForceData(resultsFolder, name, columns, exportCsv=False, steady=False):
+    if not os.path.exists(resultsFolder):
+        os.mkdir(resultsFolder)
+
+    path = forceDataPath(resultsFolder, name)
+    writeNpy(path, columns)
+
+    # Runs are collected from several scheduler threads and processes, so the manifest is updated under a lock
+    with FileLock(os.path.join(resultsFolder, MANIFEST_NAME) + ".lock"):
+        manifest = loadManifest(resultsFolder)
+        manifest["runs"][str(name)] = {
+            "file": os.path.basename(path),
+            "samples": len(columns[0]) if columns else 0,
+            "columns": COLUMN_NAMES[:len(columns)]}
+        if steady:
+            manifest["runs"][str(name)]["steady"] = True
+        saveManifest(resultsFolder, manifest)
+
+    if exportCsv:
+        exportForceCsv(resultsFolder, name)
+
+    return path
+
+# Load the force history of a run
+# Returns a list of columns (time, normal force, shear force)
+# Columns are read-only memory-mapped NumPy views when NumPy is available, array('d') objects otherwise
+# resultsFolder = path to the Results directory
+# name = run name, e.g. the simulation index or "CompressionTest"
+def readForceData(resultsFolder, name):
+    return readNpy(forceDataPath(resultsFolder, name))
+
+# Open the force history of a run for a streaming pass, without reading it into memory
+# Returns a list of columns (time, normal force, shear force) that support len, indexing and slicing
+# Columns are read-only memory-mapped NumPy views when NumPy is available, NpyColumn objects reading each slice from disk otherwise
+# resultsFolder = path to the Results directory
+# name = run name, e.g. the simulation index or "CompressionTest"
+def openForceData(resultsFolder, name):
+    return openNpy(forceDataPath(resultsFolder, name))
+
+# Returns True if the stored force history of a run only holds its steady window, as registered by writeForceData
+# resultsFolder = path to the Results directory
+# name = run name, e.g. the simulation index
+def isSteadyRun(resultsFolder, name):
+    return loadManifest(resultsFolder)["runs"].get(str(name), {}).get("steady", False)
+
+# Returns the sorted list of sliding test run names stored in the Results directory
+# The compression test run is excluded
+# resultsFolder = path to the Results directory
+def listSlidingRuns(resultsFolder):
+    names = [name for name in loadManifest(resultsFolder)["runs"] if not name == "CompressionTest"]
+    names.sort(key=lambda name: int(name) if name.isdigit() else name)
+    return names
+
+# Export the force history of a run as a Force_{name}.csv text file
+# Returns the path of the written .csv file
+# resultsFolder = path to the Results directory
+# name = run name, e.g. the simulation index or "CompressionTest"
+def exportForceCsv(resultsFolder, name):
+    columns = readForceData(resultsFolder, name)
+    path = os.path.join(resultsFolder, "Force_{}.csv".format(name))
+    with open(path, 'wb' if sys.version_info[0] < 3 else 'w') as fileObj:
+        csvWriter = csv.writer(fileObj)
+        csvWriter.writerow(COLUMN_NAMES[:len(columns)])
+        for row in zip(*columns):
+            csvWriter.writerow([repr(float(value)) for value in row])
+    return path
+
+# Write columns of floats to a .npy file as a C-ordered (columns x samples) float64 array
+# The file is written to a temporary path and renamed over the destination, so readers never see a partly written file
+# path = path to the .npy file
+# columns = sequence of equal length columns
+def writeNpy(path, columns):
+    numSamples = len(columns[0]) if columns else 0
+    if any(len(column) != numSamples for column in columns):
+        raise ValueError("All columns must have the same length.")
+    header = "{{'descr': '<f8', 'fortran_order': False, 'shape': ({}, {}), }}".format(len(columns), numSamples)
+    # Pad the header so the data starts on a 64 byte boundary, as NumPy does
+    padding = 64 - (len(_NPY_MAGIC) + 4 + len(header) + 1) % 64
+    header = header + " " * padding + "\n"
+
+    temporaryPath = temporaryFilePath(path)
+    with open(temporaryPath, 'wb') as fileObj:
+        fileObj.write(_NPY_MAGIC + b"\x01\x00" + struct.pack("<H", len(header)) + header.encode("latin1"))
+        for column in columns:
+            values = column if isinstance(column, array.array) and column.typecode == 'd' else array.array('d', column)
+            if sys.byteorder == "big":
+                values = array.array('d', values)
+                values.byteswap()
+            values.tofile(fileObj)
+    renameOver(temporaryPath, path)
+
+# Read the header of a .npy file, leaving the file positioned at the start of the data
+# Returns the header dictionary, holding descr, fortran_order and shape
+# fileObj = .npy file opened in binary mode
+def readNpyHeader(fileObj):
+    if fileObj.read(6) != _NPY_MAGIC:
+        raise ValueError("{} is not a .npy file.".format(fileObj.name))
+    major = bytearray(fileObj.read(2))[0]
+    if major == 1:
+        headerLength = struct.unpack("<H", fileObj.read(2))[0]
+    else:
+        headerLength = struct.unpack("<I", fileObj.read(4))[0]
+    return ast.literal_eval(fileObj.read(headerLength).decode("latin1"))
+
+# A column of a .npy file written by writeNpy, read from disk when indexed or sliced
+# Slices are returned as array('d') objects, so a column can be reduced a chunk at a time in constant memory
+# path = path to the .npy file
+# offset = position of the column's first value in the file
+# length = number of values of the column
+class NpyColumn(object):
+    def __init__(self, path, offset, length):
+        self.path = path
+        self.offset = offset
+        self.length = length
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.length)
+            if not step == 1:
+                raise ValueError("NpyColumn slices cannot have a step.")
+            values = array.array('d')
+            if stop > start:
+                with open(self.path, 'rb') as fileObj:
+                    fileObj.seek(self.offset + values.itemsize * start)
+                    values.fromfile(fileObj, stop - start)
+                if sys.byteorder == "big":
+                    values.byteswap()
+            return values
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("NpyColumn index out of range.")
+        return self[index:index + 1][0]
+
+# Open a 2D float64 .npy file written by writeNpy without reading its data
+# Returns a list of the rows of the stored array, memory-mapped NumPy views when NumPy is available and NpyColumn objects otherwise
+# path = path to the .npy file
+def openNpy(path):
+    if numpy is not None:
+        return list(numpy.load(path, mmap_mode='r'))
+
+    with open(path, 'rb') as fileObj:
+        header = readNpyHeader(fileObj)
+        if header["descr"] != "<f8" or header["fortran_order"]:
+            raise ValueError("{} does not hold a C-ordered float64 array.".format(path))
+        offset = fileObj.tell()
+    numColumns, numSamples = header["shape"]
+    return [NpyColumn(path, offset + 8 * numSamples * i, numSamples) for i in range(numColumns)]
+
+# Read a 2D float64 .npy file written by writeNpy
+# Returns a list of the rows of the stored array
+# path = path to the .npy file
+def readNpy(path):
+    if numpy is not None:
+        return list(numpy.load(path, mmap_mode='r'))
+
+    with open(path, 'rb') as fileObj:
+        header = readNpyHeader(fileObj)
+        if header["descr"] != "<f8" or header["fortran_order"]:
+            raise ValueError("{} does not hold a C-ordered float64 array.".format(path))
+
+        numColumns, numSamples = header["shape"]
+        columns = []
+        for i in range(numColumns):
+            column = array.array('d')
+            if numSamples > 0:
+                column.fromfile(fileObj, numSamples)
+            if sys.byteorder == "big":
+                column.byteswap()
+            columns.append(column)
+        return columns
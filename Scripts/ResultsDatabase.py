@@ -0,0 +1,341 @@
+# Local database of the results of every campaign, so past results can be looked up without grepping campaign directories or solving again
+# Each ingested campaign becomes one record holding its Config values, geometry hash, material, movement speed, geometry measurements,
+# the steady window statistics of every Sliding Test run and its generated keyword snippet
+# The database directory holds Index.json, a compact entry per record with the values queries filter on (geometry hash, material key,
+# movement speed and pressure range), and Records/<id>.json with the full records, which are only read for the records a query matches
+# Records are keyed by the campaign directory, its Config values and its geometry hash, so ingesting a campaign again replaces its record,
+# while a campaign directory rerun with another Config or geometry gets a new record and the results of its earlier inputs are kept
+# Queries filter the records and combine the runs of the matching ones, e.g. to interpolate the COF at a pressure or build a snippet
+# With ResultsDatabaseDirectory set in the Config file, the journal ingests every campaign after post processing
+# Usage: python Scripts/ResultsDatabase.py <database directory> ingest <campaign directory> [...]
+#        python Scripts/ResultsDatabase.py <database directory> list [filters]
+#        python Scripts/ResultsDatabase.py <database directory> cof <pressure> [filters]
+#        python Scripts/ResultsDatabase.py <database directory> snippet [filters] [--fit Monotone|Power] [--tolerance F] [--output path]
+#        python Scripts/ResultsDatabase.py <database directory> remove <record id>
+# Filters: --record id, --geometry hash or geometry file, --material key or MaterialName, --speed m/s, --pressure Pa
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+
+import ImportExportUtilities
+import ResultStore
+import WorkflowState
+import PostProcessing
+import BatchCampaign
+import FrictionFit
+import Keyword
+
+INDEX_NAME = "Index.json"
+RECORDS_FOLDER = "Records"
+
+# Bumped whenever the layout of the records changes
+DATABASE_VERSION = 1
+
+# Campaign values of the workflow state saved with each record
+MEASUREMENTS = ["TopFaceArea", "SlidingDistance", "DistanceToContact"]
+
+# Relative difference under which two movement speeds are the same
+SPEED_TOLERANCE = 1e-6
+
+# Returns the results database configured in the Config file, or None if the database is disabled
+# The database is enabled by setting ResultsDatabaseDirectory; relative paths are taken from the working directory
+# config = configuration dictionary returned by importConfig
+# workingDirectory = path to the workflow working directory
+def openDatabase(config, workingDirectory):
+    directory = config.get("ResultsDatabaseDirectory", "")
+    if directory == "":
+        return None
+    return ResultsDatabase(os.path.join(workingDirectory, directory))
+
+# Returns the id of the record of a campaign directory
+# campaignDirectory = path to the campaign directory
+# config = configuration dictionary of the campaign
+# geometry = hash of the campaign's geometry file
+def recordId(campaignDirectory, config, geometry):
+    key = json.dumps([os.path.normcase(os.path.abspath(campaignDirectory)), config, geometry], sort_keys=True)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+# Returns the key of the material of a configuration, a hash of its material columns
+# config = configuration dictionary returned by importConfig
+def materialHash(config):
+    return hashlib.sha1(BatchCampaign.materialKey(config).encode("utf-8")).hexdigest()[:16]
+
+# Returns the record of a campaign, read from its Config file, workflow state and Results directory
+# The statistics of the runs come from the post processing summary cache, so only runs that changed since post processing are read again
+# campaignDirectory = path to the campaign directory
+def buildRecord(campaignDirectory):
+    config = PostProcessing.loadConfig(campaignDirectory)
+    state = WorkflowState.openState(campaignDirectory)
+    topFaceArea = float(state.get("TopFaceArea"))
+    records = state.simulations()
+
+    runs = []
+    for runName, summary in PostProcessing.summarizeRuns(campaignDirectory, config):
+        result = PostProcessing.runResult(summary, topFaceArea)
+        if result is None:
+            continue
+        simulation = records.get(int(runName), {}) if str(runName).isdigit() else {}
+        runs.append({"run": runName, "targetPressure": simulation.get("pressure"), "normalForce": result[0], "shearForce": result[1],
+            "pressure": result[2], "cof": result[3], "cofCi": result[4], "normalStd": result[5], "shearStd": result[6],
+            "steadyStart": result[7], "steadySamples": result[8]})
+    runs.sort(key=lambda run: run["pressure"])
+
+    geometryPath = ImportExportUtilities.getGeometryPath(campaignDirectory)
+    geometry = ImportExportUtilities.hashFile(geometryPath)
+
+    snippetPath = os.path.join(campaignDirectory, "Results", "Keyword Snippet.txt")
+    snippet = None
+    if os.path.exists(snippetPath):
+        with open(snippetPath, 'r') as fileObj:
+            snippet = fileObj.read()
+
+    return {
+        "version": DATABASE_VERSION,
+        "id": recordId(campaignDirectory, config, geometry),
+        "name": os.path.basename(os.path.normpath(os.path.abspath(campaignDirectory))),
+        "directory": os.path.abspath(campaignDirectory),
+        "ingested": time.time(),
+        "config": config,
+        "geometry": geometry,
+        "geometryFile": os.path.basename(geometryPath),
+        "material": materialHash(config),
+        "materialName": config.get("MaterialName", ""),
+        "speed": float(config["MovementSpeed"]),
+        "measurements": dict((key, state.get(key)) for key in MEASUREMENTS if state.get(key) is not None),
+        "runs": runs,
+        "snippet": snippet}
+
+# Returns the index entry of a record
+def indexEntry(record):
+    pressures = [run["pressure"] for run in record["runs"]]
+    return {
+        "name": record["name"],
+        "directory": record["directory"],
+        "ingested": record["ingested"],
+        "geometry": record["geometry"],
+        "geometryFile": record["geometryFile"],
+        "material": record["material"],
+        "materialName": record["materialName"],
+        "speed": record["speed"],
+        "runs": len(pressures),
+        "minPressure": min(pressures) if pressures else None,
+        "maxPressure": max(pressures) if pressures else None}
+
+# Returns True if an index entry matches the query filters, filters that are None match every entry
+# identifier = record id of the entry
+# record = record id or prefix
+# geometry = geometry hash or prefix
+# material = material key or prefix, or MaterialName
+# speed = movement speed in m/s
+# pressure = pressure in Pa that must be within the pressure range of the runs
+def matches(identifier, entry, record=None, geometry=None, material=None, speed=None, pressure=None):
+    if record is not None and not identifier.startswith(record):
+        return False
+    if geometry is not None and not entry["geometry"].startswith(geometry):
+        return False
+    if material is not None and not entry["material"].startswith(material) and not entry["materialName"].strip().lower() == material.strip().lower():
+        return False
+    if speed is not None and abs(entry["speed"] - speed) > SPEED_TOLERANCE * max(abs(speed), abs(entry["speed"])):
+        return False
+    if pressure is not None and (entry["minPressure"] is None or not entry["minPressure"] <= pressure <= entry["maxPressure"]):
+        return False
+    return True
+
+# Directory of campaign records with an index of the values queries filter on
+# directory = path to the database directory
+class ResultsDatabase(object):
+    def __init__(self, directory):
+        self.directory = directory
+        self.recordsFolderPath = os.path.join(directory, RECORDS_FOLDER)
+        self.indexPath = os.path.join(directory, INDEX_NAME)
+
+    # Returns the index, a dictionary of index entries by record id
+    def index(self):
+        if not os.path.exists(self.indexPath):
+            return {}
+        with open(self.indexPath, 'r') as fileObj:
+            return json.load(fileObj)["records"]
+
+    def saveIndex(self, entries):
+        ResultStore.replaceFile(self.indexPath, json.dumps({"version": DATABASE_VERSION, "records": entries}, indent=1, sort_keys=True))
+
+    # Add records, replacing the records of the same ids
+    # Records are written before the index, which is updated under a lock so several campaigns can ingest into the same database
+    # Returns the list of record ids
+    def addRecords(self, records):
+        if not os.path.exists(self.recordsFolderPath):
+            os.makedirs(self.recordsFolderPath)
+        for record in records:
+            ResultStore.replaceFile(os.path.join(self.recordsFolderPath, record["id"] + ".json"), json.dumps(record, indent=1, sort_keys=True))
+        with WorkflowState.FileLock(self.indexPath + ".lock"):
+            entries = self.index()
+            for record in records:
+                entries[record["id"]] = indexEntry(record)
+            self.saveIndex(entries)
+        return [record["id"] for record in records]
+
+    # Ingest the results of one or more campaigns
+    # Returns the list of the ids of their records
+    # campaignDirectories = paths to the campaign directories
+    def ingest(self, *campaignDirectories):
+        return self.addRecords([buildRecord(campaignDirectory) for campaignDirectory in campaignDirectories])
+
+    # Remove a record
+    # identifier = record id
+    def remove(self, identifier):
+        with WorkflowState.FileLock(self.indexPath + ".lock"):
+            entries = self.index()
+            entries.pop(identifier, None)
+            self.saveIndex(entries)
+        recordPath = os.path.join(self.recordsFolderPath, identifier + ".json")
+        if os.path.exists(recordPath):
+            os.remove(recordPath)
+
+    # Returns the full record of an id
+    def load(self, identifier):
+        with open(os.path.join(self.recordsFolderPath, identifier + ".json"), 'r') as fileObj:
+            return json.load(fileObj)
+
+    # Returns the list of (record id, index entry) pairs that match the query filters, by campaign name
+    # filters = keyword filters of matches
+    def find(self, **filters):
+        return sorted(((identifier, entry) for identifier, entry in self.index().items() if matches(identifier, entry, **filters)),
+            key=lambda item: (item[1]["name"], item[0]))
+
+    # Returns the runs of the records that match the query filters, sorted by pressure
+    # Each run is a dictionary of its statistics with the id of its record
+    # filters = keyword filters of matches, the pressure filter is not applied to the runs themselves
+    def runs(self, **filters):
+        return self.recordRuns(self.find(**filters))
+
+    # Returns the runs of a list of (record id, index entry) pairs returned by find, sorted by pressure
+    def recordRuns(self, entries):
+        runs = []
+        for identifier, entry in entries:
+            for run in self.load(identifier)["runs"]:
+                run["record"] = identifier
+                runs.append(run)
+        runs.sort(key=lambda run: run["pressure"])
+        return runs
+
+    # Returns the (pressure, cof) points of the runs of the records that match the query filters, with the COF of equal pressures averaged
+    # filters = keyword filters of matches
+    def points(self, **filters):
+        return self.recordPoints(self.find(**filters))
+
+    # Returns the (pressure, cof) points of the runs of a list of (record id, index entry) pairs returned by find
+    def recordPoints(self, entries):
+        return FrictionFit.uniquePoints((run["pressure"], run["cof"]) for run in self.recordRuns(entries))
+
+    # Returns the COF at a pressure, interpolated linearly between the closest runs of the matching records on each side of it
+    # Returns a dictionary of the pressure, the COF and the two bracketing (pressure, cof) points, with a None COF when the pressure is outside
+    # of the range of the runs
+    # The number of distinct (geometry, material, speed) groups among the matching records is reported, since their runs should not be mixed
+    # pressure = pressure in Pa
+    # filters = keyword filters of matches, other than pressure
+    def interpolateCof(self, pressure, **filters):
+        entries = self.find(**filters)
+        points = self.recordPoints(entries)
+        result = {"pressure": pressure, "cof": None, "below": None, "above": None, "records": len(entries),
+            "groups": len(set((entry["geometry"], entry["material"], entry["speed"]) for identifier, entry in entries))}
+        below = [point for point in points if point[0] <= pressure]
+        above = [point for point in points if point[0] >= pressure]
+        if not below or not above:
+            return result
+        result["below"], result["above"] = list(below[-1]), list(above[0])
+        result["cof"] = FrictionFit.interpolate([below[-1], above[0]], pressure)
+        return result
+
+    # Returns the keyword snippet of the combined runs of the records that match the query filters
+    # The snippet of a single record is returned as generated by its campaign when no fit is requested
+    # method = "None", "Monotone" or "Power" table fit, see FrictionFit
+    # tolerance = largest COF difference between the resampled table and the fit
+    # filters = keyword filters of matches
+    def snippet(self, method="None", tolerance=0.002, **filters):
+        entries = self.find(**filters)
+        if not entries:
+            return None
+        if len(entries) == 1 and method == "None":
+            stored = self.load(entries[0][0]).get("snippet")
+            if stored:
+                return stored
+        points = self.recordPoints(entries)
+        if not method == "None" and len(points) > 1:
+            points = [(pressure, cof) for pressure, cof in FrictionFit.fitTable(points, method, tolerance)["table"]]
+        return Keyword.formatKeywords(Keyword.frictionContact(points))
+
+# Returns the query filters of the parsed command line arguments
+def getFilters(arguments):
+    geometry = arguments.geometry
+    if geometry is not None and os.path.isfile(geometry):
+        geometry = ImportExportUtilities.hashFile(geometry)
+    filters = {"record": arguments.record, "geometry": geometry, "material": arguments.material, "speed": arguments.speed}
+    return dict((key, value) for key, value in filters.items() if value is not None)
+
+# Returns the text of a value, or "-" when it is unknown
+def formatValue(value, pattern):
+    return "-" if value is None else pattern.format(value)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the results database of the campaigns")
+    parser.add_argument("database", help="database directory")
+    commands = parser.add_subparsers(dest="command")
+    ingestParser = commands.add_parser("ingest", help="add or update the records of campaign directories")
+    ingestParser.add_argument("campaigns", nargs="+")
+    removeParser = commands.add_parser("remove", help="remove a record")
+    removeParser.add_argument("identifier")
+    listParser = commands.add_parser("list", help="list the records that match the filters")
+    cofParser = commands.add_parser("cof", help="interpolate the COF at a pressure from the runs of the records that match the filters")
+    cofParser.add_argument("pressure", type=float, help="pressure in Pa")
+    snippetParser = commands.add_parser("snippet", help="write the keyword snippet of the runs of the records that match the filters")
+    snippetParser.add_argument("--fit", choices=FrictionFit.METHODS, default="None")
+    snippetParser.add_argument("--tolerance", type=float, default=0.002)
+    snippetParser.add_argument("--output", help="snippet file path, printed when not given")
+    for commandParser in [listParser, cofParser, snippetParser]:
+        commandParser.add_argument("--record", help="record id or prefix")
+        commandParser.add_argument("--geometry", help="geometry hash or prefix, or path to a geometry file")
+        commandParser.add_argument("--material", help="material key or prefix, or MaterialName")
+        commandParser.add_argument("--speed", type=float, help="movement speed in m/s")
+    listParser.add_argument("--pressure", type=float, help="pressure in Pa within the range of the runs")
+    arguments = parser.parse_args()
+    if arguments.command is None:
+        parser.error("a command is required")
+
+    database = ResultsDatabase(arguments.database)
+    if arguments.command == "ingest":
+        for identifier, campaignDirectory in zip(database.ingest(*arguments.campaigns), arguments.campaigns):
+            print("{} {}".format(identifier, campaignDirectory))
+    elif arguments.command == "remove":
+        database.remove(arguments.identifier)
+    elif arguments.command == "list":
+        filters = getFilters(arguments)
+        if arguments.pressure is not None:
+            filters["pressure"] = arguments.pressure
+        print("{:<16} {:<20} {:<10} {:<10} {:<24} {:>8} {:>5} {:>12} {:>12}".format("Record", "Campaign", "Geometry", "Material", "Material name",
+            "Speed", "Runs", "Min P [Pa]", "Max P [Pa]"))
+        for identifier, entry in database.find(**filters):
+            print("{:<16} {:<20} {:<10} {:<10} {:<24} {:>8} {:>5} {:>12} {:>12}".format(identifier, entry["name"][:20], entry["geometry"][:10],
+                entry["material"][:10], entry["materialName"][:24], "{:g}".format(entry["speed"]), entry["runs"],
+                formatValue(entry["minPressure"], "{:.4e}"), formatValue(entry["maxPressure"], "{:.4e}")))
+    elif arguments.command == "cof":
+        result = database.interpolateCof(arguments.pressure, **getFilters(arguments))
+        if result["groups"] > 1:
+            sys.stderr.write("Warning: the matching records span {} geometry, material and speed groups, add filters to select one.\n".format(result["groups"]))
+        if result["cof"] is None:
+            sys.stderr.write("No runs of the {} matching records bracket {:g} Pa.\n".format(result["records"], arguments.pressure))
+            sys.exit(1)
+        print(json.dumps(result, indent=1, sort_keys=True))
+    elif arguments.command == "snippet":
+        text = database.snippet(arguments.fit, arguments.tolerance, **getFilters(arguments))
+        if text is None:
+            sys.stderr.write("No records match.\n")
+            sys.exit(1)
+        if arguments.output:
+            with open(arguments.output, 'w') as fileObj:
+                fileObj.write(text)
+        else:
+            sys.stdout.write(text)
@@ -0,0 +1,175 @@
+# Runs independent solver jobs concurrently with a fixed number of workers
+# Each job is launched as a subprocess in its own directory with its own core allocation
+# Completion is collected in the calling thread as jobs finish and recorded per simulation index in the workflow state store
+# This lets the sliding test solves of a campaign run side by side instead of one after another
+
+import os
+import sys
+import time
+import shlex
+import threading
+import subprocess
+
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
+
+# A single solver run
+# index = simulation index the job belongs to
+# command = list of program arguments
+# directory = directory the job runs in; solver output is written to solver.log in this directory
+# cores = number of cores allocated to the job
+# monitor = optional object polled while the job runs; when its poll method returns True its stop method is called,
+#           and its finish method, if it has one, is called once the process has exited
+# state = optional WorkflowState.StateStore reference the job's status is recorded in, instead of the one given to runJobs
+# restart = optional function called with the job when its process exits with an error, returning the command that resumes it,
+#           or None if it cannot be resumed, see Restart.resumeCommand
+# context = optional value the caller keeps with the job for its onComplete function, e.g. the campaign the job belongs to
+class Job(object):
+    def __init__(self, index, command, directory, cores=1, monitor=None, state=None, restart=None, context=None):
+        self.index = index
+        self.command = command
+        self.directory = directory
+        self.cores = cores
+        self.monitor = monitor
+        self.state = state
+        self.restart = restart
+        self.context = context
+        self.restarts = 0
+        self.returnCode = None
+        self.startTime = None
+        self.endTime = None
+
+# Polls several monitors of a job as one
+# poll returns True once any monitor asks for the job to stop, and stop is then called on those monitors only
+# monitors = list of monitor references
+class MonitorGroup(object):
+    def __init__(self, monitors):
+        self.monitors = monitors
+        self.triggered = []
+
+    def poll(self):
+        self.triggered = [monitor for monitor in self.monitors if monitor.poll()]
+        return len(self.triggered) > 0
+
+    def stop(self):
+        for monitor in self.triggered:
+            monitor.stop()
+
+    def finish(self):
+        for monitor in self.monitors:
+            if hasattr(monitor, "finish"):
+                monitor.finish()
+
+# Returns a single monitor polling the given monitors, or None if there are none
+# monitors = monitor references, or None for monitors that are disabled
+def combineMonitors(*monitors):
+    monitors = [monitor for monitor in monitors if monitor is not None]
+    if not monitors:
+        return None
+    if len(monitors) == 1:
+        return monitors[0]
+    return MonitorGroup(monitors)
+
+# Returns the list of program arguments for a solver run
+# template = command line with {input}, {directory}, {ncpu} and {dump} placeholders, e.g. "lsdyna i={input} ncpu={ncpu}"
+# inputPath = path to the solver input deck
+# cores = number of cores allocated to the run
+# dumpPath = path to the restart dump a resumed run starts from
+def buildSolverCommand(template, inputPath, cores, dumpPath=""):
+    return [argument.format(input=inputPath, directory=os.path.dirname(inputPath), ncpu=cores, dump=dumpPath) for argument in shlex.split(template)]
+
+# Record the state of a job in the workflow state store
+# state = WorkflowState.StateStore reference, or None
+# job = Job reference
+# status = "running", "completed" or "failed"
+def recordStatus(state, job, status):
+    if job.state is not None:
+        state = job.state
+    if state is None:
+        return
+    state.updateSimulation(job.index, status=status, returnCode=job.returnCode, cores=job.cores, startTime=job.startTime, endTime=job.endTime, restarts=job.restarts)
+
+# Wait for a job's process to exit, polling the job's monitor in the meantime
+def _wait(job, process, pollInterval):
+    if job.monitor is None:
+        return process.wait()
+
+    while process.poll() is None:
+        if job.monitor.poll():
+            job.monitor.stop()
+            return process.wait()
+        time.sleep(pollInterval)
+    return process.returncode
+
+# Worker thread body that runs jobs from the pending queue until it is empty
+def _worker(pending, finished, pollInterval):
+    while True:
+        try:
+            job = pending.get_nowait()
+        except queue.Empty:
+            return
+
+        job.startTime = time.time()
+        finished.put(("started", job))
+        try:
+            command = job.command
+            while True:
+                with open(os.path.join(job.directory, "solver.log"), 'w') as logFile:
+                    process = subprocess.Popen(command, cwd=job.directory, stdout=logFile, stderr=subprocess.STDOUT)
+                    job.returnCode = _wait(job, process, pollInterval)
+                # A solve that exits with an error, e.g. when its node is preempted, is resumed from its restart dump when possible
+                command = job.restart(job) if not job.returnCode == 0 and job.restart is not None else None
+                if command is None:
+                    break
+                job.restarts += 1
+                sys.stderr.write("Job {} exited with code {}, resuming it from its restart dump\n".format(job.index, job.returnCode))
+            if job.monitor is not None and hasattr(job.monitor, "finish"):
+                job.monitor.finish()
+        except OSError as error:
+            job.returnCode = -1
+            sys.stderr.write("Job {} could not be started: {}\n".format(job.index, error))
+        job.endTime = time.time()
+        finished.put(("finished", job))
+
+# Run jobs concurrently and collect them as they finish
+# Returns the list of jobs in the order they finished
+# jobs = list of Job references
+# numWorkers = maximum number of jobs running at the same time
+# state = optional WorkflowState.StateStore reference that records the state of each simulation index
+# onComplete = optional function called with each successfully finished job, in the calling thread
+# pollInterval = seconds between polls of the job monitors
+def runJobs(jobs, numWorkers, state=None, onComplete=None, pollInterval=1.0):
+    pending = queue.Queue()
+    finished = queue.Queue()
+    for job in jobs:
+        pending.put(job)
+
+    workers = [threading.Thread(target=_worker, args=(pending, finished, pollInterval)) for i in range(max(1, min(numWorkers, len(jobs))))]
+    for worker in workers:
+        worker.daemon = True
+        worker.start()
+
+    done = []
+    while len(done) < len(jobs):
+        event, job = finished.get()
+        if event == "started":
+            recordStatus(state, job, "running")
+            continue
+
+        if job.returnCode == 0:
+            if onComplete is not None:
+                try:
+                    onComplete(job)
+                except Exception as error:
+                    job.returnCode = -1
+                    sys.stderr.write("Results of job {} could not be collected: {}\n".format(job.index, error))
+        recordStatus(state, job, "completed" if job.returnCode == 0 else "failed")
+        done.append(job)
+
+    for worker in workers:
+        worker.join()
+
+    return done
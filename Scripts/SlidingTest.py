@@ -1,7 +1,6 @@
 import os
 import sys
-import xml.etree.ElementTree as ET
-import csv
+import time
 
 # Get working directory path by going up 4 levels from the MECH directory
 workingDirectory = ExtAPI.DataModel.AnalysisList[0].WorkingDir
@@ -14,20 +13,40 @@ sys.path.append(scriptFolderPath)
 
 import ls_dyna
 import ImportExportUtilities
+import SlidingTestResults
+import SteadyState
+import WorkflowState
+import BatchCampaign
+import Trace
+import DeckGenerator
+import ForceOutput
+import Keyword
+import Progress
+import Scheduler
+import Restart
+import NumericWorker
+
+# Locate the campaign this Sliding Test belongs to; batch campaigns keep their files in Campaigns/<Name>
+campaignDirectory = BatchCampaign.getCampaignDirectory(workingDirectory)
 
 # Parse the workflow configuration file
-config = ImportExportUtilities.importConfig(os.path.join(workingDirectory, "Config", "Config.csv"))
+config = ImportExportUtilities.importConfig(os.path.join(campaignDirectory, "Config", "Config.csv"))
 
-# Parse the workflow log file
-logFilePath = os.path.join(workingDirectory, "Logs", "Log.xml")
-logTree = ET.parse(logFilePath)
-log = logTree.getroot()
+# Open the workflow state store
+state = WorkflowState.openState(campaignDirectory)
 
-# Retrieve references 
-project, selectionManager, dataModel, model, mesh, analysis, analysisSettings, solution, solutionInformation = ls_dyna.getReferences(ExtAPI)
+# Time each phase of the script in the campaign's trace
+tracer = Trace.openTracer(campaignDirectory, "Mechanical")
+
+tracer.phase("References", "mechanical")
+
+# Retrieve references of the analysis of the system the journal runs this script on
+project, selectionManager, dataModel, model, mesh, analysis, analysisSettings, solution, solutionInformation = ls_dyna.getReferences(ExtAPI, state.get("CurrentSystem"))
 namedSelections = ls_dyna.getNamedSelections(ExtAPI, ["Floor", "Shoe", "Floor_Contact", "Shoe_Contact", "Shoe_Top", "Floor_Side", "Shoe_Side"])
 bodies = ls_dyna.getBodies(ExtAPI, [namedSelections["Floor"], namedSelections["Shoe"]])
 
+tracer.phase("Geometry setup", "mechanical")
+
 # Set the User IDs of the Shoe body and Floor body Named Selections (needed for the Keyword Snippet)
 namedSelections["Shoe"].LSDynaUserId = 1
 namedSelections["Floor"].LSDynaUserId = 2
@@ -35,44 +54,31 @@ namedSelections["Floor"].LSDynaUserId = 2
 # Set Stiffness Behavior and Material Assignments for Shoe and Floor Bodies
 ls_dyna.setupGeometry(bodies["Shoe"], bodies["Floor"])
 
-# Add Mesh Controls and generate Mesh
-meshSize = float(config["SizeScale"]) * float(config["MeshSizeFactor"])
-ls_dyna.mesh(ExtAPI, meshSize, namedSelections["Floor_Contact"], namedSelections["Shoe_Contact"], namedSelections["Floor"], namedSelections["Shoe"])
-
-# Calculate target contact pressure for Sliding Test
-simIndex = int(log.find("./CurrentSimulationIndex").text)
-numSims = int(config["NumberOfSimulations"])
-minPressure = float(config["MinPressure"])
-maxPressure = float(config["MaxPressure"])
-targetPressure = (maxPressure - minPressure) / (numSims - 1) * simIndex + minPressure
-
-# Get Top Face area and Sliding Distance and Sliding Speed from Config file
-topFaceArea = float(log.find("./TopFaceArea").text)
-slidingDistance = float(log.find("./SlidingDistance").text)
-movementSpeed = float(config["MovementSpeed"])
-
-# Calculate target Normal Force
-targetNormalForce = targetPressure * topFaceArea
-
-# Load Normal Force Data from Compression Test
-with open(os.path.join(workingDirectory, "Results", "Force_CompressionTest.csv")) as csvFile:
-    csvReader = csv.reader(csvFile, delimiter=',', quotechar='|')
-    csvRows = [row for i, row in enumerate(csvReader) if i > 0]
-
-# Determine the duration of the displacement loading step based on the compression test data
-for row in csvRows:
-    if abs(float(row[1])) >= targetNormalForce:
-        displacementDuration = float(row[0])
-        break
+tracer.phase("Mesh", "mechanical")
 
-# Calculate target displacement
-displacementDistance = displacementDuration * movementSpeed
-
-# Calculate duration of the sliding load step
-slidingDuration = slidingDistance / movementSpeed
-
-# Calculate analysis time
-analysisDuration = displacementDuration + slidingDuration
+# Add Mesh Controls and generate Mesh
+# With MeshReuse, the systems of a campaign share one Model, so only the first script meshes and later ones reuse its mesh
+# The mesh is regenerated whenever its key, the hash of the geometry file and the mesh size, changes
+meshSize = ImportExportUtilities.getMeshSize(config)
+meshKey = ImportExportUtilities.getMeshKey(config, campaignDirectory)
+meshReuse = ImportExportUtilities.getConfigFlag(config, "MeshReuse")
+if not (meshReuse and state.get("MeshKey") == meshKey and ls_dyna.isMeshed(ExtAPI)):
+    ls_dyna.mesh(ExtAPI, meshSize, namedSelections["Floor_Contact"], namedSelections["Shoe_Contact"], namedSelections["Floor"], namedSelections["Shoe"])
+    state.set(MeshKey=meshKey)
+
+tracer.phase("Compression curve lookup", "mechanical")
+
+# Calculate the loads of the Sliding Test: target contact pressure, displacement step from the Compression Test lookup and sliding step
+# The same loads are used by DeckGenerator when Sliding Test decks are generated without Mechanical
+simIndex = int(state.get("CurrentSimulationIndex"))
+loads = DeckGenerator.slidingLoads(config, state, campaignDirectory, simIndex)
+targetPressure = loads["targetPressure"]
+displacementDuration = loads["displacementDuration"]
+displacementDistance = loads["displacementDistance"]
+analysisDuration = loads["analysisDuration"]
+movementSpeed = loads["movementSpeed"]
+
+tracer.phase("Boundary conditions", "mechanical")
 
 # Set analysis End Time
 ls_dyna.setAnalysisEndTime(ExtAPI, analysisDuration)
@@ -92,11 +98,13 @@ velocityBirthAndDeath = ls_dyna.createBirthAndDeath(ExtAPI, 1, displacementDurat
 # Create Rigid Body Constraint and apply to Floor body
 rigidBodyConstraint = ls_dyna.createRigidBodyConstraint(ExtAPI, namedSelections["Floor"])
 
+tracer.phase("Contact and results", "mechanical")
+
 # Checking if Keyword Snippet is available in working directory
 # If Snippet file exists, then load the file, create a Keyword Snippet, and suppress the default frictionless contact
 # If not, create the necessary snippet to define a frictionless, surface-to-surface contact condition
 # This is needed because this type of contact is not currently hooked up inside the Ansys Mechanical/LS-Dyna ACT package
-keywordSnippetPath = os.path.join(workingDirectory, "Keyword Snippet", "Keyword Snippet.txt")
+keywordSnippetPath = os.path.join(campaignDirectory, "Keyword Snippet", "Keyword Snippet.txt")
 if os.path.exists(keywordSnippetPath):
     with open(keywordSnippetPath, 'r') as fileObj:
         snippetText = fileObj.read()
@@ -105,36 +113,54 @@ if os.path.exists(keywordSnippetPath):
 else:
     keywordSnippet = ls_dyna.createDefaultContact(ExtAPI)
 
+# Ask the solver for its own interface force output when the force data is read from rcforc or binout instead of the tracker file,
+# and for periodic restart dumps, so an interrupted solve can be resumed
+forceSource = ForceOutput.getForceSource(config)
+outputKeywords = ForceOutput.outputKeywords(config) + Restart.outputKeywords(config)
+if outputKeywords:
+    ls_dyna.createKeywordSnippet(ExtAPI, Keyword.formatKeywords(outputKeywords, fixedWidth=True))
+
 ls_dyna.suppressDefaultBodyInteraction(ExtAPI)
 
 # Create results
 equivalentStress, normalForce, shearForce = ls_dyna.createResults(ExtAPI, displacement)
 
-# Solve the analysis
-analysis.Solve()
-
-# Access raw data file for External Force Trackers (needed due to limitations in the Mechanical Scripting API)
-# First, find the _files directory
-folders = os.listdir(workingDirectory)
-filesFolder = [folder for folder in folders if folder.endswith("_files")][0]
-
-# Parse the raw data file
-results = ImportExportUtilities.parseForceData(os.path.join(workingDirectory, filesFolder, "dp0", "SYS-{}".format(simIndex + 1), "MECH", "file3.nlh"))
-
-# Writing Normal and Shear Force data to Results directory
-with open(os.path.join(workingDirectory, "Results", "Force_{}.csv".format(simIndex)), 'wb') as fileObj:
-    csvWriter = csv.writer(fileObj)
-    csvWriter.writerow(["Time [s]", "Normal Force [N]", "Shear Force [N]"])
-    for row in results:
-        # Only export data after the initial displacement loading step is finished
-        if float(row[0]) < displacementDuration:
-            continue
-        csvWriter.writerow(row)
-
-# Save the current simulation's target contact pressure in the Log file
-simPressure = ET.SubElement(log, "SimulationPressure{}".format(simIndex), unit="Pa")
-simPressure.text = str(targetPressure)
-
-# Save Log xml file
-with open(logFilePath, 'wb') as fileObj:
-    logTree.write(fileObj, encoding='utf-8')
+# Check if a CSV copy of the force data is requested in the Config file
+exportCsv = ImportExportUtilities.getConfigFlag(config, "ExportForceCsv")
+
+# With several solver workers, only write the input deck here; the journal's scheduler solves the decks concurrently
+# Otherwise solve the analysis in this session and collect the results right away
+mechDirectory = analysis.WorkingDir
+SteadyState.clear(mechDirectory)
+
+# Save the current simulation's target contact pressure in the workflow state
+state.updateSimulation(simIndex, pressure=targetPressure, directory=mechDirectory)
+
+if int(config.get("SolverWorkers", "1")) > 1:
+    tracer.phase("Input deck writing", "mechanical", simulation=simIndex)
+    inputPath = os.path.join(mechDirectory, "input.k")
+    analysis.WriteInputFile(inputPath)
+    SlidingTestResults.writeJob(mechDirectory, simIndex, targetPressure, displacementDuration, inputPath, analysisDuration)
+    state.updateSimulation(simIndex, status="pending", input=inputPath)
+else:
+    # Watch for steady state sliding while solving, if enabled in the Config file, and report the progress of the solve
+    monitor = Scheduler.combineMonitors(SteadyState.createMonitor(config, mechDirectory, displacementDuration),
+        Progress.createMonitor(config, campaignDirectory, simIndex, mechDirectory, analysisDuration, state))
+    if monitor is not None:
+        backgroundMonitor = SteadyState.BackgroundMonitor(monitor)
+
+    state.updateSimulation(simIndex, status="running", startTime=time.time())
+    tracer.phase("Solve", "mechanical", simulation=simIndex)
+    analysis.Solve()
+
+    if monitor is not None:
+        backgroundMonitor.finish()
+        if hasattr(monitor, "finish"):
+            monitor.finish()
+
+    # Access raw data file for External Force Trackers (needed due to limitations in the Mechanical Scripting API)
+    tracer.phase("Tracker parsing and result writing", "mechanical", simulation=simIndex)
+    forceDataPath = SlidingTestResults.collect(campaignDirectory, simIndex, displacementDuration, exportCsv, mechDirectory, forceSource, NumericWorker.openWorker(config))
+    state.updateSimulation(simIndex, status="completed", endTime=time.time(), forceData=forceDataPath)
+
+tracer.endPhase()
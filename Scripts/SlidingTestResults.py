@@ -0,0 +1,66 @@
+# Collects the force tracker results of a finished Sliding Test solve into the result store
+# Used directly by SlidingTest.py, and by the scheduler when sliding tests are solved outside of Mechanical
+
+import os
+import json
+import ImportExportUtilities
+import ResultStore
+import SteadyState
+import Restart
+
+JOB_FILE_NAME = "SlidingJob.json"
+
+# Returns the Mechanical working directory of a sliding test
+# workingDirectory = path to the workflow working directory
+# simIndex = simulation index of the sliding test
+def getSimulationDirectory(workingDirectory, simIndex):
+    return ImportExportUtilities.getSystemDirectory(workingDirectory, "SYS-{}".format(simIndex + 1))
+
+# Save the parameters needed to collect a sliding test's results once its deck has been solved
+# mechDirectory = Mechanical working directory of the sliding test
+# simIndex = simulation index of the sliding test
+# targetPressure = target contact pressure in Pa
+# displacementDuration = duration of the displacement loading step in seconds
+# inputPath = path to the solver input deck
+# endTime = end time of the analysis in seconds, used to report the progress of the solve
+def writeJob(mechDirectory, simIndex, targetPressure, displacementDuration, inputPath, endTime=None):
+    job = {
+        "simIndex": simIndex,
+        "targetPressure": targetPressure,
+        "displacementDuration": displacementDuration,
+        "endTime": endTime,
+        "input": inputPath}
+    ResultStore.replaceFile(os.path.join(mechDirectory, JOB_FILE_NAME), json.dumps(job, indent=1, sort_keys=True))
+
+# Returns the job parameters saved by writeJob
+# mechDirectory = Mechanical working directory of the sliding test
+def readJob(mechDirectory):
+    with open(os.path.join(mechDirectory, JOB_FILE_NAME), 'r') as fileObj:
+        return json.load(fileObj)
+
+# Parse the force tracker file of a solved sliding test and store the data after the loading step
+# The force history of a run resumed from restart dumps is stitched from its segments, and the run is marked as completed
+# workingDirectory = path to the workflow (or campaign) working directory
+# simIndex = simulation index of the sliding test
+# displacementDuration = duration of the displacement loading step in seconds
+# exportCsv = also write a Force_{simIndex}.csv text copy of the data
+# mechDirectory = Mechanical working directory of the sliding test; found from the simulation index when not given
+# forceSource = (source, interface ID, side) tuple returned by ForceOutput.getForceSource, the tracker file when None
+# worker = optional NumericWorker reference the force output is parsed by
+def collect(workingDirectory, simIndex, displacementDuration, exportCsv=False, mechDirectory=None, forceSource=None, worker=None):
+    if mechDirectory is None:
+        mechDirectory = getSimulationDirectory(workingDirectory, simIndex)
+
+    # Only keep data after the initial displacement loading step is finished
+    # If the solve was stopped early at steady state, only keep the steady window, not the samples written before the solver stopped
+    startTime, endTime = displacementDuration, None
+    steadyWindow = SteadyState.loadSteadyWindow(mechDirectory)
+    if steadyWindow is not None:
+        startTime, endTime = steadyWindow
+
+    time, normal, shear = Restart.readForces(mechDirectory, forceSource, startTime, endTime, worker)
+
+    resultsFolderPath = os.path.join(workingDirectory, "Results")
+    forceDataPath = ResultStore.writeForceData(resultsFolderPath, simIndex, [time, normal, shear], exportCsv, steadyWindow is not None)
+    Restart.markCompleted(mechDirectory)
+    return forceDataPath
@@ -0,0 +1,142 @@
+# Content-addressed cache of solved simulations, shared between campaigns
+# Each entry is keyed by a hash of every input that determines a solve: the geometry file, its .sat export and SpaceClaim document, the material and Prony terms,
+# the mesh size, the movement speed, the keyword snippet text and, for Sliding Tests, the target pressure
+# On a hit the stored force history is restored into the Results directory instead of solving again
+# Entries are evicted least recently used first once the cache grows past its size limit
+
+import os
+import json
+import shutil
+import hashlib
+
+import ImportExportUtilities
+import ResultStore
+import Topography
+
+# Bumped whenever the way a solve's force history is produced changes, so old entries stop matching
+CACHE_VERSION = 2
+
+# Config file columns that determine the result of a solve
+INPUT_COLUMNS = ["SizeScale", "MeshSizeFactor", "CompressionTestDisplacementFactor", "MovementSpeed", "MaterialName", "Density", "DensityUnit",
+    "YoungsModulus", "YoungsModulusUnit", "PoissonsRatio", "RelativeModuli", "RelaxationTime", "RelaxationTimeUnit",
+    "SteadyStateWindow", "SteadyStateTolerance", "MeasureGeometry", "TopographySamples"]
+
+# Returns the solve cache configured in the Config file, or None if the cache is disabled
+# The cache is enabled by setting SolveCacheDirectory; relative paths are taken from the working directory
+# SolveCacheSizeLimit sets the size limit in MB
+# config = configuration dictionary returned by importConfig
+# workingDirectory = path to the workflow working directory
+def openCache(config, workingDirectory):
+    directory = config.get("SolveCacheDirectory", "")
+    if directory == "":
+        return None
+    sizeLimit = float(config.get("SolveCacheSizeLimit", "") or 1024) * 1024 * 1024
+    return SolveCache(os.path.join(workingDirectory, directory), sizeLimit)
+
+# Returns the dictionary of campaign inputs that determine the result of every solve
+# config = configuration dictionary returned by importConfig
+# workingDirectory = path to the workflow working directory
+def campaignInputs(config, workingDirectory):
+    inputs = dict((column, config.get(column, "")) for column in INPUT_COLUMNS)
+    inputs["version"] = CACHE_VERSION
+    geometryPath = ImportExportUtilities.getGeometryPath(workingDirectory)
+    inputs["geometry"] = ImportExportUtilities.hashFile(geometryPath)
+
+    # The .sat export is measured for the contact distances and topography of the loads, on the faces of the document's named selections
+    exportPath = Topography.findExportPath(workingDirectory, geometryPath)
+    inputs["geometryExport"] = ImportExportUtilities.hashFile(exportPath) if exportPath is not None else "none"
+    documentPath = Topography.findDocumentPath(geometryPath)
+    inputs["geometryDocument"] = ImportExportUtilities.hashFile(documentPath) if documentPath is not None else "none"
+
+    keywordSnippetPath = os.path.join(workingDirectory, "Keyword Snippet", "Keyword Snippet.txt")
+    inputs["keywordSnippet"] = ImportExportUtilities.hashFile(keywordSnippetPath) if os.path.exists(keywordSnippetPath) else "default"
+
+    return inputs
+
+# Returns the cache key of a solve
+# inputs = campaign inputs returned by campaignInputs
+# kind = "CompressionTest" or "SlidingTest"
+# pressure = target pressure of a Sliding Test in Pa
+def computeKey(inputs, kind, pressure=None):
+    keyInputs = dict(inputs)
+    keyInputs["kind"] = kind
+    if pressure is not None:
+        keyInputs["pressure"] = repr(float(pressure))
+    return hashlib.sha1(json.dumps(keyInputs, sort_keys=True).encode("utf-8")).hexdigest()
+
+# Directory of cache entries, one sub-directory per key holding Force.npy and Entry.json
+# directory = path to the cache directory
+# sizeLimit = largest total size of the cache in bytes
+class SolveCache(object):
+    def __init__(self, directory, sizeLimit):
+        self.directory = directory
+        self.sizeLimit = sizeLimit
+
+    def entryPath(self, key):
+        return os.path.join(self.directory, key)
+
+    # Returns the metadata of an entry and marks it as recently used, or returns None on a miss
+    # key = cache key returned by computeKey
+    def lookup(self, key):
+        metadataPath = os.path.join(self.entryPath(key), "Entry.json")
+        if not os.path.exists(metadataPath) or not os.path.exists(os.path.join(self.entryPath(key), "Force.npy")):
+            return None
+        os.utime(metadataPath, None)
+        with open(metadataPath, 'r') as fileObj:
+            return json.load(fileObj)
+
+    # Restore the force history of an entry into the result store, keeping its steady flag
+    # Returns the metadata of the entry, or None on a miss
+    # key = cache key returned by computeKey
+    # resultsFolderPath = path to the Results directory
+    # name = run name in the result store
+    def restore(self, key, resultsFolderPath, name):
+        metadata = self.lookup(key)
+        if metadata is None:
+            return None
+        columns = ResultStore.readNpy(os.path.join(self.entryPath(key), "Force.npy"))
+        ResultStore.writeForceData(resultsFolderPath, name, columns, steady=metadata.get("steady", False))
+        return metadata
+
+    # Add the force history of a run in the result store to the cache
+    # key = cache key returned by computeKey
+    # resultsFolderPath = path to the Results directory
+    # name = run name in the result store
+    # metadata = dictionary of values saved with the entry, e.g. geometry measurements; the run's steady flag is added to it
+    def store(self, key, resultsFolderPath, name, metadata=None):
+        entryPath = self.entryPath(key)
+        temporaryPath = entryPath + ".tmp"
+        if os.path.exists(temporaryPath):
+            shutil.rmtree(temporaryPath)
+        os.makedirs(temporaryPath)
+
+        shutil.copyfile(ResultStore.forceDataPath(resultsFolderPath, name), os.path.join(temporaryPath, "Force.npy"))
+        metadata = dict(metadata or {})
+        metadata["steady"] = ResultStore.isSteadyRun(resultsFolderPath, name)
+        with open(os.path.join(temporaryPath, "Entry.json"), 'w') as fileObj:
+            json.dump(metadata, fileObj, indent=1, sort_keys=True)
+
+        # Entries only become visible once complete
+        if os.path.exists(entryPath):
+            shutil.rmtree(entryPath)
+        os.rename(temporaryPath, entryPath)
+
+        self.evict()
+
+    # Remove least recently used entries until the cache is within its size limit
+    def evict(self):
+        entries = []
+        totalSize = 0
+        for key in os.listdir(self.directory):
+            metadataPath = os.path.join(self.entryPath(key), "Entry.json")
+            if not os.path.exists(metadataPath):
+                continue
+            size = sum(os.path.getsize(os.path.join(self.entryPath(key), name)) for name in os.listdir(self.entryPath(key)))
+            entries.append((os.path.getmtime(metadataPath), size, key))
+            totalSize += size
+
+        entries.sort()
+        while totalSize > self.sizeLimit and entries:
+            lastUsed, size, key = entries.pop(0)
+            shutil.rmtree(self.entryPath(key))
+            totalSize -= size
@@ -1,7 +1,7 @@
 # Python Script, API Version = V20
 
 import os
-import xml.etree.ElementTree as ET
+import sys
 
 # There does not seem to be any way to get the working directory programatically in SpaceClaim
 # It needs to be hardcoded
@@ -12,15 +12,20 @@ workingDirectory = r"/ihome/kbeschorner/hti2/Flooring_Topography_Modeling/Templa
 if not os.path.isdir(workingDirectory):
     raise Exception("Working Directory path is invalid.\nUpdate the script's workingDirectory path declaration.")
 
-# Check if Log.xml file can be located
+# Check if the workflow state file can be located
 # Throw an exception if it cannot
-logFilePath = os.path.join(workingDirectory, "Logs", "Log.xml")
-if not os.path.exists(logFilePath):
-    raise Exception("Log.xml cannot be found.")
+stateFilePath = os.path.join(workingDirectory, "Logs", "State.jsonl")
+if not os.path.exists(stateFilePath):
+    raise Exception("State.jsonl cannot be found.")
 
-# Parse the workflow log file
-logTree = ET.parse(logFilePath)
-log = logTree.getroot()
+# Add Scripts directory to local import path
+scriptFolderPath = os.path.join(workingDirectory, "Scripts")
+sys.path.append(scriptFolderPath)
+
+import WorkflowState
+
+# Open the workflow state store
+state = WorkflowState.openState(workingDirectory)
 
 # Get selections
 shoe_top = Selection.CreateByGroups("Shoe_Top")
@@ -34,14 +39,5 @@ topFaceArea = MeasureHelper.MeasureArea(shoe_top)
 slidingDistance = abs(MeasureHelper.GetCentroid(shoe_side).X - MeasureHelper.GetCentroid(floor_side).X)
 distanceToContact = abs(MeasureHelper.DistanceBetweenObjects(shoe_contact, floor_contact).DeltaY)
 
-# Save in Config xml
-topFaceAreaNode = ET.SubElement(log, "TopFaceArea")
-topFaceAreaNode.text = str(topFaceArea)
-slidingDistanceNode = ET.SubElement(log, "SlidingDistance")
-slidingDistanceNode.text = "{:.4e}".format(float(slidingDistance))
-distanceToContactNode = ET.SubElement(log, "DistanceToContact")
-distanceToContactNode.text = "{:.4e}".format(float(distanceToContact))
-
-# Save changes to Config.xml file
-with open(logFilePath, 'wb') as fileObj:
-    logTree.write(fileObj, encoding='utf-8')
+# Save in the workflow state
+state.set(TopFaceArea=topFaceArea, SlidingDistance=slidingDistance, DistanceToContact=distanceToContact)
@@ -0,0 +1,182 @@
+# Detects steady state sliding while a Sliding Test is being solved and stops the solve early
+# The force tracker file is tailed as it grows and the shear/normal force ratio is checked over a sliding time window
+# Once the mean ratio of the two halves of the window agree within a relative tolerance, LS-DYNA is asked to stop
+# The steady window is saved next to the run so that only that window is recorded for post-processing
+
+import os
+import json
+import threading
+import collections
+import xml.etree.ElementTree as ET
+
+import ImportExportUtilities
+import ResultStore
+
+RESULT_NAME = "SteadyState.json"
+
+# Tracks the shear/normal force ratio over a sliding window of simulated time
+# window = length of the window in seconds of simulated time
+# tolerance = largest relative difference between the mean ratios of the two halves of the window
+class SteadyStateDetector(object):
+    def __init__(self, window, tolerance):
+        self.window = window
+        self.tolerance = tolerance
+        self.firstHalf = collections.deque()
+        self.secondHalf = collections.deque()
+        self.firstSum = 0.0
+        self.secondSum = 0.0
+        self.startTime = None
+        self.currentTime = None
+        self.steadyWindow = None
+
+    # Add a force sample and return True once steady state has been reached
+    # row = list of time, normal force and shear force values
+    def add(self, row):
+        sampleTime, normal, shear = row[0], row[1], row[2]
+        if self.steadyWindow is not None:
+            return True
+        if normal == 0:
+            return False
+        if self.startTime is None:
+            self.startTime = sampleTime
+        self.currentTime = sampleTime
+
+        ratio = shear / abs(normal)
+        self.secondHalf.append((sampleTime, ratio))
+        self.secondSum += ratio
+
+        # Move samples from the second half into the first half and drop samples that left the window
+        while self.secondHalf and self.secondHalf[0][0] <= sampleTime - self.window / 2.0:
+            element = self.secondHalf.popleft()
+            self.secondSum -= element[1]
+            self.firstHalf.append(element)
+            self.firstSum += element[1]
+        while self.firstHalf and self.firstHalf[0][0] <= sampleTime - self.window:
+            self.firstSum -= self.firstHalf.popleft()[1]
+
+        if sampleTime - self.startTime < self.window or not self.firstHalf or not self.secondHalf:
+            return False
+
+        firstMean = self.firstSum / len(self.firstHalf)
+        secondMean = self.secondSum / len(self.secondHalf)
+        mean = (self.firstSum + self.secondSum) / (len(self.firstHalf) + len(self.secondHalf))
+        if abs(secondMean - firstMean) <= self.tolerance * abs(mean):
+            self.steadyWindow = (self.firstHalf[0][0], sampleTime)
+            return True
+        return False
+
+# Reads the rows appended to a growing force tracker file since the last poll
+# path = path to the force tracker file
+# onRow = function called with each new row
+# startTime = rows with a time below this value are skipped
+class ForceDataTail(object):
+    def __init__(self, path, onRow, startTime=None):
+        self.path = path
+        self.onRow = onRow
+        self.startTime = startTime
+        self.reset()
+
+    def reset(self):
+        self.offset = 0
+        self.parser = ET.XMLParser(target=ImportExportUtilities.ForceDataTarget(3, self.startTime, None, self.onRow))
+
+    # Feed any new data of the file to the parser
+    def poll(self):
+        if not os.path.exists(self.path):
+            return
+        if os.path.getsize(self.path) < self.offset:
+            # The file was rewritten, start over
+            self.reset()
+        with open(self.path, 'rb') as fileObj:
+            fileObj.seek(self.offset)
+            chunk = fileObj.read()
+        if chunk:
+            self.offset += len(chunk)
+            self.parser.feed(chunk)
+
+# Ask the LS-DYNA run in a directory to write a restart dump and terminate
+# LS-DYNA checks its working directory for a d3kil file holding a sense switch
+# directory = LS-DYNA working directory
+def requestStop(directory):
+    with open(os.path.join(directory, "d3kil"), 'w') as fileObj:
+        fileObj.write("sw1.\n")
+
+# Watches the force tracker file of a running Sliding Test and stops the solve once it is steady
+# directory = working directory of the solve
+# startTime = start of the sliding load step in seconds; the loading step is not monitored
+# window = length of the steady state window in seconds of simulated time
+# tolerance = largest relative difference between the mean force ratios of the two halves of the window
+# trackerName = name of the force tracker file in the working directory
+class SteadyStateMonitor(object):
+    def __init__(self, directory, startTime, window, tolerance, trackerName="file3.nlh"):
+        self.directory = directory
+        self.detector = SteadyStateDetector(window, tolerance)
+        self.tail = ForceDataTail(os.path.join(directory, trackerName), self.detector.add, startTime)
+        self.stopped = False
+
+    # Read new tracker data and return True once steady state has been reached
+    def poll(self):
+        self.tail.poll()
+        return self.detector.steadyWindow is not None
+
+    # Stop the solve and save the steady window
+    def stop(self):
+        if self.stopped:
+            return
+        requestStop(self.directory)
+        start, end = self.detector.steadyWindow
+        ResultStore.replaceFile(os.path.join(self.directory, RESULT_NAME), json.dumps({"windowStart": start, "windowEnd": end}, indent=1, sort_keys=True))
+        self.stopped = True
+
+# Returns the steady window (start, end) saved by a monitor in a directory, or None if the run was not stopped early
+# directory = working directory of the solve
+def loadSteadyWindow(directory):
+    resultPath = os.path.join(directory, RESULT_NAME)
+    if not os.path.exists(resultPath):
+        return None
+    with open(resultPath, 'r') as fileObj:
+        result = json.load(fileObj)
+    return result["windowStart"], result["windowEnd"]
+
+# Remove the files of an earlier early termination from a directory
+# directory = working directory of the solve
+def clear(directory):
+    for name in [RESULT_NAME, "d3kil"]:
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            os.remove(path)
+
+# Returns a monitor configured from the Config file, or None if steady state detection is disabled
+# Detection is enabled by setting SteadyStateTolerance to a value above zero
+# config = configuration dictionary returned by importConfig
+# directory = working directory of the solve
+# startTime = start of the sliding load step in seconds
+def createMonitor(config, directory, startTime):
+    tolerance = float(config.get("SteadyStateTolerance", "0"))
+    if tolerance <= 0:
+        return None
+    return SteadyStateMonitor(directory, startTime, float(config["SteadyStateWindow"]), tolerance)
+
+# Poll a monitor from a background thread until it reaches steady state or finish is called
+# Used when the solve blocks the calling thread, as analysis.Solve() does in Mechanical
+# monitor = SteadyStateMonitor reference
+# pollInterval = seconds between polls
+class BackgroundMonitor(object):
+    def __init__(self, monitor, pollInterval=1.0):
+        self.monitor = monitor
+        self.pollInterval = pollInterval
+        self.finished = threading.Event()
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def run(self):
+        while not self.finished.is_set():
+            if self.monitor.poll():
+                self.monitor.stop()
+                return
+            self.finished.wait(self.pollInterval)
+
+    def finish(self):
+        self.finished.set()
+        self.thread.join()
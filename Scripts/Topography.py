@@ -0,0 +1,782 @@
+# Offline measurements of the shoe and floor geometry, and roughness of the floor topography
+# The measurements the tests need, TopFaceArea, SlidingDistance and DistanceToContact, are taken from the ACIS .sat export of the geometry
+# in Geometry/Design Modeler File Types, so no SpaceClaim session is needed
+# The faces of the named selections are read from the SpaceClaim .scdoc document next to the geometry file, whose named selection monikers
+# end with the ids the .sat name attributes of the faces end with
+# Without a document the faces are found by position, largest or smallest mean vertex coordinate:
+#   Shoe_Top = face of the Shoe at its largest y, Shoe_Contact = face of the Shoe at its smallest y
+#   Shoe_Side = face of the Shoe at its largest x, in the sliding direction, Floor_Side = face of the Floor at its largest x
+#   Floor_Contact = face of the Floor at its largest y, the topography
+# Campaigns only use the measurements when MeasureGeometry is set in the Config file; by default they keep the fixed DEFAULT_MEASUREMENTS
+# The topography face is a B-spline surface, sampled on a grid of its surface parameters, which follow x and z
+# Roughness parameters (ISO 25178 Sa, Sq, Sp, Sv, Sz, Ssk, Sku and the density of peaks Spd) are computed from a grid of heights after
+# removing its least squares plane, in two passes over chunks of rows
+# Profilometer height maps are read a chunk of rows at a time, memory-mapped when NumPy is available, from a 2D .npy array or a text grid
+# Usage: python Scripts/Topography.py <.sat file or height map> [...] [--spacing dx[,dy]] [--samples N] [--document .scdoc file]
+
+import os
+import re
+import sys
+import json
+import math
+import array
+import bisect
+import zipfile
+import operator
+import xml.etree.ElementTree as ET
+
+import ImportExportUtilities
+import ResultStore
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+REPORT_NAME = "Topography.json"
+EXPORT_FOLDER = os.path.join("Geometry", "Design Modeler File Types")
+
+# Measurements used when the geometry is not measured, those of the shoe and floor the workflow was set up with
+DEFAULT_MEASUREMENTS = {"TopFaceArea": 2.94e-6, "SlidingDistance": 5.3463e-3, "DistanceToContact": 3.1013e-4}
+
+# Named selections of the faces that are measured
+FACE_NAMES = ["Shoe_Top", "Shoe_Contact", "Shoe_Side", "Floor_Side", "Floor_Contact"]
+
+# Default number of samples of each knot span of the topography surface, in each direction
+DEFAULT_SAMPLES = 4
+
+# Number of height map rows read at a time
+CHUNK_ROWS = 256
+
+RECORD_START = re.compile(r"^-(\d+) (\S+) ", re.M)
+STRING_TOKEN = re.compile(r"@(\d+) ")
+NUMBER_SEPARATORS = re.compile(r"[\s,;]+")
+
+# One entity record of a .sat file
+# index = entity index
+# kind = entity type, e.g. "face"
+# text = record text after the entity type
+class SatRecord(object):
+    def __init__(self, index, kind, text):
+        self.index = index
+        self.kind = kind
+        self.text = text
+        # Entity indices the record refers to, -1 for none, its other tokens and its strings, in order
+        self.pointers = []
+        self.values = []
+        self.strings = []
+        position = 0
+        while position < len(text):
+            match = STRING_TOKEN.match(text, position)
+            if match:
+                end = match.end() + int(match.group(1))
+                self.strings.append(text[match.end():end])
+                position = end + 1
+                continue
+            end = position
+            while end < len(text) and not text[end].isspace():
+                end += 1
+            token = text[position:end]
+            if token.startswith("$"):
+                self.pointers.append(int(token[1:]))
+            elif token:
+                self.values.append(token)
+            position = end + 1
+
+    # Returns the trailing numeric values of the record, e.g. the coordinates of a point
+    def numbers(self):
+        numbers = []
+        for value in reversed(self.values):
+            try:
+                numbers.append(float(value))
+            except ValueError:
+                break
+        return numbers[::-1]
+
+# Entities of an ACIS .sat file
+# path = path to the .sat file
+class SatModel(object):
+    def __init__(self, path):
+        with open(path, 'r') as fileObj:
+            text = fileObj.read()
+        end = text.find("End-of-ACIS-data")
+        text = text[:end] if end >= 0 else text
+
+        matches = list(RECORD_START.finditer(text))
+        self.records = {}
+        for i, match in enumerate(matches):
+            recordText = text[match.end():matches[i + 1].start() if i + 1 < len(matches) else len(text)].strip()
+            if recordText.endswith("#"):
+                recordText = recordText[:-1]
+            self.records[int(match.group(1))] = SatRecord(int(match.group(1)), match.group(2), recordText)
+
+        # Entity names, from their name attributes
+        self.names = {}
+        for record in self.records.values():
+            if record.kind.startswith("string_attrib-name_attrib") and len(record.strings) > 1 and record.strings[0] == "ATTRIB_XACIS_NAME":
+                self.names[record.pointers[3]] = record.strings[1]
+
+    # Returns the record of an entity index, or None for -1
+    def record(self, index):
+        return self.records.get(index) if index >= 0 else None
+
+    # Returns the entity index of the body with a name
+    def body(self, name):
+        for index, bodyName in self.names.items():
+            if bodyName == name and self.records[index].kind == "body":
+                return index
+        raise Exception("The geometry has no body named {}.".format(name))
+
+    # Returns the face entity indices of a body
+    def faces(self, bodyIndex):
+        faces = []
+        lump = self.record(self.records[bodyIndex].pointers[2])
+        while lump is not None:
+            shell = self.record(lump.pointers[3])
+            while shell is not None:
+                face = self.record(shell.pointers[4])
+                while face is not None:
+                    faces.append(face.index)
+                    face = self.record(face.pointers[2])
+                shell = self.record(shell.pointers[2])
+            lump = self.record(lump.pointers[2])
+        return faces
+
+    # Returns the loops of a face, each as the list of its vertex points in order, the periphery first
+    def faceLoops(self, faceIndex):
+        loops = []
+        loop = self.record(self.records[faceIndex].pointers[3])
+        while loop is not None:
+            points = []
+            first = loop.pointers[3]
+            coedge = self.record(first)
+            while coedge is not None:
+                edge = self.records[coedge.pointers[5]]
+                vertex = self.records[edge.pointers[2] if coedge.values[-1] == "forward" else edge.pointers[3]]
+                points.append(tuple(self.records[vertex.pointers[3]].numbers()[-3:]))
+                coedge = self.record(coedge.pointers[2])
+                if coedge is not None and coedge.index == first:
+                    break
+            loops.append(points)
+            loop = self.record(loop.pointers[2])
+        return loops
+
+    # Returns the surface record of a face
+    def surface(self, faceIndex):
+        return self.records[self.records[faceIndex].pointers[6]]
+
+# Returns the face of a list with the largest or smallest mean vertex coordinate along an axis
+# model = SatModel reference
+# faces = face entity indices
+# axis = 0, 1 or 2 for x, y or z
+# largest = True for the largest mean coordinate, False for the smallest
+def extremeFace(model, faces, axis, largest):
+    def meanCoordinate(face):
+        points = [point for loop in model.faceLoops(face) for point in loop]
+        return sum(point[axis] for point in points) / len(points)
+    return (max if largest else min)(faces, key=meanCoordinate)
+
+# Returns the objects of the named selections of a SpaceClaim .scdoc document, as {name: [(part, id)]}
+# Each object is a moniker "<part guid>:<id>"
+# path = path to the .scdoc file
+def readNamedSelections(path):
+    archive = zipfile.ZipFile(path)
+    try:
+        root = ET.fromstring(archive.read("SpaceClaim/document.xml"))
+    finally:
+        archive.close()
+
+    def localName(element):
+        return element.tag.split("}")[-1]
+
+    selections = {}
+    for element in root.iter():
+        if localName(element) == "NamedSelectionDef":
+            names = [child.text for child in element if localName(child) == "name"]
+            objects = [item.get("refId") for child in element if localName(child) == "objects" for item in child.iter() if item.get("refId")]
+            if names:
+                selections[names[0]] = [tuple(refId.rsplit(":", 1)) for refId in objects]
+    return selections
+
+# Returns the faces of the named selections of a document, by name
+# The Shoe and Floor named selections give the part of each body; a face is the face of the body of its part whose name attribute
+# ends with the id of its moniker
+# model = SatModel reference
+# bodyFaces = {"Shoe": face entity indices, "Floor": face entity indices}
+# path = path to the .scdoc file
+def namedFaces(model, bodyFaces, path):
+    selections = readNamedSelections(path)
+    parts = {}
+    for body in bodyFaces:
+        if len(selections.get(body, [])) != 1:
+            raise Exception("The {} named selection of {} does not select one body.".format(body, path))
+        parts[selections[body][0][0]] = body
+
+    faces = {}
+    for name in FACE_NAMES:
+        if len(selections.get(name, [])) != 1:
+            raise Exception("The {} named selection of {} does not select one face.".format(name, path))
+        part, objectId = selections[name][0]
+        if part not in parts:
+            raise Exception("The {} named selection of {} selects a face of neither the Shoe nor the Floor.".format(name, path))
+        matches = [face for face in bodyFaces[parts[part]] if model.names.get(face, "").split(":")[-1] == objectId]
+        if len(matches) != 1:
+            raise Exception("The {} face of {} was not found in the .sat export.".format(name, path))
+        faces[name] = matches[0]
+    return faces
+
+# Returns the faces of the named selections found by position, by name
+# model = SatModel reference
+# bodyFaces = {"Shoe": face entity indices, "Floor": face entity indices}
+def positionFaces(model, bodyFaces):
+    return {
+        "Shoe_Top": extremeFace(model, bodyFaces["Shoe"], 1, True),
+        "Shoe_Contact": extremeFace(model, bodyFaces["Shoe"], 1, False),
+        "Shoe_Side": extremeFace(model, bodyFaces["Shoe"], 0, True),
+        "Floor_Side": extremeFace(model, bodyFaces["Floor"], 0, True),
+        "Floor_Contact": extremeFace(model, bodyFaces["Floor"], 1, True)}
+
+# Returns the (area, centroid) of a planar polygon, by Newell's method
+# points = list of (x, y, z) vertices in order
+def polygonArea(points):
+    origin = points[0]
+    normal = [0.0, 0.0, 0.0]
+    triangles = []
+    for a, b in zip(points[1:], points[2:]):
+        u = [a[k] - origin[k] for k in range(3)]
+        v = [b[k] - origin[k] for k in range(3)]
+        cross = [u[1] * v[2] - u[2] * v[1], u[2] * v[0] - u[0] * v[2], u[0] * v[1] - u[1] * v[0]]
+        normal = [normal[k] + cross[k] for k in range(3)]
+        triangles.append((cross, a, b))
+    length = math.sqrt(sum(n * n for n in normal))
+    if length == 0:
+        return 0.0, tuple(sum(point[k] for point in points) / len(points) for k in range(3))
+
+    # Signed triangle areas weigh the triangle centroids, so concave polygons are handled
+    centroid = [0.0, 0.0, 0.0]
+    for cross, a, b in triangles:
+        weight = sum(cross[k] * normal[k] for k in range(3)) / length
+        centroid = [centroid[k] + weight * (origin[k] + a[k] + b[k]) / 3.0 for k in range(3)]
+    return length / 2.0, tuple(c / length for c in centroid)
+
+# Returns the (area, centroid) of a planar face, with the areas of its inner loops removed
+def faceArea(model, faceIndex):
+    loops = model.faceLoops(faceIndex)
+    area, centroid = polygonArea(loops[0])
+    for loop in loops[1:]:
+        holeArea, holeCentroid = polygonArea(loop)
+        if area > holeArea:
+            centroid = tuple((area * c - holeArea * h) / (area - holeArea) for c, h in zip(centroid, holeCentroid))
+        area -= holeArea
+    return area, centroid
+
+# Non-rational or rational B-spline surface of a .sat spline-surface record
+# Control points are stored with the u index varying fastest
+class SplineSurface(object):
+    def __init__(self, record):
+        tokens = record.text.split()
+        start = [i for i, token in enumerate(tokens) if token in ("nubs", "nurbs")]
+        if not start:
+            raise Exception("Spline surface {} is not a B-spline surface.".format(record.index))
+        start = start[0]
+        rational = tokens[start] == "nurbs"
+        self.degreeU = int(tokens[start + 1])
+        self.degreeV = int(tokens[start + 2])
+        numKnotsU, numKnotsV = int(tokens[start + 7]), int(tokens[start + 8])
+        position = start + 9
+        self.knotsU = self.expandKnots(tokens[position:position + 2 * numKnotsU])
+        position += 2 * numKnotsU
+        self.knotsV = self.expandKnots(tokens[position:position + 2 * numKnotsV])
+        position += 2 * numKnotsV
+
+        # ACIS stores the end knots with a multiplicity of the degree, one less than the clamped knot vector
+        self.countU = len(self.knotsU) - self.degreeU - 1
+        self.countV = len(self.knotsV) - self.degreeV - 1
+        size = 4 if rational else 3
+        values = [float(token) for token in tokens[position:position + self.countU * self.countV * size]]
+        if len(values) < self.countU * self.countV * size:
+            raise Exception("Spline surface {} has too few control points.".format(record.index))
+
+        # Homogeneous control point coordinates x w, y w, z w and w, each as rows by u index
+        self.coordinates = []
+        weights = values[3::4] if rational else [1.0] * (self.countU * self.countV)
+        for k in range(3):
+            coordinate = [value * weight for value, weight in zip(values[k::size], weights)]
+            self.coordinates.append([coordinate[i::self.countU] for i in range(self.countU)])
+        self.coordinates.append([weights[i::self.countU] for i in range(self.countU)])
+
+    # Returns the clamped knot vector of (knot, multiplicity) tokens
+    @staticmethod
+    def expandKnots(tokens):
+        knots = []
+        for knot, multiplicity in zip(tokens[0::2], tokens[1::2]):
+            knots.extend([float(knot)] * int(multiplicity))
+        return [knots[0]] + knots + [knots[-1]]
+
+    # Returns the parameters of a knot vector's spans, each span divided into a number of samples
+    @staticmethod
+    def parameters(knots, degree, count, samples):
+        distinct = sorted(set(knots[degree:count + 1]))
+        parameters = []
+        for low, high in zip(distinct, distinct[1:]):
+            parameters.extend(low + (high - low) * i / float(samples) for i in range(samples))
+        parameters.append(distinct[-1])
+        return parameters
+
+    # Returns the (span, basis function values) of a parameter
+    @staticmethod
+    def basis(knots, degree, count, parameter):
+        span = min(count - 1, max(degree, bisect.bisect_right(knots, parameter) - 1))
+        values = [1.0] + [0.0] * degree
+        left = [0.0] * (degree + 1)
+        right = [0.0] * (degree + 1)
+        for j in range(1, degree + 1):
+            left[j] = parameter - knots[span + 1 - j]
+            right[j] = knots[span + j] - parameter
+            saved = 0.0
+            for r in range(j):
+                term = values[r] / (right[r + 1] + left[j - r])
+                values[r] = saved + right[r + 1] * term
+                saved = left[j - r] * term
+            values[j] = saved
+        return span, values
+
+    # Returns the x, y and z grids of the surface at a number of samples per knot span, each as rows by u parameter
+    def sample(self, samples=DEFAULT_SAMPLES):
+        basisU = [self.basis(self.knotsU, self.degreeU, self.countU, u) for u in self.parameters(self.knotsU, self.degreeU, self.countU, samples)]
+        basisV = [self.basis(self.knotsV, self.degreeV, self.countV, v) for v in self.parameters(self.knotsV, self.degreeV, self.countV, samples)]
+
+        if numpy is not None:
+            matrixU = numpy.zeros((len(basisU), self.countU))
+            for i, (span, values) in enumerate(basisU):
+                matrixU[i, span - self.degreeU:span + 1] = values
+            matrixV = numpy.zeros((len(basisV), self.countV))
+            for i, (span, values) in enumerate(basisV):
+                matrixV[i, span - self.degreeV:span + 1] = values
+            grids = [matrixU.dot(numpy.array(coordinate)).dot(matrixV.T) for coordinate in self.coordinates]
+            return [grid / grids[3] for grid in grids[:3]]
+
+        grids = [[], [], []]
+        for span, values in basisU:
+            # Combine the control point rows of the u span once, then evaluate along v
+            combined = []
+            for coordinate in self.coordinates:
+                rows = coordinate[span - self.degreeU:span + 1]
+                combined.append([math.fsum(map(operator.mul, values, column)) for column in zip(*rows)])
+            gridRows = [[], [], []]
+            for spanV, valuesV in basisV:
+                point = [sum(map(operator.mul, valuesV, combinedCoordinate[spanV - self.degreeV:spanV + 1])) for combinedCoordinate in combined]
+                for k in range(3):
+                    gridRows[k].append(point[k] / point[3])
+            for k in range(3):
+                grids[k].append(gridRows[k])
+        return grids
+
+# Returns the rows and columns of x, y and z grids of a surface whose samples lie in an x and z range
+# Grid lines follow x and z, so a row or column is kept when any of its samples is in the range
+def clipGrids(grids, xRange, zRange):
+    x, z = grids[0], grids[2]
+    numRows, numColumns = len(x), len(x[0])
+
+    def inside(i, j):
+        return xRange[0] <= x[i][j] <= xRange[1] and zRange[0] <= z[i][j] <= zRange[1]
+
+    insideRows, insideColumns = set(), set()
+    for i in range(numRows):
+        for j in range(numColumns):
+            if inside(i, j):
+                insideRows.add(i)
+                insideColumns.add(j)
+    rows, columns = sorted(insideRows), sorted(insideColumns)
+    return [[[grid[i][j] for j in columns] for i in rows] for grid in grids]
+
+# Returns the spacing of a sampled grid between its columns and between its rows
+def gridSpacing(grids):
+    x, z = grids[0], grids[2]
+    numRows, numColumns = len(x), len(x[0])
+    middleRow, middleColumn = numRows // 2, numColumns // 2
+    columnSpacing = math.hypot(x[middleRow][-1] - x[middleRow][0], z[middleRow][-1] - z[middleRow][0]) / max(1, numColumns - 1)
+    rowSpacing = math.hypot(x[-1][middleColumn] - x[0][middleColumn], z[-1][middleColumn] - z[0][middleColumn]) / max(1, numRows - 1)
+    return columnSpacing, rowSpacing
+
+# Returns the vertical distance between a horizontal face and a sampled surface below it, at their closest points
+# The face is taken as the x and z box of its vertices
+# footprint = (xMin, xMax, zMin, zMax, y) of the face
+# grids = x, y and z grids of the surface
+def distanceToSurface(footprint, grids):
+    xMin, xMax, zMin, zMax, y = footprint
+    if numpy is not None:
+        x, heights, z = [numpy.asarray(grid, dtype=float) for grid in grids]
+        dx = numpy.maximum(numpy.maximum(xMin - x, x - xMax), 0.0)
+        dz = numpy.maximum(numpy.maximum(zMin - z, z - zMax), 0.0)
+        dy = y - heights
+        closest = numpy.argmin(dx * dx + dy * dy + dz * dz)
+        return abs(float(dy.flat[closest]))
+
+    best, bestDy = None, None
+    for rowX, rowY, rowZ in zip(*grids):
+        for px, py, pz in zip(rowX, rowY, rowZ):
+            dx = max(xMin - px, px - xMax, 0.0)
+            dz = max(zMin - pz, pz - zMax, 0.0)
+            dy = y - py
+            distance = dx * dx + dy * dy + dz * dz
+            if best is None or distance < best:
+                best, bestDy = distance, dy
+    return abs(bestDy)
+
+# Measure an exported geometry
+# Returns a report dictionary holding the TopFaceArea, SlidingDistance and DistanceToContact measurements in m and m^2,
+# and the roughness of the floor topography
+# path = path to the .sat file
+# samples = number of samples of each knot span of the topography surface
+# documentPath = path to the .scdoc document whose named selections give the faces, None to find them by position
+def measureGeometry(path, samples=DEFAULT_SAMPLES, documentPath=None):
+    model = SatModel(path)
+    bodyFaces = dict((body, model.faces(model.body(body))) for body in ["Shoe", "Floor"])
+    floorFaces = bodyFaces["Floor"]
+    faces = namedFaces(model, bodyFaces, documentPath) if documentPath is not None else positionFaces(model, bodyFaces)
+
+    topFaceArea = faceArea(model, faces["Shoe_Top"])[0]
+    slidingDistance = abs(faceArea(model, faces["Shoe_Side"])[1][0] - faceArea(model, faces["Floor_Side"])[1][0])
+
+    contactPoints = [point for loop in model.faceLoops(faces["Shoe_Contact"]) for point in loop]
+    footprint = (min(point[0] for point in contactPoints), max(point[0] for point in contactPoints),
+        min(point[2] for point in contactPoints), max(point[2] for point in contactPoints),
+        sum(point[1] for point in contactPoints) / len(contactPoints))
+
+    # Sample the topography over the extent of the floor
+    floorPoints = [point for face in floorFaces for loop in model.faceLoops(face) for point in loop]
+    xRange = (min(point[0] for point in floorPoints), max(point[0] for point in floorPoints))
+    zRange = (min(point[2] for point in floorPoints), max(point[2] for point in floorPoints))
+    surface = model.surface(faces["Floor_Contact"])
+    if surface.kind != "spline-surface":
+        raise Exception("The floor contact face of {} is not a spline surface.".format(path))
+    grids = clipGrids(SplineSurface(surface).sample(samples), xRange, zRange)
+
+    columnSpacing, rowSpacing = gridSpacing(grids)
+    return {
+        "geometry": path,
+        "document": documentPath,
+        "faces": dict((name, model.names.get(face, face)) for name, face in faces.items()),
+        "measurements": {
+            "TopFaceArea": topFaceArea,
+            "SlidingDistance": slidingDistance,
+            "DistanceToContact": distanceToSurface(footprint, grids)},
+        "floorRoughness": roughness(lambda: iter([grids[1]]), columnSpacing, rowSpacing)}
+
+# Returns the least squares plane z = a + b * column + c * row of chunks of rows of heights, as (a, b, c)
+# Heights that are not a number are left out
+# chunks = function returning an iterator over chunks of rows of heights
+def fitPlane(chunks):
+    # Sums of 1, column, row, z, column^2, row^2, column row, column z and row z, with z taken relative to a shift for precision
+    sums = [0.0] * 9
+    shift = None
+    rowIndex = 0
+    for chunk in chunks():
+        if numpy is not None:
+            chunk = numpy.asarray(chunk, dtype=float)
+            rows, columns = numpy.indices(chunk.shape)
+            rows = rows + rowIndex
+            valid = numpy.isfinite(chunk)
+            if shift is None and valid.any():
+                shift = float(chunk[valid][0])
+            z = chunk[valid] - (shift or 0.0)
+            i, j = columns[valid].astype(float), rows[valid].astype(float)
+            for k, value in enumerate([float(z.size), i.sum(), j.sum(), z.sum(), (i * i).sum(), (j * j).sum(), (i * j).sum(), (i * z).sum(), (j * z).sum()]):
+                sums[k] += value
+            rowIndex += chunk.shape[0]
+            continue
+
+        for row in chunk:
+            if all(value == value for value in row):
+                columns, heights = range(len(row)), row
+            else:
+                valid = [(i, value) for i, value in enumerate(row) if value == value]
+                columns, heights = [i for i, value in valid], [value for i, value in valid]
+            if heights and shift is None:
+                shift = heights[0]
+            heights = [value - shift for value in heights] if heights else heights
+            count = len(heights)
+            columnSum = float(sum(columns))
+            heightSum = math.fsum(heights)
+            j = float(rowIndex)
+            for k, value in enumerate([count, columnSum, j * count, heightSum, float(sum(i * i for i in columns)), j * j * count, j * columnSum,
+                    math.fsum(map(operator.mul, columns, heights)), j * heightSum]):
+                sums[k] += value
+            rowIndex += 1
+
+    n, si, sj, sz, sii, sjj, sij, siz, sjz = sums
+    if n == 0:
+        raise Exception("The height map has no valid heights.")
+    # A grid of a single row or column has no slope in that direction
+    active = [0] + [k for k, total, squares in [(1, si, sii), (2, sj, sjj)] if squares * n - total * total > 1e-9 * squares * n]
+    matrix = [[n, si, sj], [si, sii, sij], [sj, sij, sjj]]
+    vector = [sz, siz, sjz]
+    coefficients = [0.0, 0.0, 0.0]
+    for k, value in zip(active, solveLinear([[matrix[r][k] for k in active] for r in active], [vector[r] for r in active])):
+        coefficients[k] = value
+    return coefficients[0] + shift, coefficients[1], coefficients[2]
+
+# Returns the solution of a small linear system, by Gaussian elimination with partial pivoting
+def solveLinear(matrix, vector):
+    size = len(vector)
+    rows = [list(matrix[i]) + [vector[i]] for i in range(size)]
+    for column in range(size):
+        pivot = max(range(column, size), key=lambda i: abs(rows[i][column]))
+        rows[column], rows[pivot] = rows[pivot], rows[column]
+        for i in range(column + 1, size):
+            factor = rows[i][column] / rows[column][column]
+            rows[i] = [value - factor * pivotValue for value, pivotValue in zip(rows[i], rows[column])]
+    solution = [0.0] * size
+    for i in reversed(range(size)):
+        solution[i] = (rows[i][size] - sum(rows[i][k] * solution[k] for k in range(i + 1, size))) / rows[i][i]
+    return solution
+
+# Returns the number of peaks of the interior rows of a block of rows of residual heights
+# A peak is a point above the mean plane and higher than its 8 neighbours
+def countPeaks(block):
+    if numpy is not None:
+        if block.shape[0] < 3 or block.shape[1] < 3:
+            return 0
+        center = block[1:-1, 1:-1]
+        peaks = center > 0
+        numRows, numColumns = block.shape
+        for di in (-1, 0, 1):
+            for dj in (-1, 0, 1):
+                if di or dj:
+                    peaks &= center > block[1 + di:numRows - 1 + di, 1 + dj:numColumns - 1 + dj]
+        return int(peaks.sum())
+
+    count = 0
+    for previous, row, following in zip(block, block[1:], block[2:]):
+        for i in range(1, len(row) - 1):
+            value = row[i]
+            if value > 0 and value > row[i - 1] and value > row[i + 1] and value > max(previous[i - 1:i + 2]) and value > max(following[i - 1:i + 2]):
+                count += 1
+    return count
+
+# Returns the roughness parameters of chunks of rows of heights
+# chunks = function returning an iterator over chunks of rows of heights; it is called twice
+# spacing = distance between the columns of the grid in m
+# rowSpacing = distance between the rows of the grid in m, the column spacing by default
+def roughness(chunks, spacing, rowSpacing=None):
+    rowSpacing = spacing if rowSpacing is None else rowSpacing
+    a, b, c = fitPlane(chunks)
+
+    # Sums of the residual heights to the plane and their absolute values, squares, cubes and fourth powers
+    count = 0
+    sums = [0.0] * 4
+    highest, lowest = None, None
+    peaks = 0
+    numRows, numColumns = 0, 0
+    tail = []
+    for chunk in chunks():
+        if numpy is not None:
+            chunk = numpy.asarray(chunk, dtype=float)
+            rows, columns = numpy.indices(chunk.shape)
+            residuals = chunk - (a + b * columns + c * (rows + numRows))
+            valid = residuals[numpy.isfinite(residuals)]
+            count += valid.size
+            if valid.size:
+                squares = valid * valid
+                for k, value in enumerate([numpy.abs(valid).sum(), squares.sum(), (squares * valid).sum(), (squares * squares).sum()]):
+                    sums[k] += float(value)
+                highest = float(valid.max()) if highest is None else max(highest, float(valid.max()))
+                lowest = float(valid.min()) if lowest is None else min(lowest, float(valid.min()))
+            block = numpy.vstack(tail + [residuals]) if len(tail) else residuals
+            peaks += countPeaks(block)
+            tail = [block[-2:]]
+            numRows += chunk.shape[0]
+            numColumns = chunk.shape[1]
+            continue
+
+        residualRows = []
+        for row in chunk:
+            rowTerm = c * numRows
+            residuals = [value - (a + b * i + rowTerm) for i, value in enumerate(row)]
+            valid = [value for value in residuals if value == value]
+            count += len(valid)
+            if valid:
+                squares = [value * value for value in valid]
+                for k, value in enumerate([math.fsum(map(abs, valid)), math.fsum(squares), math.fsum(map(operator.mul, squares, valid)),
+                        math.fsum(map(operator.mul, squares, squares))]):
+                    sums[k] += value
+                highest = max(valid) if highest is None else max(highest, max(valid))
+                lowest = min(valid) if lowest is None else min(lowest, min(valid))
+            residualRows.append(residuals)
+            numRows += 1
+            numColumns = len(row)
+        block = tail + residualRows
+        peaks += countPeaks(block)
+        tail = block[-2:]
+
+    sq = math.sqrt(sums[1] / count)
+    area = max(1, numColumns - 1) * spacing * max(1, numRows - 1) * rowSpacing
+    return {
+        "rows": numRows,
+        "columns": numColumns,
+        "points": count,
+        "spacing": [spacing, rowSpacing],
+        "Sa": sums[0] / count,
+        "Sq": sq,
+        "Sp": highest,
+        "Sv": -lowest,
+        "Sz": highest - lowest,
+        "Ssk": sums[2] / count / sq ** 3 if sq > 0 else 0.0,
+        "Sku": sums[3] / count / sq ** 4 if sq > 0 else 0.0,
+        "peaks": peaks,
+        "Spd": peaks / area if area > 0 else 0.0}
+
+# Height map of a profilometer, as a 2D .npy array or a text grid of heights with one row per line
+# Text grids may be separated by spaces, tabs, commas or semicolons; lines that do not start with a number are skipped
+# path = path to the height map
+class HeightMap(object):
+    def __init__(self, path):
+        self.path = path
+
+    # Returns an iterator over chunks of rows of heights
+    def chunks(self, chunkRows=CHUNK_ROWS):
+        if self.path.lower().endswith(".npy"):
+            return self.npyChunks(chunkRows)
+        return self.textChunks(chunkRows)
+
+    def npyChunks(self, chunkRows):
+        if numpy is not None:
+            data = numpy.load(self.path, mmap_mode='r')
+            if not data.ndim == 2:
+                raise Exception("The height map {} is not a 2D array.".format(self.path))
+            for start in range(0, data.shape[0], chunkRows):
+                yield numpy.asarray(data[start:start + chunkRows], dtype=float)
+            return
+
+        with open(self.path, 'rb') as fileObj:
+            header = ResultStore.readNpyHeader(fileObj)
+            typecodes = {"<f8": 'd', "<f4": 'f'}
+            if header["descr"] not in typecodes or header["fortran_order"] or not len(header["shape"]) == 2:
+                raise Exception("The height map {} is not a C-ordered 2D float64 or float32 array.".format(self.path))
+            numRows, numColumns = header["shape"]
+            for start in range(0, numRows, chunkRows):
+                values = array.array(typecodes[header["descr"]])
+                values.fromfile(fileObj, min(chunkRows, numRows - start) * numColumns)
+                if sys.byteorder == "big":
+                    values.byteswap()
+                yield [values[i:i + numColumns] for i in range(0, len(values), numColumns)]
+
+    def textChunks(self, chunkRows):
+        rows = []
+        with open(self.path, 'r') as fileObj:
+            for line in fileObj:
+                tokens = [token for token in NUMBER_SEPARATORS.split(line.strip()) if token]
+                try:
+                    row = [float(token) for token in tokens]
+                except ValueError:
+                    continue
+                if not row:
+                    continue
+                rows.append(row)
+                if len(rows) == chunkRows:
+                    yield numpy.array(rows) if numpy is not None else rows
+                    rows = []
+        if rows:
+            yield numpy.array(rows) if numpy is not None else rows
+
+# Returns the roughness parameters of a height map
+# path = path to the height map
+# spacing = distance between the columns of the map in m
+# rowSpacing = distance between the rows of the map in m, the column spacing by default
+def measureHeightMap(path, spacing, rowSpacing=None):
+    heightMap = HeightMap(path)
+    report = roughness(heightMap.chunks, spacing, rowSpacing)
+    report["heightMap"] = path
+    return report
+
+# Returns the path to the .sat export of a geometry file, or None if there is no .sat file at all
+# The export must have the name of the geometry file; .sat files of other geometries raise, as measuring one of them would be wrong
+# workingDirectory = path to the workflow working directory or a campaign directory
+# geometryPath = path to the .agdb geometry file
+def findExportPath(workingDirectory, geometryPath):
+    folderPath = os.path.join(workingDirectory, EXPORT_FOLDER)
+    files = sorted(file for file in os.listdir(folderPath) if file.lower().endswith(".sat")) if os.path.isdir(folderPath) else []
+    if not files:
+        return None
+    geometryName = os.path.splitext(os.path.basename(geometryPath))[0]
+    matches = [file for file in files if os.path.splitext(file)[0] == geometryName]
+    if not matches:
+        raise Exception("No .sat export named {}.sat in {}, found {}.".format(geometryName, folderPath, ", ".join(files)))
+    return os.path.join(folderPath, matches[0])
+
+# Returns the path to the .sat export of a campaign's geometry
+# workingDirectory = path to the campaign directory
+def getExportPath(workingDirectory):
+    path = findExportPath(workingDirectory, ImportExportUtilities.getGeometryPath(workingDirectory))
+    if path is None:
+        raise Exception("No .sat export of the geometry was found in {}.".format(os.path.join(workingDirectory, EXPORT_FOLDER)))
+    return path
+
+# Returns the (column, row) spacing of the height map in m from the HeightMapSpacing column of the Config file
+def getHeightMapSpacing(config):
+    spacing = config.get("HeightMapSpacing", "")
+    spacing = [float(value) for value in (spacing if isinstance(spacing, list) else [spacing]) if value]
+    if not spacing:
+        raise Exception("HeightMapSpacing must be set to measure the height map.")
+    return spacing[0], spacing[-1]
+
+# Returns the path to the SpaceClaim document of a geometry file, the .scdoc file of the same name next to it, or None if there is none
+# geometryPath = path to the .agdb geometry file
+def findDocumentPath(geometryPath):
+    path = os.path.splitext(geometryPath)[0] + ".scdoc"
+    return path if os.path.exists(path) else None
+
+# Returns the geometry report of a campaign
+# With MeasureGeometry set in the Config file, the geometry is measured from its .sat export, with the faces of the named selections of its
+# SpaceClaim document and TopographySamples samples per knot span of the topography surface; otherwise the report holds DEFAULT_MEASUREMENTS
+# config = configuration dictionary returned by importConfig
+# workingDirectory = path to the campaign directory
+def campaignGeometry(config, workingDirectory):
+    if not ImportExportUtilities.getConfigFlag(config, "MeasureGeometry"):
+        return {"geometry": None, "measurements": dict(DEFAULT_MEASUREMENTS)}
+    documentPath = findDocumentPath(ImportExportUtilities.getGeometryPath(workingDirectory))
+    return measureGeometry(getExportPath(workingDirectory), int(config.get("TopographySamples", "") or DEFAULT_SAMPLES), documentPath)
+
+# Measure the geometry of a campaign, if MeasureGeometry is set, and its height map if one is set in the Config file, and write the report
+# to the Results directory
+# Returns the dictionary of the TopFaceArea, SlidingDistance and DistanceToContact measurements
+# HeightMap is the path to a profilometer height map, relative to the campaign directory, with its spacing in m in HeightMapSpacing
+# config = configuration dictionary returned by importConfig
+# workingDirectory = path to the campaign directory
+def measureCampaign(config, workingDirectory):
+    report = campaignGeometry(config, workingDirectory)
+    heightMapPath = config.get("HeightMap", "")
+    if heightMapPath:
+        spacing, rowSpacing = getHeightMapSpacing(config)
+        report["heightMapRoughness"] = measureHeightMap(os.path.join(workingDirectory, heightMapPath), spacing, rowSpacing)
+
+    resultsFolderPath = os.path.join(workingDirectory, "Results")
+    if not os.path.exists(resultsFolderPath):
+        os.makedirs(resultsFolderPath)
+    ResultStore.replaceFile(os.path.join(resultsFolderPath, REPORT_NAME), json.dumps(report, indent=1, sort_keys=True))
+    return report["measurements"]
+
+if __name__ == "__main__":
+    arguments = sys.argv[1:]
+    options = {}
+    for name in ["--spacing", "--samples", "--document"]:
+        if name in arguments:
+            position = arguments.index(name)
+            options[name] = arguments[position + 1]
+            arguments = arguments[:position] + arguments[position + 2:]
+    if not arguments:
+        print("Usage: python Topography.py <.sat file or height map> [...] [--spacing dx[,dy]] [--samples N] [--document .scdoc file]")
+        sys.exit(2)
+
+    reports = {}
+    for path in arguments:
+        if path.lower().endswith(".sat"):
+            reports[path] = measureGeometry(path, int(options.get("--samples", DEFAULT_SAMPLES)), options.get("--document"))
+        else:
+            if "--spacing" not in options:
+                print("--spacing is needed to measure the height map {}.".format(path))
+                sys.exit(2)
+            spacing = [float(value) for value in options["--spacing"].split(",")]
+            reports[path] = measureHeightMap(path, spacing[0], spacing[-1])
+    print(json.dumps(reports, indent=1, sort_keys=True))
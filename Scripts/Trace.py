@@ -0,0 +1,182 @@
+# Phase-level timing of the workflow
+# Spans are appended to Logs/Trace.jsonl in the campaign directory as Chrome trace events, one JSON object per line
+# The journal, the Mechanical scripts and the solver jobs all append to the same file, so a campaign's trace shows where its wall-clock time went
+# exportChromeTrace converts the file for chrome://tracing or Perfetto, and writeReport writes a plain text summary of the time per phase
+# Usage: python Scripts/Trace.py <campaign directory>
+
+import os
+import sys
+import json
+import time
+import threading
+
+TRACE_NAME = "Trace.jsonl"
+CHROME_TRACE_NAME = "Trace.json"
+REPORT_NAME = "TraceSummary.txt"
+
+# A span in progress, ended by calling its end method or by leaving its with block
+class Span(object):
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.startTime = time.time()
+        self.endTime = None
+
+    # End the span and append it to the trace file
+    # args = additional span arguments, e.g. results only known at the end of the phase
+    def end(self, **args):
+        if self.endTime is not None:
+            return
+        self.endTime = time.time()
+        self.args.update(args)
+        self.tracer.record(self.name, self.startTime, self.endTime, self.category, None, **self.args)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        if excType is not None:
+            self.args["error"] = excType.__name__
+        self.end()
+        return False
+
+# Writes the spans of a process to a trace file
+# path = path to the trace file
+# processName = name shown for the process in the trace viewer, e.g. "Workbench" or "Mechanical"
+class Tracer(object):
+    def __init__(self, path, processName):
+        self.path = path
+        self.processName = processName
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        self.currentPhase = None
+        self._writeProcessName()
+
+    def _writeProcessName(self):
+        self._append({"name": "process_name", "ph": "M", "pid": self.pid, "tid": 0, "args": {"name": self.processName}})
+
+    def _append(self, event):
+        line = json.dumps(event, sort_keys=True) + "\n"
+        with self.lock:
+            with open(self.path, 'a') as fileObj:
+                fileObj.write(line)
+
+    # Empty the trace file, at the start of a new workflow run
+    def reset(self):
+        with self.lock:
+            with open(self.path, 'w'):
+                pass
+        self._writeProcessName()
+
+    # Append a span that has already finished
+    # name = span name
+    # startTime, endTime = start and end of the span as time.time values
+    # category = span category, e.g. "journal", "mechanical" or "solver"
+    # threadId = optional track of the span in the trace viewer, the current thread by default; spans that overlap in time need separate tracks
+    # args = span arguments shown in the trace viewer
+    def record(self, name, startTime, endTime, category="", threadId=None, **args):
+        self._append({"name": name, "cat": category, "ph": "X", "pid": self.pid, "tid": threading.current_thread().ident if threadId is None else threadId,
+            "ts": int(startTime * 1e6), "dur": int((endTime - startTime) * 1e6), "args": args})
+
+    # Returns a new span, used as a with block or ended with its end method
+    def span(self, name, category="", **args):
+        return Span(self, name, category, args)
+
+    # End the current phase of a script and start the next one
+    # Scripts made of consecutive steps call phase at the start of each step instead of wrapping every step in a with block
+    def phase(self, name, category="", **args):
+        self.endPhase()
+        self.currentPhase = self.span(name, category, **args)
+        return self.currentPhase
+
+    # End the current phase of a script, if any
+    def endPhase(self):
+        if self.currentPhase is not None:
+            self.currentPhase.end()
+            self.currentPhase = None
+
+# Returns a tracer writing to the trace file of a campaign directory
+# directory = path to the campaign directory
+# processName = name shown for the process in the trace viewer
+def openTracer(directory, processName):
+    logFolderPath = os.path.join(directory, "Logs")
+    if not os.path.exists(logFolderPath):
+        os.mkdir(logFolderPath)
+    return Tracer(os.path.join(logFolderPath, TRACE_NAME), processName)
+
+# Returns the list of trace events in the trace file of a campaign directory
+# Lines cut short by a process that stopped mid-write are skipped
+# directory = path to the campaign directory
+def loadEvents(directory):
+    path = os.path.join(directory, "Logs", TRACE_NAME)
+    events = []
+    if not os.path.exists(path):
+        return events
+    with open(path, 'r') as fileObj:
+        for line in fileObj:
+            try:
+                events.append(json.loads(line))
+            except ValueError:
+                continue
+    return events
+
+# Write the trace of a campaign directory as a Chrome trace file, Logs/Trace.json
+# Returns the path to the Chrome trace file
+# directory = path to the campaign directory
+def exportChromeTrace(directory):
+    path = os.path.join(directory, "Logs", CHROME_TRACE_NAME)
+    with open(path, 'w') as fileObj:
+        json.dump({"traceEvents": loadEvents(directory), "displayTimeUnit": "ms"}, fileObj)
+    return path
+
+# Returns the wall-clock time of a trace and the time spent in each span name
+# The time per name is a list of [category, name, count, total, maximum] sorted by decreasing total time in s
+# Nested spans are counted in their own name and in every enclosing span's name
+# events = trace events returned by loadEvents
+def summarize(events):
+    spans = [event for event in events if event.get("ph") == "X"]
+    if not spans:
+        return 0.0, []
+
+    wallTime = (max(event["ts"] + event["dur"] for event in spans) - min(event["ts"] for event in spans)) / 1e6
+    totals = {}
+    for event in spans:
+        key = (event.get("cat", ""), event["name"])
+        duration = event["dur"] / 1e6
+        if key not in totals:
+            totals[key] = [key[0], key[1], 0, 0.0, 0.0]
+        totals[key][2] += 1
+        totals[key][3] += duration
+        totals[key][4] = max(totals[key][4], duration)
+
+    return wallTime, sorted(totals.values(), key=lambda total: -total[3])
+
+# Returns the summary report of the trace of a campaign directory as text
+# directory = path to the campaign directory
+def formatReport(directory):
+    wallTime, totals = summarize(loadEvents(directory))
+    lines = ["Wall-clock time: {:.3f} s".format(wallTime), "",
+        "{:<12} {:<40} {:>6} {:>12} {:>12} {:>8}".format("Category", "Span", "Count", "Total [s]", "Max [s]", "Share")]
+    for category, name, count, total, maximum in totals:
+        share = total / wallTime if wallTime > 0 else 0.0
+        lines.append("{:<12} {:<40} {:>6} {:>12.3f} {:>12.3f} {:>7.1%}".format(category, name, count, total, maximum, share))
+    return "\n".join(lines) + "\n"
+
+# Write the summary report and the Chrome trace of a campaign directory to its Logs directory
+# Returns the path to the summary report
+# directory = path to the campaign directory
+def writeReport(directory):
+    exportChromeTrace(directory)
+    path = os.path.join(directory, "Logs", REPORT_NAME)
+    with open(path, 'w') as fileObj:
+        fileObj.write(formatReport(directory))
+    return path
+
+if __name__ == "__main__":
+    if not len(sys.argv) == 2:
+        print("Usage: python Trace.py <campaign directory>")
+        sys.exit(2)
+    writeReport(sys.argv[1])
+    sys.stdout.write(formatReport(sys.argv[1]))
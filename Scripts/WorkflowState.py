@@ -0,0 +1,158 @@
+# Append-only store for the workflow state, replacing in-place rewrites of Logs/Log.xml
+# Every update is a single JSON line appended to Logs/State.jsonl while holding a lock file, so several processes can write safely
+# The current state is rebuilt by replaying the lines in order; a line cut short by a crash is ignored
+# The file is compacted to one line per record after post-processing; readers replay a compacted file from its start
+# Campaign values (measurements, current simulation index) and per-simulation records (status, pressure, timings, output paths) are kept
+# Logs/Log.xml is still written as a read-only export for backwards compatibility
+
+import os
+import json
+import time
+import xml.etree.ElementTree as ET
+
+import ResultStore
+
+STATE_NAME = "State.jsonl"
+
+# Returns the workflow state store of a working directory
+# workingDirectory = path to the workflow working directory
+def openState(workingDirectory):
+    logsFolderPath = os.path.join(workingDirectory, "Logs")
+    if not os.path.exists(logsFolderPath):
+        os.mkdir(logsFolderPath)
+    return StateStore(os.path.join(logsFolderPath, STATE_NAME))
+
+# Lock held while appending to the state file, see ResultStore.FileLock
+FileLock = ResultStore.FileLock
+
+# Workflow state backed by an append-only JSON lines file
+# path = path to the state file
+class StateStore(object):
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self.firstLine = None
+        self.values = {}
+        self.simulationRecords = {}
+
+    # Replay the lines appended since the last read
+    # A file that was compacted or reset by another store starts with another line, and is then replayed from its start
+    def refresh(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb') as fileObj:
+            firstLine = fileObj.readline()
+            if not firstLine == self.firstLine:
+                self.firstLine = firstLine
+                self.offset = 0
+                self.values = {}
+                self.simulationRecords = {}
+            fileObj.seek(self.offset)
+            data = fileObj.read()
+
+        # Only complete lines are replayed; a partial last line is either still being written or cut short by a crash
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            try:
+                record = json.loads(line.decode("utf-8"))
+            except ValueError:
+                continue
+            self.apply(record)
+        self.offset += end
+
+    def apply(self, record):
+        if record["scope"] == "campaign":
+            self.values.update(record["values"])
+        else:
+            self.simulationRecords.setdefault(record["index"], {}).update(record["values"])
+
+    # Append a record to the state file
+    def append(self, record):
+        record["time"] = time.time()
+        line = (json.dumps(record, sort_keys=True) + "\n").encode("utf-8")
+        with FileLock(self.path + ".lock"):
+            # Terminate a line cut short by a crash so it does not swallow this record
+            if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+                with open(self.path, 'rb') as fileObj:
+                    fileObj.seek(-1, os.SEEK_END)
+                    if fileObj.read(1) != b"\n":
+                        line = b"\n" + line
+            with open(self.path, 'ab') as fileObj:
+                fileObj.write(line)
+                fileObj.flush()
+                os.fsync(fileObj.fileno())
+
+    # Remove all records and start a new, empty state file
+    def reset(self):
+        with FileLock(self.path + ".lock"):
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        self.offset = 0
+        self.firstLine = None
+        self.values = {}
+        self.simulationRecords = {}
+
+    # Returns a campaign value
+    # key = name of the value
+    # default = value returned when the value has not been set
+    def get(self, key, default=None):
+        self.refresh()
+        return self.values.get(key, default)
+
+    # Set one or more campaign values
+    # values = keyword arguments of the values to set
+    def set(self, **values):
+        self.append({"scope": "campaign", "values": values})
+
+    # Returns a copy of the record of a simulation
+    # index = simulation index
+    def simulation(self, index):
+        self.refresh()
+        return dict(self.simulationRecords.get(index, {}))
+
+    # Returns a copy of the records of all simulations, by simulation index
+    def simulations(self):
+        self.refresh()
+        return dict((index, dict(record)) for index, record in self.simulationRecords.items())
+
+    # Set one or more fields of a simulation's record
+    # index = simulation index
+    # fields = keyword arguments of the fields to set, e.g. status, pressure, startTime, endTime, forceData
+    def updateSimulation(self, index, **fields):
+        self.append({"scope": "simulation", "index": int(index), "values": fields})
+
+    # Returns the set of simulation indices whose status is "completed"
+    def completedIndices(self):
+        return set(index for index, record in self.simulations().items() if record.get("status") == "completed")
+
+    # Rewrite the state file as one line per campaign and simulation record
+    # The new file is written next to the old one and renamed over it; its first line holds the compaction time,
+    # so other stores tell it apart from the file they read before and replay it from its start
+    def compact(self):
+        with FileLock(self.path + ".lock"):
+            self.refresh()
+            lines = [json.dumps({"scope": "campaign", "values": self.values, "time": time.time()}, sort_keys=True)]
+            for index in sorted(self.simulationRecords):
+                lines.append(json.dumps({"scope": "simulation", "index": index, "values": self.simulationRecords[index]}, sort_keys=True))
+            ResultStore.replaceFile(self.path, "\n".join(lines) + "\n")
+            self.offset = os.path.getsize(self.path)
+            self.firstLine = (lines[0] + "\n").encode("utf-8")
+
+    # Write the state in the layout of the original Log.xml file
+    # path = path to the Log.xml file
+    def exportLogXml(self, path):
+        self.refresh()
+        log = ET.Element("root")
+        for key in sorted(self.values):
+            ET.SubElement(log, key).text = str(self.values[key])
+        for index in sorted(self.simulationRecords):
+            record = self.simulationRecords[index]
+            if "pressure" in record:
+                ET.SubElement(log, "SimulationPressure{}".format(index), unit="Pa").text = str(record["pressure"])
+            if "status" in record:
+                ET.SubElement(log, "SimulationStatus{}".format(index)).text = str(record["status"])
+
+        temporaryPath = ResultStore.temporaryFilePath(path)
+        with open(temporaryPath, 'wb') as fileObj:
+            ET.ElementTree(log).write(fileObj, encoding='utf-8')
+        ResultStore.renameOver(temporaryPath, path)
@@ -2,49 +2,118 @@ import Ansys.Mechanical.DataModel.Enums.StiffnessBehavior as StiffnessBehavior
 import Ansys.Core.Units.Quantity as Quantity
 import Ansys.ACT.Mechanical.Fields.VariableDefinitionType as VariableDefinitionType
 import Ansys.Mechanical.DataModel.Enums.NormalOrientationType as NormalOrientationType
+import Ansys.ACT.Interfaces.Common.SelectionTypeEnum as SelectionTypeEnum
+
+import Keyword
+
+# Every ExtAPI property access and method call crosses the .NET boundary, so the objects the workflow uses are resolved once per model
+# The Named Selections are indexed by name in a single pass over the model tree, and other tree objects are looked up by name only once
+# Systems sharing a Model hold several analyses; the analysis of the system the script runs on is selected by its system caption
+# ExtAPI = ExtAPI reference
+# systemCaption = optional Workbench system name of the analysis, the first analysis is used when it is None
+class ModelIndex(object):
+    def __init__(self, ExtAPI, systemCaption=None):
+        self.ExtAPI = ExtAPI
+        self.dataModel = ExtAPI.DataModel
+        self.project = self.dataModel.Project
+        self.model = self.project.Model
+        self.mesh = self.model.Mesh
+        self.analysis = self.findAnalysis(systemCaption)
+        self.analysisSettings = self.analysis.AnalysisSettings
+        self.solution = self.analysis.Solution
+        self.solutionInformation = self.solution.SolutionInformation
+        self.selectionManager = ExtAPI.SelectionManager
+        self.namedSelections = None
+        self.objects = {}
+        self.bodies = {}
+
+    # Returns the analysis of a system
+    # A caption that matches no analysis raises, instead of running the script on another system's analysis
+    def findAnalysis(self, systemCaption):
+        analyses = list(self.dataModel.AnalysisList)
+        if systemCaption is None:
+            return analyses[0]
+        for analysis in analyses:
+            if analysis.SystemCaption == systemCaption:
+                return analysis
+        raise Exception("No analysis of system {} in the model, found {}.".format(systemCaption, ", ".join(analysis.SystemCaption for analysis in analyses)))
+
+    # Returns the Named Selection with the given name
+    def namedSelection(self, name):
+        if self.namedSelections is None:
+            self.namedSelections = {}
+            for selection in self.model.NamedSelections.Children:
+                self.namedSelections.setdefault(selection.Name, selection)
+        return self.namedSelections[name]
+
+    # Returns the first object of the model tree with the given name
+    def objectByName(self, name):
+        if name not in self.objects:
+            self.objects[name] = self.dataModel.GetObjectsByName(name)[0]
+        return self.objects[name]
+
+    # Returns the geometry entity ids of a Named Selection
+    def ids(self, namedSelection):
+        return list(namedSelection.Location.Ids)
+
+    # Returns the Body of the first entity of a Named Selection
+    def body(self, namedSelection):
+        name = namedSelection.Name
+        if name not in self.bodies:
+            self.bodies[name] = self.model.Geometry.GetBody(self.dataModel.GeoData.GeoEntityById(self.ids(namedSelection)[0]))
+        return self.bodies[name]
+
+    # Returns a selection of the entities of several Named Selections, built without changing the current selection
+    def combinedSelection(self, namedSelections):
+        selection = self.selectionManager.CreateSelectionInfo(SelectionTypeEnum.GeometryEntities)
+        ids = []
+        for namedSelection in namedSelections:
+            ids.extend(self.ids(namedSelection))
+        selection.Ids = ids
+        return selection
+
+_modelIndex = None
+
+# Returns the model index of an ExtAPI reference, creating it on first use
+# ExtAPI = ExtAPI reference
+# systemCaption = optional Workbench system name of the analysis the script runs on
+def getModelIndex(ExtAPI, systemCaption=None):
+    global _modelIndex
+    if _modelIndex is None or _modelIndex.ExtAPI is not ExtAPI:
+        _modelIndex = ModelIndex(ExtAPI, systemCaption)
+    return _modelIndex
+
+# Discard the model index, after objects it holds were deleted or renamed
+def clearModelIndex():
+    global _modelIndex
+    _modelIndex = None
 
 # Returns references
+# Scripts call this first, so it starts a new model index in case the module stayed loaded from an earlier script
 # ExtAPI = ExtAPI reference
-def getReferences(ExtAPI):
-    project = ExtAPI.DataModel.Project
-    selectionManager = ExtAPI.SelectionManager
-    dataModel = ExtAPI.DataModel
-    model = ExtAPI.DataModel.Project.Model
-    mesh = ExtAPI.DataModel.Project.Model.Mesh
-    analysis = ExtAPI.DataModel.AnalysisList[0]
-    analysisSettings = ExtAPI.DataModel.GetObjectsByName("Analysis Settings")[0]
-    solution = ExtAPI.DataModel.GetObjectsByName("Solution")[0]
-    solutionInformation = ExtAPI.DataModel.GetObjectsByName("Solution Information")[0]
-
-    return project, selectionManager, dataModel, model, mesh, analysis, analysisSettings, solution, solutionInformation
+# systemCaption = optional Workbench system name of the analysis the script runs on, needed when systems share a Model
+def getReferences(ExtAPI, systemCaption=None):
+    clearModelIndex()
+    index = getModelIndex(ExtAPI, systemCaption)
+
+    return index.project, index.selectionManager, index.dataModel, index.model, index.mesh, index.analysis, index.analysisSettings, index.solution, index.solutionInformation
 
 # Returns dictionary of Named Selection references
 # ExtAPI = ExtAPI reference
 # names = list of NamedSelection Names
 def getNamedSelections(ExtAPI, names):
-    model = ExtAPI.DataModel.Project.Model
+    index = getModelIndex(ExtAPI)
 
-    namedSelections = {}
-    for name in names:
-        namedSelections[name] = [selection for selection in model.NamedSelections.Children if selection.Name == name][0]
-
-    return namedSelections
+    return dict((name, index.namedSelection(name)) for name in names)
 
 # Returns dictionary of Body references
+# The bodies are found from the Named Selections' entity ids, so the current selection is left untouched
 # ExtAPI = ExtAPI reference
 # namedSelections = list of NamedSelection references
 def getBodies(ExtAPI, namedSelections):
-    dataModel = ExtAPI.DataModel
-    model = ExtAPI.DataModel.Project.Model
-    selectionManager = ExtAPI.SelectionManager
-
-    bodies = {}
-    for namedSelection in namedSelections:
-        selectionManager.NewSelection(namedSelection)
-        bodies[namedSelection.Name] = model.Geometry.GetBody(dataModel.GeoData.GeoEntityById(selectionManager.CurrentSelection.Ids[0]))
-        selectionManager.ClearSelection()
+    index = getModelIndex(ExtAPI)
 
-    return bodies
+    return dict((namedSelection.Name, index.body(namedSelection)) for namedSelection in namedSelections)
 
 # Set desired geometry properties
 # shoe = Body reference to shoe
@@ -65,35 +134,31 @@ def setupGeometry(shoe, floor):
 # floor = NamedSelection reference to floor
 # shoe = NamedSelection reference to shoe
 def mesh(ExtAPI, meshSize, floorContact, shoeContact, floor, shoe):
-    mesh = ExtAPI.DataModel.Project.Model.Mesh
-    selectionManager = ExtAPI.SelectionManager
+    index = getModelIndex(ExtAPI)
+    mesh = index.mesh
 
     # Add Face Meshing control
     faceMeshing = mesh.AddFaceMeshing()
-    selectionManager.NewSelection(floorContact)
-    selectionManager.AddSelection(shoeContact)
-    selection = selectionManager.CurrentSelection
-    selectionManager.ClearSelection()
-    faceMeshing.Location = selection
+    faceMeshing.Location = index.combinedSelection([floorContact, shoeContact])
 
     # Add Body Sizing mesh control
     sizing = mesh.AddSizing()
-    selectionManager.NewSelection(floor)
-    selectionManager.AddSelection(shoe)
-    selection = selectionManager.CurrentSelection
-    sizing.Location = selection
-    selectionManager.ClearSelection()
+    sizing.Location = index.combinedSelection([floor, shoe])
     sizing.ElementSize = Quantity(meshSize, "m")
 
     # Generate Mesh
     mesh.GenerateMesh()
 
+# Returns True if the model holds a generated mesh
+# ExtAPI = ExtAPI reference
+def isMeshed(ExtAPI):
+    return getModelIndex(ExtAPI).mesh.Nodes > 0
+
 # Set analysis End time
 # ExtAPI = ExtAPI reference
 # endTime = analysis End Time in seconds
 def setAnalysisEndTime(ExtAPI, endTime):
-    analysis = ExtAPI.DataModel.GetObjectsByName("Analysis Settings")[0]
-    analysisSettings = ExtAPI.DataModel.GetObjectsByName("Analysis Settings")[0]
+    analysisSettings = getModelIndex(ExtAPI).analysisSettings
 
     analysisSettings.PropertyByName("Step Controls/Endtime").InternalValue = endTime
 
@@ -102,7 +167,7 @@ def setAnalysisEndTime(ExtAPI, endTime):
 # namedSelection = NamedSelection reference to scope condition to
 # tabularData = nested list of time and displacement pairs in seconds and meters
 def createDisplacement(ExtAPI, namedSelection, tabularData):
-    analysis = ExtAPI.DataModel.AnalysisList[0]
+    analysis = getModelIndex(ExtAPI).analysis
 
     timeValues = [Quantity("{} [sec]".format(str(element[0]))) for element in tabularData]
     displacementValues = [Quantity("{} [m]".format(str(element[1]))) for element in tabularData]
@@ -122,7 +187,7 @@ def createDisplacement(ExtAPI, namedSelection, tabularData):
 # namedSelection = NamedSelection reference to scope condition to
 # tabularData = nested list of time and velocity pairs in seconds and meters/second
 def createVelocity(ExtAPI, namedSelection, tabularData):
-    analysis = ExtAPI.DataModel.AnalysisList[0]
+    analysis = getModelIndex(ExtAPI).analysis
 
     timeValues = [Quantity("{} [sec]".format(str(element[0]))) for element in tabularData]
     velocityValues = [Quantity("{} [m/s]".format(str(element[1]))) for element in tabularData]
@@ -143,7 +208,7 @@ def createVelocity(ExtAPI, namedSelection, tabularData):
 # birthTime = analyis time to activate the condition
 # deathTime = analysis time to deactivate the condition
 def createBirthAndDeath(ExtAPI, index, birthTime, deathTime):
-    analysis = ExtAPI.DataModel.AnalysisList[0]
+    analysis = getModelIndex(ExtAPI).analysis
 
     birthAndDeath = analysis.CreateLoadObject("BirthAndDeath","LSDYNA")
     property = birthAndDeath.Properties['Boundary Condition']
@@ -157,7 +222,7 @@ def createBirthAndDeath(ExtAPI, index, birthTime, deathTime):
 # ExtAPI = ExtAPI reference
 # namedSelection = NamedSelection reference to scope condition to
 def createRigidBodyConstraint(ExtAPI, namedSelection):
-    analysis = ExtAPI.DataModel.AnalysisList[0]
+    analysis = getModelIndex(ExtAPI).analysis
 
     rigidBodyConstraint = analysis.CreateLoadObject("Rigid Constraint","LSDYNA")
     rigidBodyConstraint.Properties["Geometry/DefineBy/Geo"].Value = namedSelection
@@ -167,25 +232,12 @@ def createRigidBodyConstraint(ExtAPI, namedSelection):
 # Suppresses the default Body Interaction. Needed when using a Keyword Snippet to define a custom friction condition
 # ExtAPI = ExtAPI reference
 def suppressDefaultBodyInteraction(ExtAPI):
-    dataModel = ExtAPI.DataModel
-
-    dataModel.GetObjectsByName("Body Interaction")[0].PropertyByName("Suppressed").InternalValue = 1
+    getModelIndex(ExtAPI).objectByName("Body Interaction").PropertyByName("Suppressed").InternalValue = 1
 
 # Creates and returns a reference to a keyword snippet that defines a frictionless, surface-to-surface contact
 # This is needed as this body interaction option is not supported in the Ansys Mechanical/LS-Dyna ACT package
 def createDefaultContact(ExtAPI):
-    snippet = """*CONTACT_AUTOMATIC_SURFACE_TO_SURFACE 
-$     ssid      msid     sstyp     mstyp    sboxid    mboxid       spr       mpr
-            1         2         3         3         0         0         1         1
-$       fs        fd        dc        vc       vdc    penchk        bt        dt
-            0         0         0         0        10         0         0         0
-$      sfs       sfm       sst       mst      sfst      sfmt       fsf       vsf
-            0         0         0         0         0         0         0         0
-$     soft   softscl    lcidab    maxpar     sbopt     depth     bsort    frcfrq
-            2       0.1         0         0         3         5         0         0
-$   penmax    tkhopt    shlthk     snlog      isym     i2d3d    sldthk    sldstf
-            0         0         0         0         0         0         0         0
-"""
+    snippet = Keyword.formatKeywords([Keyword.contactAutomaticSurfaceToSurface()], fixedWidth=True)
 
     return createKeywordSnippet(ExtAPI, snippet)
 
@@ -193,7 +245,7 @@ $   penmax    tkhopt    shlthk     snlog      isym     i2d3d    sldthk    sldstf
 # ExtAPI = ExtAPI reference
 # text = keyword commands to store in snippet
 def createKeywordSnippet(ExtAPI, text):
-    analysis = ExtAPI.DataModel.AnalysisList[0]
+    analysis = getModelIndex(ExtAPI).analysis
 
     keywordSnippet = analysis.AddCommandSnippet()
     keywordSnippet.Input = text
@@ -204,8 +256,9 @@ def createKeywordSnippet(ExtAPI, text):
 # ExtAPI = ExtAPI reference
 # displacement = Displacement Boundary Condition reference
 def createResults(ExtAPI, displacement):
-    solution = ExtAPI.DataModel.GetObjectsByName("Solution")[0]
-    solutionInformation = ExtAPI.DataModel.GetObjectsByName("Solution Information")[0]
+    index = getModelIndex(ExtAPI)
+    solution = index.solution
+    solutionInformation = index.solutionInformation
 
     # Create Equivalent Stress result
     equivalentStress = solution.AddEquivalentStress()
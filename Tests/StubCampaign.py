@@ -0,0 +1,60 @@
+# Synthetic campaign whose Sliding Tests are solved from generated decks by Benchmarks/StubSolver.py instead of LS-DYNA
+# Shared by the tests of the scheduler, the direct deck path, steady state stopping and restarts
+
+import os
+import sys
+import shutil
+
+testsFolderPath = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(testsFolderPath, "..", "Scripts"))
+sys.path.append(os.path.join(testsFolderPath, "..", "Benchmarks"))
+
+import ImportExportUtilities
+import BatchCampaign
+import CompressionCurve
+import PressureSampling
+import DeckGenerator
+import WorkflowState
+import SlidingTestResults
+import ForceOutput
+import SyntheticData
+
+CONFIG_FOLDER_PATH = os.path.join(testsFolderPath, "..", "Config")
+STUB_SOLVER_PATH = os.path.abspath(os.path.join(testsFolderPath, "..", "Benchmarks", "StubSolver.py"))
+
+# Returns the SolverCommand that runs the stub solver with additional options, e.g. "crash=0.5" or "delay=0.05"
+def stubCommand(*options):
+    return " ".join(['"{}"'.format(sys.executable), '"{}"'.format(STUB_SOLVER_PATH), "i={input}", "ncpu={ncpu}"] + list(options))
+
+# Create a campaign with a compression curve, a base deck and a pressure schedule, ready for DeckGenerator.prepareRun
+# Returns the configuration dictionary and the workflow state store of the campaign
+# directory = path to the new campaign directory
+# pressures = target contact pressures of the Sliding Tests in Pa
+# settings = Config file values replacing those of the template Config file
+def createCampaign(directory, pressures, **settings):
+    shutil.copytree(CONFIG_FOLDER_PATH, os.path.join(directory, "Config"))
+    configPath = os.path.join(directory, "Config", "Config.csv")
+    SyntheticData.writeForceSet(directory, 0, 2000)
+    CompressionCurve.saveIndex(os.path.join(directory, "Results"))
+
+    config = ImportExportUtilities.importConfig(configPath)
+    config.update({"SolverCommand": stubCommand(), "ProgressInterval": "0", "RestartDumpCycles": "0", "SteadyStateTolerance": "0", "NumericWorkerCommand": ""})
+    config.update(settings)
+    BatchCampaign.writeConfig(configPath, config, BatchCampaign.readConfigColumns(configPath))
+
+    state = WorkflowState.openState(directory)
+    state.set(TopFaceArea=1e-4)
+    PressureSampling.saveSchedule(directory, pressures)
+    SyntheticData.writeBaseDeck(directory, 40)
+    DeckGenerator.saveBase(directory)
+    return ImportExportUtilities.importConfig(configPath), state
+
+# Returns the onComplete function of Scheduler.runJobs that collects the force data of a finished job into the campaign's result store
+# directory = path to the campaign directory
+# config, state = configuration dictionary and workflow state store returned by createCampaign
+def collector(directory, config, state):
+    def collect(job):
+        displacementDuration = SlidingTestResults.readJob(job.directory)["displacementDuration"]
+        forceDataPath = SlidingTestResults.collect(directory, job.index, displacementDuration, False, job.directory, ForceOutput.getForceSource(config))
+        state.updateSimulation(job.index, status="completed", forceData=forceDataPath)
+    return collect
@@ -0,0 +1,31 @@
+# Tests of the batch campaign list
+# Usage: python -m pytest Tests
+
+import os
+import sys
+import shutil
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "Scripts"))
+
+import BatchCampaign
+
+def writeCampaigns(directory, text):
+    os.mkdir(os.path.join(directory, "Config"))
+    shutil.copyfile(os.path.join(ROOT, "Config", "Config.csv"), os.path.join(directory, "Config", "Config.csv"))
+    with open(os.path.join(directory, "Config", BatchCampaign.CAMPAIGNS_NAME), 'w') as fileObj:
+        fileObj.write(text)
+
+def test_example_campaigns_override_config_settings(tmp_path):
+    with open(os.path.join(ROOT, "Config", "Campaigns.example.csv"), 'r') as fileObj:
+        writeCampaigns(str(tmp_path), fileObj.read())
+    campaigns = BatchCampaign.loadCampaigns(str(tmp_path))
+    assert [campaign["name"] for campaign in campaigns] == ["Fine", "Coarse"]
+    assert campaigns[1]["overrides"] == {"NumberOfSimulations": "3"}
+
+def test_unknown_column_is_rejected(tmp_path):
+    writeCampaigns(str(tmp_path), "Name,Geometry,MeshSize\nFine,,2\n")
+    with pytest.raises(ValueError, match="MeshSize"):
+        BatchCampaign.loadCampaigns(str(tmp_path))
@@ -0,0 +1,54 @@
+# Tests of the compression curve lookup index, without NumPy and, where it is installed, with NumPy
+# Usage: python -m pytest Tests
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Scripts"))
+
+import CompressionCurve
+import ResultStore
+
+# A compression test whose normal force dips and plateaus on its way up
+TIME = [0.0, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0]
+NORMAL = [0.0, -10.0, -8.0, -10.0, -30.0, -30.0, -50.0]
+
+@pytest.fixture(params=["python", "numpy"])
+def implementation(request, monkeypatch):
+    if request.param == "numpy":
+        if CompressionCurve.numpy is None:
+            pytest.skip("NumPy is not installed")
+    else:
+        monkeypatch.setattr(CompressionCurve, "numpy", None)
+    return request.param
+
+def test_index_holds_the_increasing_envelope_of_the_force(implementation):
+    forces, times = CompressionCurve.buildIndex(TIME, NORMAL)
+    assert list(forces) == [0.0, 10.0, 30.0, 50.0]
+    assert list(times) == [0.0, 1.0, 4.0, 6.0]
+
+def test_times_are_interpolated_between_envelope_samples(implementation):
+    index = CompressionCurve.buildIndex(TIME, NORMAL)
+    times = CompressionCurve.lookupTimes(index, [5.0, 10.0, 20.0, 40.0, 50.0])
+    assert times == pytest.approx([0.5, 1.0, 2.5, 5.0, 6.0], rel=1e-12)
+
+def test_targets_outside_of_the_curve_have_no_time(implementation):
+    index = CompressionCurve.buildIndex(TIME[1:], NORMAL[1:])
+    assert CompressionCurve.lookupTimes(index, [5.0, 10.0, 50.0, 60.0]) == [None, 1.0, 6.0, None]
+    assert CompressionCurve.lookupTimes([[], []], [1.0]) == [None]
+
+def test_loading_durations_list_every_target_out_of_range(implementation):
+    index = CompressionCurve.buildIndex(TIME, NORMAL)
+    assert CompressionCurve.loadingDurations(index, [20.0]) == pytest.approx([2.5])
+    with pytest.raises(Exception, match="6.0000e\\+01 N, 7.0000e\\+01 N .*0.0000e\\+00 N to 5.0000e\\+01 N"):
+        CompressionCurve.loadingDurations(index, [20.0, 60.0, 70.0])
+
+def test_index_is_saved_and_loaded_from_the_results(tmp_path, implementation):
+    resultsFolder = str(tmp_path)
+    ResultStore.writeForceData(resultsFolder, "CompressionTest", [TIME, NORMAL, [0.0] * len(TIME)])
+    index = CompressionCurve.loadIndex(resultsFolder)
+    assert os.path.exists(os.path.join(resultsFolder, CompressionCurve.INDEX_NAME))
+    assert [list(column) for column in CompressionCurve.loadIndex(resultsFolder)] == [list(column) for column in index]
+    assert CompressionCurve.lookupTimes(CompressionCurve.loadIndex(resultsFolder), [40.0]) == pytest.approx([5.0])
@@ -0,0 +1,54 @@
+# Tests of the direct Sliding Test decks, with Benchmarks/StubSolver.py standing in for LS-DYNA
+# Usage: python -m pytest Tests
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import StubCampaign
+import Scheduler
+import DeckGenerator
+import ResultStore
+import Keyword
+
+# Returns the keywords of a deck with the given name
+def readKeywords(deckPath, name):
+    with open(deckPath, 'r') as fileObj:
+        return [keyword for keyword in Keyword.parseKeywords(fileObj) if keyword.name == name]
+
+def test_output_intervals_follow_the_sliding_end_time(tmp_path):
+    directory = str(tmp_path)
+    config, state = StubCampaign.createCampaign(directory, [2e6])
+    state.set(SlidingDistance=2e-3)
+    baseEndTime = DeckGenerator.loadBase(directory)["endTime"]
+    runDirectory, deckPath = DeckGenerator.prepareRun(config, state, directory, 0)
+    analysisDuration = DeckGenerator.slidingLoads(config, state, directory, 0)["analysisDuration"]
+    assert analysisDuration > 2 * baseEndTime
+
+    # The base deck writes 100 outputs over the Compression Test, and so does the Sliding Test deck over its own end time
+    ncforc = readKeywords(deckPath, "DATABASE_NCFORC")
+    assert len(ncforc) == 1
+    assert abs(ncforc[0].cards[0].values[0] - analysisDuration / 100) < 1e-9 * analysisDuration
+
+    command = Scheduler.buildSolverCommand(StubCampaign.stubCommand(), deckPath, 1)
+    done = Scheduler.runJobs([Scheduler.Job(0, command, runDirectory)], 1, state, StubCampaign.collector(directory, config, state), 0.01)
+
+    assert done[0].returnCode == 0
+    time = ResultStore.readForceData(os.path.join(directory, "Results"), 0)[0]
+    assert abs(time[-1] - analysisDuration) < 1e-6 * analysisDuration
+    assert abs((time[-1] - time[-2]) - analysisDuration / 100) < 1e-4 * analysisDuration
+
+def test_force_output_request_replaces_that_of_the_base_deck(tmp_path):
+    directory = str(tmp_path)
+    config, state = StubCampaign.createCampaign(directory, [2e6], ForceSource="rcforc", ForceOutputInterval="1e-6")
+    state.set(SlidingDistance=2e-3)
+    with open(DeckGenerator.getBasePath(directory), 'r') as fileObj:
+        text = fileObj.read()
+    with open(DeckGenerator.getBasePath(directory), 'w') as fileObj:
+        fileObj.write(text.replace("*END", "*DATABASE_RCFORC\n1e-5,1,0,1\n*END"))
+    DeckGenerator.saveBase(directory)
+
+    runDirectory, deckPath = DeckGenerator.prepareRun(config, state, directory, 0)
+
+    assert [keyword.cards[0].values[0] for keyword in readKeywords(deckPath, "DATABASE_RCFORC")] == [1e-6]
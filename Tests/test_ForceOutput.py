@@ -0,0 +1,25 @@
+# Tests of the solver force output readers
+# Usage: python -m pytest Tests
+
+import os
+import sys
+import shutil
+
+testsFolderPath = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(testsFolderPath, "..", "Scripts"))
+sys.path.insert(0, os.path.join(testsFolderPath, "..", "Benchmarks"))
+
+import ForceOutput
+import SyntheticData
+
+def test_binout_files_of_an_mpp_run_give_each_time_once(tmp_path):
+    directory = str(tmp_path)
+    SyntheticData.writeBinoutFile(os.path.join(directory, "binout0000"), 50)
+    single = ForceOutput.readBinout(ForceOutput.findBinoutFiles(directory))
+    shutil.copyfile(os.path.join(directory, "binout0000"), os.path.join(directory, "binout0001"))
+
+    merged = ForceOutput.readBinout(ForceOutput.findBinoutFiles(directory))
+
+    assert len(ForceOutput.findBinoutFiles(directory)) == 2
+    assert [list(column) for column in merged] == [list(column) for column in single]
+    assert len(set(merged[0])) == len(merged[0]) == 50
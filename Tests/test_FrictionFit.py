@@ -0,0 +1,89 @@
+# Tests of the fitted, compact friction tables
+# Usage: python -m pytest Tests
+
+import os
+import sys
+import random
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Scripts"))
+
+import FrictionFit
+
+# Noisy COF results of a campaign, falling with pressure
+def noisyPoints(seed=0):
+    generator = random.Random(seed)
+    return [(pressure, 0.9 - 0.08 * pressure / 1e6 + generator.uniform(-0.03, 0.03)) for pressure in [5e5 + 2.5e5 * i for i in range(15)]]
+
+# Returns the values of a function at evenly spaced points of a range
+def sampleFunction(function, start, stop, count=2000):
+    return [function(start + (stop - start) * i / (count - 1.0)) for i in range(count)]
+
+def test_settings_are_matched_regardless_of_case():
+    assert FrictionFit.getFitSettings({}) == ("None", 0.002)
+    assert FrictionFit.getFitSettings({"FrictionFit": " monotone", "FrictionFitTolerance": "0.01"}) == ("Monotone", 0.01)
+    with pytest.raises(Exception, match="Unknown FrictionFit Spline"):
+        FrictionFit.getFitSettings({"FrictionFit": "Spline"})
+
+def test_isotonic_regression_pools_values_out_of_order():
+    assert FrictionFit.isotonic([1.0, 3.0, 2.0, 4.0]) == [1.0, 2.5, 2.5, 4.0]
+    assert FrictionFit.isotonic([4.0, 2.0, 3.0, 1.0], increasing=False) == [4.0, 2.5, 2.5, 1.0]
+
+@pytest.mark.parametrize("seed", range(5))
+def test_monotone_fit_neither_turns_back_nor_overshoots(seed):
+    points = noisyPoints(seed)
+    function, parameters = FrictionFit.fitMonotone(points)
+    knots = [cof for pressure, cof in parameters["knots"]]
+
+    values = sampleFunction(function, points[0][0], points[-1][0])
+
+    assert not parameters["increasing"]
+    assert all(later <= earlier + 1e-12 for earlier, later in zip(values, values[1:]))
+    assert min(knots) - 1e-12 <= min(values) and max(values) <= max(knots) + 1e-12
+    assert [function(pressure) for pressure, cof in parameters["knots"]] == pytest.approx(knots, abs=1e-12)
+
+def test_monotone_slopes_are_zero_at_a_plateau():
+    slopes = FrictionFit.pchipSlopes([0.0, 1.0, 2.0, 3.0], [0.5, 0.5, 0.6, 0.6])
+    assert slopes[1] == 0.0 and slopes[2] == 0.0
+
+def test_power_fit_recovers_a_power_law():
+    points = [(pressure, 3.0 * pressure ** -0.1) for pressure in [5e5, 1e6, 2e6, 4e6]]
+    function, parameters = FrictionFit.fitPower(points)
+    assert parameters["a"] == pytest.approx(3.0, rel=1e-9)
+    assert parameters["b"] == pytest.approx(-0.1, rel=1e-9)
+
+def test_power_fit_rejects_non_positive_data():
+    with pytest.raises(Exception, match="positive pressures and COF"):
+        FrictionFit.fitTable([(5e5, 0.8), (1e6, 0.0), (2e6, 0.6)], "Power", 0.002)
+    with pytest.raises(Exception, match="positive pressures and COF"):
+        FrictionFit.fitTable([(0.0, 0.8), (1e6, 0.7)], "Power", 0.002)
+
+@pytest.mark.parametrize("method", ["Monotone", "Power"])
+@pytest.mark.parametrize("tolerance", [0.0005, 0.002, 0.01])
+def test_resampled_table_stays_within_the_tolerance_of_the_fit(method, tolerance):
+    points = noisyPoints()
+    function = (FrictionFit.fitMonotone if method == "Monotone" else FrictionFit.fitPower)(FrictionFit.uniquePoints(points))[0]
+
+    report = FrictionFit.fitTable(points, method, tolerance)
+
+    table = [tuple(point) for point in report["table"]]
+    assert table[0][0] == points[0][0] and table[-1][0] == points[-1][0]
+    assert report["tablePoints"] == len(table)
+    assert report["tableMaxErrorToFit"] <= tolerance
+    # Between the grid points the chords are checked at, the table stays close to the tolerance
+    grid = [points[0][0] + (points[-1][0] - points[0][0]) * i / 4999.0 for i in range(5000)]
+    assert max(abs(FrictionFit.interpolate(table, x) - function(x)) for x in grid) <= 1.1 * tolerance
+
+def test_looser_tolerance_gives_fewer_rows():
+    counts = [FrictionFit.fitTable(noisyPoints(), "Power", tolerance)["tablePoints"] for tolerance in [0.0001, 0.001, 0.01]]
+    assert counts[0] > counts[1] > counts[2] >= 2
+
+def test_straight_line_is_resampled_to_its_ends():
+    grid = [float(i) for i in range(100)]
+    assert FrictionFit.resample(lambda x: 0.5 - 0.001 * x, grid, 1e-9) == [(0.0, 0.5), (99.0, 0.5 - 0.099)]
+
+def test_equal_pressures_are_averaged_before_fitting():
+    report = FrictionFit.fitTable([(1e6, 0.6), (1e6, 0.8)], "Monotone", 0.002)
+    assert report["table"] == [(1e6, pytest.approx(0.7))]
+    assert report["rawPoints"] == 1
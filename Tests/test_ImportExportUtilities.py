@@ -0,0 +1,106 @@
+# Tests of the force tracker parser, through the streaming XML parser and, where NumPy is installed, the memory-mapped NumPy parser,
+# and of the mesh key
+# Usage: python -m pytest Tests
+
+import os
+import sys
+
+import pytest
+
+testsFolderPath = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(testsFolderPath, "..", "Scripts"))
+sys.path.insert(0, os.path.join(testsFolderPath, "..", "Benchmarks"))
+
+import ImportExportUtilities
+import SyntheticData
+
+NUM_SAMPLES = 2000
+
+# Small chunks, so rows and values are split across chunks
+CHUNK_SIZE = 4096
+
+# Returns the columns of a parser, as lists
+# parser = "xml" or "numpy"
+def parse(parser, path, startTime=None, endTime=None, monkeypatch=None):
+    if parser == "numpy":
+        if ImportExportUtilities.numpy is None or ImportExportUtilities.mmap is None:
+            pytest.skip("NumPy is not installed")
+        columns = ImportExportUtilities.parseColData(path, startTime, endTime, 3, CHUNK_SIZE)
+    else:
+        monkeypatch.setattr(ImportExportUtilities, "numpy", None)
+        columns = ImportExportUtilities.parseForceData(path, startTime, endTime, chunkSize=CHUNK_SIZE)
+    return [list(column) for column in columns]
+
+# Returns the columns written by SyntheticData.writeTrackerFile, at the precision of the file
+def expectedColumns(numSamples):
+    return [[float("{:.6e}".format(value)) for value in column] for column in SyntheticData.forceHistory(numSamples)]
+
+@pytest.fixture(params=["xml", "numpy"])
+def parser(request, monkeypatch):
+    return lambda path, startTime=None, endTime=None: parse(request.param, path, startTime, endTime, monkeypatch)
+
+def test_whole_file_is_parsed(tmp_path, parser):
+    path = str(tmp_path / "file3.nlh")
+    SyntheticData.writeTrackerFile(path, NUM_SAMPLES)
+    assert parser(path) == expectedColumns(NUM_SAMPLES)
+
+def test_rows_outside_the_time_window_are_dropped(tmp_path, parser):
+    path = str(tmp_path / "file3.nlh")
+    SyntheticData.writeTrackerFile(path, NUM_SAMPLES)
+    expected = expectedColumns(NUM_SAMPLES)
+    startTime, endTime = expected[0][300], expected[0][1500]
+
+    columns = parser(path, startTime, endTime)
+
+    assert columns == [column[300:1500] for column in expected]
+
+def test_final_row_is_kept_without_trailing_space(tmp_path, parser):
+    path = str(tmp_path / "file3.nlh")
+    with open(path, 'w') as fileObj:
+        fileObj.write('<?xml version="1.0"?>\n<ROOT>\n<COLDATA>\n 0.0 -1.0 0.5\n 1.0e-5 -2.0 0.75</COLDATA>\n</ROOT>\n')
+    assert parser(path) == [[0.0, 1.0e-5], [-1.0, -2.0], [0.5, 0.75]]
+
+def test_file_cut_short_keeps_its_complete_rows(tmp_path, parser):
+    path = str(tmp_path / "file3.nlh")
+    SyntheticData.writeTrackerFile(path, NUM_SAMPLES)
+    with open(path, 'rb') as fileObj:
+        text = fileObj.read()
+    expected = expectedColumns(NUM_SAMPLES)
+    dataStart = text.index(b"<COLDATA>\n") + len(b"<COLDATA>\n")
+    rowLength = text.index(b"\n", dataStart) + 1 - dataStart
+
+    # Cut inside the first, second and last value of a row, so the cut row is dropped whole
+    for row, offset in [(0, 5), (731, 20), (1999, rowLength - 3)]:
+        with open(path, 'wb') as fileObj:
+            fileObj.write(text[:dataStart + row * rowLength + offset])
+        assert parser(path) == [column[:row] for column in expected]
+
+def test_both_parsers_agree_on_a_file_cut_anywhere(tmp_path, monkeypatch):
+    if ImportExportUtilities.numpy is None or ImportExportUtilities.mmap is None:
+        pytest.skip("NumPy is not installed")
+    path = str(tmp_path / "file3.nlh")
+    SyntheticData.writeTrackerFile(path, 200)
+    with open(path, 'rb') as fileObj:
+        text = fileObj.read()
+
+    for length in range(0, len(text), 97):
+        with open(path, 'wb') as fileObj:
+            fileObj.write(text[:length])
+        withNumpy = parse("numpy", path)
+        assert parse("xml", path, monkeypatch=monkeypatch) == withNumpy
+        monkeypatch.undo()
+
+def test_mesh_key_follows_the_geometry_and_mesh_size(tmp_path):
+    directory = str(tmp_path)
+    os.mkdir(os.path.join(directory, "Geometry"))
+    geometryPath = os.path.join(directory, "Geometry", "Floor.agdb")
+    with open(geometryPath, 'w') as fileObj:
+        fileObj.write("agdb 1")
+    config = {"SizeScale": "1e-4", "MeshSizeFactor": "5"}
+    key = ImportExportUtilities.getMeshKey(config, directory)
+    assert ImportExportUtilities.getMeshKey(dict(config), directory) == key
+
+    assert not ImportExportUtilities.getMeshKey(dict(config, MeshSizeFactor="4"), directory) == key
+    with open(geometryPath, 'w') as fileObj:
+        fileObj.write("agdb 2")
+    assert not ImportExportUtilities.getMeshKey(config, directory) == key
@@ -0,0 +1,25 @@
+# Tests of the LS-DYNA keyword helpers
+# Usage: python -m pytest Tests
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Scripts"))
+
+import Keyword
+
+def test_merge_keeps_each_pressure_once():
+    first = [(1e5, 0.2), (2e5, 0.25), (4e5, 0.3)]
+    second = [(2e5, 0.25), (3e5, 0.28), (4e5, 0.3 + 1e-12)]
+    assert Keyword.mergeFrictionTables(first, second) == [(1e5, 0.2), (2e5, 0.25), (3e5, 0.28), (4e5, 0.3)]
+
+def test_merged_table_round_trips_through_a_deck():
+    points = Keyword.mergeFrictionTables([(1e5, 0.2), (3e5, 0.3)], [(1e5, 0.2), (2e5, 0.25)])
+    keywords = Keyword.parseKeywords(Keyword.formatKeywords(Keyword.frictionTable(points)).splitlines())
+    assert Keyword.readFrictionTable(keywords) == points
+
+def test_merge_rejects_conflicting_cofs():
+    with pytest.raises(ValueError):
+        Keyword.mergeFrictionTables([(1e5, 0.2)], [(1e5, 0.3)])
@@ -0,0 +1,65 @@
+# Tests of the out-of-process numeric worker and its fallback to running jobs in this process
+# Usage: python -m pytest Tests
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import StubCampaign
+import NumericWorker
+import FrictionFit
+
+POINTS = [[5e5, 0.8], [1e6, 0.7], [2e6, 0.6], [4e6, 0.55]]
+
+# Stands in for the worker script: answers the start-up check, then never answers a job
+HANGING_WORKER = """import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(sys.argv[1]))
+import NumericWorker
+inputStream = getattr(sys.stdin, "buffer", sys.stdin)
+outputStream = getattr(sys.stdout, "buffer", sys.stdout)
+NumericWorker.readMessage(inputStream)
+NumericWorker.writeMessage(outputStream, {"result": {"numpy": False}})
+time.sleep(60)
+"""
+
+def quote(path):
+    return '"{}"'.format(path)
+
+def test_worker_runs_a_job_like_this_process():
+    worker = NumericWorker.NumericWorker(quote(sys.executable))
+    try:
+        result = NumericWorker.run(worker, FrictionFit.fitTable, POINTS, "Monotone", 0.002)
+        assert worker.available and worker.process is not None
+    finally:
+        worker.close()
+    assert result == FrictionFit.fitTable(POINTS, "Monotone", 0.002)
+
+def test_worker_that_cannot_start_falls_back_and_reports_why(tmp_path, capsys):
+    worker = NumericWorker.NumericWorker(quote(os.path.join(str(tmp_path), "missing-python")))
+    result = NumericWorker.run(worker, FrictionFit.fitTable, POINTS, "Monotone", 0.002)
+
+    assert result == FrictionFit.fitTable(POINTS, "Monotone", 0.002)
+    assert not worker.available and worker.error
+    assert worker.error in capsys.readouterr().err
+
+def test_hanging_worker_is_stopped_after_the_timeout(tmp_path, capsys):
+    scriptPath = os.path.join(str(tmp_path), "HangingWorker.py")
+    with open(scriptPath, 'w') as fileObj:
+        fileObj.write(HANGING_WORKER)
+    worker = NumericWorker.NumericWorker("{} {}".format(quote(sys.executable), quote(scriptPath)), 0.5)
+    worker.start()
+    process = worker.process
+
+    start = time.time()
+    result = NumericWorker.run(worker, FrictionFit.fitTable, POINTS, "Monotone", 0.002)
+
+    assert time.time() - start < 10
+    assert result == FrictionFit.fitTable(POINTS, "Monotone", 0.002)
+    assert not worker.available and worker.process is None
+    assert process.poll() is not None
+    assert "did not answer" in capsys.readouterr().err
+    assert NumericWorker.run(worker, FrictionFit.fitTable, POINTS, "Monotone", 0.002) == result
@@ -0,0 +1,26 @@
+# Tests of the pressure schedule of the Sliding Tests
+# Usage: python -m pytest Tests
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Scripts"))
+
+import PressureSampling
+
+def test_seedSchedule_keeps_adaptive_pressures_of_the_same_grid(tmp_path):
+    directory = str(tmp_path)
+    os.mkdir(os.path.join(directory, "Logs"))
+    assert PressureSampling.seedSchedule(directory, [1e6, 2e6]) == [1e6, 2e6]
+    assert PressureSampling.appendPressures(directory, [1.5e6]) == [2]
+
+    assert PressureSampling.seedSchedule(directory, [1e6, 2e6]) == [1e6, 2e6, 1.5e6]
+    assert PressureSampling.loadSchedule(directory) == [1e6, 2e6, 1.5e6]
+
+def test_seedSchedule_replaces_the_schedule_of_another_grid(tmp_path):
+    directory = str(tmp_path)
+    os.mkdir(os.path.join(directory, "Logs"))
+    PressureSampling.saveSchedule(directory, [1e6, 2e6, 1.5e6])
+
+    assert PressureSampling.seedSchedule(directory, [1e6, 3e6]) == [1e6, 3e6]
+    assert PressureSampling.loadSchedule(directory) == [1e6, 3e6]
@@ -0,0 +1,29 @@
+# Tests of the solver progress telemetry, with Benchmarks/StubSolver.py standing in for LS-DYNA
+# Usage: python -m pytest Tests
+
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import StubCampaign
+import Scheduler
+import DeckGenerator
+import Progress
+
+def test_progress_is_kept_out_of_the_state_file_while_solving(tmp_path):
+    directory = str(tmp_path)
+    config, state = StubCampaign.createCampaign(directory, [2e6], ProgressInterval="0.01")
+    runDirectory, deckPath = DeckGenerator.prepareRun(config, state, directory, 0)
+    endTime = DeckGenerator.slidingLoads(config, state, directory, 0)["analysisDuration"]
+    monitor = Progress.createMonitor(config, directory, 0, runDirectory, endTime, state)
+    command = Scheduler.buildSolverCommand(StubCampaign.stubCommand("samples=1000", "delay=0.02"), deckPath, 1)
+
+    Scheduler.runJobs([Scheduler.Job(0, command, runDirectory, 1, monitor)], 1, state, None, 0.01)
+
+    with open(state.path, 'r') as fileObj:
+        records = [json.loads(line) for line in fileObj]
+    assert len([record for record in records if "progress" in record.get("values", {})]) == 1
+    assert state.simulation(0)["progress"] == 1.0
+    assert Progress.loadStatuses(directory)["0"]["finished"]
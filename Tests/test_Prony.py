@@ -0,0 +1,29 @@
+# Tests of the Prony series reduction
+# Usage: python -m pytest Tests
+
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Scripts"))
+
+import Prony
+
+def test_reduced_material_keeps_the_bulk_modulus(tmp_path):
+    directory = str(tmp_path)
+    moduli = [0.3, 0.2, 0.2, 0.1]
+    times = [1e-9, 1e-8, 1e-3, 1e-2]
+    config = {"PronyReduction": "True", "PronyTolerance": "0.01", "PronyWindow": ["1e-5", "1e-4"], "RelaxationTimeUnit": "s",
+        "RelativeModuli": [repr(value) for value in moduli], "RelaxationTime": [repr(value) for value in times],
+        "YoungsModulus": "7.33E+06", "PoissonsRatio": "0.4994"}
+
+    reduced = Prony.reduceConfig(config, directory)
+
+    with open(os.path.join(directory, "Results", Prony.REPORT_NAME), 'r') as fileObj:
+        report = json.load(fileObj)
+    assert report["reducedTerms"] < len(times) and report["modulusScale"] < 0.9
+    shearModulus, bulkModulus = Prony.shearAndBulkModuli(7.33e6, 0.4994)
+    reducedShear, reducedBulk = Prony.shearAndBulkModuli(float(reduced["YoungsModulus"]), float(reduced["PoissonsRatio"]))
+    assert abs(reducedShear / shearModulus - report["modulusScale"]) < 1e-12
+    assert abs(reducedBulk / bulkModulus - 1.0) < 1e-9
+    assert report["bulkModulusError"] < 1e-9
@@ -0,0 +1,98 @@
+# Tests of the restart-aware resume of interrupted solves, with Benchmarks/StubSolver.py standing in for LS-DYNA
+# Usage: python -m pytest Tests
+
+import os
+import sys
+import time
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import StubCampaign
+import Scheduler
+import DeckGenerator
+import ResultStore
+import Restart
+
+RESTART_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Scripts", "Restart.py")
+
+def writeDump(path, size, age):
+    with open(path, 'wb') as fileObj:
+        fileObj.write(b"d" * size)
+    os.utime(path, (time.time() - age, time.time() - age))
+
+def test_findDump_passes_over_a_dump_cut_short(tmp_path):
+    directory = str(tmp_path)
+    writeDump(os.path.join(directory, "d3dump09"), 1000, 30)
+    writeDump(os.path.join(directory, "d3dump10"), 1000, 40)
+    assert Restart.findDump(directory) == os.path.join(directory, "d3dump10")
+
+    writeDump(os.path.join(directory, "d3dump11"), 100, 20)
+    assert Restart.findDump(directory) == os.path.join(directory, "d3dump10")
+
+def test_findDump_passes_over_a_dump_still_written(tmp_path):
+    directory = str(tmp_path)
+    writeDump(os.path.join(directory, "d3dump01"), 1000, 30)
+    growing = subprocess.Popen([sys.executable, "-c", "import time\nfor i in range(30):\n    open('d3dump02', 'ab').write(b'd' * 100)\n    time.sleep(0.1)"], cwd=directory)
+    time.sleep(0.2)
+    try:
+        assert Restart.findDump(directory) == os.path.join(directory, "d3dump01")
+    finally:
+        growing.wait()
+
+# Returns the run directory and deck of a Sliding Test of a campaign whose solves write 1000 samples and a restart dump every 100 samples
+def prepareCampaign(directory, *options):
+    config, state = StubCampaign.createCampaign(directory, [2e6], RestartDumpCycles="100", SolverCommand=StubCampaign.stubCommand("samples=1000", *options))
+    runDirectory, deckPath = DeckGenerator.prepareRun(config, state, directory, 0)
+    return config, state, runDirectory, deckPath
+
+# Returns the force history a Sliding Test has without being interrupted
+def uninterruptedForces(directory):
+    config, state, runDirectory, deckPath = prepareCampaign(directory)
+    job = Restart.createJob(0, config, deckPath, runDirectory, 1, state=state)
+    Scheduler.runJobs([job], 1, state, StubCampaign.collector(directory, config, state), 0.01)
+    return [list(column) for column in ResultStore.readForceData(os.path.join(directory, "Results"), 0)]
+
+def test_crashed_solve_is_resumed_by_the_scheduler(tmp_path):
+    directory = str(tmp_path / "Crashed")
+    config, state, runDirectory, deckPath = prepareCampaign(directory, "crash=0.55")
+    job = Restart.createJob(0, config, deckPath, runDirectory, 1, state=state)
+
+    done = Scheduler.runJobs([job], 1, state, StubCampaign.collector(directory, config, state), 0.01)
+
+    assert done[0].returnCode == 0 and done[0].restarts == 1
+    assert Restart.loadRecord(runDirectory)["restarts"][0]["dump"] == "d3dump06"
+    forces = [list(column) for column in ResultStore.readForceData(os.path.join(directory, "Results"), 0)]
+    assert forces == uninterruptedForces(str(tmp_path / "Uninterrupted"))
+
+def test_interrupted_campaign_is_resumed_when_run_again(tmp_path):
+    directory = str(tmp_path / "Interrupted")
+    config, state, runDirectory, deckPath = prepareCampaign(directory)
+
+    # The solve dies with the journal, so nothing resumes it
+    Restart.startRun(runDirectory, deckPath)
+    command = Scheduler.buildSolverCommand(StubCampaign.stubCommand("samples=1000", "crash=0.55"), deckPath, 1)
+    Scheduler.runJobs([Scheduler.Job(0, command, runDirectory)], 1, state, None, 0.01)
+    assert [index for index, record in Restart.findInterrupted(directory)] == [0]
+    assert Restart.findChanged(directory) == []
+
+    output = subprocess.check_output([sys.executable, RESTART_PATH, directory, "--resume"]).decode("utf-8")
+
+    assert "dump=d3dump06" in output
+    assert state.completedIndices() == set([0])
+    assert Restart.findInterrupted(directory) == []
+    forces = [list(column) for column in ResultStore.readForceData(os.path.join(directory, "Results"), 0)]
+    assert forces == uninterruptedForces(str(tmp_path / "Uninterrupted"))
+
+def test_changed_deck_is_not_resumed(tmp_path):
+    directory = str(tmp_path)
+    config, state, runDirectory, deckPath = prepareCampaign(directory)
+    Restart.startRun(runDirectory, deckPath)
+    command = Scheduler.buildSolverCommand(StubCampaign.stubCommand("samples=1000", "crash=0.55"), deckPath, 1)
+    Scheduler.runJobs([Scheduler.Job(0, command, runDirectory)], 1, state, None, 0.01)
+
+    with open(deckPath, 'a') as fileObj:
+        fileObj.write("$ edited\n")
+
+    assert Restart.findInterrupted(directory) == []
+    assert [index for index, record in Restart.findChanged(directory)] == [0]
@@ -0,0 +1,124 @@
+# Tests of the binary result store
+# Usage: python -m pytest Tests
+
+import os
+import sys
+import time
+import array
+import tracemalloc
+import socket
+import threading
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Scripts"))
+
+import ResultStore
+import ForceStatistics
+
+def test_replaceFile_overwrites_without_leaving_temporary_file(tmp_path):
+    path = str(tmp_path / "file.json")
+    ResultStore.replaceFile(path, "old")
+    ResultStore.replaceFile(path, "new")
+    with open(path, 'r') as fileObj:
+        assert fileObj.read() == "new"
+    assert os.listdir(str(tmp_path)) == ["file.json"]
+
+def test_concurrent_replaceFile_calls_do_not_share_a_temporary_file(tmp_path):
+    path = str(tmp_path / "file.json")
+    errors = []
+    def write(text):
+        try:
+            for i in range(200):
+                ResultStore.replaceFile(path, text)
+        except (IOError, OSError) as error:
+            errors.append(error)
+    threads = [threading.Thread(target=write, args=(str(i) * 1000,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert os.listdir(str(tmp_path)) == ["file.json"]
+
+def test_readers_never_see_a_partly_written_run(tmp_path):
+    path = str(tmp_path / "Force_0.npy")
+    numSamples = 200000
+    columns = [array.array('d', [float(i)]) * numSamples for i in range(3)]
+    ResultStore.writeNpy(path, columns)
+    done = threading.Event()
+    def write():
+        for i in range(20):
+            ResultStore.writeNpy(path, columns)
+        done.set()
+    thread = threading.Thread(target=write)
+    thread.start()
+    reads = 0
+    while not done.is_set() or reads == 0:
+        read = ResultStore.readNpy(path)
+        assert [len(column) for column in read] == [numSamples] * 3
+        assert read[2][-1] == 2.0
+        reads += 1
+    thread.join()
+    assert os.listdir(str(tmp_path)) == ["Force_0.npy"]
+
+def test_concurrent_writes_keep_every_manifest_entry(tmp_path):
+    resultsFolder = str(tmp_path / "Results")
+    os.mkdir(resultsFolder)
+    threads = [threading.Thread(target=ResultStore.writeForceData, args=(resultsFolder, i, [[0.0, 1.0], [2.0, 3.0], [4.0, 5.0]])) for i in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert ResultStore.listSlidingRuns(resultsFolder) == [str(i) for i in range(16)]
+    assert [list(column) for column in ResultStore.readForceData(resultsFolder, 7)] == [[0.0, 1.0], [2.0, 3.0], [4.0, 5.0]]
+
+def writeLock(path, pid, age):
+    with open(path, 'w') as fileObj:
+        fileObj.write("{} {}".format(socket.gethostname(), pid))
+    os.utime(path, (time.time() - age, time.time() - age))
+
+def test_lock_of_an_exited_process_is_broken(tmp_path):
+    path = str(tmp_path / "file.lock")
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    writeLock(path, process.pid, 0)
+    with ResultStore.FileLock(path, timeout=60.0):
+        with open(path, 'r') as fileObj:
+            assert fileObj.read() == "{} {}".format(socket.gethostname(), os.getpid())
+    assert not os.path.exists(path)
+
+def test_old_lock_of_a_running_process_is_kept(tmp_path):
+    path = str(tmp_path / "file.lock")
+    writeLock(path, os.getpid(), 10)
+    acquired = threading.Event()
+    def acquire():
+        with ResultStore.FileLock(path, timeout=0.1):
+            acquired.set()
+    thread = threading.Thread(target=acquire)
+    thread.start()
+    assert not acquired.wait(0.5)
+    os.remove(path)
+    thread.join(5)
+    assert acquired.is_set()
+
+def test_streaming_summary_matches_and_does_not_load_the_run(tmp_path):
+    resultsFolder = str(tmp_path)
+    numSamples = 400000
+    time = array.array('d', (1e-6 * i for i in range(numSamples)))
+    normal = array.array('d', (-100.0 - (i % 7) for i in range(numSamples)))
+    shear = array.array('d', (25.0 + (i % 5) for i in range(numSamples)))
+    ResultStore.writeForceData(resultsFolder, 0, [time, normal, shear])
+    del time, normal, shear
+
+    opened = ResultStore.openForceData(resultsFolder, 0)
+    assert len(opened[0]) == numSamples and opened[0][-1] == 1e-6 * (numSamples - 1)
+    assert list(opened[2][5:8]) == [25.0, 26.0, 27.0]
+
+    tracemalloc.start()
+    try:
+        summary = ForceStatistics.summarize(opened)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert summary == ForceStatistics.summarize(ResultStore.readForceData(resultsFolder, 0))
+    assert peak < 3 * 8 * numSamples / 2
@@ -0,0 +1,36 @@
+# Tests of the results database
+# Usage: python -m pytest Tests
+
+import os
+import sys
+import shutil
+
+testsFolderPath = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(testsFolderPath, "..", "Scripts"))
+sys.path.insert(0, os.path.join(testsFolderPath, "..", "Benchmarks"))
+
+import ImportExportUtilities
+import BatchCampaign
+import ResultsDatabase
+import SyntheticData
+
+def test_rerun_with_other_inputs_keeps_the_earlier_record(tmp_path):
+    directory = str(tmp_path / "Campaign")
+    shutil.copytree(os.path.join(testsFolderPath, "..", "Config"), os.path.join(directory, "Config"))
+    os.makedirs(os.path.join(directory, "Geometry"))
+    with open(os.path.join(directory, "Geometry", "Floor.agdb"), 'w') as fileObj:
+        fileObj.write("agdb")
+    SyntheticData.writeForceSet(directory, 3, 500)
+    database = ResultsDatabase.ResultsDatabase(str(tmp_path / "Database"))
+
+    first = database.ingest(directory)
+    assert database.ingest(directory) == first
+
+    configPath = os.path.join(directory, "Config", "Config.csv")
+    config = ImportExportUtilities.importConfig(configPath)
+    config["MovementSpeed"] = "1.0"
+    BatchCampaign.writeConfig(configPath, config, BatchCampaign.readConfigColumns(configPath))
+    second = database.ingest(directory)
+
+    assert not second == first
+    assert sorted(entry["speed"] for identifier, entry in database.find()) == [0.5, 1.0]
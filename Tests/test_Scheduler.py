@@ -0,0 +1,51 @@
+# Tests of the solver job scheduler, with Benchmarks/StubSolver.py standing in for LS-DYNA
+# Usage: python -m pytest Tests
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import StubCampaign
+import Scheduler
+import DeckGenerator
+import ResultStore
+import PressureSampling
+
+# Returns the scheduler jobs of the Sliding Tests of a campaign
+def createJobs(directory, config, state, command):
+    jobs = []
+    for i in range(len(PressureSampling.loadSchedule(directory))):
+        runDirectory, deckPath = DeckGenerator.prepareRun(config, state, directory, i)
+        jobs.append(Scheduler.Job(i, Scheduler.buildSolverCommand(command, deckPath, 1), runDirectory))
+    return jobs
+
+def test_runJobs_solves_and_collects_every_job(tmp_path):
+    directory = str(tmp_path)
+    config, state = StubCampaign.createCampaign(directory, [1e6, 2e6, 3e6, 4e6])
+    jobs = createJobs(directory, config, state, StubCampaign.stubCommand("samples=400", "delay=0.02"))
+
+    done = Scheduler.runJobs(jobs, 2, state, StubCampaign.collector(directory, config, state), 0.01)
+
+    assert sorted(job.index for job in done) == [0, 1, 2, 3]
+    assert all(job.returnCode == 0 for job in done)
+    assert state.completedIndices() == set([0, 1, 2, 3])
+    assert ResultStore.listSlidingRuns(os.path.join(directory, "Results")) == ["0", "1", "2", "3"]
+
+    # Never more than two solves at the same time, and the two workers did overlap
+    events = sorted([(job.startTime, 1) for job in done] + [(job.endTime, -1) for job in done])
+    running = [sum(change for time, change in events[:k + 1]) for k in range(len(events))]
+    assert max(running) == 2
+
+def test_failed_jobs_are_recorded_and_not_collected(tmp_path):
+    directory = str(tmp_path)
+    config, state = StubCampaign.createCampaign(directory, [1e6, 2e6])
+    jobs = createJobs(directory, config, state, StubCampaign.stubCommand("crash=0.5"))
+    jobs[1].command = ["no-such-solver-executable"]
+    collected = []
+
+    done = Scheduler.runJobs(jobs, 2, state, collected.append, 0.01)
+
+    assert dict((job.index, job.returnCode) for job in done) == {0: 1, 1: -1}
+    assert collected == []
+    assert [state.simulation(i)["status"] for i in range(2)] == ["failed", "failed"]
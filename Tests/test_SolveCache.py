@@ -0,0 +1,51 @@
+# Tests of the solve cache keys and entries
+# Usage: python -m pytest Tests
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Scripts"))
+
+import SolveCache
+import ResultStore
+import Topography
+
+def writeFile(path, text):
+    if not os.path.exists(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    with open(path, 'w') as fileObj:
+        fileObj.write(text)
+
+def test_key_changes_with_the_geometry_export(tmp_path):
+    directory = str(tmp_path)
+    writeFile(os.path.join(directory, "Geometry", "Floor.agdb"), "agdb")
+    exportPath = os.path.join(directory, Topography.EXPORT_FOLDER, "Floor.sat")
+    writeFile(exportPath, "sat 1")
+    key = SolveCache.computeKey(SolveCache.campaignInputs({}, directory), "CompressionTest")
+    assert SolveCache.computeKey(SolveCache.campaignInputs({}, directory), "CompressionTest") == key
+
+    writeFile(exportPath, "sat 2")
+    assert not SolveCache.computeKey(SolveCache.campaignInputs({}, directory), "CompressionTest") == key
+
+def test_export_of_another_geometry_is_not_used(tmp_path):
+    directory = str(tmp_path)
+    writeFile(os.path.join(directory, "Geometry", "Floor.agdb"), "agdb")
+    assert Topography.findExportPath(directory, os.path.join(directory, "Geometry", "Floor.agdb")) is None
+    writeFile(os.path.join(directory, Topography.EXPORT_FOLDER, "Other.sat"), "sat")
+    with pytest.raises(Exception, match="Floor.sat"):
+        Topography.findExportPath(directory, os.path.join(directory, "Geometry", "Floor.agdb"))
+
+def test_restored_run_keeps_its_steady_flag(tmp_path):
+    cache = SolveCache.SolveCache(str(tmp_path / "Cache"), 1e9)
+    resultsFolder = str(tmp_path / "Results")
+    ResultStore.writeForceData(resultsFolder, 0, [[0.0, 1.0], [-2.0, -2.0], [1.0, 1.0]], steady=True)
+    ResultStore.writeForceData(resultsFolder, 1, [[0.0, 1.0], [-2.0, -2.0], [1.0, 1.0]])
+    cache.store("steady", resultsFolder, 0, {"measurements": {}})
+    cache.store("unsteady", resultsFolder, 1)
+
+    assert cache.restore("steady", resultsFolder, 2)["measurements"] == {}
+    cache.restore("unsteady", resultsFolder, 3)
+    assert ResultStore.isSteadyRun(resultsFolder, 2)
+    assert not ResultStore.isSteadyRun(resultsFolder, 3)
@@ -0,0 +1,46 @@
+# Tests of stopping Sliding Tests early at steady state, with Benchmarks/StubSolver.py standing in for LS-DYNA
+# Usage: python -m pytest Tests
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import StubCampaign
+import Scheduler
+import DeckGenerator
+import SlidingTestResults
+import SteadyState
+import ResultStore
+import ImportExportUtilities
+import PostProcessing
+
+def test_stopped_run_keeps_only_its_steady_window(tmp_path):
+    directory = str(tmp_path)
+    config, state = StubCampaign.createCampaign(directory, [2e6])
+    # Slide for as long as the loading step, so the stub solver's shear force settles well before the end
+    state.set(SlidingDistance=4e-3)
+    runDirectory, deckPath = DeckGenerator.prepareRun(config, state, directory, 0)
+    job = SlidingTestResults.readJob(runDirectory)
+    window = (job["endTime"] - job["displacementDuration"]) / 10.0
+    monitor = SteadyState.SteadyStateMonitor(runDirectory, job["displacementDuration"], window, 0.01)
+    command = Scheduler.buildSolverCommand(StubCampaign.stubCommand("samples=2000", "delay=0.05"), deckPath, 1)
+
+    done = Scheduler.runJobs([Scheduler.Job(0, command, runDirectory, 1, monitor)], 1, state, StubCampaign.collector(directory, config, state), 0.01)
+
+    assert done[0].returnCode == 0
+    windowStart, windowEnd = SteadyState.loadSteadyWindow(runDirectory)
+    written = ImportExportUtilities.parseForceData(os.path.join(runDirectory, "file3.nlh"))[0]
+    assert written[-1] > windowEnd and written[-1] < job["endTime"]
+
+    time = ResultStore.readForceData(os.path.join(directory, "Results"), 0)[0]
+    assert time[0] == windowStart
+    assert time[len(time) - 1] == windowEnd
+    assert len(time) == len([sampleTime for sampleTime in written if windowStart <= sampleTime <= windowEnd])
+
+    # The stored window is steady as a whole; the post-processing does not search it again with its own tolerance
+    assert ResultStore.isSteadyRun(os.path.join(directory, "Results"), 0)
+    config["SteadyCofTolerance"] = "1e-9"
+    summary = PostProcessing.summarizeRuns(directory, config)[0][1]
+    assert summary["steadySamples"] == len(time)
+    assert summary["steadyStart"] == windowStart
@@ -0,0 +1,94 @@
+# Tests of the geometry measurements of the checked-in 1e-4 geometry, from its .sat export and the named selections of its SpaceClaim document,
+# without NumPy and, where it is installed, with NumPy
+# Usage: python -m pytest Tests
+
+import os
+import sys
+import json
+import shutil
+
+import pytest
+
+testsFolderPath = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(testsFolderPath, "..", "Scripts"))
+
+import Topography
+
+GEOMETRY_FOLDER = os.path.join(testsFolderPath, "..", "Geometry")
+EXPORT_PATH = os.path.join(testsFolderPath, "..", Topography.EXPORT_FOLDER, "1e-4.sat")
+DOCUMENT_PATH = os.path.join(GEOMETRY_FOLDER, "1e-4.scdoc")
+
+# Faces of the named selections of the document, by the name attributes of the .sat export
+NAMED_FACES = {"Shoe_Top": "30:121", "Shoe_Contact": "30:124", "Shoe_Side": "30:109", "Floor_Side": "33:155", "Floor_Contact": "33:94"}
+
+@pytest.fixture(params=["python", "numpy"])
+def implementation(request, monkeypatch):
+    if request.param == "numpy":
+        if Topography.numpy is None:
+            pytest.skip("NumPy is not installed")
+    else:
+        monkeypatch.setattr(Topography, "numpy", None)
+    return request.param
+
+# Returns a campaign directory holding the 1e-4 geometry, its .sat export and, optionally, its SpaceClaim document
+def campaignDirectory(tmp_path, withDocument=True):
+    directory = str(tmp_path)
+    os.makedirs(os.path.join(directory, Topography.EXPORT_FOLDER))
+    shutil.copyfile(os.path.join(GEOMETRY_FOLDER, "1e-4.agdb"), os.path.join(directory, "Geometry", "1e-4.agdb"))
+    shutil.copyfile(EXPORT_PATH, os.path.join(directory, Topography.EXPORT_FOLDER, "1e-4.sat"))
+    if withDocument:
+        shutil.copyfile(DOCUMENT_PATH, os.path.join(directory, "Geometry", "1e-4.scdoc"))
+    return directory
+
+def test_named_selections_are_read_from_the_document():
+    selections = Topography.readNamedSelections(DOCUMENT_PATH)
+    assert sorted(selections) == sorted(Topography.FACE_NAMES + ["Shoe", "Floor"])
+    assert all(len(objects) == 1 for objects in selections.values())
+    assert selections["Shoe_Contact"][0] == (selections["Shoe"][0][0], "124")
+
+def test_named_selection_faces_are_the_faces_found_by_position():
+    model = Topography.SatModel(EXPORT_PATH)
+    bodyFaces = dict((body, model.faces(model.body(body))) for body in ["Shoe", "Floor"])
+    faces = Topography.namedFaces(model, bodyFaces, DOCUMENT_PATH)
+    assert dict((name, model.names[face]) for name, face in faces.items()) == NAMED_FACES
+    assert Topography.positionFaces(model, bodyFaces) == faces
+
+# The shoe is 1.4 mm x 2.1 mm, from x = 0.35 mm to 1.75 mm, its contact face 0.2 mm above the floor datum y = 0; the floor ends at x = 7 mm
+# and its topography peaks just below the datum, so the gap to it is a little over 0.2 mm
+def test_1e4_geometry_is_measured_within_its_tolerances(implementation):
+    report = Topography.measureGeometry(EXPORT_PATH, documentPath=DOCUMENT_PATH)
+    measurements = report["measurements"]
+    assert report["faces"] == NAMED_FACES
+    assert measurements["TopFaceArea"] == pytest.approx(1.4e-3 * 2.1e-3, rel=1e-9)
+    assert measurements["SlidingDistance"] == pytest.approx(7e-3 - 1.75e-3, rel=1e-9)
+    assert measurements["DistanceToContact"] == pytest.approx(2.0016e-4, abs=1e-7)
+
+    # Denser sampling of the topography moves the gap by less than 1e-7 m
+    finer = Topography.measureGeometry(EXPORT_PATH, 8, DOCUMENT_PATH)["measurements"]["DistanceToContact"]
+    assert abs(finer - measurements["DistanceToContact"]) < 1e-7
+
+def test_campaign_keeps_the_default_measurements_unless_measuring_is_set(tmp_path):
+    directory = campaignDirectory(tmp_path)
+    assert Topography.measureCampaign({}, directory) == Topography.DEFAULT_MEASUREMENTS
+    assert Topography.measureCampaign({"MeasureGeometry": "False"}, directory) == Topography.DEFAULT_MEASUREMENTS
+
+    # Without measuring, no .sat export is needed
+    shutil.rmtree(os.path.join(directory, Topography.EXPORT_FOLDER))
+    assert Topography.measureCampaign({}, directory) == Topography.DEFAULT_MEASUREMENTS
+
+def test_campaign_measures_the_faces_of_its_document(tmp_path):
+    directory = campaignDirectory(tmp_path)
+    measurements = Topography.measureCampaign({"MeasureGeometry": "True"}, directory)
+    assert measurements["SlidingDistance"] == pytest.approx(5.25e-3, rel=1e-9)
+    with open(os.path.join(directory, "Results", Topography.REPORT_NAME), 'r') as fileObj:
+        report = json.load(fileObj)
+    assert report["document"] == os.path.join(directory, "Geometry", "1e-4.scdoc")
+    assert report["faces"] == NAMED_FACES
+
+def test_campaign_without_a_document_finds_its_faces_by_position(tmp_path):
+    directory = campaignDirectory(tmp_path, withDocument=False)
+    Topography.measureCampaign({"MeasureGeometry": "True"}, directory)
+    with open(os.path.join(directory, "Results", Topography.REPORT_NAME), 'r') as fileObj:
+        report = json.load(fileObj)
+    assert report["document"] is None
+    assert report["faces"] == NAMED_FACES
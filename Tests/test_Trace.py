@@ -0,0 +1,83 @@
+# Tests of the campaign timing traces
+# Usage: python -m pytest Tests
+
+import os
+import sys
+import json
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Scripts"))
+
+import Trace
+
+def test_spans_and_phases_are_recorded_once(tmp_path):
+    directory = str(tmp_path)
+    tracer = Trace.openTracer(directory, "Workbench")
+    with tracer.span("solve", "journal", index=0) as span:
+        pass
+    span.end()
+    tracer.phase("mesh", "mechanical")
+    tracer.phase("solve", "mechanical").end(returnCode=0)
+    tracer.endPhase()
+
+    events = Trace.loadEvents(directory)
+    assert events[0] == {"name": "process_name", "ph": "M", "pid": os.getpid(), "tid": 0, "args": {"name": "Workbench"}}
+    spans = [(event["cat"], event["name"], event["args"]) for event in events if event["ph"] == "X"]
+    assert spans == [("journal", "solve", {"index": 0}), ("mechanical", "mesh", {}), ("mechanical", "solve", {"returnCode": 0})]
+
+def test_failed_span_records_its_error(tmp_path):
+    tracer = Trace.openTracer(str(tmp_path), "Mechanical")
+    with pytest.raises(ValueError):
+        with tracer.span("solve"):
+            raise ValueError("no solution")
+    assert Trace.loadEvents(str(tmp_path))[-1]["args"] == {"error": "ValueError"}
+
+def test_summary_totals_each_span_name(tmp_path):
+    tracer = Trace.openTracer(str(tmp_path), "Workbench")
+    tracer.record("campaign", 100.0, 110.0, "journal")
+    tracer.record("solve", 101.0, 104.0, "solver", threadId=1)
+    tracer.record("solve", 102.0, 107.0, "solver", threadId=2)
+    tracer.record("post", 108.0, 109.5, "journal")
+
+    wallTime, totals = Trace.summarize(Trace.loadEvents(str(tmp_path)))
+
+    assert wallTime == pytest.approx(10.0)
+    assert [total[:3] for total in totals] == [["journal", "campaign", 1], ["solver", "solve", 2], ["journal", "post", 1]]
+    assert totals[1][3:] == pytest.approx([8.0, 5.0])
+    assert Trace.summarize([]) == (0.0, [])
+
+def test_concurrent_spans_keep_every_line_and_skip_a_cut_line(tmp_path):
+    directory = str(tmp_path)
+    tracer = Trace.openTracer(directory, "Workbench")
+    def record(index):
+        for i in range(50):
+            tracer.record("job", 0.0, 1.0, "solver", args=index)
+    threads = [threading.Thread(target=record, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with open(tracer.path, 'a') as fileObj:
+        fileObj.write('{"name": "cut')
+
+    assert len([event for event in Trace.loadEvents(directory) if event["ph"] == "X"]) == 400
+
+def test_report_and_chrome_trace_are_written(tmp_path):
+    directory = str(tmp_path)
+    tracer = Trace.openTracer(directory, "Workbench")
+    tracer.record("campaign", 0.0, 4.0, "journal")
+    tracer.record("solve", 1.0, 2.0, "solver")
+
+    reportPath = Trace.writeReport(directory)
+
+    with open(reportPath, 'r') as fileObj:
+        report = fileObj.read()
+    assert report.startswith("Wall-clock time: 4.000 s")
+    assert "25.0%" in report
+    with open(os.path.join(directory, "Logs", Trace.CHROME_TRACE_NAME), 'r') as fileObj:
+        assert len(json.load(fileObj)["traceEvents"]) == 3
+
+    tracer.reset()
+    assert Trace.loadEvents(directory) == [{"name": "process_name", "ph": "M", "pid": os.getpid(), "tid": 0, "args": {"name": "Workbench"}}]
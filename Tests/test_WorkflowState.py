@@ -0,0 +1,31 @@
+# Tests of the campaign state store
+# Usage: python -m pytest Tests
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Scripts"))
+
+import WorkflowState
+
+def test_compaction_keeps_state_and_other_stores_follow_it(tmp_path):
+    writer = WorkflowState.openState(str(tmp_path))
+    reader = WorkflowState.openState(str(tmp_path))
+    for index in range(20):
+        writer.set(CurrentSimulationIndex=index)
+        writer.updateSimulation(index % 4, status="running", progress=index)
+    assert reader.get("CurrentSimulationIndex") == 19
+    size = os.path.getsize(writer.path)
+
+    writer.compact()
+    assert os.path.getsize(writer.path) < size
+    writer.updateSimulation(2, status="completed")
+    assert reader.simulation(2) == {"status": "completed", "progress": 18}
+    assert reader.get("CurrentSimulationIndex") == 19
+    assert WorkflowState.openState(str(tmp_path)).simulations() == writer.simulations()
+
+    # A store that reads the compacted file again starts over at its first line instead of its old offset
+    reader.set(CurrentSimulationIndex=20)
+    writer.compact()
+    assert writer.get("CurrentSimulationIndex") == 20
+    assert reader.simulation(2)["status"] == "completed"
@@ -0,0 +1,58 @@
+# Tests of the ExtAPI round trips of the ls_dyna model setup, on the recording fake ExtAPI of the setup benchmark
+# Usage: python -m pytest Tests
+
+import os
+import sys
+import json
+
+import pytest
+
+testsFolderPath = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(testsFolderPath, "..", "Scripts"))
+sys.path.insert(0, os.path.join(testsFolderPath, "..", "Benchmarks"))
+
+# Installs the fake Ansys modules before ls_dyna is imported
+import SetupBenchmark
+import FakeExtAPI
+import ls_dyna
+
+# Returns the round trips of each setup step, by step name
+# numNamedSelections = number of Named Selections in the fake model
+def setupSteps(numNamedSelections):
+    steps = {}
+    for name, count in SetupBenchmark.measure(numNamedSelections)[2]:
+        steps[name] = steps.get(name, 0) + count
+    return steps
+
+def test_setup_round_trips_do_not_exceed_the_baseline():
+    with open(os.path.join(testsFolderPath, "..", "Benchmarks", "Baseline.json"), 'r') as fileObj:
+        baseline = json.load(fileObj)
+    for size in [7, 100, 1000]:
+        assert SetupBenchmark.measure(size)[0] <= baseline["results"]["mechanicalSetup/{}".format(size)]["roundTrips"]
+
+def test_named_selections_are_scanned_once():
+    small, large = setupSteps(7), setupSteps(1000)
+    # One round trip per Named Selection for the single scan of the model tree, whatever the number of names looked up
+    assert large["getNamedSelections"] - small["getNamedSelections"] == 1000 - 7
+    for name in small:
+        if not name == "getNamedSelections":
+            assert large[name] == small[name]
+    assert small["getNamedSelections"] + small["getBodies"] < SetupBenchmark.runLegacyLookups(FakeExtAPI.createExtAPI(SetupBenchmark.recorder, 7))
+
+def test_mesh_builds_selections_without_changing_the_current_selection():
+    recorder = SetupBenchmark.recorder
+    ExtAPI = FakeExtAPI.createExtAPI(recorder)
+    ls_dyna.getReferences(ExtAPI)
+    namedSelections = ls_dyna.getNamedSelections(ExtAPI, FakeExtAPI.WORKFLOW_NAMED_SELECTIONS)
+    recorder.reset()
+
+    ls_dyna.mesh(ExtAPI, 5e-4, namedSelections["Floor_Contact"], namedSelections["Shoe_Contact"], namedSelections["Floor"], namedSelections["Shoe"])
+
+    calls = dict((path, count) for (kind, path), count in recorder.counts.items() if kind == "call" and path.startswith("SelectionManager."))
+    assert calls == {"SelectionManager.CreateSelectionInfo": 2}
+
+def test_analysis_of_an_unknown_system_raises():
+    ExtAPI = FakeExtAPI.createExtAPI(SetupBenchmark.recorder, systemCaption="Sliding Test 1")
+    assert ls_dyna.ModelIndex(ExtAPI, "Sliding Test 1").analysis is ExtAPI.DataModel.AnalysisList[0]
+    with pytest.raises(Exception, match="Sliding Test 2"):
+        ls_dyna.ModelIndex(ExtAPI, "Sliding Test 2")